@@ -2,12 +2,16 @@
 Vercel用エントリーポイント
 FastAPIアプリケーションをVercelのサーバーレス関数として動作させる
 """
+import os
 import sys
 from pathlib import Path
 
 # プロジェクトのルートパスをsys.pathに追加
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+# コールドスタート短縮のため、ルーターは初回リクエスト時に読み込む
+os.environ.setdefault("LAZY_ROUTERS", "true")
+
 from app.main import app
 
 # Vercelのサーバーレス関数として動作
@@ -5,7 +5,9 @@ from datetime import datetime
 import json
 import uuid
 from app.core.supabase import get_supabase_client
-from supabase import Client
+from app.core.security import require_admin
+from app.schemas.application import ApplicationBulkReview, ApplicationBulkReviewResponse, DogInfo
+from app.services.application_service import ApplicationService, APPLICATION_COLUMNS, APPLICATION_STATUS_COLUMNS
 
 router = APIRouter(prefix="/api/v1/applications", tags=["申請管理"])
 
@@ -26,15 +28,21 @@ async def create_application(
     dogs: Optional[str] = Form(None),
     vaccination_certificates: Optional[List[UploadFile]] = File(None),
     residence_proof: Optional[UploadFile] = File(None),
-    supabase: Client = Depends(get_supabase_client)
+    supabase=Depends(get_supabase_client)
 ):
     """利用申請を作成"""
     try:
         print(f"Received data - name: {name}, email: {email}, phone: {phone}, address: {address}")
         print(f"Files - vaccination_certificates: {vaccination_certificates}, residence_proof: {residence_proof}")
         
-        # 犬情報をパース
-        dogs_data = json.loads(dogs) if isinstance(dogs, str) and dogs else []
+        # 犬情報をパース（application_dogs にない項目は保存しない）
+        try:
+            dogs_data = [DogInfo(**dog) for dog in (json.loads(dogs) if isinstance(dogs, str) and dogs else [])]
+        except (ValueError, TypeError) as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"犬情報の形式が正しくありません: {str(e)}"
+            )
         
         # 申請IDを生成
         application_id = str(uuid.uuid4())
@@ -54,9 +62,8 @@ async def create_application(
         result = supabase.table("applications").insert(application_data).execute()
         
         if result.data:
-            # 犬情報の保存は一時的にスキップ（テーブル構造の不一致のため）
-            # TODO: dogsテーブルのスキーマを確認して修正
-            pass
+            # 犬情報（承認時に provision_account が dogs へ写す）
+            await ApplicationService.save_application_dogs(supabase, application_id, dogs_data)
             
             return {
                 "id": application_id,
@@ -69,6 +76,8 @@ async def create_application(
                 detail="申請の作成に失敗しました"
             )
             
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error creating application: {e}")
         raise HTTPException(
@@ -77,11 +86,36 @@ async def create_application(
         )
 
 
+@router.post("/admin/bulk-review", response_model=ApplicationBulkReviewResponse)
+async def bulk_review_applications(
+    review: ApplicationBulkReview,
+    admin_user: Dict[str, Any] = Depends(require_admin)
+):
+    """
+    承認待ちの申請を一括審査（管理者用）
+    
+    - **application_ids**: 申請IDリスト（最大500件）
+    - **status**: 新しいステータス（approved/rejected）
+    - **admin_memo**: 管理者メモ（オプション）
+    - **rejected_reason**: 却下理由（却下時は必須）
+    
+    アカウント作成と通知メールはバックグラウンドで行われ、申請ごとの結果を返します
+    管理者権限が必要です
+    """
+    return await ApplicationService.bulk_review_applications(
+        review.application_ids,
+        review.status,
+        admin_user["id"],
+        review.admin_memo,
+        review.rejected_reason
+    )
+
+
 @router.get("/{application_id}")
-async def get_application(application_id: str, supabase: Client = Depends(get_supabase_client)):
+async def get_application(application_id: str, supabase=Depends(get_supabase_client)):
     """申請詳細を取得"""
     try:
-        result = supabase.table("applications").select("*").eq("id", application_id).execute()
+        result = supabase.table("applications").select(APPLICATION_COLUMNS).eq("id", application_id).execute()
         
         if result.data and len(result.data) > 0:
             application = result.data[0]
@@ -106,10 +140,10 @@ async def get_application(application_id: str, supabase: Client = Depends(get_su
 
 
 @router.get("/status/{email}")
-async def check_application_status(email: str, supabase: Client = Depends(get_supabase_client)):
+async def check_application_status(email: str, supabase=Depends(get_supabase_client)):
     """申請状況を確認（メールアドレスで検索）"""
     try:
-        result = supabase.table("applications").select("*").eq("email", email).execute()
+        result = supabase.table("applications").select(APPLICATION_STATUS_COLUMNS).eq("email", email).execute()
         return result.data if result.data else []
     except Exception as e:
         print(f"Error checking status: {e}")
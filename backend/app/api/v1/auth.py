@@ -67,4 +67,4 @@ async def get_current_user_info(current_user: Dict[str, Any] = Depends(get_curre
     
     認証が必要です
     """
-    return current_user
\ No newline at end of file
+    return await AuthService.get_account(current_user["id"])
\ No newline at end of file
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, Query, status
+from fastapi import APIRouter, Depends, Query, Response, status
 from typing import List, Optional, Dict, Any
 from datetime import date
 from app.schemas.entry import (
@@ -8,10 +8,13 @@ from app.schemas.entry import (
     CheckOutRequest,
     EntryLogResponse,
     CurrentVisitorsResponse,
-    VisitorStatistics
+    VisitorStatistics,
+    EligibilityPreloadResponse
 )
 from app.services.entry_service import EntryService
+from app.services.vaccination_eligibility_service import VaccinationEligibilityService
 from app.core.security import get_current_user, require_admin
+from app.core.rows import RowsResponse
 
 router = APIRouter(prefix="/api/v1/entries", tags=["入退場管理"])
 
@@ -61,6 +64,18 @@ async def check_out(
     return await EntryService.check_out(request.entry_log_ids, admin_user["id"])
 
 
+@router.post("/admin/eligibility/preload", response_model=EligibilityPreloadResponse)
+async def preload_eligibility(
+    admin_user: Dict[str, Any] = Depends(require_admin)
+):
+    """
+    全頭のワクチン接種判定をまとめて読み込む（開園時にスキャナー端末から呼び出す）
+    
+    管理者権限が必要です
+    """
+    return await VaccinationEligibilityService.preload()
+
+
 @router.get("/current-visitors", response_model=CurrentVisitorsResponse)
 async def get_current_visitors():
     """
@@ -68,7 +83,7 @@ async def get_current_visitors():
     
     認証不要
     """
-    return await EntryService.get_current_visitors()
+    return RowsResponse(await EntryService.get_current_visitors())
 
 
 @router.get("/history", response_model=List[EntryLogResponse])
@@ -89,7 +104,35 @@ async def get_entry_history(
     
     管理者権限が必要です
     """
-    return await EntryService.get_entry_history(user_id, start_date, end_date, limit)
+    return RowsResponse(await EntryService.get_entry_history(user_id, start_date, end_date, limit))
+
+
+@router.get("/admin/export")
+async def export_entry_history(
+    start_date: date = Query(..., description="開始日"),
+    end_date: date = Query(..., description="終了日"),
+    user_id: Optional[str] = Query(None, description="ユーザーIDでフィルタ"),
+    admin_user: Dict[str, Any] = Depends(require_admin)
+):
+    """
+    入退場履歴をCSVでダウンロード（管理者用）
+    
+    - **start_date**: 開始日
+    - **end_date**: 終了日
+    - **user_id**: ユーザーIDでフィルタ（オプション）
+    
+    アーカイブ済みの月の記録も含みます。
+    
+    管理者権限が必要です
+    """
+    content = await EntryService.export_entry_history(start_date, end_date, user_id)
+    return Response(
+        content=content,
+        media_type="text/csv; charset=utf-8",
+        headers={
+            "Content-Disposition": f'attachment; filename="entry_logs_{start_date.isoformat()}_{end_date.isoformat()}.csv"'
+        }
+    )
 
 
 @router.get("/my-history", response_model=List[EntryLogResponse])
@@ -108,7 +151,7 @@ async def get_my_entry_history(
     
     認証が必要です
     """
-    return await EntryService.get_entry_history(current_user["id"], start_date, end_date, limit)
+    return RowsResponse(await EntryService.get_entry_history(current_user["id"], start_date, end_date, limit))
 
 
 @router.get("/statistics", response_model=VisitorStatistics)
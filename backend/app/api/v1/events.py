@@ -9,7 +9,7 @@ from app.schemas.event import (
     EventRegistrationResponse
 )
 from app.services.event_service import EventService
-from app.core.security import get_current_user, require_admin
+from app.core.security import get_current_user, get_optional_user, require_admin
 
 router = APIRouter(prefix="/api/v1/events", tags=["イベント管理"])
 
@@ -20,7 +20,7 @@ async def get_events(
     end_date: Optional[date] = Query(None, description="終了日"),
     limit: int = Query(20, le=100, description="取得件数"),
     offset: int = Query(0, description="オフセット"),
-    current_user: Optional[Dict[str, Any]] = Depends(get_current_user)
+    current_user: Optional[Dict[str, Any]] = Depends(get_optional_user)
 ):
     """
     イベント一覧を取得
@@ -39,7 +39,7 @@ async def get_events(
 @router.get("/{event_id}", response_model=EventResponse)
 async def get_event(
     event_id: str,
-    current_user: Optional[Dict[str, Any]] = Depends(get_current_user)
+    current_user: Optional[Dict[str, Any]] = Depends(get_optional_user)
 ):
     """
     イベント詳細を取得
@@ -64,7 +64,7 @@ async def register_event(
     
     認証が必要です
     """
-    return await EventService.register_event(event_id, current_user["id"])
+    return await EventService.register_event(event_id, current_user["id"], current_user)
 
 
 @router.delete("/{event_id}/register")
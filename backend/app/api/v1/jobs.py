@@ -0,0 +1,61 @@
+from fastapi import APIRouter, Depends
+from typing import Dict
+from app.services.vaccination_reminder_service import VaccinationReminderService
+from app.services.provisioning_service import ProvisioningService
+from app.services.auto_checkout_service import AutoCheckoutService
+from app.services.entry_archive_service import EntryArchiveService
+from app.core.security import require_cron
+
+router = APIRouter(prefix="/api/v1/jobs", tags=["定期ジョブ"])
+
+
+@router.get("/vaccination-reminders", dependencies=[Depends(require_cron)])
+async def run_vaccination_reminders() -> Dict[str, int]:
+    """
+    ワクチン接種期限のリマインダーを送信（毎日実行）
+    
+    期限が近い記録を飼い主ごとにまとめて1通ずつ送信します。
+    送信済みの記録は再実行しても再送しません。
+    
+    Authorization: Bearer <CRON_SECRET> が必要です
+    """
+    return await VaccinationReminderService.run()
+
+
+@router.get("/provisioning", dependencies=[Depends(require_cron)])
+async def run_provisioning() -> Dict[str, int]:
+    """
+    承認済み申請のアカウント作成で未完了のものを再実行（数分おきに実行）
+    
+    承認直後のバックグラウンド処理が中断・失敗したジョブを拾い直します。
+    作成済みのユーザー・犬は作り直しません。
+    
+    Authorization: Bearer <CRON_SECRET> が必要です
+    """
+    return await ProvisioningService.sweep()
+
+
+@router.get("/auto-checkout", dependencies=[Depends(require_cron)])
+async def run_auto_checkout() -> Dict[str, int]:
+    """
+    閉園後も退場していない入場記録を自動で退場させる（1時間おきに実行）
+    
+    営業時間・特別休業日から入場日ごとの閉園時刻を求め、猶予時間を過ぎた記録を
+    まとめて退場（exit_reason = auto_closed）にします。
+    
+    Authorization: Bearer <CRON_SECRET> が必要です
+    """
+    return await AutoCheckoutService.run()
+
+
+@router.get("/entry-log-archive", dependencies=[Depends(require_cron)])
+async def run_entry_log_archive() -> Dict[str, int]:
+    """
+    古い月の入退場記録をアーカイブ（毎月1日に実行）
+    
+    数か月先までの月パーティションを用意し、保持期間（ENTRY_LOG_HOT_MONTHS）より前の月を
+    Parquetファイルにしてストレージに保存してから、その月のパーティションを削除します。
+    
+    Authorization: Bearer <CRON_SECRET> が必要です
+    """
+    return await EntryArchiveService.archive()
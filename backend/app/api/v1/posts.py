@@ -1,16 +1,25 @@
-from fastapi import APIRouter, Depends, Query, status
+import asyncio
+import json
+import time
+from fastapi import APIRouter, Depends, Query, Request, status
+from fastapi.responses import StreamingResponse
 from typing import List, Optional, Dict, Any
 from app.schemas.post import (
     PostCreate,
     PostUpdate,
     PostModerate,
+    PostBulkModerate,
+    PostBulkModerateResponse,
     PostResponse,
     PostListResponse,
     CommentCreate,
-    CommentResponse
+    CommentResponse,
+    TrendingHashtagResponse
 )
-from app.services.post_service import PostService
-from app.core.security import get_current_user, require_admin
+from app.services.post_service import PostService, MODERATION_CHANNEL
+from app.core.security import get_current_user, get_optional_user, require_admin
+from app.core.config import settings
+from app.core.realtime import realtime_hub
 
 router = APIRouter(prefix="/api/v1/posts", tags=["SNS投稿"])
 
@@ -29,7 +38,7 @@ async def create_post(
     
     認証が必要です
     """
-    return await PostService.create_post(post_data, current_user["id"])
+    return await PostService.create_post(post_data, current_user["id"], current_user)
 
 
 @router.get("/feed", response_model=PostListResponse)
@@ -38,7 +47,7 @@ async def get_feed(
     hashtag: Optional[str] = Query(None, description="ハッシュタグでフィルタ"),
     limit: int = Query(20, le=100, description="取得件数"),
     offset: int = Query(0, description="オフセット"),
-    current_user: Optional[Dict[str, Any]] = Depends(get_current_user)
+    current_user: Optional[Dict[str, Any]] = Depends(get_optional_user)
 ):
     """
     フィード（投稿一覧）を取得
@@ -54,10 +63,24 @@ async def get_feed(
     return await PostService.get_feed(category, hashtag, limit, offset, user_id)
 
 
+@router.get("/hashtags/trending", response_model=List[TrendingHashtagResponse])
+async def get_trending_hashtags(
+    limit: int = Query(10, le=50, description="取得件数")
+):
+    """
+    トレンドハッシュタグを取得
+    
+    - **limit**: 取得件数（最大50）
+    
+    直近に承認された投稿が多いタグほど上位（半減期24時間で減衰）
+    """
+    return await PostService.get_trending_hashtags(limit)
+
+
 @router.get("/{post_id}", response_model=PostResponse)
 async def get_post(
     post_id: str,
-    current_user: Optional[Dict[str, Any]] = Depends(get_current_user)
+    current_user: Optional[Dict[str, Any]] = Depends(get_optional_user)
 ):
     """
     投稿詳細を取得
@@ -99,7 +122,7 @@ async def add_comment(
     
     認証が必要です
     """
-    return await PostService.add_comment(post_id, comment_data, current_user["id"])
+    return await PostService.add_comment(post_id, comment_data, current_user["id"], current_user)
 
 
 @router.get("/{post_id}/comments", response_model=List[CommentResponse])
@@ -137,6 +160,24 @@ async def moderate_post(
     return await PostService.moderate_post(post_id, moderation, admin_user["id"])
 
 
+@router.post("/admin/bulk-moderate", response_model=PostBulkModerateResponse)
+async def bulk_moderate_posts(
+    moderation: PostBulkModerate,
+    admin_user: Dict[str, Any] = Depends(require_admin)
+):
+    """
+    承認待ち投稿を一括モデレート（管理者用）
+    
+    - **post_ids**: 投稿IDリスト（最大500件）
+    - **status**: 新しいステータス（approved/rejected）
+    - **admin_memo**: 管理者メモ（オプション）
+    
+    承認待ちでない投稿は skipped_ids に返されます
+    管理者権限が必要です
+    """
+    return await PostService.bulk_moderate_posts(moderation.post_ids, moderation.status, admin_user["id"])
+
+
 @router.get("/admin/pending", response_model=PostListResponse)
 async def get_pending_posts(
     limit: int = Query(20, le=100, description="取得件数"),
@@ -149,13 +190,49 @@ async def get_pending_posts(
     - **limit**: 取得件数（最大100）
     - **offset**: オフセット
     
+    古い順に返します。以降の増減は /admin/queue/stream で受け取れます
     管理者権限が必要です
     """
-    # 承認待ちステータスでフィード取得
-    return await PostService.get_feed(
-        category=None,
-        hashtag=None,
-        limit=limit,
-        offset=offset,
-        current_user_id=admin_user["id"]
-    )
\ No newline at end of file
+    return await PostService.get_moderation_queue(limit, offset)
+
+
+@router.get("/admin/queue/stream")
+async def stream_moderation_queue(
+    request: Request,
+    admin_user: Dict[str, Any] = Depends(require_admin)
+):
+    """
+    モデレーションキューの差分をServer-Sent Eventsで配信（管理者用）
+    
+    - **post_pending**: 新しい承認待ち投稿（data.post）
+    - **posts_moderated**: モデレート済みの投稿ID（data.post_ids, data.status）
+    
+    REDIS_URL が設定されていれば、他のインスタンスで行われたモデレートも届きます
+    （未設定の場合は同じインスタンス内の変更のみ）。
+    接続は REALTIME_STREAM_MAX_SECONDS 秒で閉じるため、クライアントは再接続
+    （EventSource は自動で再接続）のたびに /admin/pending を取り直してください
+    管理者権限が必要です
+    """
+    async def event_stream():
+        async with realtime_hub.subscribe(MODERATION_CHANNEL) as queue:
+            yield f"retry: {settings.REALTIME_RECONNECT_MS}\n: connected\n\n"
+            # 関数の実行時間の上限に達する前に閉じ、クライアントに再接続させる
+            deadline = time.monotonic() + settings.REALTIME_STREAM_MAX_SECONDS
+            while not await request.is_disconnected():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=min(15, remaining))
+                except asyncio.TimeoutError:
+                    # 接続維持のためのコメント行
+                    yield ": keep-alive\n\n"
+                    continue
+                data = json.dumps(message["data"], ensure_ascii=False, default=str)
+                yield f"event: {message['event']}\ndata: {data}\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -65,6 +65,24 @@ async def list_users(
     return await UserService.list_users(status, limit, offset)
 
 
+# /admin/{user_id} より先に登録する（"search" がユーザーIDとして扱われないように）
+@router.get("/admin/search", response_model=List[UserProfileResponse])
+async def search_users(
+    q: str = Query(..., min_length=1, description="検索クエリ"),
+    limit: int = Query(20, le=100, description="取得件数"),
+    admin_user: Dict[str, Any] = Depends(require_admin)
+):
+    """
+    ユーザーを検索（管理者用）
+    
+    - **q**: 検索クエリ（名前、メールアドレス、電話番号）
+    - **limit**: 取得件数（最大100）
+    
+    管理者権限が必要です
+    """
+    return await UserService.search_users(q, limit)
+
+
 @router.get("/admin/{user_id}", response_model=UserProfileResponse)
 async def get_user(
     user_id: str,
@@ -96,20 +114,3 @@ async def update_user_status(
     """
     await UserService.update_user_status(user_id, status_data)
     return await UserService.get_user_by_id(user_id)
-
-
-@router.get("/admin/search", response_model=List[UserProfileResponse])
-async def search_users(
-    q: str = Query(..., min_length=1, description="検索クエリ"),
-    limit: int = Query(20, le=100, description="取得件数"),
-    admin_user: Dict[str, Any] = Depends(require_admin)
-):
-    """
-    ユーザーを検索（管理者用）
-    
-    - **q**: 検索クエリ（名前、メールアドレス、電話番号）
-    - **limit**: 取得件数（最大100）
-    
-    管理者権限が必要です
-    """
-    return await UserService.search_users(q, limit)
\ No newline at end of file
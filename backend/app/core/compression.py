@@ -0,0 +1,127 @@
+import gzip
+from typing import Any, Dict, List, Optional, Tuple
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # brotli は任意（未インストールなら gzip のみ）
+    brotli = None
+
+# 圧縮するレスポンスの Content-Type（前方一致）
+COMPRESSIBLE_TYPES = (b"application/json", b"text/")
+
+# 圧縮した表現のETagに付ける接尾辞（表現ごとに別のETagにする）
+ETAG_SUFFIXES = {"br": "-br", "gzip": "-gzip"}
+
+
+def _accepted_encodings(scope) -> List[str]:
+    accepted = []
+    for name, value in scope.get("headers", []):
+        if name != b"accept-encoding":
+            continue
+        for item in value.decode("latin-1").split(","):
+            coding, *params = item.split(";")
+            quality = 1.0
+            for param in params:
+                key, _, value = param.strip().partition("=")
+                if key == "q":
+                    try:
+                        quality = float(value)
+                    except ValueError:
+                        quality = 0.0
+            if quality > 0:
+                accepted.append(coding.strip().lower())
+    return accepted
+
+
+def choose_encoding(scope) -> Optional[str]:
+    """
+    クライアントが受け付ける圧縮方式を選ぶ（brotli が使えれば br を優先）
+    """
+    accepted = _accepted_encodings(scope)
+    if brotli is not None and ("br" in accepted or "*" in accepted):
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    # mtime を固定して同じ内容からは同じバイト列にする
+    return gzip.compress(body, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+def _with_etag_suffix(value: bytes, encoding: str) -> bytes:
+    tag = value.decode("latin-1")
+    if tag.endswith('"'):
+        tag = tag[:-1] + ETAG_SUFFIXES[encoding] + '"'
+    return tag.encode("latin-1")
+
+
+class CompressionMiddleware:
+    """
+    JSON・テキストのレスポンスを br / gzip で圧縮するASGIミドルウェア
+    minimum_size バイト未満のレスポンスとストリーミングのレスポンスは圧縮しない
+    """
+
+    def __init__(self, app, minimum_size: int = None):
+        self.app = app
+        self.minimum_size = minimum_size if minimum_size is not None else settings.COMPRESSION_MIN_SIZE
+
+    async def __call__(self, scope, receive, send):
+        encoding = choose_encoding(scope) if scope["type"] == "http" else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Dict[str, Any]] = None
+        passthrough = False
+
+        async def send_compressed(message: Dict[str, Any]) -> None:
+            nonlocal start, passthrough
+            if message["type"] == "http.response.start":
+                headers = dict(message.get("headers", []))
+                compressible = (
+                    message["status"] not in (204, 304)
+                    and b"content-encoding" not in headers
+                    and headers.get(b"content-type", b"").startswith(COMPRESSIBLE_TYPES)
+                )
+                if compressible:
+                    start = message
+                else:
+                    passthrough = True
+                    await send(message)
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            headers: List[Tuple[bytes, bytes]] = [
+                (name, value) for name, value in start.get("headers", []) if name != b"vary"
+            ]
+            vary = [value for name, value in start.get("headers", []) if name == b"vary"]
+            headers.append((b"vary", b", ".join(vary + [b"Accept-Encoding"])))
+            passthrough = True
+
+            if message.get("more_body") or len(body) < self.minimum_size:
+                await send({**start, "headers": headers})
+                await send(message)
+                return
+
+            compressed = compress(body, encoding)
+            headers = [
+                (name, _with_etag_suffix(value, encoding) if name == b"etag" else value)
+                for name, value in headers if name != b"content-length"
+            ]
+            headers += [
+                (b"content-encoding", encoding.encode()),
+                (b"content-length", str(len(compressed)).encode()),
+            ]
+            await send({**start, "headers": headers})
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
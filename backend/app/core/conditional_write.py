@@ -0,0 +1,98 @@
+from app.core.supabase import supabase, execute_async
+from fastapi import HTTPException, status
+from typing import Any, Dict, Iterable, List, Optional
+
+
+def _scoped(query: Any, match: Dict[str, Any]) -> Any:
+    for column, value in match.items():
+        query = query.eq(column, value)
+    return query
+
+
+async def _missing_ids(table: str, ids: List[str]) -> List[str]:
+    """
+    ids のうちテーブルに存在しないもの（条件に一致しなかったときだけ、404 と 403 の区別に使う）
+    """
+    result = await execute_async(supabase.table(table).select("id").in_("id", ids))
+    found = {row["id"] for row in result.data or []}
+    return [row_id for row_id in ids if row_id not in found]
+
+
+async def _raise_unmatched(
+    table: str,
+    match: Dict[str, Any],
+    detail: str,
+    status_code: int,
+    not_found_detail: Optional[str]
+) -> None:
+    """
+    一致する行がなかった場合のエラー（403 などを返す場合は、行そのものがなければ 404 にする）
+    """
+    if status_code != status.HTTP_404_NOT_FOUND and not_found_detail and "id" in match:
+        if await _missing_ids(table, [match["id"]]):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=not_found_detail)
+    raise HTTPException(status_code=status_code, detail=detail)
+
+
+async def update_where(
+    table: str,
+    values: Dict[str, Any],
+    match: Dict[str, Any],
+    detail: str,
+    status_code: int = status.HTTP_404_NOT_FOUND,
+    not_found_detail: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    match（id・所有者など）に一致する行だけを更新し、更新後の行を返す（存在確認を別に問い合わせない）
+    一致する行がなければ status_code（存在しない: 404、所有者でない: 403）で detail を返す
+    not_found_detail を指定すると、一致しなかったときだけ id の存在を確認し、存在しなければ404で返す
+    """
+    result = await execute_async(_scoped(supabase.table(table).update(values), match))
+    if not result.data:
+        await _raise_unmatched(table, match, detail, status_code, not_found_detail)
+    return result.data[0]
+
+
+async def delete_where(
+    table: str,
+    match: Dict[str, Any],
+    detail: str,
+    status_code: int = status.HTTP_404_NOT_FOUND,
+    not_found_detail: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    match に一致する行だけを削除し、削除した行を返す（一致する行がなければ update_where と同じエラー）
+    """
+    result = await execute_async(_scoped(supabase.table(table).delete(), match))
+    if not result.data:
+        await _raise_unmatched(table, match, detail, status_code, not_found_detail)
+    return result.data[0]
+
+
+async def require_all(
+    table: str,
+    ids: Iterable[str],
+    match: Dict[str, Any],
+    detail: str,
+    status_code: int = status.HTTP_403_FORBIDDEN,
+    not_found_detail: Optional[str] = None
+) -> List[str]:
+    """
+    ids の行がすべて match（所有者など）に一致することを1回の in_ で確認する
+    一致しないIDがあれば detail の {ids} に埋め込んで status_code で返す
+    not_found_detail を指定すると、一致しなかったIDのうち存在しないものを {ids} に埋め込んで404で返す
+    """
+    ids = list(dict.fromkeys(ids))
+    result = await execute_async(_scoped(supabase.table(table).select("id").in_("id", ids), match))
+    found = {row["id"] for row in result.data or []}
+    missing = [row_id for row_id in ids if row_id not in found]
+    if missing:
+        if not_found_detail and status_code != status.HTTP_404_NOT_FOUND:
+            absent = await _missing_ids(table, missing)
+            if absent:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=not_found_detail.format(ids=", ".join(absent))
+                )
+        raise HTTPException(status_code=status_code, detail=detail.format(ids=", ".join(missing)))
+    return ids
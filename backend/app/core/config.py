@@ -14,15 +14,105 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     
+    # パスワードハッシュ（argon2id は argon2-cffi がある場合のみ、なければPBKDF2。パラメータを変えるとログイン時に再ハッシュ）
+    PASSWORD_HASH_SCHEME: str = "argon2id"  # argon2id / pbkdf2_sha256
+    PASSWORD_ARGON2_TIME_COST: int = 3
+    PASSWORD_ARGON2_MEMORY_KIB: int = 65536
+    PASSWORD_ARGON2_PARALLELISM: int = 1
+    PASSWORD_PBKDF2_ITERATIONS: int = 100000
+    PASSWORD_HASH_CONCURRENCY: int = 2  # ハッシュ計算に使うスレッド数（超えた分は待たせる）
+    
     # CORS設定
     BACKEND_CORS_ORIGINS: List[str] = ["http://localhost:3000"]
     
     # Redis設定（オプション）
     REDIS_URL: Optional[str] = None
     
+    # フィードのタイムラインキャッシュ（REDIS_URL があればRedis、なければプロセス内メモリ）
+    TIMELINE_CACHE_ENABLED: bool = True
+    TIMELINE_SIZE: int = 200
+    TIMELINE_TTL_SECONDS: int = 300
+    
+    # 利用者の表示用カード（名前・アバター）のプロセス内キャッシュ（一覧は利用者を結合せずにここから付与する）
+    USER_CARD_CACHE_SIZE: int = 10000
+    USER_CARD_TTL_SECONDS: int = 300
+    
+    # 定期ジョブ（Vercel Cronから Authorization: Bearer <CRON_SECRET> で呼び出す）
+    CRON_SECRET: Optional[str] = None
+    VACCINATION_REMINDER_DAYS: List[int] = [30, 7]  # 接種期限の何日前に通知するか
+    REMINDER_SEND_CONCURRENCY: int = 10
+    
+    # 入場時のワクチン接種確認（必須ワクチンの種類、次回接種日が未登録の記録の有効日数）
+    REQUIRED_VACCINE_TYPES: List[str] = ["狂犬病"]
+    VACCINATION_VALIDITY_DAYS: int = 365
+    ELIGIBILITY_NEGATIVE_TTL_SECONDS: int = 300  # 接種が確認できない判定を保持する秒数
+    
+    # 閉園時の自動退場（営業時間は園のタイムゾーンの時刻、閉園から猶予分を過ぎたら退場させる）
+    PARK_TIMEZONE: str = "Asia/Tokyo"
+    AUTO_CHECKOUT_GRACE_MINUTES: int = 30
+    
+    # 入退場記録の月パーティションとアーカイブ（保持期間より前の月はParquetにしてストレージへ移す）
+    ENTRY_LOG_HOT_MONTHS: int = 12
+    ENTRY_LOG_PARTITIONS_AHEAD: int = 3  # 何か月先までパーティションを用意しておくか
+    ENTRY_LOG_ARCHIVE_BUCKET: str = "archives"
+    
+    # バックグラウンドジョブ（アカウント作成・通知メールなど）
+    JOB_WORKER_CONCURRENCY: int = 4
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_RETRY_DELAY_SECONDS: float = 1.0
+    
+    # 承認済み申請のアカウント作成（provisioning_jobs、定期ジョブで未完了分を再実行）
+    PROVISIONING_MAX_ATTEMPTS: int = 5
+    PROVISIONING_LEASE_SECONDS: int = 120  # 実行中のジョブを他のワーカーが取らない秒数
+    PROVISIONING_CONCURRENCY: int = 5
+    PROVISIONING_SWEEP_LIMIT: int = 200
+    
+    # 管理画面へのリアルタイム配信（SSE、REDIS_URL があればRedisのpub/subで全インスタンスに届ける）
+    REALTIME_STREAM_MAX_SECONDS: int = 25  # 関数の実行時間の上限（vercel.json の maxDuration）より短くし、クライアントに再接続させる
+    REALTIME_RECONNECT_MS: int = 3000
+    
+    # レート制限（トークンバケット、REDIS_URL があればRedisで全インスタンス共有）
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_IP_PER_MINUTE: int = 120
+    RATE_LIMIT_IP_BURST: int = 60
+    RATE_LIMIT_USER_PER_MINUTE: int = 300
+    RATE_LIMIT_USER_BURST: int = 100
+    RATE_LIMIT_TRUST_FORWARDED: bool = False  # X-Forwarded-For の先頭をクライアントIPとする（Vercel等の信頼できるプロキシ配下でのみ有効にする）
+    
+    # 認証なしの同一GETリクエストの同時実行をまとめるパス（前方一致）
+    COALESCE_ENABLED: bool = True
+    COALESCE_PATHS: List[str] = [
+        "/api/v1/posts/feed",
+        "/api/v1/posts/hashtags/trending",
+        "/api/v1/announcements",
+        "/api/v1/events",
+        "/api/v1/entries/current-visitors",
+        "/api/v1/entries/statistics",
+    ]
+    
+    # レスポンスの圧縮（br は brotli がインストールされている場合のみ）
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024  # これより小さいレスポンスは圧縮しない（バイト）
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 5
+    
+    # ETagを付けて変更がなければ304を返す一覧系のGET（前方一致）
+    ETAG_ENABLED: bool = True
+    ETAG_PATHS: List[str] = [
+        "/api/v1/posts/feed",
+        "/api/v1/users/admin/list",
+        "/api/v1/events",
+        "/api/v1/entries/history",
+        "/api/v1/entries/my-history",
+        "/api/v1/announcements",
+    ]
+    
     # 環境設定
     ENVIRONMENT: str = "development"
     
+    # 起動最適化（サーバーレス向け：ルーターを初回リクエスト時に読み込む）
+    LAZY_ROUTERS: bool = False
+    
     class Config:
         env_file = ".env"
         
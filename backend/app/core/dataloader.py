@@ -0,0 +1,107 @@
+import asyncio
+import contextvars
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Set
+
+BatchFn = Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]]
+
+# リクエストごとのローダー（DataLoaderMiddleware がリクエストの開始時に空の辞書を設定する）
+_loaders: contextvars.ContextVar[Optional[Dict[str, "DataLoader"]]] = contextvars.ContextVar(
+    "dataloaders", default=None
+)
+
+
+class DataLoader:
+    """
+    イベントループの同じ周回で呼ばれた load(key) をまとめて1回の batch_fn(keys) で取得する
+    取得結果はローダーを破棄するまで（通常は1リクエストの間）保持し、同じキーは問い合わせ直さない
+    batch_fn は {key: 値} を返し、含まれないキーは None になる
+    """
+
+    def __init__(self, batch_fn: BatchFn, max_batch_size: int = 200):
+        self._batch_fn = batch_fn
+        self._max_batch_size = max_batch_size
+        self._cache: Dict[Hashable, asyncio.Future] = {}
+        self._queue: List[Hashable] = []
+        self._tasks: Set[asyncio.Task] = set()
+        self.batches = 0
+
+    def load(self, key: Hashable) -> "asyncio.Future[Any]":
+        future = self._cache.get(key)
+        if future is not None:
+            return future
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._cache[key] = future
+        if not self._queue:
+            # 今の周回で呼ばれる load をすべて待ってから問い合わせる
+            loop.call_soon(self._dispatch, loop)
+        self._queue.append(key)
+        return future
+
+    async def load_many(self, keys: List[Hashable]) -> List[Any]:
+        return list(await asyncio.gather(*[self.load(key) for key in keys]))
+
+    def prime(self, key: Hashable, value: Any) -> None:
+        """
+        取得済みの値を登録する（既に取得済み・取得中のキーは変えない）
+        """
+        if key not in self._cache:
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(value)
+            self._cache[key] = future
+
+    def _dispatch(self, loop: asyncio.AbstractEventLoop) -> None:
+        keys, self._queue = self._queue, []
+        for i in range(0, len(keys), self._max_batch_size):
+            task = loop.create_task(self._run(keys[i:i + self._max_batch_size]))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, keys: List[Hashable]) -> None:
+        self.batches += 1
+        try:
+            values = await self._batch_fn(keys)
+        except Exception as e:
+            for key in keys:
+                # 失敗した結果は保持せず、次の load で問い合わせ直す
+                future = self._cache.pop(key)
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for key in keys:
+            future = self._cache[key]
+            if not future.done():
+                future.set_result(values.get(key))
+
+
+def request_loader(name: str, batch_fn: BatchFn) -> DataLoader:
+    """
+    現在のリクエストの name のローダーを返す（なければ作成する）
+    リクエストの外（定期ジョブ・テスト）では呼び出しごとに新しいローダーを返す
+    """
+    loaders = _loaders.get()
+    if loaders is None:
+        return DataLoader(batch_fn)
+    loader = loaders.get(name)
+    if loader is None:
+        loader = loaders[name] = DataLoader(batch_fn)
+    return loader
+
+
+class DataLoaderMiddleware:
+    """
+    リクエストごとにローダーを用意するASGIミドルウェア（リクエストが終われば取得結果も破棄する）
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _loaders.set({})
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _loaders.reset(token)
@@ -0,0 +1,92 @@
+import hashlib
+from typing import Any, Dict, List, Optional
+from app.core.compression import ETAG_SUFFIXES
+from app.core.config import settings
+
+
+def compute_etag(body: bytes) -> str:
+    """レスポンス本文のハッシュから強いETagを作る"""
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def _if_none_match(scope) -> Optional[str]:
+    for name, value in scope.get("headers", []):
+        if name == b"if-none-match":
+            return value.decode("latin-1")
+    return None
+
+
+def matching_tag(if_none_match: str, etag: str) -> Optional[str]:
+    """
+    If-None-Match の中で etag に一致するもの（圧縮した表現の接尾辞付きを含む）を返す
+    """
+    variants = {etag} | {etag[:-1] + suffix + '"' for suffix in ETAG_SUFFIXES.values()}
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return etag
+        # If-None-Match は弱い比較（W/ を無視して比べる）
+        if tag.removeprefix("W/") in variants:
+            return tag.removeprefix("W/")
+    return None
+
+
+class ETagMiddleware:
+    """
+    一覧系のGETレスポンスにETagを付け、内容が変わっていなければ304を返すASGIミドルウェア
+    本文は作るため問い合わせは減らないが、転送量（モバイル回線・Vercelの帯域）を減らす
+    """
+
+    def __init__(self, app, paths: List[str] = None):
+        self.app = app
+        self.paths = tuple(paths if paths is not None else settings.ETAG_PATHS)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET" or not scope["path"].startswith(self.paths):
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = _if_none_match(scope)
+        start: Optional[Dict[str, Any]] = None
+        passthrough = False
+
+        async def send_with_etag(message: Dict[str, Any]) -> None:
+            nonlocal start, passthrough
+            if message["type"] == "http.response.start":
+                if message["status"] == 200:
+                    start = message
+                else:
+                    passthrough = True
+                    await send(message)
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            passthrough = True
+            if message.get("more_body"):
+                await send(start)
+                await send(message)
+                return
+
+            etag = compute_etag(message.get("body", b""))
+            headers = [(name, value) for name, value in start.get("headers", []) if name != b"etag"]
+            if not any(name == b"cache-control" for name, _ in headers):
+                # 利用者ごとに内容が変わるため共有キャッシュには置かず、毎回ETagで確認させる
+                headers.append((b"cache-control", b"private, no-cache"))
+
+            tag = matching_tag(if_none_match, etag) if if_none_match else None
+            if tag is not None:
+                headers = [
+                    (name, value) for name, value in headers
+                    if name not in (b"content-length", b"content-type")
+                ]
+                await send({**start, "status": 304, "headers": headers + [(b"etag", tag.encode("latin-1"))]})
+                await send({"type": "http.response.body", "body": b""})
+                return
+
+            await send({**start, "headers": headers + [(b"etag", etag.encode("latin-1"))]})
+            await send(message)
+
+        await self.app(scope, receive, send_with_etag)
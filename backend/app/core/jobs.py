@@ -0,0 +1,94 @@
+import asyncio
+import traceback
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from app.core.config import settings
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class JobQueue:
+    """
+    プロセス内のバックグラウンドジョブキュー
+    enqueue したジョブを複数のワーカーで並列に処理し、失敗したジョブは間隔を空けて再試行する
+    （サーバーレス環境ではレスポンス後に処理が止まる場合があるため、永続化が必要な処理には使わない）
+    """
+
+    def __init__(self, concurrency: int = 4, max_attempts: int = 3, retry_delay: float = 1.0):
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._handlers: Dict[str, JobHandler] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._queue_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._workers: List[asyncio.Task] = []
+        self.processed = 0
+        self.failed = 0
+
+    def register(self, name: str) -> Callable[[JobHandler], JobHandler]:
+        """
+        ジョブの処理関数を登録するデコレーター
+        """
+        def decorator(handler: JobHandler) -> JobHandler:
+            self._handlers[name] = handler
+            return handler
+        return decorator
+
+    def _ensure_workers(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if self._queue is None or self._queue_loop is not loop:
+            # イベントループが変わった場合（テストなど）はキューとワーカーを作り直す
+            self._queue = asyncio.Queue()
+            self._queue_loop = loop
+            self._workers = []
+        self._workers = [worker for worker in self._workers if not worker.done()]
+        while len(self._workers) < self.concurrency:
+            self._workers.append(loop.create_task(self._worker()))
+        return self._queue
+
+    def enqueue(self, name: str, payload: Dict[str, Any]) -> None:
+        """
+        ジョブを追加（実行中のイベントループ内から呼び出す）
+        """
+        if name not in self._handlers:
+            raise KeyError(f"未登録のジョブです: {name}")
+        self._ensure_workers().put_nowait({"name": name, "payload": payload})
+
+    async def _run(self, job: Dict[str, Any]) -> None:
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                await self._handlers[job["name"]](job["payload"])
+                self.processed += 1
+                return
+            except Exception:
+                if attempt == self.max_attempts:
+                    self.failed += 1
+                    print(f"ジョブ失敗 ({job['name']}): {traceback.format_exc()}")
+                    return
+                # 失敗したら間隔を倍にしながら再試行
+                await asyncio.sleep(self.retry_delay * 2 ** (attempt - 1))
+
+    async def _worker(self) -> None:
+        queue = self._queue
+        while True:
+            job = await queue.get()
+            try:
+                await self._run(job)
+            finally:
+                queue.task_done()
+
+    async def drain(self) -> None:
+        """
+        キューに残っているジョブ（再試行中を含む）がすべて終わるまで待つ
+        """
+        if self._queue is not None and self._queue_loop is asyncio.get_running_loop():
+            await self._queue.join()
+
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+
+job_queue = JobQueue(
+    concurrency=settings.JOB_WORKER_CONCURRENCY,
+    max_attempts=settings.JOB_MAX_ATTEMPTS,
+    retry_delay=settings.JOB_RETRY_DELAY_SECONDS
+)
@@ -0,0 +1,208 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, List, Optional, Tuple
+from app.core.config import settings
+from app.core.redis import get_redis
+from starlette.concurrency import run_in_threadpool
+
+
+@dataclass(frozen=True)
+class RateLimitRule:
+    """
+    トークンバケットの設定（capacity 回まで連続で受け付け、毎分 per_minute 回分ずつ回復）
+    """
+    name: str
+    per_minute: float
+    capacity: int
+    method: Optional[str] = None
+    path: Optional[str] = None  # 前方一致（exact なら末尾の / を除いて完全一致）
+    exact: bool = False
+
+    @property
+    def refill_per_second(self) -> float:
+        return self.per_minute / 60.0
+
+    def matches(self, method: str, path: str) -> bool:
+        if self.method is not None and self.method != method:
+            return False
+        if self.path is None:
+            return True
+        if self.exact:
+            return path.rstrip("/") == self.path.rstrip("/")
+        return path.startswith(self.path)
+
+
+# Supabaseへの問い合わせが多い公開エンドポイントの個別制限（IP単位）
+ENDPOINT_RULES = [
+    RateLimitRule("application_create", per_minute=5, capacity=5, method="POST", path="/api/v1/applications/", exact=True),
+    RateLimitRule("application_status", per_minute=20, capacity=10, method="GET", path="/api/v1/applications/status/"),
+    RateLimitRule("login", per_minute=10, capacity=10, method="POST", path="/api/v1/auth/login"),
+]
+
+
+class MemoryRateLimiter:
+    """
+    プロセス内メモリのトークンバケット（サーバーレスではインスタンスごとの制限になる）
+    """
+
+    def __init__(self, max_keys: int = 10000):
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    def allow(self, key: str, rule: RateLimitRule, cost: float = 1.0) -> Tuple[bool, float]:
+        """
+        (受け付けるか, 次に受け付けられるまでの秒数) を返す
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (float(rule.capacity), now))
+            tokens = min(float(rule.capacity), tokens + (now - updated) * rule.refill_per_second)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        retry_after = 0.0 if allowed else (cost - tokens) / rule.refill_per_second
+        return allowed, retry_after
+
+
+# 残りトークンと更新時刻をハッシュに保持し、1往復で判定・更新する
+_TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(bucket[1])
+local updated = tonumber(bucket[2])
+if tokens == nil then
+  tokens = capacity
+  updated = now
+end
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local allowed = 0
+if tokens >= cost then
+  tokens = tokens - cost
+  allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(tokens)}
+"""
+
+
+class RedisRateLimiter:
+    """
+    Redisのトークンバケット（全インスタンスで共有）
+    """
+
+    def __init__(self, client, prefix: str = "ratelimit:"):
+        self.client = client
+        self.prefix = prefix
+        self._script = client.register_script(_TOKEN_BUCKET_SCRIPT)
+
+    def allow(self, key: str, rule: RateLimitRule, cost: float = 1.0) -> Tuple[bool, float]:
+        allowed, tokens = self._script(
+            keys=[f"{self.prefix}{key}"],
+            args=[rule.capacity, rule.refill_per_second, time.time(), cost]
+        )
+        if int(allowed):
+            return True, 0.0
+        return False, (cost - float(tokens)) / rule.refill_per_second
+
+
+def _client_ip(scope) -> str:
+    if settings.RATE_LIMIT_TRUST_FORWARDED:
+        for name, value in scope.get("headers", []):
+            if name == b"x-forwarded-for":
+                return value.decode("latin-1").split(",")[0].strip()
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def _user_key(scope) -> Optional[str]:
+    """
+    Bearerトークンを利用者のキーとする（検証はしない。偽のトークンはIP単位の制限で抑える）
+    """
+    for name, value in scope.get("headers", []):
+        if name == b"authorization" and value[:7].lower() == b"bearer ":
+            return hashlib.sha256(value[7:]).hexdigest()[:32]
+    return None
+
+
+class RateLimitMiddleware:
+    """
+    IP単位・利用者単位のトークンバケットでリクエスト数を制限するASGIミドルウェア
+    REDIS_URL が設定されていればRedis、なければプロセス内メモリで数える
+    """
+
+    def __init__(self, app, limiter: Any = None):
+        self.app = app
+        self._limiter = limiter
+        self.ip_rule = RateLimitRule("ip", settings.RATE_LIMIT_IP_PER_MINUTE, settings.RATE_LIMIT_IP_BURST)
+        self.user_rule = RateLimitRule("user", settings.RATE_LIMIT_USER_PER_MINUTE, settings.RATE_LIMIT_USER_BURST)
+        self.endpoint_rules: List[RateLimitRule] = ENDPOINT_RULES
+
+    @property
+    def limiter(self):
+        if self._limiter is None:
+            client = get_redis()
+            self._limiter = RedisRateLimiter(client) if client is not None else MemoryRateLimiter()
+        return self._limiter
+
+    def _check(self, scope) -> Tuple[bool, float]:
+        method, path = scope["method"], scope["path"]
+        ip = _client_ip(scope)
+        user = _user_key(scope)
+
+        checks = [(f"{rule.name}:{ip}", rule) for rule in self.endpoint_rules if rule.matches(method, path)]
+        checks.append((f"ip:{ip}", self.ip_rule))
+        if user:
+            checks.append((f"user:{user}", self.user_rule))
+
+        for key, rule in checks:
+            allowed, retry_after = self.limiter.allow(key, rule)
+            if not allowed:
+                return False, retry_after
+        return True, 0.0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            if isinstance(self.limiter, MemoryRateLimiter):
+                allowed, retry_after = self._check(scope)
+            else:
+                # Redisへの往復（ルールごとに1回）はスレッドプールで行い、イベントループを止めない
+                allowed, retry_after = await run_in_threadpool(self._check, scope)
+        except Exception as e:
+            # 制限の判定に失敗した場合（Redis障害など）はリクエストを通す
+            print(f"レート制限エラー: {str(e)}")
+            allowed, retry_after = True, 0.0
+
+        if allowed:
+            await self.app(scope, receive, send)
+            return
+
+        body = json.dumps(
+            {"detail": "リクエストが多すぎます。しばらくしてから再度お試しください"},
+            ensure_ascii=False
+        ).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, int(retry_after + 0.999))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
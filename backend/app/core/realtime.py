@@ -0,0 +1,115 @@
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Tuple
+from app.core.redis import get_redis
+from starlette.concurrency import run_in_threadpool
+
+# Redis pub/sub のチャンネル名の接頭辞
+REDIS_CHANNEL_PREFIX = "realtime:"
+
+
+class RealtimeHub:
+    """
+    リアルタイム配信ハブ
+    チャンネルごとに購読者のキューを保持し、broadcast されたイベントを配信する
+    REDIS_URL が設定されていればRedisのpub/subを経由し、他のインスタンスの購読者にも届ける
+    （未設定の場合はプロセス内のみで、サーバーレス環境ではインスタンス間で共有されない）
+    """
+
+    def __init__(self, max_queue_size: int = 100, redis: Any = None, poll_timeout: float = 1.0):
+        self.max_queue_size = max_queue_size
+        self.poll_timeout = poll_timeout
+        self._redis = redis
+        self._subscribers: Dict[str, List[asyncio.Queue]] = {}
+        self._listeners: Dict[str, Tuple[asyncio.Task, asyncio.Future]] = {}
+
+    @property
+    def redis(self):
+        return self._redis if self._redis is not None else get_redis()
+
+    def publish(self, channel: str, event: str, data: Dict[str, Any]) -> int:
+        """
+        このプロセスの購読者へイベントを配信し、配信先の購読者数を返す
+        """
+        queues = self._subscribers.get(channel, [])
+        for queue in queues:
+            if queue.full():
+                # 受信が追いつかない購読者は古いイベントから捨てる
+                queue.get_nowait()
+            queue.put_nowait({"event": event, "data": data})
+        return len(queues)
+
+    async def broadcast(self, channel: str, event: str, data: Dict[str, Any]) -> None:
+        """
+        全インスタンスの購読者へイベントを配信（Redisがなければこのプロセスの購読者のみ）
+        """
+        client = self.redis
+        if client is None:
+            self.publish(channel, event, data)
+            return
+        message = json.dumps({"event": event, "data": data}, ensure_ascii=False, default=str)
+        await run_in_threadpool(client.publish, f"{REDIS_CHANNEL_PREFIX}{channel}", message)
+
+    async def _listen(self, client: Any, channel: str, ready: asyncio.Future) -> None:
+        """
+        Redisのチャンネルを受信し、このプロセスの購読者へ配信する（購読者がいなくなったら終了）
+        """
+        pubsub = client.pubsub(ignore_subscribe_messages=True)
+        try:
+            await run_in_threadpool(pubsub.subscribe, f"{REDIS_CHANNEL_PREFIX}{channel}")
+            ready.set_result(None)
+            while True:
+                if channel not in self._subscribers:
+                    # 判定と登録解除を同時に行い、直後の購読では新しい受信タスクを起動させる
+                    self._listeners.pop(channel, None)
+                    break
+                message = await run_in_threadpool(pubsub.get_message, timeout=self.poll_timeout)
+                if message is None or message["type"] != "message":
+                    continue
+                payload = json.loads(message["data"])
+                self.publish(channel, payload["event"], payload["data"])
+        except Exception as e:
+            print(f"リアルタイム配信の受信エラー: {str(e)}")
+            if not ready.done():
+                ready.set_exception(e)
+            if self._listeners.get(channel, (None,))[0] is asyncio.current_task():
+                del self._listeners[channel]
+        finally:
+            await run_in_threadpool(pubsub.close)
+
+    async def _ensure_listener(self, channel: str) -> None:
+        """
+        このプロセスでチャンネルの受信タスクを1つだけ起動し、SUBSCRIBE が済むまで待つ
+        （購読直後に broadcast されたイベントも取りこぼさない）
+        """
+        client = self.redis
+        if client is None:
+            return
+        listener = self._listeners.get(channel)
+        if listener is None or listener[0].done():
+            ready = asyncio.get_running_loop().create_future()
+            listener = (asyncio.create_task(self._listen(client, channel, ready)), ready)
+            self._listeners[channel] = listener
+        await asyncio.shield(listener[1])
+
+    @asynccontextmanager
+    async def subscribe(self, channel: str) -> AsyncIterator[asyncio.Queue]:
+        """
+        チャンネルを購読する（抜けると購読解除）
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._subscribers.setdefault(channel, []).append(queue)
+        try:
+            await self._ensure_listener(channel)
+            yield queue
+        finally:
+            self._subscribers[channel].remove(queue)
+            if not self._subscribers[channel]:
+                del self._subscribers[channel]
+
+    def subscriber_count(self, channel: str) -> int:
+        return len(self._subscribers.get(channel, []))
+
+
+realtime_hub = RealtimeHub()
@@ -0,0 +1,31 @@
+import threading
+from typing import TYPE_CHECKING, Optional
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    from redis import Redis
+
+_client: Optional["Redis"] = None
+_client_lock = threading.Lock()
+
+
+def get_redis() -> Optional["Redis"]:
+    """
+    Redisクライアントを取得
+    REDIS_URL が未設定の場合は None（呼び出し側はプロセス内メモリで代替する）
+    """
+    global _client
+    if not settings.REDIS_URL:
+        return None
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                import redis
+                _client = redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+    return _client
+
+
+def set_redis_client(client: Optional["Redis"]) -> None:
+    """Redisクライアントを差し替える（テスト用）"""
+    global _client
+    _client = client
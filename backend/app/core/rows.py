@@ -0,0 +1,72 @@
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from fastapi.responses import ORJSONResponse
+from typing import Any, Dict, Optional
+import orjson
+
+
+def parse_timestamp(value: Any) -> Optional[datetime]:
+    """
+    DBの時刻（ISO 8601 文字列）を datetime にする（取得済みの datetime・None はそのまま返す）
+    Python 3.11 の fromisoformat は末尾の Z や桁数の違う小数秒もそのまま読める
+    """
+    if value is None or isinstance(value, datetime):
+        parsed = value
+    else:
+        parsed = datetime.fromisoformat(value)
+    # タイムゾーンなしで保存された時刻はUTCとして扱う
+    if parsed is not None and parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+@dataclass(slots=True)
+class EntryRow:
+    """
+    入退場記録の1行（EntryLogResponse と同じ項目・順序、時刻は取得時に1回だけ datetime にする）
+    """
+    id: str
+    user_id: str
+    user_name: Optional[str]
+    dog_id: str
+    dog_name: Optional[str]
+    dog_breed: Optional[str]
+    entry_time: datetime
+    exit_time: Optional[datetime]
+    checked_by: Optional[str]
+    created_at: Optional[datetime]
+
+    @classmethod
+    def decode(cls, row: Dict[str, Any]) -> "EntryRow":
+        """
+        利用者名・犬の情報を付けた記録（辞書）から作る
+        """
+        return cls(
+            id=row["id"],
+            user_id=row["user_id"],
+            user_name=row.get("user_name"),
+            dog_id=row["dog_id"],
+            dog_name=row.get("dog_name"),
+            dog_breed=row.get("dog_breed"),
+            entry_time=parse_timestamp(row["entry_time"]),
+            exit_time=parse_timestamp(row.get("exit_time")),
+            checked_by=row.get("checked_by"),
+            created_at=parse_timestamp(row.get("created_at")),
+        )
+
+    @property
+    def stay_minutes(self) -> Optional[int]:
+        """滞在時間（分、退場前は None）"""
+        if self.exit_time is None:
+            return None
+        return int((self.exit_time - self.entry_time).total_seconds() / 60)
+
+
+class RowsResponse(ORJSONResponse):
+    """
+    EntryRow などの slots dataclass を response_model の検証を通さずに orjson で直接JSON化する
+    UTCの時刻は pydantic と同じく末尾を Z にする
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
@@ -3,10 +3,16 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from app.core.supabase import supabase
 from app.core.config import settings
 from typing import Optional, Dict, Any
+import hmac
 import jwt
 from datetime import datetime, timedelta
 
+# 認証時に取得する利用者・管理者の列（リクエストごとに取得するため処理で使う列だけにする）
+CURRENT_USER_COLUMNS = "id, auth_id, email, name, avatar_url, status"
+ADMIN_COLUMNS = "id, auth_id, email, name, role, is_active"
+
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
 
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> Dict[str, Any]:
@@ -25,7 +31,7 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
             )
         
         # usersテーブルからユーザー情報を取得
-        user_data = supabase.table("users").select("*").eq("auth_id", user.user.id).execute()
+        user_data = supabase.table("users").select(CURRENT_USER_COLUMNS).eq("auth_id", user.user.id).execute()
         
         if not user_data.data:
             raise HTTPException(
@@ -42,13 +48,25 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
         )
 
 
+async def get_optional_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)
+) -> Optional[Dict[str, Any]]:
+    """
+    認証が任意のエンドポイント用
+    トークンがなければ None、あれば get_current_user と同じく検証する
+    """
+    if credentials is None:
+        return None
+    return await get_current_user(credentials)
+
+
 async def require_admin(current_user: Dict[str, Any] = Depends(get_current_user)) -> Dict[str, Any]:
     """
     管理者権限を要求
     現在のユーザーが管理者であることを確認
     """
     # admin_usersテーブルから管理者情報を取得
-    admin = supabase.table("admin_users").select("*").eq("auth_id", current_user["auth_id"]).execute()
+    admin = supabase.table("admin_users").select(ADMIN_COLUMNS).eq("auth_id", current_user["auth_id"]).execute()
     
     if not admin.data:
         raise HTTPException(
@@ -79,6 +97,20 @@ async def require_super_admin(admin_user: Dict[str, Any] = Depends(require_admin
     return admin_user
 
 
+async def require_cron(credentials: HTTPAuthorizationCredentials = Depends(security)) -> None:
+    """
+    定期ジョブの呼び出し元を検証
+    Vercel Cronが付与する Authorization: Bearer <CRON_SECRET> を確認する
+    """
+    if not settings.CRON_SECRET or not hmac.compare_digest(
+        credentials.credentials.encode(), settings.CRON_SECRET.encode()
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="認証に失敗しました"
+        )
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
     アクセストークンを作成
@@ -0,0 +1,166 @@
+import asyncio
+import functools
+import inspect
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Tuple, TypeVar
+from pydantic import BaseModel
+from app.core.config import settings
+
+F = TypeVar("F", bound=Callable[..., Awaitable[Any]])
+
+
+class SingleFlight:
+    """
+    同じキーの処理が実行中なら、その結果を待って共有する（同時に1回だけ実行）
+    結果は保持しないため、TTLキャッシュのように古いデータを返すことはない
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        fn を実行して結果を返す（同じキーの実行中の処理があればその結果を待つ）
+        最初の呼び出し元が自分のタスク内で実行し、待っている呼び出し元には Future で結果を渡す
+        """
+        self.calls += 1
+        future = self._calls.get(key)
+        if future is not None:
+            self.shared += 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # 実行していた呼び出し元がキャンセルされた場合は自分で実行し直す
+                return await self.do(key, fn)
+
+        future = asyncio.get_running_loop().create_future()
+        # 待っている呼び出し元がいなくても例外を未取得として警告させない
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._calls[key] = future
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._calls.pop(key, None)
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+
+# 名前ごとの SingleFlight（メトリクス表示用に保持）
+_groups: Dict[str, SingleFlight] = {}
+
+
+def _group(name: str) -> SingleFlight:
+    if name not in _groups:
+        _groups[name] = SingleFlight()
+    return _groups[name]
+
+
+def _normalize(value: Any) -> Hashable:
+    """引数をキーとして比較できる形にそろえる"""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, BaseModel):
+        return _normalize(value.model_dump())
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), _normalize(v)) for k, v in value.items()))
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(_normalize(v) for v in value))
+    if isinstance(value, (list, tuple)):
+        return tuple(_normalize(v) for v in value)
+    try:
+        hash(value)
+    except TypeError:
+        return repr(value)
+    return value
+
+
+def single_flight(fn: F) -> F:
+    """
+    サービスメソッド用のデコレーター
+    同じ引数（デフォルト値を補って正規化したもの）の呼び出しが実行中なら、その結果を共有する
+    結果は呼び出し元の間で同じオブジェクトになるため、呼び出し側で変更しないこと
+    """
+    signature = inspect.signature(fn)
+    group = _group(fn.__qualname__)
+
+    @functools.wraps(fn)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        key = tuple((name, _normalize(value)) for name, value in bound.arguments.items())
+        return await group.do(key, lambda: fn(*args, **kwargs))
+
+    return wrapper  # type: ignore[return-value]
+
+
+def single_flight_metrics() -> Dict[str, Dict[str, Any]]:
+    """
+    名前ごとの呼び出し数・共有された数・共有率（coalesce_ratio）
+    """
+    return {
+        name: {
+            "calls": group.calls,
+            "shared": group.shared,
+            "coalesce_ratio": round(group.shared / group.calls, 4) if group.calls else 0.0,
+            "in_flight": group.in_flight(),
+        }
+        for name, group in sorted(_groups.items())
+    }
+
+
+class CoalesceMiddleware:
+    """
+    認証なしの同一GETリクエストが同時に来たとき、アプリの処理を1回にまとめるASGIミドルウェア
+    最初のリクエストのレスポンスをバッファし、待っていたリクエストにも同じ内容を返す
+    """
+
+    def __init__(self, app, paths: List[str] = None):
+        self.app = app
+        self.paths = tuple(paths if paths is not None else settings.COALESCE_PATHS)
+        self.group = _group("http:coalesce")
+
+    def _key(self, scope) -> Tuple[str, str]:
+        query = scope.get("query_string", b"").decode("latin-1")
+        return scope["path"], "&".join(sorted(query.split("&"))) if query else ""
+
+    def _coalescable(self, scope) -> bool:
+        if scope["type"] != "http" or scope["method"] != "GET":
+            return False
+        if not scope["path"].startswith(self.paths):
+            return False
+        # 認証付き・Cookie付きのリクエストは利用者ごとに結果が変わるため対象外
+        return not any(name in (b"authorization", b"cookie") for name, _ in scope.get("headers", []))
+
+    async def __call__(self, scope, receive, send):
+        if not self._coalescable(scope):
+            await self.app(scope, receive, send)
+            return
+
+        async def run() -> List[Dict[str, Any]]:
+            messages: List[Dict[str, Any]] = []
+
+            async def buffer(message: Dict[str, Any]) -> None:
+                messages.append(message)
+
+            await self.app(scope, receive, buffer)
+            return messages
+
+        for message in await self.group.do(self._key(scope), run):
+            await send(message)
@@ -1,12 +1,52 @@
-from supabase import create_client, Client
+import threading
+from typing import TYPE_CHECKING, Any, Optional
+from starlette.concurrency import run_in_threadpool
 from app.core.config import settings
 
-# Supabaseクライアントの作成
-supabase: Client = create_client(
-    settings.SUPABASE_URL,
-    settings.SUPABASE_SERVICE_KEY
-)
+if TYPE_CHECKING:
+    from supabase import Client
 
-def get_supabase_client() -> Client:
-    """Supabaseクライアントを取得"""
-    return supabase
\ No newline at end of file
+_client: Optional["Client"] = None
+_client_lock = threading.Lock()
+
+
+def get_supabase_client() -> "Client":
+    """
+    Supabaseクライアントを取得
+    初回呼び出し時に作成する（コールドスタート時のimport・初期化コストを最初のリクエストまで遅延）
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from supabase import create_client
+                _client = create_client(
+                    settings.SUPABASE_URL,
+                    settings.SUPABASE_SERVICE_KEY
+                )
+    return _client
+
+
+def set_supabase_client(client: Any) -> None:
+    """Supabaseクライアントを差し替える（テスト・負荷試験用）"""
+    global _client
+    _client = client
+
+
+class _LazySupabaseClient:
+    """属性アクセス時に実際のクライアントへ委譲するプロキシ"""
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(get_supabase_client(), name)
+
+
+# Supabaseクライアント（各サービスは from app.core.supabase import supabase で参照）
+supabase: "Client" = _LazySupabaseClient()
+
+
+async def execute_async(query: Any) -> Any:
+    """
+    クエリをスレッドプールで実行する
+    同期クライアントの往復中もイベントループを止めないため、同時リクエストの処理や single_flight での共有が効く
+    """
+    return await run_in_threadpool(query.execute)
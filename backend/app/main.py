@@ -1,15 +1,38 @@
+import importlib
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
+from app.core.dataloader import DataLoaderMiddleware
 
 # FastAPIアプリケーションの作成
 app = FastAPI(
     title="里山ドッグラン管理システムAPI",
     version="1.0.0",
     docs_url="/api/docs",
-    redoc_url="/api/redoc"
+    redoc_url="/api/redoc",
+    # レスポンスのJSON化は orjson で行う（標準の json より高速で出力も小さい）
+    default_response_class=ORJSONResponse
 )
 
+# 同一GETの同時実行をまとめる・リクエスト数を制限する（CORSヘッダーは429にも付ける）
+if settings.COALESCE_ENABLED:
+    from app.core.singleflight import CoalesceMiddleware
+    app.add_middleware(CoalesceMiddleware)
+# ETagは圧縮前の本文から計算する（圧縮側で表現ごとの接尾辞を付ける）
+if settings.ETAG_ENABLED:
+    from app.core.etag import ETagMiddleware
+    app.add_middleware(ETagMiddleware)
+if settings.COMPRESSION_ENABLED:
+    from app.core.compression import CompressionMiddleware
+    app.add_middleware(CompressionMiddleware)
+if settings.RATE_LIMIT_ENABLED:
+    from app.core.rate_limit import RateLimitMiddleware
+    app.add_middleware(RateLimitMiddleware)
+
+# リクエストごとのローダー（同じリクエスト内の利用者・犬の取得をまとめる）
+app.add_middleware(DataLoaderMiddleware)
+
 # CORS設定
 app.add_middleware(
     CORSMiddleware,
@@ -19,6 +42,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 終了時にバックグラウンドジョブを処理し切る
+@app.on_event("shutdown")
+async def drain_background_jobs():
+    from app.core.jobs import job_queue
+    await job_queue.drain()
+
 # 基本ルートエンドポイント
 @app.get("/")
 async def root():
@@ -38,15 +67,66 @@ async def health_check():
 async def health_simple():
     return {"status": "ok"}
 
-# APIルーターのインポートと登録
-from app.api.v1 import auth, applications, dogs, users, files, posts, events, entries, announcements
-
-app.include_router(auth.router)
-app.include_router(applications.router)
-app.include_router(dogs.router)
-app.include_router(users.router)
-app.include_router(files.router)
-app.include_router(posts.router)
-app.include_router(events.router)
-app.include_router(entries.router)
-app.include_router(announcements.router)
\ No newline at end of file
+# 同時実行の共有状況（single_flight / 同一GETのまとめ）
+@app.get("/api/metrics")
+async def metrics():
+    from app.core.singleflight import single_flight_metrics
+    return {"single_flight": single_flight_metrics()}
+
+# APIルーター（プレフィックス → モジュール）
+ROUTER_MODULES = {
+    "/api/v1/auth": "app.api.v1.auth",
+    "/api/v1/applications": "app.api.v1.applications",
+    "/api/v1/dogs": "app.api.v1.dogs",
+    "/api/v1/users": "app.api.v1.users",
+    "/api/v1/files": "app.api.v1.files",
+    "/api/v1/posts": "app.api.v1.posts",
+    "/api/v1/events": "app.api.v1.events",
+    "/api/v1/entries": "app.api.v1.entries",
+    "/api/v1/announcements": "app.api.v1.announcements",
+    "/api/v1/jobs": "app.api.v1.jobs",
+}
+
+_loaded_routers = set()
+
+
+def include_router_module(module_name: str) -> None:
+    """ルーターモジュールを読み込んでアプリケーションに登録"""
+    if module_name in _loaded_routers:
+        return
+    module = importlib.import_module(module_name)
+    app.include_router(module.router)
+    _loaded_routers.add(module_name)
+    # ルート追加後にOpenAPIスキーマを再生成させる
+    app.openapi_schema = None
+
+
+class LazyRouterMiddleware:
+    """
+    ルーターを初回リクエスト時に読み込むASGIミドルウェア
+    サーバーレスのコールドスタートでは、そのリクエストが使うルーターだけをimportする
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and len(_loaded_routers) < len(ROUTER_MODULES):
+            path = scope["path"]
+            if path in (app.openapi_url, app.docs_url, app.redoc_url):
+                # APIドキュメントは全ルーターが必要
+                for module_name in ROUTER_MODULES.values():
+                    include_router_module(module_name)
+            else:
+                for prefix, module_name in ROUTER_MODULES.items():
+                    if path == prefix or path.startswith(prefix + "/"):
+                        include_router_module(module_name)
+                        break
+        await self.app(scope, receive, send)
+
+
+if settings.LAZY_ROUTERS:
+    app.add_middleware(LazyRouterMiddleware)
+else:
+    for _module_name in ROUTER_MODULES.values():
+        include_router_module(_module_name)
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 from enum import Enum
@@ -67,4 +67,26 @@ class ApplicationListResponse(BaseModel):
     total: int
     items: List[ApplicationResponse]
     page: int
-    per_page: int
\ No newline at end of file
+    per_page: int
+
+
+class ApplicationBulkReview(BaseModel):
+    """申請一括審査用スキーマ（管理者用）"""
+    application_ids: List[str] = Field(..., min_length=1, max_length=500)
+    status: ApplicationStatus
+    admin_memo: Optional[str] = None
+    rejected_reason: Optional[str] = None  # 却下時は必須
+
+
+class ApplicationReviewResult(BaseModel):
+    """申請ごとの審査結果"""
+    id: str
+    result: str  # approved, rejected, not_found, already_processed
+    status: Optional[str] = None  # 現在のステータス
+
+
+class ApplicationBulkReviewResponse(BaseModel):
+    """申請一括審査結果スキーマ"""
+    status: str
+    updated: int
+    results: List[ApplicationReviewResult]
@@ -53,4 +53,11 @@ class VisitorStatistics(BaseModel):
     total_today: int
     current_visitors: int
     peak_hour: Optional[str]
-    average_stay_minutes: Optional[float]
\ No newline at end of file
+    average_stay_minutes: Optional[float]
+
+
+class EligibilityPreloadResponse(BaseModel):
+    """ワクチン接種判定の事前読み込み結果スキーマ"""
+    dogs: int
+    eligible: int
+    ineligible: int
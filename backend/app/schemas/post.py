@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional, List
+from pydantic import BaseModel, Field
+from typing import Literal, Optional, List
 from datetime import datetime
 from enum import Enum
 
@@ -40,6 +40,20 @@ class PostModerate(BaseModel):
     admin_memo: Optional[str] = None
 
 
+class PostBulkModerate(BaseModel):
+    """投稿一括モデレート用スキーマ（管理者用）"""
+    post_ids: List[str] = Field(..., min_length=1, max_length=500)
+    status: Literal[PostStatus.APPROVED, PostStatus.REJECTED]
+    admin_memo: Optional[str] = None
+
+
+class PostBulkModerateResponse(BaseModel):
+    """投稿一括モデレート結果スキーマ"""
+    status: str
+    updated_ids: List[str]
+    skipped_ids: List[str]  # 存在しない、または承認待ちでない投稿
+
+
 class CommentCreate(BaseModel):
     """コメント作成用スキーマ"""
     content: str
@@ -65,6 +79,14 @@ class HashtagResponse(BaseModel):
         from_attributes = True
 
 
+class TrendingHashtagResponse(BaseModel):
+    """トレンドハッシュタグレスポンススキーマ"""
+    id: str
+    name: str
+    post_count: int = 0
+    score: float  # 現在時点の減衰後スコア（直近の承認投稿1件 ≒ 1.0）
+
+
 class CommentResponse(BaseModel):
     """コメントレスポンススキーマ"""
     id: str
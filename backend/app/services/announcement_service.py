@@ -1,4 +1,6 @@
-from app.core.supabase import supabase
+from app.core.supabase import supabase, execute_async
+from app.core.singleflight import single_flight
+from app.core.conditional_write import update_where, delete_where
 from app.schemas.announcement import (
     AnnouncementCreate,
     AnnouncementUpdate,
@@ -11,6 +13,14 @@ from typing import Dict, Any, List, Optional
 from datetime import datetime, date
 
 
+# お知らせのレスポンスに必要な列
+ANNOUNCEMENT_COLUMNS = "id, title, content, priority, is_active, created_by, created_at, updated_at"
+
+# 営業時間・特別休業日の取得列
+BUSINESS_HOURS_COLUMNS = "day_of_week, open_time, close_time, is_closed"
+SPECIAL_HOLIDAY_COLUMNS = "id, holiday_date, reason, created_at"
+
+
 class AnnouncementService:
     @staticmethod
     async def create_announcement(
@@ -26,7 +36,7 @@ class AnnouncementService:
                 "created_by": admin_id
             }
             
-            result = supabase.table("announcements").insert(announcement).execute()
+            result = await execute_async(supabase.table("announcements").insert(announcement))
             
             if not result.data:
                 raise HTTPException(
@@ -60,15 +70,15 @@ class AnnouncementService:
         お知らせ一覧を取得
         """
         try:
-            query = supabase.table("announcements").select("*", count="exact")
+            query = supabase.table("announcements").select(ANNOUNCEMENT_COLUMNS, count="exact")
             
             if is_active_only:
                 query = query.eq("is_active", True)
             
             # 優先度と作成日時でソート
-            result = query.order("priority", desc=True).order("created_at", desc=True).range(
+            result = await execute_async(query.order("priority", desc=True).order("created_at", desc=True).range(
                 offset, offset + limit - 1
-            ).execute()
+            ))
             
             return {
                 "total": result.count if hasattr(result, 'count') else len(result.data),
@@ -89,7 +99,7 @@ class AnnouncementService:
         お知らせ詳細を取得
         """
         try:
-            result = supabase.table("announcements").select("*").eq("id", announcement_id).execute()
+            result = await execute_async(supabase.table("announcements").select(ANNOUNCEMENT_COLUMNS).eq("id", announcement_id))
             
             if not result.data:
                 raise HTTPException(
@@ -116,15 +126,6 @@ class AnnouncementService:
         お知らせを更新
         """
         try:
-            # お知らせの存在確認
-            existing = supabase.table("announcements").select("id").eq("id", announcement_id).execute()
-            
-            if not existing.data:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="お知らせが見つかりません"
-                )
-            
             # 更新データの準備
             update_data = announcement_data.dict(exclude_none=True)
             
@@ -134,15 +135,8 @@ class AnnouncementService:
                     detail="更新するデータがありません"
                 )
             
-            result = supabase.table("announcements").update(update_data).eq("id", announcement_id).execute()
-            
-            if not result.data:
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail="お知らせの更新に失敗しました"
-                )
-            
-            return result.data[0]
+            # 更新されなければお知らせが存在しない
+            return await update_where("announcements", update_data, {"id": announcement_id}, "お知らせが見つかりません")
             
         except Exception as e:
             if hasattr(e, 'status_code'):
@@ -158,23 +152,8 @@ class AnnouncementService:
         お知らせを削除（論理削除）
         """
         try:
-            # お知らせの存在確認
-            existing = supabase.table("announcements").select("id").eq("id", announcement_id).execute()
-            
-            if not existing.data:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="お知らせが見つかりません"
-                )
-            
             # is_activeをfalseに設定（論理削除）
-            result = supabase.table("announcements").update({"is_active": False}).eq("id", announcement_id).execute()
-            
-            if not result.data:
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail="お知らせの削除に失敗しました"
-                )
+            await update_where("announcements", {"is_active": False}, {"id": announcement_id}, "お知らせが見つかりません")
             
             return {"message": "お知らせを削除しました"}
             
@@ -187,12 +166,13 @@ class AnnouncementService:
             )
     
     @staticmethod
+    @single_flight
     async def get_business_hours() -> List[Dict[str, Any]]:
         """
         営業時間を取得
         """
         try:
-            result = supabase.table("business_hours").select("*").order("day_of_week").execute()
+            result = await execute_async(supabase.table("business_hours").select(BUSINESS_HOURS_COLUMNS).order("day_of_week"))
             
             # データが存在しない場合はデフォルト値を返す
             if not result.data:
@@ -224,12 +204,12 @@ class AnnouncementService:
             
             for hours in hours_data:
                 # upsertで更新または作成
-                result = supabase.table("business_hours").upsert({
+                result = await execute_async(supabase.table("business_hours").upsert({
                     "day_of_week": hours.day_of_week,
                     "open_time": hours.open_time,
                     "close_time": hours.close_time,
                     "is_closed": hours.is_closed
-                }).execute()
+                }))
                 
                 if result.data:
                     updated_count += 1
@@ -252,9 +232,9 @@ class AnnouncementService:
         """
         try:
             # 日付の重複チェック
-            existing = supabase.table("special_holidays").select("id").eq(
+            existing = await execute_async(supabase.table("special_holidays").select("id").eq(
                 "holiday_date", holiday_data.holiday_date
-            ).execute()
+            ))
             
             if existing.data:
                 raise HTTPException(
@@ -262,7 +242,7 @@ class AnnouncementService:
                     detail="この日付は既に登録されています"
                 )
             
-            result = supabase.table("special_holidays").insert(holiday_data.dict()).execute()
+            result = await execute_async(supabase.table("special_holidays").insert(holiday_data.dict()))
             
             if not result.data:
                 raise HTTPException(
@@ -281,6 +261,7 @@ class AnnouncementService:
             )
     
     @staticmethod
+    @single_flight
     async def get_special_holidays(
         start_date: Optional[date] = None,
         end_date: Optional[date] = None
@@ -289,7 +270,7 @@ class AnnouncementService:
         特別休業日一覧を取得
         """
         try:
-            query = supabase.table("special_holidays").select("*")
+            query = supabase.table("special_holidays").select(SPECIAL_HOLIDAY_COLUMNS)
             
             if start_date:
                 query = query.gte("holiday_date", start_date.isoformat())
@@ -297,7 +278,7 @@ class AnnouncementService:
             if end_date:
                 query = query.lte("holiday_date", end_date.isoformat())
             
-            result = query.order("holiday_date").execute()
+            result = await execute_async(query.order("holiday_date"))
             
             return result.data or []
             
@@ -313,17 +294,8 @@ class AnnouncementService:
         特別休業日を削除
         """
         try:
-            # 存在確認
-            existing = supabase.table("special_holidays").select("id").eq("id", holiday_id).execute()
-            
-            if not existing.data:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="特別休業日が見つかりません"
-                )
-            
-            # 削除
-            supabase.table("special_holidays").delete().eq("id", holiday_id).execute()
+            # 削除（削除されなければ存在しない）
+            await delete_where("special_holidays", {"id": holiday_id}, "特別休業日が見つかりません")
             
             return {"message": "特別休業日を削除しました"}
             
@@ -1,12 +1,63 @@
-from app.core.supabase import supabase
-from app.schemas.application import ApplicationCreate, ApplicationUpdate, ApplicationStatus
+from app.core.supabase import supabase, execute_async
+from app.schemas.application import ApplicationCreate, ApplicationUpdate, ApplicationStatus, DogInfo
+from app.services.notification_service import NotificationService
+from app.services.provisioning_service import ProvisioningService
 from fastapi import HTTPException, status
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 import uuid
 
 
+# 申請のレスポンスに必要な列
+APPLICATION_COLUMNS = (
+    "id, email, name, phone, address, is_imabari_resident, residence_years, preferred_date, "
+    "status, admin_memo, rejected_reason, created_at, reviewed_at, reviewed_by"
+)
+
+# メールアドレスでの申請状況確認（認証なしのため住所・電話番号などは返さない）
+APPLICATION_STATUS_COLUMNS = "id, name, status, created_at, reviewed_at, rejected_reason"
+
+# application_dogs に保存する犬情報（アカウント作成時に dogs へ写す列）
+APPLICATION_DOG_FIELDS = {"name", "breed", "weight", "gender", "birth_date", "personality"}
+
+# in_ フィルタ1回あたりのID数（URL長の上限対策）
+IN_CHUNK_SIZE = 200
+
+
+def _chunks(items: List[Any], size: int) -> List[List[Any]]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
 class ApplicationService:
+    @staticmethod
+    def application_dog_rows(application_id: str, dogs: List[DogInfo]) -> List[Dict[str, Any]]:
+        """
+        申請の犬情報を application_dogs の行にする（テーブルにない項目は保存しない、空欄は NULL）
+        """
+        return [
+            {
+                "application_id": application_id,
+                **{key: (value if value != "" else None) for key, value in dog.dict(include=APPLICATION_DOG_FIELDS).items()}
+            }
+            for dog in dogs
+        ]
+    
+    @staticmethod
+    async def save_application_dogs(client: Any, application_id: str, dogs: List[DogInfo]) -> None:
+        """
+        申請の犬情報を1回の複数行insertで保存する
+        失敗した場合は犬のいない申請を残さないよう申請も削除し、エラーを呼び出し元へ伝える
+        """
+        if not dogs:
+            return
+        try:
+            await execute_async(
+                client.table("application_dogs").insert(ApplicationService.application_dog_rows(application_id, dogs))
+            )
+        except Exception:
+            await execute_async(client.table("applications").delete().eq("id", application_id))
+            raise
+    
     @staticmethod
     async def create_application(data: ApplicationCreate) -> Dict[str, Any]:
         """
@@ -36,13 +87,8 @@ class ApplicationService:
             
             application_id = result.data[0]["id"]
             
-            # 犬情報を別途保存する場合の処理（後で実装）
-            # for dog in data.dog_info:
-            #     dog_data = {
-            #         "application_id": application_id,
-            #         **dog.dict()
-            #     }
-            #     supabase.table("application_dogs").insert(dog_data).execute()
+            # 犬情報（承認時に provision_account が dogs へ写す）
+            await ApplicationService.save_application_dogs(supabase, application_id, data.dog_info)
             
             # TODO: 管理者への通知機能を実装
             # await NotificationService.notify_admin_new_application(result.data[0])
@@ -63,7 +109,7 @@ class ApplicationService:
         申請詳細を取得
         """
         try:
-            result = supabase.table("applications").select("*").eq("id", application_id).execute()
+            result = supabase.table("applications").select(APPLICATION_COLUMNS).eq("id", application_id).execute()
             
             if not result.data:
                 raise HTTPException(
@@ -87,7 +133,7 @@ class ApplicationService:
         メールアドレスで申請状況を確認
         """
         try:
-            result = supabase.table("applications").select("*").eq("email", email).order("created_at", desc=True).execute()
+            result = supabase.table("applications").select(APPLICATION_STATUS_COLUMNS).eq("email", email).order("created_at", desc=True).execute()
             return result.data or []
             
         except Exception as e:
@@ -107,7 +153,7 @@ class ApplicationService:
         """
         try:
             # クエリの構築
-            query = supabase.table("applications").select("*", count="exact")
+            query = supabase.table("applications").select(APPLICATION_COLUMNS, count="exact")
             
             if status:
                 query = query.eq("status", status)
@@ -138,16 +184,7 @@ class ApplicationService:
         申請を承認
         """
         try:
-            # 申請情報を取得
-            application = await ApplicationService.get_application(application_id)
-            
-            if application["status"] != ApplicationStatus.PENDING.value:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="この申請は既に処理されています"
-                )
-            
-            # 申請ステータスを更新
+            # 申請ステータスを更新（承認待ちの場合のみ）
             update_data = {
                 "status": ApplicationStatus.APPROVED.value,
                 "admin_memo": admin_memo,
@@ -155,19 +192,20 @@ class ApplicationService:
                 "reviewed_by": admin_id
             }
             
-            result = supabase.table("applications").update(update_data).eq("id", application_id).execute()
+            result = supabase.table("applications").update(update_data).eq(
+                "id", application_id
+            ).eq("status", ApplicationStatus.PENDING.value).execute()
             
             if not result.data:
+                # 存在しなければ404
+                await ApplicationService.get_application(application_id)
                 raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail="申請の承認に失敗しました"
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="この申請は既に処理されています"
                 )
             
-            # ユーザーアカウントの作成処理
-            # TODO: Supabase Authでユーザーを作成し、usersテーブルに登録
-            
-            # TODO: 承認メール送信
-            # await NotificationService.send_approval_email(application)
+            # アカウント作成と承認メールは、更新と同じトランザクションで登録されたジョブで行う
+            await ProvisioningService.enqueue_jobs([application_id])
             
             return result.data[0]
             
@@ -189,16 +227,7 @@ class ApplicationService:
         申請を却下
         """
         try:
-            # 申請情報を取得
-            application = await ApplicationService.get_application(application_id)
-            
-            if application["status"] != ApplicationStatus.PENDING.value:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="この申請は既に処理されています"
-                )
-            
-            # 申請ステータスを更新
+            # 申請ステータスを更新（承認待ちの場合のみ）
             update_data = {
                 "status": ApplicationStatus.REJECTED.value,
                 "rejected_reason": reason,
@@ -206,16 +235,20 @@ class ApplicationService:
                 "reviewed_by": admin_id
             }
             
-            result = supabase.table("applications").update(update_data).eq("id", application_id).execute()
+            result = supabase.table("applications").update(update_data).eq(
+                "id", application_id
+            ).eq("status", ApplicationStatus.PENDING.value).execute()
             
             if not result.data:
+                # 存在しなければ404
+                await ApplicationService.get_application(application_id)
                 raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail="申請の却下に失敗しました"
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="この申請は既に処理されています"
                 )
             
-            # TODO: 却下メール送信
-            # await NotificationService.send_rejection_email(application, reason)
+            # 却下メールは、更新と同じトランザクションで登録されたジョブで送る
+            await ProvisioningService.enqueue_jobs([application_id])
             
             return result.data[0]
             
@@ -225,4 +258,82 @@ class ApplicationService:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"申請却下エラー: {str(e)}"
-            )
\ No newline at end of file
+            )
+    
+    @staticmethod
+    async def bulk_review_applications(
+        application_ids: List[str],
+        new_status: ApplicationStatus,
+        admin_id: str,
+        admin_memo: Optional[str] = None,
+        rejected_reason: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        承認待ちの申請をまとめて承認・却下（管理者用）
+        IN_CHUNK_SIZE 件ずつの条件付きUPDATEで反映し、アカウント作成と通知メールは審査結果のジョブで行う
+        """
+        try:
+            if new_status == ApplicationStatus.PENDING:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="status は approved または rejected を指定してください"
+                )
+            if new_status == ApplicationStatus.REJECTED and not rejected_reason:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="却下する場合は rejected_reason を指定してください"
+                )
+            
+            application_ids = list(dict.fromkeys(application_ids))
+            
+            update_data = {
+                "status": new_status.value,
+                "reviewed_at": datetime.utcnow().isoformat(),
+                "reviewed_by": admin_id
+            }
+            if admin_memo is not None:
+                update_data["admin_memo"] = admin_memo
+            if new_status == ApplicationStatus.REJECTED:
+                update_data["rejected_reason"] = rejected_reason
+            
+            # 承認待ちのものだけを更新（同時に審査された申請は更新されない）
+            updated: Dict[str, Dict[str, Any]] = {}
+            for chunk in _chunks(application_ids, IN_CHUNK_SIZE):
+                result = supabase.table("applications").update(update_data).in_(
+                    "id", chunk
+                ).eq("status", ApplicationStatus.PENDING.value).execute()
+                updated.update({row["id"]: row for row in result.data or []})
+            
+            # 更新されなかった申請は現在のステータスをまとめて確認
+            current: Dict[str, str] = {}
+            skipped = [application_id for application_id in application_ids if application_id not in updated]
+            for chunk in _chunks(skipped, IN_CHUNK_SIZE):
+                existing = supabase.table("applications").select("id, status").in_("id", chunk).execute()
+                current.update({row["id"]: row["status"] for row in existing.data or []})
+            
+            # アカウント作成と通知メールは、更新と同じトランザクションで登録されたジョブで行う
+            await ProvisioningService.enqueue_jobs(list(updated))
+            
+            results = []
+            for application_id in application_ids:
+                if application_id in updated:
+                    results.append({"id": application_id, "result": new_status.value, "status": new_status.value})
+                elif application_id in current:
+                    results.append({"id": application_id, "result": "already_processed", "status": current[application_id]})
+                else:
+                    results.append({"id": application_id, "result": "not_found", "status": None})
+            
+            return {
+                "status": new_status.value,
+                "updated": len(updated),
+                "results": results
+            }
+            
+        except Exception as e:
+            if hasattr(e, 'status_code'):
+                raise e
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"申請一括審査エラー: {str(e)}"
+            )
+
@@ -1,9 +1,16 @@
-from app.core.supabase import supabase
+from app.core.supabase import supabase, execute_async
 from app.schemas.auth import UserCreate, Token
 from fastapi import HTTPException, status
+from starlette.concurrency import run_in_threadpool
 from typing import Dict, Any
 
 
+# /auth/me のレスポンスに必要な列
+ACCOUNT_COLUMNS = (
+    "id, email, name, phone, address, is_imabari_resident, residence_years, status, avatar_url"
+)
+
+
 class AuthService:
     @staticmethod
     async def register_user(user_data: UserCreate) -> Dict[str, Any]:
@@ -13,8 +20,8 @@ class AuthService:
         2. usersテーブルにユーザー情報保存
         """
         try:
-            # Supabase Authでユーザー作成
-            auth_response = supabase.auth.sign_up({
+            # Supabase Authでユーザー作成（Authサーバーでのパスワードのハッシュ化を待つ間もイベントループを止めない）
+            auth_response = await run_in_threadpool(supabase.auth.sign_up, {
                 "email": user_data.email,
                 "password": user_data.password
             })
@@ -63,8 +70,8 @@ class AuthService:
         ユーザーログイン
         """
         try:
-            # Supabase Authでログイン
-            response = supabase.auth.sign_in_with_password({
+            # Supabase Authでログイン（Authサーバーでのパスワードの検証を待つ間もイベントループを止めない）
+            response = await run_in_threadpool(supabase.auth.sign_in_with_password, {
                 "email": email,
                 "password": password
             })
@@ -76,7 +83,7 @@ class AuthService:
                 )
             
             # ユーザーのステータス確認
-            user_data = supabase.table("users").select("status").eq("email", email).execute()
+            user_data = await execute_async(supabase.table("users").select("status").eq("email", email))
             
             if user_data.data and user_data.data[0]["status"] == "suspended":
                 # ログアウト
@@ -107,7 +114,7 @@ class AuthService:
         """
         try:
             # Supabase Authでトークンリフレッシュ
-            response = supabase.auth.refresh_session(refresh_token)
+            response = await run_in_threadpool(supabase.auth.refresh_session, refresh_token)
             
             if not response.session:
                 raise HTTPException(
@@ -141,4 +148,28 @@ class AuthService:
             
         except Exception as e:
             # ログアウトエラーは無視してOKを返す
-            return {"message": "ログアウトしました"}
\ No newline at end of file
+            return {"message": "ログアウトしました"}
+    
+    @staticmethod
+    async def get_account(user_id: str) -> Dict[str, Any]:
+        """
+        ログイン中のユーザーの登録情報を取得
+        """
+        try:
+            result = supabase.table("users").select(ACCOUNT_COLUMNS).eq("id", user_id).execute()
+            
+            if not result.data:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="ユーザー情報が見つかりません"
+                )
+            
+            return result.data[0]
+            
+        except Exception as e:
+            if hasattr(e, 'status_code'):
+                raise e
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"ユーザー情報取得エラー: {str(e)}"
+            )
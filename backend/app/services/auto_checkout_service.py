@@ -0,0 +1,85 @@
+from app.core.supabase import supabase
+from app.core.config import settings
+from app.core.rows import parse_timestamp
+from app.services.announcement_service import AnnouncementService
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, Any, List, Optional
+from zoneinfo import ZoneInfo
+
+
+# 閉園時に自動で退場させた記録の退場理由
+AUTO_CLOSED = "auto_closed"
+
+
+class AutoCheckoutService:
+    @staticmethod
+    def park_timezone() -> ZoneInfo:
+        return ZoneInfo(settings.PARK_TIMEZONE)
+
+    @staticmethod
+    async def closing_time(day: date) -> datetime:
+        """
+        その日の閉園時刻を返す（営業時間・特別休業日から求める）
+        休園日は営業時間がないため、その日の終わりを閉園時刻とする
+        """
+        tz = AutoCheckoutService.park_timezone()
+        end_of_day = datetime.combine(day + timedelta(days=1), time.min, tz)
+
+        holidays = await AnnouncementService.get_special_holidays(day, day)
+        if holidays:
+            return end_of_day
+
+        # business_hours.day_of_week は 0=日曜
+        day_of_week = (day.weekday() + 1) % 7
+        hours: Optional[Dict[str, Any]] = next(
+            (h for h in await AnnouncementService.get_business_hours() if h["day_of_week"] == day_of_week),
+            None
+        )
+        if not hours or hours.get("is_closed") or not hours.get("close_time"):
+            return end_of_day
+        return datetime.combine(day, time.fromisoformat(str(hours["close_time"])), tz)
+
+    @staticmethod
+    def _close(start: datetime, end: datetime, exit_time: datetime) -> int:
+        """
+        入場時刻が [start, end) で退場していない記録を1回の更新でまとめて退場させる
+        退場していないことを更新の条件にしているため、複数のインスタンスで同時に実行しても二重に処理しない
+        """
+        result = supabase.table("entry_logs").update({
+            "exit_time": exit_time.isoformat(),
+            "exit_reason": AUTO_CLOSED
+        }).is_("exit_time", None).gte("entry_time", start.isoformat()).lt("entry_time", end.isoformat()).execute()
+        return len(result.data or [])
+
+    @staticmethod
+    async def run(now: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        閉園時刻（＋猶予）を過ぎても退場していない入場記録を自動で退場させる（定期ジョブ用）
+        閉園前の入場は閉園時刻、閉園後の入場は実行時刻を退場時刻とする
+        """
+        now = now or datetime.now(timezone.utc)
+        tz = AutoCheckoutService.park_timezone()
+        grace = timedelta(minutes=settings.AUTO_CHECKOUT_GRACE_MINUTES)
+
+        # 退場していない記録は少数のため、入場日だけを取得して日ごとにまとめる
+        result = supabase.table("entry_logs").select("entry_time").is_("exit_time", None).execute()
+        days: List[date] = sorted({parse_timestamp(row["entry_time"]).astimezone(tz).date() for row in result.data or []})
+
+        closed = 0
+        waiting_days = 0
+        for day in days:
+            closing = await AutoCheckoutService.closing_time(day)
+            if now < closing + grace:
+                waiting_days += 1
+                continue
+            start = datetime.combine(day, time.min, tz)
+            end = datetime.combine(day + timedelta(days=1), time.min, tz)
+            closed += AutoCheckoutService._close(start, closing, closing)
+            if closing < end:
+                closed += AutoCheckoutService._close(closing, end, now)
+
+        return {
+            "open": len(result.data or []),
+            "closed": closed,
+            "waiting_days": waiting_days,
+        }
@@ -1,10 +1,28 @@
 from app.core.supabase import supabase
+from app.core.conditional_write import update_where, require_all
 from app.schemas.dog import DogCreate, DogUpdate, VaccinationRecordCreate
+from app.services.vaccination_eligibility_service import VaccinationEligibilityService
 from fastapi import HTTPException, status
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 
 
+# 犬情報のレスポンスに必要な列
+DOG_COLUMNS = (
+    "id, user_id, name, breed, weight, gender, birth_date, personality, photo_url, "
+    "is_active, created_at, updated_at"
+)
+
+# ワクチン接種記録のレスポンスに必要な列
+VACCINATION_COLUMNS = (
+    "id, dog_id, vaccine_type, vaccination_date, certificate_url, next_vaccination_date, "
+    "created_at, updated_at"
+)
+
+# 犬情報とワクチン接種記録
+DOG_WITH_VACCINATIONS_SELECT = f"{DOG_COLUMNS}, vaccination_records({VACCINATION_COLUMNS})"
+
+
 class DogService:
     @staticmethod
     async def create_dog(dog_data: DogCreate, user_id: str) -> Dict[str, Any]:
@@ -47,7 +65,7 @@ class DogService:
         try:
             # 犬情報とワクチン接種記録を結合して取得
             result = supabase.table("dogs").select(
-                "*, vaccination_records(*)"
+                DOG_WITH_VACCINATIONS_SELECT
             ).eq("user_id", user_id).eq("is_active", True).execute()
             
             return result.data or []
@@ -65,7 +83,7 @@ class DogService:
         """
         try:
             result = supabase.table("dogs").select(
-                "*, vaccination_records(*)"
+                DOG_WITH_VACCINATIONS_SELECT
             ).eq("id", dog_id).eq("user_id", user_id).execute()
             
             if not result.data:
@@ -90,29 +108,17 @@ class DogService:
         犬情報を更新
         """
         try:
-            # 所有者確認
-            existing = supabase.table("dogs").select("id").eq("id", dog_id).eq("user_id", user_id).execute()
-            
-            if not existing.data:
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail="この犬情報を更新する権限がありません"
-                )
-            
             # 更新データの準備
             update_data = dog_data.dict(exclude_none=True)
             if update_data.get("birth_date"):
                 update_data["birth_date"] = update_data["birth_date"].isoformat()
             
-            result = supabase.table("dogs").update(update_data).eq("id", dog_id).execute()
-            
-            if not result.data:
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail="犬情報の更新に失敗しました"
-                )
-            
-            return result.data[0]
+            # 所有者の犬だけを更新（更新されなければ、犬がなければ404・他人の犬なら403）
+            return await update_where(
+                "dogs", update_data, {"id": dog_id, "user_id": user_id},
+                "この犬情報を更新する権限がありません", status.HTTP_403_FORBIDDEN,
+                not_found_detail="犬情報が見つかりません"
+            )
             
         except Exception as e:
             if hasattr(e, 'status_code'):
@@ -128,23 +134,12 @@ class DogService:
         犬情報を削除（論理削除）
         """
         try:
-            # 所有者確認
-            existing = supabase.table("dogs").select("id").eq("id", dog_id).eq("user_id", user_id).execute()
-            
-            if not existing.data:
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail="この犬情報を削除する権限がありません"
-                )
-            
-            # 論理削除（is_activeをfalseに設定）
-            result = supabase.table("dogs").update({"is_active": False}).eq("id", dog_id).execute()
-            
-            if not result.data:
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail="犬情報の削除に失敗しました"
-                )
+            # 論理削除（所有者の犬だけ is_active を false に設定）
+            await update_where(
+                "dogs", {"is_active": False}, {"id": dog_id, "user_id": user_id},
+                "この犬情報を削除する権限がありません", status.HTTP_403_FORBIDDEN,
+                not_found_detail="犬情報が見つかりません"
+            )
             
             return {"message": "犬情報を削除しました"}
             
@@ -166,14 +161,11 @@ class DogService:
         ワクチン接種記録を追加
         """
         try:
-            # 犬の所有者確認
-            dog = supabase.table("dogs").select("id").eq("id", dog_id).eq("user_id", user_id).execute()
-            
-            if not dog.data:
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail="このワクチン記録を追加する権限がありません"
-                )
+            # 犬の所有者確認（INSERTには条件を付けられないため事前に確認する）
+            await require_all(
+                "dogs", [dog_id], {"user_id": user_id}, "このワクチン記録を追加する権限がありません",
+                not_found_detail="犬情報が見つかりません"
+            )
             
             # ワクチン記録データの準備
             vaccination = {
@@ -195,6 +187,9 @@ class DogService:
                     detail="ワクチン記録の追加に失敗しました"
                 )
             
+            # 入場ゲートの接種判定を更新
+            VaccinationEligibilityService.refresh([dog_id])
+            
             return result.data[0]
             
         except Exception as e:
@@ -211,8 +206,12 @@ class DogService:
         犬のワクチン接種記録を取得
         """
         try:
-            # 犬の所有者確認
-            dog = supabase.table("dogs").select("id").eq("id", dog_id).eq("user_id", user_id).execute()
+            # 犬の所有者確認と接種記録の取得を1クエリで行う
+            dog = supabase.table("dogs").select(
+                f"id, vaccination_records({VACCINATION_COLUMNS})"
+            ).eq("id", dog_id).eq("user_id", user_id).order(
+                "vaccination_date", desc=True, foreign_table="vaccination_records"
+            ).execute()
             
             if not dog.data:
                 raise HTTPException(
@@ -220,9 +219,7 @@ class DogService:
                     detail="このワクチン記録を表示する権限がありません"
                 )
             
-            result = supabase.table("vaccination_records").select("*").eq("dog_id", dog_id).order("vaccination_date", desc=True).execute()
-            
-            return result.data or []
+            return dog.data[0]["vaccination_records"] or []
             
         except Exception as e:
             if hasattr(e, 'status_code'):
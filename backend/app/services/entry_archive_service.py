@@ -0,0 +1,233 @@
+from app.core.supabase import supabase
+from app.core.config import settings
+from app.core.rows import parse_timestamp
+from collections import OrderedDict
+from datetime import date, datetime, time, timezone
+from typing import Dict, Any, List, Optional
+import io
+
+
+# アーカイブするParquetファイルの列（entry_logs の全列）
+ARCHIVE_COLUMNS = "id, user_id, dog_id, entry_time, exit_time, exit_reason, checked_by, created_at"
+ARCHIVE_LIST_COLUMNS = "month, storage_path, row_count"
+
+# 月の記録を取得する1回あたりの件数（PostgRESTの最大件数以下）
+PAGE_SIZE = 1000
+
+# 読み込んだアーカイブを保持する月数（インスタンス内のキャッシュ）
+ARCHIVE_CACHE_SIZE = 12
+_archive_cache: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+
+_TIMESTAMP_COLUMNS = ("entry_time", "exit_time", "created_at")
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:  # pyarrow は任意（アーカイブの作成・読み込みにだけ使う）
+        raise RuntimeError("入退場記録のアーカイブには pyarrow が必要です（pip install pyarrow）")
+    return pyarrow
+
+
+def month_start(value: date) -> date:
+    return value.replace(day=1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_bounds(month: date) -> tuple:
+    """
+    月の範囲 [開始, 翌月の開始) をUTCで返す（パーティションの範囲と同じ）
+    """
+    start = datetime.combine(month_start(month), time.min, timezone.utc)
+    return start, datetime.combine(add_months(month_start(month), 1), time.min, timezone.utc)
+
+
+def storage_path(month: date) -> str:
+    return f"entry_logs/{month.year:04d}/{month.month:02d}.parquet"
+
+
+class EntryArchiveService:
+    @staticmethod
+    def hot_cutoff(today: Optional[date] = None) -> date:
+        """
+        パーティションに残す最も古い月（これより前の月はアーカイブの対象）
+        """
+        today = today or datetime.now(timezone.utc).date()
+        return add_months(month_start(today), -settings.ENTRY_LOG_HOT_MONTHS)
+
+    @staticmethod
+    def ensure_partitions(today: date, months_ahead: Optional[int] = None) -> List[str]:
+        """
+        今月から数か月先までのパーティションを作成（作成済みなら何もしない）
+        """
+        months_ahead = settings.ENTRY_LOG_PARTITIONS_AHEAD if months_ahead is None else months_ahead
+        return [
+            supabase.rpc("ensure_entry_log_partition", {
+                "p_month": add_months(month_start(today), offset).isoformat()
+            }).execute().data
+            for offset in range(months_ahead + 1)
+        ]
+
+    @staticmethod
+    def _month_rows(month: date) -> List[Dict[str, Any]]:
+        start, end = month_bounds(month)
+        rows: List[Dict[str, Any]] = []
+        while True:
+            result = supabase.table("entry_logs").select(ARCHIVE_COLUMNS).gte(
+                "entry_time", start.isoformat()
+            ).lt("entry_time", end.isoformat()).order("entry_time").order("id").range(
+                len(rows), len(rows) + PAGE_SIZE - 1
+            ).execute()
+            page = result.data or []
+            rows.extend(page)
+            if len(page) < PAGE_SIZE:
+                return rows
+
+    @staticmethod
+    def to_parquet(rows: List[Dict[str, Any]]) -> bytes:
+        """
+        入退場記録をParquet（zstd圧縮）に変換
+        """
+        pa = _pyarrow()
+        timestamp = pa.timestamp("us", tz="UTC")
+        schema = pa.schema([
+            ("id", pa.string()),
+            ("user_id", pa.string()),
+            ("dog_id", pa.string()),
+            ("entry_time", timestamp),
+            ("exit_time", timestamp),
+            ("exit_reason", pa.string()),
+            ("checked_by", pa.string()),
+            ("created_at", timestamp),
+        ])
+        columns = {
+            name: [
+                parse_timestamp(row[name]) if name in _TIMESTAMP_COLUMNS and row.get(name) else row.get(name)
+                for row in rows
+            ]
+            for name in schema.names
+        }
+        buffer = io.BytesIO()
+        pa.parquet.write_table(pa.table(columns, schema=schema), buffer, compression="zstd")
+        return buffer.getvalue()
+
+    @staticmethod
+    def from_parquet(data: bytes) -> List[Dict[str, Any]]:
+        """
+        Parquetから入退場記録を読み込む（時刻はAPIと同じISO形式の文字列にする）
+        """
+        pa = _pyarrow()
+        rows = pa.parquet.read_table(io.BytesIO(data)).to_pylist()
+        for row in rows:
+            for name in _TIMESTAMP_COLUMNS:
+                if row.get(name) is not None:
+                    row[name] = row[name].isoformat()
+        return rows
+
+    @staticmethod
+    def archived_months(start: Optional[date] = None, end: Optional[date] = None) -> List[Dict[str, Any]]:
+        """
+        アーカイブ済みの月を新しい順に取得（start〜end の日付を含む月のみ）
+        """
+        query = supabase.table("entry_log_archives").select(ARCHIVE_LIST_COLUMNS)
+        if start:
+            query = query.gte("month", month_start(start).isoformat())
+        if end:
+            query = query.lte("month", month_start(end).isoformat())
+        return query.order("month", desc=True).execute().data or []
+
+    @staticmethod
+    def read_archived(path: str) -> List[Dict[str, Any]]:
+        """
+        アーカイブしたParquetファイルを読み込む（アーカイブは書き換えないためインスタンス内でキャッシュする）
+        """
+        if path in _archive_cache:
+            _archive_cache.move_to_end(path)
+        else:
+            data = supabase.storage.from_(settings.ENTRY_LOG_ARCHIVE_BUCKET).download(path)
+            _archive_cache[path] = EntryArchiveService.from_parquet(data)
+            while len(_archive_cache) > ARCHIVE_CACHE_SIZE:
+                _archive_cache.popitem(last=False)
+        return [dict(row) for row in _archive_cache[path]]
+
+    @staticmethod
+    async def archive(today: Optional[date] = None) -> Dict[str, int]:
+        """
+        ENTRY_LOG_HOT_MONTHS か月より前の月をParquetに書き出してストレージに保存し、パーティションを削除する（定期ジョブ用）
+        書き出し後に記録が変わっていた月は削除せず、次回の実行で書き出し直す
+        """
+        today = today or datetime.now(timezone.utc).date()
+        cutoff = EntryArchiveService.hot_cutoff(today)
+        partitions = EntryArchiveService.ensure_partitions(today)
+
+        archived = 0
+        archived_rows = 0
+        skipped = 0
+        while True:
+            oldest = supabase.table("entry_logs").select("entry_time").lt(
+                "entry_time", datetime.combine(cutoff, time.min, timezone.utc).isoformat()
+            ).order("entry_time").limit(1).execute()
+            if not oldest.data:
+                break
+
+            month = month_start(parse_timestamp(oldest.data[0]["entry_time"]).astimezone(timezone.utc).date())
+            rows = EntryArchiveService._month_rows(month)
+            path = storage_path(month)
+            supabase.storage.from_(settings.ENTRY_LOG_ARCHIVE_BUCKET).upload(
+                path,
+                EntryArchiveService.to_parquet(rows),
+                {"content-type": "application/vnd.apache.parquet", "upsert": "true"}
+            )
+            _archive_cache.pop(path, None)
+
+            done = supabase.rpc("archive_entry_log_partition", {
+                "p_month": month.isoformat(),
+                "p_storage_path": path,
+                "p_row_count": len(rows)
+            }).execute().data
+            if not done:
+                # 古い月から順に処理するため、この月が残っている間は先に進まない
+                skipped += 1
+                break
+            archived += 1
+            archived_rows += len(rows)
+
+        return {
+            "partitions": len(partitions),
+            "archived_months": archived,
+            "archived_rows": archived_rows,
+            "skipped_months": skipped,
+        }
+
+    @staticmethod
+    def read_range(
+        user_id: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        アーカイブ済みの記録を新しい順に取得（入場時刻が [start, end] のもの、limit 件に達したら残りの月は読まない）
+        """
+        rows: List[Dict[str, Any]] = []
+        months = EntryArchiveService.archived_months(
+            start.astimezone(timezone.utc).date() if start else None,
+            end.astimezone(timezone.utc).date() if end else None
+        )
+        for archive in months:
+            for row in EntryArchiveService.read_archived(archive["storage_path"]):
+                entry_time = parse_timestamp(row["entry_time"])
+                if user_id and row["user_id"] != user_id:
+                    continue
+                if (start and entry_time < start) or (end and entry_time > end):
+                    continue
+                rows.append(row)
+            if limit is not None and len(rows) >= limit:
+                break
+        rows.sort(key=lambda row: parse_timestamp(row["entry_time"]), reverse=True)
+        return rows[:limit] if limit is not None else rows
@@ -1,26 +1,99 @@
-from app.core.supabase import supabase
+from app.core.supabase import supabase, execute_async
+from app.core.singleflight import single_flight
+from app.core.conditional_write import require_all
+from app.core.rows import EntryRow, parse_timestamp
 from app.services.qr_service import QRService
+from app.services.vaccination_eligibility_service import VaccinationEligibilityService
+from app.services.auto_checkout_service import AUTO_CLOSED
+from app.services.entry_archive_service import EntryArchiveService
+from app.services.loaders import Loaders
+from app.services.user_card_service import UserCardService
 from app.schemas.entry import QRCodeRequest, CheckInRequest, CheckOutRequest
 from fastapi import HTTPException, status
 from typing import Dict, Any, List, Optional
-from datetime import datetime, date, timedelta
+from datetime import datetime, date, time, timedelta, timezone
+import asyncio
+import csv
+import io
+
+
+# 入退場記録のレスポンスに必要な列（犬の名前と犬種を埋め込む、利用者名は利用者カードから付ける）
+ENTRY_LOG_SELECT = (
+    "id, user_id, dog_id, entry_time, exit_time, checked_by, created_at, "
+    "dogs!inner(name, breed)"
+)
+
+# CSVエクスポートの列
+EXPORT_COLUMNS = [
+    "id", "user_id", "user_name", "dog_id", "dog_name", "dog_breed",
+    "entry_time", "exit_time", "exit_reason", "stay_minutes"
+]
+EXPORT_PAGE_SIZE = 1000
+
+# CSVエクスポートで取得する列（利用者名・犬の情報は記録ごとに結合せず、IDごとに1回だけ引く）
+EXPORT_SELECT = "id, user_id, dog_id, entry_time, exit_time, exit_reason"
 
 
 class EntryService:
+    @staticmethod
+    def _flatten(entry: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        埋め込んだ犬の情報を平坦化
+        """
+        dogs = entry.pop("dogs", None) or {}
+        entry["dog_name"] = dogs.get("name")
+        entry["dog_breed"] = dogs.get("breed")
+        return entry
+
+    @staticmethod
+    def _with_stay_minutes(entry: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        滞在時間（分）を計算
+        """
+        if entry.get("exit_time"):
+            duration = parse_timestamp(entry["exit_time"]) - parse_timestamp(entry["entry_time"])
+            entry["stay_minutes"] = int(duration.total_seconds() / 60)
+        else:
+            entry["stay_minutes"] = None
+        return entry
+
+    @staticmethod
+    async def _attach_names(entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        結合せずに取得した記録に利用者名（利用者カード）・犬の名前と犬種を付ける
+        リクエスト内のローダーでまとめて問い合わせ、同じリクエストで取得済みの利用者・犬は問い合わせない
+        """
+        dog_ids = list({entry["dog_id"] for entry in entries if entry.get("dog_id")})
+        _, dog_rows = await asyncio.gather(
+            UserCardService.hydrate(entries, avatar=False),
+            Loaders.dogs().load_many(dog_ids)
+        )
+        dogs = dict(zip(dog_ids, dog_rows))
+        for entry in entries:
+            entry["dogs"] = dogs.get(entry.get("dog_id"))
+            EntryService._flatten(entry)
+        return entries
+
+    @staticmethod
+    def _range(start_date: Optional[date], end_date: Optional[date]):
+        """
+        日付の範囲を入場時刻の範囲（UTC）にする（終了日は23:59:59まで含める）
+        """
+        start = datetime.combine(start_date, time.min, timezone.utc) if start_date else None
+        end = datetime.combine(end_date, time.max, timezone.utc) if end_date else None
+        return start, end
+    
     @staticmethod
     async def generate_qr_code(user_id: str, dog_ids: List[str]) -> Dict[str, Any]:
         """
         入場用QRコードを生成
         """
         try:
-            # 犬の所有権を確認
-            for dog_id in dog_ids:
-                dog = supabase.table("dogs").select("id").eq("id", dog_id).eq("user_id", user_id).execute()
-                if not dog.data:
-                    raise HTTPException(
-                        status_code=status.HTTP_403_FORBIDDEN,
-                        detail=f"犬ID {dog_id} にアクセスする権限がありません"
-                    )
+            # 犬の所有権を1クエリでまとめて確認
+            await require_all(
+                "dogs", dog_ids, {"user_id": user_id}, "犬ID {ids} にアクセスする権限がありません",
+                not_found_detail="犬ID {ids} が見つかりません"
+            )
             
             # QRコードを生成
             return await QRService.generate_entry_qr(user_id, dog_ids)
@@ -44,6 +117,14 @@ class EntryService:
             user_id = payload["user_id"]
             dog_ids = payload["dog_ids"]
             
+            # ワクチン接種の有効期限を確認（判定はキャッシュから、未取得の犬だけまとめて問い合わせ）
+            ineligible = VaccinationEligibilityService.ineligible(dog_ids)
+            if ineligible:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"犬ID {', '.join(ineligible)} のワクチン接種が確認できません（未登録または期限切れ）"
+                )
+            
             # 既に入場済みでないか確認
             for dog_id in dog_ids:
                 existing = supabase.table("entry_logs").select("id").eq(
@@ -90,27 +171,21 @@ class EntryService:
     async def check_out(entry_log_ids: List[str], admin_id: str) -> Dict[str, Any]:
         """
         退場処理
+        退場していない記録だけを1回の条件付きUPDATEで退場させ、結果は更新された行から組み立てる
+        （閉園時の自動退場と同時に実行されても、先に記録された退場時刻を上書きしない）
         """
         try:
             exit_time = datetime.utcnow().isoformat()
-            updated_count = 0
             
-            for log_id in entry_log_ids:
-                # 入場記録が存在し、まだ退場していないことを確認
-                existing = supabase.table("entry_logs").select("id").eq(
-                    "id", log_id
-                ).is_("exit_time", None).execute()
-                
-                if not existing.data:
-                    continue
-                
-                # 退場時刻を記録
-                result = supabase.table("entry_logs").update({
-                    "exit_time": exit_time
-                }).eq("id", log_id).execute()
-                
-                if result.data:
-                    updated_count += 1
+            result = await execute_async(
+                supabase.table("entry_logs").update({
+                    "exit_time": exit_time,
+                    "exit_reason": "scanned"
+                }).in_("id", list(dict.fromkeys(entry_log_ids))).is_("exit_time", None)
+            )
+            
+            checked_out_ids = [row["id"] for row in result.data or []]
+            updated_count = len(checked_out_ids)
             
             if updated_count == 0:
                 raise HTTPException(
@@ -123,7 +198,8 @@ class EntryService:
             
             return {
                 "status": "success",
-                "message": f"{updated_count}件の退場処理が完了しました"
+                "message": f"{updated_count}件の退場処理が完了しました",
+                "entry_log_ids": checked_out_ids
             }
             
         except Exception as e:
@@ -142,16 +218,12 @@ class EntryService:
         try:
             # 退場時刻がnullの記録を取得
             result = supabase.table("entry_logs").select(
-                "*, users!inner(name), dogs!inner(name, breed)"
+                ENTRY_LOG_SELECT
             ).is_("exit_time", None).order("entry_time", desc=True).execute()
             
-            visitors = result.data or []
-            
-            # データの整形
-            for visitor in visitors:
-                visitor["user_name"] = visitor["users"]["name"] if visitor.get("users") else None
-                visitor["dog_name"] = visitor["dogs"]["name"] if visitor.get("dogs") else None
-                visitor["dog_breed"] = visitor["dogs"]["breed"] if visitor.get("dogs") else None
+            visitors = [EntryService._flatten(visitor) for visitor in result.data or []]
+            await UserCardService.hydrate(visitors, avatar=False)
+            visitors = [EntryRow.decode(visitor) for visitor in visitors]
             
             return {
                 "count": len(visitors),
@@ -170,13 +242,13 @@ class EntryService:
         start_date: Optional[date] = None,
         end_date: Optional[date] = None,
         limit: int = 50
-    ) -> List[Dict[str, Any]]:
+    ) -> List[EntryRow]:
         """
-        入退場履歴を取得
+        入退場履歴を取得（時刻を datetime にした EntryRow の新しい順）
         """
         try:
             query = supabase.table("entry_logs").select(
-                "*, users!inner(name), dogs!inner(name, breed)"
+                ENTRY_LOG_SELECT
             )
             
             # フィルタ条件
@@ -194,22 +266,19 @@ class EntryService:
             # 最新順で取得
             result = query.order("entry_time", desc=True).limit(limit).execute()
             
-            history = result.data or []
+            rows = await UserCardService.hydrate(
+                [EntryService._flatten(entry) for entry in result.data or []], avatar=False
+            )
+            history = [EntryRow.decode(row) for row in rows]
             
-            # データの整形
-            for entry in history:
-                entry["user_name"] = entry["users"]["name"] if entry.get("users") else None
-                entry["dog_name"] = entry["dogs"]["name"] if entry.get("dogs") else None
-                entry["dog_breed"] = entry["dogs"]["breed"] if entry.get("dogs") else None
-                
-                # 滞在時間を計算
-                if entry.get("exit_time"):
-                    entry_time = datetime.fromisoformat(entry["entry_time"].replace('Z', '+00:00'))
-                    exit_time = datetime.fromisoformat(entry["exit_time"].replace('Z', '+00:00'))
-                    duration = exit_time - entry_time
-                    entry["stay_minutes"] = int(duration.total_seconds() / 60)
-                else:
-                    entry["stay_minutes"] = None
+            # 保持期間より前の日付から指定されたときだけ、足りない分をアーカイブ済みの月（古い記録）から読む
+            # （期間の指定がなければアーカイブは読まない。全月のダウンロードを避けるため）
+            if len(history) < limit and start_date and start_date < EntryArchiveService.hot_cutoff():
+                start, end = EntryService._range(start_date, end_date)
+                archived = EntryArchiveService.read_range(user_id, start, end, limit - len(history))
+                history.extend(EntryRow.decode(row) for row in await EntryService._attach_names(archived))
+                history.sort(key=lambda entry: entry.entry_time, reverse=True)
+                history = history[:limit]
             
             return history
             
@@ -220,6 +289,47 @@ class EntryService:
             )
     
     @staticmethod
+    async def export_entry_history(
+        start_date: date,
+        end_date: date,
+        user_id: Optional[str] = None
+    ) -> str:
+        """
+        入退場履歴をCSVで出力（アーカイブ済みの月も含める）
+        """
+        try:
+            start, end = EntryService._range(start_date, end_date)
+            entries: List[Dict[str, Any]] = []
+            while True:
+                query = supabase.table("entry_logs").select(EXPORT_SELECT).gte("entry_time", start.isoformat()).lte("entry_time", end.isoformat())
+                if user_id:
+                    query = query.eq("user_id", user_id)
+                page = query.order("entry_time", desc=True).order("id").range(
+                    len(entries), len(entries) + EXPORT_PAGE_SIZE - 1
+                ).execute().data or []
+                entries.extend(page)
+                if len(page) < EXPORT_PAGE_SIZE:
+                    break
+            
+            entries.extend(EntryArchiveService.read_range(user_id, start, end))
+            await EntryService._attach_names(entries)
+            entries.sort(key=lambda entry: parse_timestamp(entry["entry_time"]), reverse=True)
+            
+            output = io.StringIO()
+            writer = csv.DictWriter(output, fieldnames=EXPORT_COLUMNS, extrasaction="ignore")
+            writer.writeheader()
+            for entry in entries:
+                writer.writerow(EntryService._with_stay_minutes(entry))
+            return output.getvalue()
+            
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"履歴エクスポートエラー: {str(e)}"
+            )
+    
+    @staticmethod
+    @single_flight
     async def get_visitor_statistics(target_date: Optional[date] = None) -> Dict[str, Any]:
         """
         利用統計を取得
@@ -237,17 +347,19 @@ class EntryService:
                 "entry_time", start_datetime.isoformat()
             ).lte("entry_time", end_datetime.isoformat())
             
-            total_result = total_query.execute()
+            total_result = await execute_async(total_query)
             total_today = total_result.count if hasattr(total_result, 'count') else 0
             
             # 現在の利用者数
-            current_result = supabase.table("entry_logs").select("id", count="exact").is_("exit_time", None).execute()
+            current_result = await execute_async(
+                supabase.table("entry_logs").select("id", count="exact").is_("exit_time", None)
+            )
             current_visitors = current_result.count if hasattr(current_result, 'count') else 0
             
             # 今日の入退場記録を取得して統計を計算
-            logs_result = supabase.table("entry_logs").select("entry_time, exit_time").gte(
+            logs_result = await execute_async(supabase.table("entry_logs").select("entry_time, exit_time, exit_reason").gte(
                 "entry_time", start_datetime.isoformat()
-            ).lte("entry_time", end_datetime.isoformat()).execute()
+            ).lte("entry_time", end_datetime.isoformat()))
             
             logs = logs_result.data or []
             
@@ -256,13 +368,13 @@ class EntryService:
             stay_times = []
             
             for log in logs:
-                entry_time = datetime.fromisoformat(log["entry_time"].replace('Z', '+00:00'))
+                entry_time = parse_timestamp(log["entry_time"])
                 hour = entry_time.hour
                 hour_counts[hour] = hour_counts.get(hour, 0) + 1
                 
-                # 滞在時間を計算
-                if log.get("exit_time"):
-                    exit_time = datetime.fromisoformat(log["exit_time"].replace('Z', '+00:00'))
+                # 滞在時間を計算（閉園時に自動で退場させた記録は実際の滞在時間ではないため除く）
+                if log.get("exit_time") and log.get("exit_reason") != AUTO_CLOSED:
+                    exit_time = parse_timestamp(log["exit_time"])
                     stay_minutes = (exit_time - entry_time).total_seconds() / 60
                     stay_times.append(stay_minutes)
             
@@ -1,11 +1,84 @@
-from app.core.supabase import supabase
+from app.core.supabase import supabase, execute_async
+from app.core.singleflight import single_flight
+from app.core.conditional_write import update_where
+from app.core.rows import parse_timestamp
+from app.services.user_card_service import UserCardService
 from app.schemas.event import EventCreate, EventUpdate, EventRegistrationStatus
 from fastapi import HTTPException, status
 from typing import Dict, Any, List, Optional
-from datetime import datetime, date
+from datetime import datetime, date, timezone
+
+
+# イベントのレスポンスに必要な列（参加者数・登録状態は別途付与）
+EVENT_COLUMNS = (
+    "id, title, description, event_date, location, max_participants, registration_deadline, "
+    "created_by, created_at, updated_at"
+)
+
+# イベントと参加登録中の件数（registered.status で絞り込む）
+EVENT_WITH_COUNT_SELECT = f"{EVENT_COLUMNS}, registered:event_registrations(count)"
+
+# ログイン時は自分の登録も埋め込む（mine.user_id で絞り込む）
+EVENT_WITH_STATE_SELECT = f"{EVENT_WITH_COUNT_SELECT}, mine:event_registrations(id, status)"
 
 
 class EventService:
+    @staticmethod
+    def _with_registration_state(event: Dict[str, Any], registration_count: int, is_registered: bool) -> Dict[str, Any]:
+        """
+        参加者数・登録状態と登録可能か（定員・締切・開催日）を付与
+        """
+        event["registration_count"] = registration_count
+        event["is_registered"] = is_registered
+        
+        # 登録可能かチェック（DBの日時はタイムゾーン付き）
+        now = datetime.now(timezone.utc)
+        event["can_register"] = True
+        
+        # 定員チェック
+        if event.get("max_participants"):
+            if registration_count >= event["max_participants"]:
+                event["can_register"] = False
+        
+        # 締切チェック
+        if event.get("registration_deadline"):
+            deadline = parse_timestamp(event["registration_deadline"])
+            if now > deadline:
+                event["can_register"] = False
+        
+        # イベント日チェック
+        event_date = parse_timestamp(event["event_date"])
+        if now > event_date:
+            event["can_register"] = False
+        
+        return event
+    
+    @staticmethod
+    def _select_with_state(current_user_id: Optional[str] = None, count: Optional[str] = None) -> Any:
+        """
+        イベントと登録状況（参加者数・ログイン時は自分の登録）を1クエリで取得するクエリ
+        """
+        select = EVENT_WITH_STATE_SELECT if current_user_id else EVENT_WITH_COUNT_SELECT
+        query = supabase.table("events").select(select, count=count).eq(
+            "registered.status", EventRegistrationStatus.REGISTERED.value
+        )
+        if current_user_id:
+            query = query.eq("mine.user_id", current_user_id)
+        return query
+    
+    @staticmethod
+    def _from_state_row(event: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        _select_with_state の1行から埋め込みを取り除き、登録状況を付与
+        """
+        registered = event.pop("registered", None) or [{"count": 0}]
+        mine = event.pop("mine", None) or []
+        return EventService._with_registration_state(
+            event,
+            registered[0]["count"],
+            any(r["status"] == EventRegistrationStatus.REGISTERED.value for r in mine)
+        )
+    
     @staticmethod
     async def create_event(event_data: EventCreate, admin_id: str) -> Dict[str, Any]:
         """
@@ -23,7 +96,7 @@ class EventService:
             if event.get("registration_deadline"):
                 event["registration_deadline"] = event["registration_deadline"].isoformat()
             
-            result = supabase.table("events").insert(event).execute()
+            result = await execute_async(supabase.table("events").insert(event))
             
             if not result.data:
                 raise HTTPException(
@@ -45,6 +118,7 @@ class EventService:
             )
     
     @staticmethod
+    @single_flight
     async def get_events(
         start_date: Optional[date] = None,
         end_date: Optional[date] = None,
@@ -56,8 +130,8 @@ class EventService:
         イベント一覧を取得
         """
         try:
-            # 基本クエリ
-            query = supabase.table("events").select("*", count="exact")
+            # 基本クエリ（参加者数と登録状態も同じクエリで取得）
+            query = EventService._select_with_state(current_user_id, count="exact")
             
             # 日付フィルタ
             if start_date:
@@ -66,52 +140,9 @@ class EventService:
                 query = query.lte("event_date", end_date.isoformat())
             
             # ページネーションと並び順
-            result = query.order("event_date").range(offset, offset + limit - 1).execute()
+            result = await execute_async(query.order("event_date").range(offset, offset + limit - 1))
             
-            events = result.data or []
-            
-            # 各イベントに参加者数と登録状態を追加
-            for event in events:
-                event_id = event["id"]
-                
-                # 参加登録者数
-                registrations = supabase.table("event_registrations").select(
-                    "id", count="exact"
-                ).eq("event_id", event_id).eq("status", EventRegistrationStatus.REGISTERED.value).execute()
-                event["registration_count"] = registrations.count if hasattr(registrations, 'count') else 0
-                
-                # 現在のユーザーが登録しているか
-                if current_user_id:
-                    user_registration = supabase.table("event_registrations").select("status").eq(
-                        "event_id", event_id
-                    ).eq("user_id", current_user_id).execute()
-                    
-                    event["is_registered"] = (
-                        len(user_registration.data) > 0 and 
-                        user_registration.data[0]["status"] == EventRegistrationStatus.REGISTERED.value
-                    )
-                else:
-                    event["is_registered"] = False
-                
-                # 登録可能かチェック
-                now = datetime.utcnow()
-                event["can_register"] = True
-                
-                # 定員チェック
-                if event.get("max_participants"):
-                    if event["registration_count"] >= event["max_participants"]:
-                        event["can_register"] = False
-                
-                # 締切チェック
-                if event.get("registration_deadline"):
-                    deadline = datetime.fromisoformat(event["registration_deadline"].replace('Z', '+00:00'))
-                    if now > deadline:
-                        event["can_register"] = False
-                
-                # イベント日チェック
-                event_date = datetime.fromisoformat(event["event_date"].replace('Z', '+00:00'))
-                if now > event_date:
-                    event["can_register"] = False
+            events = [EventService._from_state_row(event) for event in result.data or []]
             
             return {
                 "total": result.count if hasattr(result, 'count') else len(events),
@@ -132,7 +163,7 @@ class EventService:
         イベント詳細を取得
         """
         try:
-            result = supabase.table("events").select("*").eq("id", event_id).execute()
+            result = await execute_async(EventService._select_with_state(current_user_id).eq("id", event_id))
             
             if not result.data:
                 raise HTTPException(
@@ -140,48 +171,7 @@ class EventService:
                     detail="イベントが見つかりません"
                 )
             
-            event = result.data[0]
-            
-            # 参加登録者数
-            registrations = supabase.table("event_registrations").select(
-                "id", count="exact"
-            ).eq("event_id", event_id).eq("status", EventRegistrationStatus.REGISTERED.value).execute()
-            event["registration_count"] = registrations.count if hasattr(registrations, 'count') else 0
-            
-            # 現在のユーザーが登録しているか
-            if current_user_id:
-                user_registration = supabase.table("event_registrations").select("status").eq(
-                    "event_id", event_id
-                ).eq("user_id", current_user_id).execute()
-                
-                event["is_registered"] = (
-                    len(user_registration.data) > 0 and 
-                    user_registration.data[0]["status"] == EventRegistrationStatus.REGISTERED.value
-                )
-            else:
-                event["is_registered"] = False
-            
-            # 登録可能かチェック
-            now = datetime.utcnow()
-            event["can_register"] = True
-            
-            # 定員チェック
-            if event.get("max_participants"):
-                if event["registration_count"] >= event["max_participants"]:
-                    event["can_register"] = False
-            
-            # 締切チェック
-            if event.get("registration_deadline"):
-                deadline = datetime.fromisoformat(event["registration_deadline"].replace('Z', '+00:00'))
-                if now > deadline:
-                    event["can_register"] = False
-            
-            # イベント日チェック
-            event_date = datetime.fromisoformat(event["event_date"].replace('Z', '+00:00'))
-            if now > event_date:
-                event["can_register"] = False
-            
-            return event
+            return EventService._from_state_row(result.data[0])
             
         except Exception as e:
             if hasattr(e, 'status_code'):
@@ -192,13 +182,25 @@ class EventService:
             )
     
     @staticmethod
-    async def register_event(event_id: str, user_id: str) -> Dict[str, Any]:
+    async def register_event(
+        event_id: str,
+        user_id: str,
+        author: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
         """
         イベントに参加登録
+        イベント・参加者数・自分の登録を1クエリで取得し、レスポンスは保存した行と利用者名から組み立てる
         """
         try:
-            # イベント情報を取得
-            event = await EventService.get_event(event_id, user_id)
+            result = await execute_async(EventService._select_with_state(user_id).eq("id", event_id))
+            
+            if not result.data:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="イベントが見つかりません"
+                )
+            
+            event = EventService._from_state_row(result.data[0])
             
             # 既に登録済みかチェック
             if event["is_registered"]:
@@ -220,14 +222,19 @@ class EventService:
                         detail="登録期限を過ぎています"
                     )
             
-            # 参加登録
+            # 参加登録（キャンセル済みの登録があれば登録中に戻す）
             registration = {
                 "event_id": event_id,
                 "user_id": user_id,
-                "status": EventRegistrationStatus.REGISTERED.value
+                "status": EventRegistrationStatus.REGISTERED.value,
+                "registered_at": datetime.now(timezone.utc).isoformat(),
+                "cancelled_at": None
             }
             
-            result = supabase.table("event_registrations").insert(registration).execute()
+            result = await execute_async(supabase.table("event_registrations").upsert(
+                registration,
+                on_conflict="event_id,user_id"
+            ))
             
             if not result.data:
                 raise HTTPException(
@@ -235,7 +242,7 @@ class EventService:
                     detail="参加登録に失敗しました"
                 )
             
-            return result.data[0]
+            return {**result.data[0], "user_name": (author or {}).get("name")}
             
         except Exception as e:
             if hasattr(e, 'status_code'):
@@ -251,32 +258,17 @@ class EventService:
         イベント参加をキャンセル
         """
         try:
-            # 登録を確認
-            registration = supabase.table("event_registrations").select("*").eq(
-                "event_id", event_id
-            ).eq("user_id", user_id).eq("status", EventRegistrationStatus.REGISTERED.value).execute()
-            
-            if not registration.data:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="参加登録が見つかりません"
-                )
-            
-            # ステータスをキャンセルに更新
+            # 参加登録中の登録だけをキャンセルに更新
             update_data = {
                 "status": EventRegistrationStatus.CANCELLED.value,
                 "cancelled_at": datetime.utcnow().isoformat()
             }
             
-            result = supabase.table("event_registrations").update(update_data).eq(
-                "id", registration.data[0]["id"]
-            ).execute()
-            
-            if not result.data:
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail="キャンセルに失敗しました"
-                )
+            await update_where("event_registrations", update_data, {
+                "event_id": event_id,
+                "user_id": user_id,
+                "status": EventRegistrationStatus.REGISTERED.value
+            }, "参加登録が見つかりません")
             
             return {"message": "参加登録をキャンセルしました"}
             
@@ -294,20 +286,12 @@ class EventService:
         イベントの参加者一覧を取得（管理者用）
         """
         try:
-            result = supabase.table("event_registrations").select(
-                "*, users!inner(name, email, phone)"
-            ).eq("event_id", event_id).eq("status", EventRegistrationStatus.REGISTERED.value).execute()
-            
-            registrations = result.data or []
+            result = await execute_async(supabase.table("event_registrations").select(
+                "id, event_id, user_id, status, registered_at, cancelled_at"
+            ).eq("event_id", event_id).eq("status", EventRegistrationStatus.REGISTERED.value))
             
-            # データの整形
-            for reg in registrations:
-                if reg.get("users"):
-                    reg["user_name"] = reg["users"]["name"]
-                    reg["user_email"] = reg["users"]["email"]
-                    reg["user_phone"] = reg["users"]["phone"]
-            
-            return registrations
+            # 参加者名は利用者カードから付ける
+            return await UserCardService.hydrate(result.data or [], avatar=False)
             
         except Exception as e:
             raise HTTPException(
@@ -321,15 +305,6 @@ class EventService:
         イベントを更新（管理者用）
         """
         try:
-            # イベントの存在確認
-            existing = supabase.table("events").select("id").eq("id", event_id).execute()
-            
-            if not existing.data:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="イベントが見つかりません"
-                )
-            
             # 更新データの準備
             update_data = event_data.dict(exclude_none=True)
             
@@ -339,15 +314,8 @@ class EventService:
             if update_data.get("registration_deadline"):
                 update_data["registration_deadline"] = update_data["registration_deadline"].isoformat()
             
-            result = supabase.table("events").update(update_data).eq("id", event_id).execute()
-            
-            if not result.data:
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail="イベントの更新に失敗しました"
-                )
-            
-            return result.data[0]
+            # 更新されなければイベントが存在しない
+            return await update_where("events", update_data, {"id": event_id}, "イベントが見つかりません")
             
         except Exception as e:
             if hasattr(e, 'status_code'):
@@ -1,4 +1,5 @@
 from app.core.supabase import supabase
+from app.services.user_card_service import UserCardService
 from fastapi import HTTPException, UploadFile, status
 from typing import Dict, Any, List
 import uuid
@@ -240,6 +241,7 @@ class FileService:
             supabase.table("users").update(
                 {"avatar_url": public_url}
             ).eq("id", user_id).execute()
+            UserCardService.invalidate(user_id)
             
             return {
                 "url": public_url,
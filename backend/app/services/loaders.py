@@ -0,0 +1,29 @@
+from app.core.supabase import supabase, execute_async
+from app.core.dataloader import BatchFn, DataLoader, request_loader
+from typing import Any, Dict, Hashable, List
+
+
+# IDから引く利用者・犬の列（一覧の表示名・アバター・犬種に使う）
+USER_CARD_COLUMNS = "id, name, avatar_url"
+DOG_CARD_COLUMNS = "id, user_id, name, breed"
+
+
+def _by_id(table: str, columns: str) -> BatchFn:
+    async def batch(ids: List[Hashable]) -> Dict[Hashable, Any]:
+        result = await execute_async(supabase.table(table).select(columns).in_("id", ids))
+        return {row["id"]: row for row in result.data or []}
+    return batch
+
+
+class Loaders:
+    """
+    リクエスト内で共有する利用者・犬のローダー（返す行は共有されるため書き換えないこと）
+    """
+
+    @staticmethod
+    def users() -> DataLoader:
+        return request_loader("users", _by_id("users", USER_CARD_COLUMNS))
+
+    @staticmethod
+    def dogs() -> DataLoader:
+        return request_loader("dogs", _by_id("dogs", DOG_CARD_COLUMNS))
@@ -1,12 +1,9 @@
 from app.core.supabase import supabase
+from app.core.realtime import realtime_hub
 from fastapi import HTTPException, status
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 import asyncio
-import smtplib
-from email.mime.text import MimeText
-from email.mime.multipart import MimeMultipart
-import json
 
 
 class NotificationService:
@@ -72,14 +69,18 @@ class NotificationService:
             里山ドッグラン管理チーム
             """
             
-            await NotificationService._send_email(
+            sent = await NotificationService._send_email(
                 application["email"],
                 subject,
                 message
             )
+            if not sent:
+                raise RuntimeError(f"承認メールを送信できませんでした: {application['email']}")
             
         except Exception as e:
+            # ジョブとして再試行させるため、ログに記録して呼び出し元に伝える
             print(f"承認メール送信エラー: {str(e)}")
+            raise
     
     @staticmethod
     async def send_rejection_email(application: Dict[str, Any], reason: str) -> None:
@@ -102,14 +103,18 @@ class NotificationService:
             里山ドッグラン管理チーム
             """
             
-            await NotificationService._send_email(
+            sent = await NotificationService._send_email(
                 application["email"],
                 subject,
                 message
             )
+            if not sent:
+                raise RuntimeError(f"却下メールを送信できませんでした: {application['email']}")
             
         except Exception as e:
+            # ジョブとして再試行させるため、ログに記録して呼び出し元に伝える
             print(f"却下メール送信エラー: {str(e)}")
+            raise
     
     @staticmethod
     async def notify_new_event(event: Dict[str, Any]) -> None:
@@ -303,11 +308,8 @@ class NotificationService:
         リアルタイム更新をブロードキャスト
         """
         try:
-            # TODO: Supabase Realtimeチャンネルでブロードキャスト
-            # または WebSocket実装
-            
-            print(f"[REALTIME] Channel: {channel}, Event: {event}")
-            print(f"[REALTIME] Data: {json.dumps(data, ensure_ascii=False)}")
+            # 購読者（管理画面のSSE等）へ配信（REDIS_URL があれば他のインスタンスにも届く）
+            await realtime_hub.broadcast(channel, event, data)
             
             # Supabase Realtimeを使用する場合の実装例
             # supabase.realtime.channel(channel).send({
@@ -346,4 +348,5 @@ async def broadcast_new_post(post: Dict[str, Any]):
             {"post": post}
         )
     except Exception as e:
-        print(f"新規投稿ブロードキャストエラー: {str(e)}")
\ No newline at end of file
+        print(f"新規投稿ブロードキャストエラー: {str(e)}")
+
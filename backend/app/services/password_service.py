@@ -0,0 +1,138 @@
+from app.core.config import settings
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional, Tuple
+import asyncio
+import hashlib
+import hmac
+import secrets
+import threading
+
+try:
+    from argon2 import PasswordHasher, Type
+    from argon2.exceptions import InvalidHashError, VerificationError
+except ImportError:  # argon2-cffi は任意（未インストールなら PBKDF2 でハッシュする）
+    PasswordHasher = None
+
+ARGON2ID = "argon2id"
+PBKDF2_SHA256 = "pbkdf2_sha256"
+
+# 以前の helpers.hash_password の形式（"<ハッシュ>:<ソルト>"、反復回数は固定）
+LEGACY_PBKDF2_ITERATIONS = 100000
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _pool() -> ThreadPoolExecutor:
+    """
+    ハッシュ計算用のスレッドプール（PASSWORD_HASH_CONCURRENCY 本、超えた分はキューで待つ）
+    hashlib・argon2-cffi は計算中にGILを手放すため、計算中も他のリクエストを処理できる
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.PASSWORD_HASH_CONCURRENCY, thread_name_prefix="password-hash"
+                )
+    return _executor
+
+
+def _argon2() -> Optional[Any]:
+    if PasswordHasher is None:
+        return None
+    return PasswordHasher(
+        time_cost=settings.PASSWORD_ARGON2_TIME_COST,
+        memory_cost=settings.PASSWORD_ARGON2_MEMORY_KIB,
+        parallelism=settings.PASSWORD_ARGON2_PARALLELISM,
+        type=Type.ID
+    )
+
+
+def _pbkdf2(password: str, salt: bytes, iterations: int) -> str:
+    return hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations).hex()
+
+
+class PasswordService:
+    @staticmethod
+    def scheme() -> str:
+        """
+        新しく作るハッシュの方式（argon2id を指定していても argon2-cffi がなければ PBKDF2）
+        """
+        if settings.PASSWORD_HASH_SCHEME == ARGON2ID and PasswordHasher is not None:
+            return ARGON2ID
+        return PBKDF2_SHA256
+
+    @staticmethod
+    def hash_sync(password: str) -> str:
+        """
+        パスワードをハッシュ化（同期、非同期の処理からは hash を使う）
+        """
+        if PasswordService.scheme() == ARGON2ID:
+            return _argon2().hash(password)
+        iterations = settings.PASSWORD_PBKDF2_ITERATIONS
+        salt = secrets.token_hex(16)
+        return f"{PBKDF2_SHA256}${iterations}${salt}${_pbkdf2(password, salt.encode(), iterations)}"
+
+    @staticmethod
+    def verify_sync(password: str, hashed: str) -> bool:
+        """
+        パスワードを検証（同期、非同期の処理からは verify を使う）
+        """
+        try:
+            if hashed.startswith(f"${ARGON2ID}$"):
+                hasher = _argon2()
+                if hasher is None:
+                    return False
+                try:
+                    return hasher.verify(hashed, password)
+                except (VerificationError, InvalidHashError):
+                    return False
+            if hashed.startswith(f"{PBKDF2_SHA256}$"):
+                _, iterations, salt, expected = hashed.split("$")
+                return hmac.compare_digest(_pbkdf2(password, salt.encode(), int(iterations)), expected)
+            expected, salt = hashed.split(":")
+            return hmac.compare_digest(_pbkdf2(password, salt.encode(), LEGACY_PBKDF2_ITERATIONS), expected)
+        except ValueError:
+            return False
+
+    @staticmethod
+    def needs_rehash(hashed: str) -> bool:
+        """
+        保存済みのハッシュが現在の方式・パラメータと違うか
+        """
+        if PasswordService.scheme() == ARGON2ID:
+            return not hashed.startswith(f"${ARGON2ID}$") or _argon2().check_needs_rehash(hashed)
+        if not hashed.startswith(f"{PBKDF2_SHA256}$"):
+            return True
+        return hashed.split("$")[1] != str(settings.PASSWORD_PBKDF2_ITERATIONS)
+
+    @staticmethod
+    async def _run(fn: Any, *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(_pool(), fn, *args)
+
+    @staticmethod
+    async def hash(password: str) -> str:
+        """
+        パスワードをスレッドプールでハッシュ化（計算中もイベントループを止めない）
+        """
+        return await PasswordService._run(PasswordService.hash_sync, password)
+
+    @staticmethod
+    async def verify(password: str, hashed: str) -> bool:
+        """
+        パスワードをスレッドプールで検証
+        """
+        return await PasswordService._run(PasswordService.verify_sync, password, hashed)
+
+    @staticmethod
+    async def verify_and_update(password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        """
+        パスワードを検証し、一致してハッシュの方式・パラメータが古ければ新しいハッシュも返す
+        呼び出し側は2つ目の値が None でなければ保存済みのハッシュを置き換える（ログイン時の再ハッシュ）
+        """
+        if not await PasswordService.verify(password, hashed):
+            return False, None
+        if PasswordService.needs_rehash(hashed):
+            return True, await PasswordService.hash(password)
+        return True, None
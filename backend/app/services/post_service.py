@@ -1,14 +1,63 @@
 from app.core.supabase import supabase
 from app.schemas.post import PostCreate, PostUpdate, PostModerate, CommentCreate, PostStatus
+from app.services.notification_service import NotificationService
+from app.services.user_card_service import UserCardService
+from app.services.timeline_service import TimelineService, TIMELINE_CARD_SELECT
 from fastapi import HTTPException, status
 from typing import Dict, Any, List, Optional
+import math
+import time
+
+
+# モデレーションキュー用の取得列（承認待ち投稿にはいいね・コメントが無いため集計しない）
+# 投稿者名・アバターは利用者を結合せず、利用者カードから付ける
+MODERATION_QUEUE_SELECT = (
+    "id, user_id, content, category, status, created_at, updated_at, "
+    "post_images(id, image_url, display_order, created_at), "
+    "post_hashtags(hashtags(id, name))"
+)
+
+# in_ フィルタ1回あたりのID数（URL長の上限対策）
+IN_CHUNK_SIZE = 200
+
+# モデレーション通知のチャンネル
+MODERATION_CHANNEL = "moderation"
+
+# フィードの取得列（タイムラインのカードと同じ列）
+FEED_SELECT = TIMELINE_CARD_SELECT
+
+# コメントの取得列（投稿者名・アバターは利用者カードから付ける）
+COMMENT_SELECT = "id, post_id, user_id, content, created_at, updated_at"
+
+# 現在のユーザーのいいね（user_id で絞り込んだ likes を埋め込む）
+MY_LIKE_SELECT = "my_like:likes(id)"
+
+# ハッシュタグ絞り込み用の内部結合（post_hashtags → hashtags を名前で絞り込む）
+HASHTAG_FILTER_SELECT = "tag_filter:post_hashtags!inner(hashtags!inner(name))"
+
+# トレンドスコアの減衰係数（半減期24時間、SQL関数 bump_hashtag_trend と揃えること）
+TREND_DECAY = math.log(2) / (24 * 3600)
 
 
 class PostService:
     @staticmethod
-    async def create_post(post_data: PostCreate, user_id: str) -> Dict[str, Any]:
+    async def _author(user_id: str, author: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        投稿者の表示名・アバター（呼び出し元が持っていればDBに問い合わせない）
+        """
+        if author is not None and "avatar_url" in author:
+            return author
+        return (await UserCardService.get_many([user_id])).get(user_id) or {}
+    
+    @staticmethod
+    async def create_post(
+        post_data: PostCreate,
+        user_id: str,
+        author: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
         """
         投稿を作成
+        レスポンスは保存した行と投稿者（author、通常は get_current_user の結果）から組み立て、読み直さない
         """
         try:
             # 投稿データの作成
@@ -28,23 +77,47 @@ class PostService:
                     detail="投稿の作成に失敗しました"
                 )
             
-            post_id = result.data[0]["id"]
+            created = result.data[0]
+            post_id = created["id"]
             
-            # ハッシュタグの処理
-            for tag_name in post_data.hashtags:
-                # ハッシュタグが存在しなければ作成
+            # ハッシュタグの処理（1回のupsertと1回の複数行insert）
+            tags: List[Dict[str, Any]] = []
+            tag_names = PostService._normalize_hashtags(post_data.hashtags)
+            if tag_names:
+                # 既存タグも含めてIDを返させるため、重複時は更新扱いにする
                 tag_result = supabase.table("hashtags").upsert(
-                    {"name": tag_name}
+                    [{"name": name} for name in tag_names],
+                    on_conflict="name"
                 ).execute()
                 
                 if tag_result.data:
                     # 投稿とハッシュタグを関連付け
-                    supabase.table("post_hashtags").insert({
-                        "post_id": post_id,
-                        "hashtag_id": tag_result.data[0]["id"]
-                    }).execute()
+                    supabase.table("post_hashtags").insert([
+                        {"post_id": post_id, "hashtag_id": tag["id"]}
+                        for tag in tag_result.data
+                    ]).execute()
+                    tags = [{"id": tag["id"], "name": tag["name"]} for tag in tag_result.data]
+            
+            # 作成直後の投稿には画像・いいね・コメントがない
+            # （承認時刻はトレンドの取り消し用の内部の列のため返さない）
+            created.pop("approved_at", None)
+            author = await PostService._author(user_id, author)
+            created.update({
+                "user_name": author.get("name"),
+                "user_avatar": author.get("avatar_url"),
+                "images": [],
+                "hashtags": tags,
+                "is_liked": False
+            })
+            
+            # モデレーターのキューへ追加分だけ通知
+            await NotificationService.broadcast_realtime_update(
+                MODERATION_CHANNEL,
+                "post_pending",
+                {"post": PostService._to_queue_item(dict(created))}
+            )
             
-            return await PostService.get_post(post_id, user_id)
+            return created
             
         except Exception as e:
             if hasattr(e, 'status_code'):
@@ -54,16 +127,40 @@ class PostService:
                 detail=f"投稿作成エラー: {str(e)}"
             )
     
+    @staticmethod
+    def _post_select(current_user_id: Optional[str] = None) -> str:
+        """
+        フィード・投稿詳細の取得列（ログイン時は自分のいいねを埋め込む）
+        """
+        if current_user_id:
+            return f"{FEED_SELECT}, {MY_LIKE_SELECT}"
+        return FEED_SELECT
+    
+    @staticmethod
+    def _format_post(post: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        フィード・投稿詳細のレスポンス用に整形
+        """
+        post.pop("tag_filter", None)
+        post["is_liked"] = bool(post.pop("my_like", None))
+        # 埋め込み結果は平坦化した項目に置き換え、同じ内容を二重に返さない
+        return TimelineService._to_card(post)
+    
     @staticmethod
     async def get_post(post_id: str, current_user_id: Optional[str] = None) -> Dict[str, Any]:
         """
         投稿詳細を取得
         """
         try:
-            # 投稿情報を取得（関連データを含む）
-            result = supabase.table("posts").select(
-                "*, users!inner(name, avatar_url), post_images(*), post_hashtags(hashtags(*))"
-            ).eq("id", post_id).execute()
+            # 投稿情報を取得（関連データ・いいね数・コメント数・自分のいいねを含む1クエリ）
+            query = supabase.table("posts").select(
+                PostService._post_select(current_user_id)
+            ).eq("id", post_id)
+            
+            if current_user_id:
+                query = query.eq("my_like.user_id", current_user_id)
+            
+            result = query.execute()
             
             if not result.data:
                 raise HTTPException(
@@ -71,29 +168,8 @@ class PostService:
                     detail="投稿が見つかりません"
                 )
             
-            post = result.data[0]
-            
-            # いいね数を取得
-            likes = supabase.table("likes").select("id", count="exact").eq("post_id", post_id).execute()
-            post["like_count"] = likes.count if hasattr(likes, 'count') else 0
-            
-            # コメント数を取得
-            comments = supabase.table("comments").select("id", count="exact").eq("post_id", post_id).execute()
-            post["comment_count"] = comments.count if hasattr(comments, 'count') else 0
-            
-            # 現在のユーザーがいいねしているか確認
-            if current_user_id:
-                user_like = supabase.table("likes").select("id").eq("post_id", post_id).eq("user_id", current_user_id).execute()
-                post["is_liked"] = len(user_like.data) > 0
-            else:
-                post["is_liked"] = False
-            
-            # データの整形
-            post["user_name"] = post["users"]["name"] if post.get("users") else None
-            post["user_avatar"] = post["users"]["avatar_url"] if post.get("users") else None
-            post["images"] = post.get("post_images", [])
-            post["hashtags"] = [h["hashtags"] for h in post.get("post_hashtags", [])]
-            
+            post = PostService._format_post(result.data[0])
+            await UserCardService.hydrate([post])
             return post
             
         except Exception as e:
@@ -115,10 +191,21 @@ class PostService:
         """
         フィード（投稿一覧）を取得
         """
+        # 上位ページは事前構築済みのタイムラインから返す（結合なし）
+        if TimelineService.is_cacheable(category, hashtag, offset, limit):
+            try:
+                return await TimelineService.get_page(category, offset, limit, current_user_id)
+            except Exception as e:
+                print(f"タイムライン取得エラー: {str(e)}")
+        
         try:
-            # 基本クエリ（承認済み投稿のみ）
+            # 基本クエリ（承認済み投稿のみ、いいね数・コメント数は posts のカウンタを使用）
+            select = PostService._post_select(current_user_id)
+            if hashtag:
+                select += f", {HASHTAG_FILTER_SELECT}"
+            
             query = supabase.table("posts").select(
-                "*, users!inner(name, avatar_url), post_images(*), post_hashtags(hashtags(*))",
+                select,
                 count="exact"
             ).eq("status", PostStatus.APPROVED.value)
             
@@ -126,40 +213,18 @@ class PostService:
             if category:
                 query = query.eq("category", category)
             
-            # ハッシュタグフィルタ（後で実装）
-            # if hashtag:
-            #     # ハッシュタグでフィルタリング
-            #     pass
+            # ハッシュタグフィルタ（post_hashtags(hashtag_id) のインデックスを使う内部結合）
+            if hashtag:
+                query = query.eq("tag_filter.hashtags.name", hashtag.strip().lstrip("#"))
+            
+            # 現在のユーザーのいいねだけを埋め込む
+            if current_user_id:
+                query = query.eq("my_like.user_id", current_user_id)
             
             # ページネーションと並び順
             result = query.order("created_at", desc=True).range(offset, offset + limit - 1).execute()
             
-            posts = result.data or []
-            
-            # 各投稿にいいね数とコメント数を追加
-            for post in posts:
-                post_id = post["id"]
-                
-                # いいね数
-                likes = supabase.table("likes").select("id", count="exact").eq("post_id", post_id).execute()
-                post["like_count"] = likes.count if hasattr(likes, 'count') else 0
-                
-                # コメント数
-                comments = supabase.table("comments").select("id", count="exact").eq("post_id", post_id).execute()
-                post["comment_count"] = comments.count if hasattr(comments, 'count') else 0
-                
-                # 現在のユーザーがいいねしているか
-                if current_user_id:
-                    user_like = supabase.table("likes").select("id").eq("post_id", post_id).eq("user_id", current_user_id).execute()
-                    post["is_liked"] = len(user_like.data) > 0
-                else:
-                    post["is_liked"] = False
-                
-                # データの整形
-                post["user_name"] = post["users"]["name"] if post.get("users") else None
-                post["user_avatar"] = post["users"]["avatar_url"] if post.get("users") else None
-                post["images"] = post.get("post_images", [])
-                post["hashtags"] = [h["hashtags"] for h in post.get("post_hashtags", [])]
+            posts = await UserCardService.hydrate([PostService._format_post(post) for post in result.data or []])
             
             return {
                 "total": result.count if hasattr(result, 'count') else len(posts),
@@ -174,46 +239,104 @@ class PostService:
                 detail=f"フィード取得エラー: {str(e)}"
             )
     
+    @staticmethod
+    def _normalize_hashtags(hashtags: List[str]) -> List[str]:
+        """
+        ハッシュタグ名を正規化（先頭の#と空白を除去し、重複を除く）
+        """
+        names = [tag.strip().lstrip("#").strip() for tag in hashtags]
+        return list(dict.fromkeys(name for name in names if name))
+    
+    @staticmethod
+    async def get_trending_hashtags(limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        トレンドハッシュタグを取得
+        trend_score のインデックス順に上位だけを読むため posts は走査しない
+        （降順ではNULLが先頭に並ぶため、スコアのないタグはDB側で除く）
+        """
+        try:
+            result = supabase.table("hashtags").select(
+                "id, name, post_count, trend_score"
+            ).not_.is_("trend_score", "null").order("trend_score", desc=True).limit(limit).execute()
+            
+            # 対数スコアを現在時点の減衰後スコアに変換
+            now = TREND_DECAY * time.time()
+            return [
+                {
+                    "id": tag["id"],
+                    "name": tag["name"],
+                    "post_count": tag.get("post_count") or 0,
+                    "score": math.exp(tag["trend_score"] - now),
+                }
+                for tag in result.data or []
+            ]
+            
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"トレンド取得エラー: {str(e)}"
+            )
+    
+    @staticmethod
+    def _bump_hashtag_trend(post_ids: List[str]) -> None:
+        """
+        承認された投稿のハッシュタグのトレンドスコアを加算
+        """
+        try:
+            supabase.rpc("bump_hashtag_trend", {"p_post_ids": post_ids}).execute()
+        except Exception as e:
+            # トレンドは補助的な集計のため、失敗してもモデレート自体は成功させる
+            print(f"トレンド更新エラー: {str(e)}")
+    
     @staticmethod
     async def toggle_like(post_id: str, user_id: str) -> Dict[str, Any]:
         """
         いいねの切り替え
         """
         try:
-            # 既存のいいねを確認
-            existing = supabase.table("likes").select("*").eq("post_id", post_id).eq("user_id", user_id).execute()
-            
-            if existing.data:
-                # いいね解除
-                supabase.table("likes").delete().eq("id", existing.data[0]["id"]).execute()
-                liked = False
-            else:
-                # いいね追加
-                supabase.table("likes").insert({
-                    "post_id": post_id,
-                    "user_id": user_id
-                }).execute()
-                liked = True
-            
-            # 現在のいいね数を取得
-            likes = supabase.table("likes").select("id", count="exact").eq("post_id", post_id).execute()
-            like_count = likes.count if hasattr(likes, 'count') else 0
+            # 切り替えと新しいいいね数の取得をDB側で原子的に行う（1往復）
+            result = supabase.rpc("toggle_like", {
+                "p_post_id": post_id,
+                "p_user_id": user_id
+            }).execute()
+            
+            row = result.data[0] if isinstance(result.data, list) else result.data
+            if not row or row.get("like_count") is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="投稿が見つかりません"
+                )
+            
+            await TimelineService.on_like_toggled(post_id, user_id, row["liked"], row["like_count"])
             
             return {
-                "liked": liked,
-                "like_count": like_count
+                "liked": row["liked"],
+                "like_count": row["like_count"]
             }
             
         except Exception as e:
+            if hasattr(e, 'status_code'):
+                raise e
+            # 存在しない投稿（外部キー違反）
+            if getattr(e, 'code', None) == "23503":
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="投稿が見つかりません"
+                )
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"いいねエラー: {str(e)}"
             )
     
     @staticmethod
-    async def add_comment(post_id: str, comment_data: CommentCreate, user_id: str) -> Dict[str, Any]:
+    async def add_comment(
+        post_id: str,
+        comment_data: CommentCreate,
+        user_id: str,
+        author: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
         """
-        コメントを追加
+        コメントを追加（レスポンスは保存した行と投稿者から組み立てる）
         """
         try:
             # 投稿が存在し、承認済みか確認
@@ -246,19 +369,15 @@ class PostService:
                     detail="コメントの投稿に失敗しました"
                 )
             
-            # ユーザー情報を含めて返す
-            comment_id = result.data[0]["id"]
-            comment_with_user = supabase.table("comments").select(
-                "*, users!inner(name, avatar_url)"
-            ).eq("id", comment_id).execute()
-            
-            if comment_with_user.data:
-                comment = comment_with_user.data[0]
-                comment["user_name"] = comment["users"]["name"] if comment.get("users") else None
-                comment["user_avatar"] = comment["users"]["avatar_url"] if comment.get("users") else None
-                return comment
+            await TimelineService.on_comment_added(post_id)
             
-            return result.data[0]
+            # ユーザー情報を含めて返す
+            author = await PostService._author(user_id, author)
+            return {
+                **result.data[0],
+                "user_name": author.get("name"),
+                "user_avatar": author.get("avatar_url")
+            }
             
         except Exception as e:
             if hasattr(e, 'status_code'):
@@ -275,22 +394,58 @@ class PostService:
         """
         try:
             result = supabase.table("comments").select(
-                "*, users!inner(name, avatar_url)"
+                COMMENT_SELECT
             ).eq("post_id", post_id).order("created_at", desc=True).range(offset, offset + limit - 1).execute()
             
-            comments = result.data or []
+            return await UserCardService.hydrate(result.data or [])
+            
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"コメント取得エラー: {str(e)}"
+            )
+    
+    @staticmethod
+    def _to_queue_item(post: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        モデレーションキューの1件に整形（埋め込み結果を平坦化）
+        """
+        post.setdefault("user_name", None)
+        post.setdefault("user_avatar", None)
+        if "post_images" in post:
+            post["images"] = post.pop("post_images") or []
+        if "post_hashtags" in post:
+            post["hashtags"] = [h["hashtags"] for h in post.pop("post_hashtags") or []]
+        post.setdefault("like_count", 0)
+        post.setdefault("comment_count", 0)
+        post["is_liked"] = False
+        return post
+    
+    @staticmethod
+    async def get_moderation_queue(limit: int = 20, offset: int = 0) -> Dict[str, Any]:
+        """
+        モデレーションキュー（承認待ち投稿、古い順）を取得（管理者用）
+        """
+        try:
+            # 部分インデックス idx_posts_pending_queue を使う1クエリで取得
+            result = supabase.table("posts").select(
+                MODERATION_QUEUE_SELECT,
+                count="exact"
+            ).eq("status", PostStatus.PENDING.value).order("created_at").range(offset, offset + limit - 1).execute()
             
-            # データの整形
-            for comment in comments:
-                comment["user_name"] = comment["users"]["name"] if comment.get("users") else None
-                comment["user_avatar"] = comment["users"]["avatar_url"] if comment.get("users") else None
+            posts = await UserCardService.hydrate([PostService._to_queue_item(post) for post in result.data or []])
             
-            return comments
+            return {
+                "total": result.count if hasattr(result, 'count') else len(posts),
+                "items": posts,
+                "page": offset // limit + 1,
+                "per_page": limit
+            }
             
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"コメント取得エラー: {str(e)}"
+                detail=f"モデレーションキュー取得エラー: {str(e)}"
             )
     
     @staticmethod
@@ -299,8 +454,30 @@ class PostService:
         投稿をモデレート（管理者用）
         """
         try:
-            # 投稿の存在確認
-            post = supabase.table("posts").select("id").eq("id", post_id).execute()
+            # ステータスを更新（同じステータスへの変更は対象外）
+            update_data = {
+                "status": moderation.status.value
+            }
+            
+            result = supabase.table("posts").update(update_data).eq("id", post_id).neq(
+                "status", moderation.status.value
+            ).execute()
+            
+            if result.data:
+                if moderation.status == PostStatus.APPROVED:
+                    PostService._bump_hashtag_trend([post_id])
+                    await TimelineService.on_approved([post_id])
+                else:
+                    await TimelineService.on_removed([post_id])
+                
+                await NotificationService.broadcast_realtime_update(
+                    MODERATION_CHANNEL,
+                    "posts_moderated",
+                    {"post_ids": [post_id], "status": moderation.status.value, "moderated_by": admin_id}
+                )
+            
+            # レスポンス用に画像・ハッシュタグを1クエリで取得（投稿者は利用者カードから付ける）
+            post = supabase.table("posts").select(MODERATION_QUEUE_SELECT).eq("id", post_id).execute()
             
             if not post.data:
                 raise HTTPException(
@@ -308,25 +485,64 @@ class PostService:
                     detail="投稿が見つかりません"
                 )
             
-            # ステータスを更新
-            update_data = {
-                "status": moderation.status.value
-            }
-            
-            result = supabase.table("posts").update(update_data).eq("id", post_id).execute()
+            return (await UserCardService.hydrate([PostService._to_queue_item(post.data[0])]))[0]
             
-            if not result.data:
+        except Exception as e:
+            if hasattr(e, 'status_code'):
+                raise e
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"モデレートエラー: {str(e)}"
+            )
+    
+    @staticmethod
+    async def bulk_moderate_posts(post_ids: List[str], new_status: PostStatus, admin_id: str) -> Dict[str, Any]:
+        """
+        承認待ち投稿をまとめてモデレート（管理者用）
+        IN_CHUNK_SIZE 件ずつのUPDATEで反映し、承認待ちでなくなった投稿は対象外とする
+        """
+        try:
+            if new_status == PostStatus.PENDING:
                 raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail="投稿のモデレートに失敗しました"
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="status は approved または rejected を指定してください"
+                )
+            
+            post_ids = list(dict.fromkeys(post_ids))
+            
+            updated = set()
+            for i in range(0, len(post_ids), IN_CHUNK_SIZE):
+                result = supabase.table("posts").update(
+                    {"status": new_status.value}
+                ).in_("id", post_ids[i:i + IN_CHUNK_SIZE]).eq("status", PostStatus.PENDING.value).execute()
+                updated.update(row["id"] for row in result.data or [])
+            
+            updated_ids = [post_id for post_id in post_ids if post_id in updated]
+            skipped_ids = [post_id for post_id in post_ids if post_id not in updated]
+            
+            if updated_ids and new_status == PostStatus.APPROVED:
+                PostService._bump_hashtag_trend(updated_ids)
+                for i in range(0, len(updated_ids), IN_CHUNK_SIZE):
+                    await TimelineService.on_approved(updated_ids[i:i + IN_CHUNK_SIZE])
+            
+            if updated_ids:
+                # モデレーターのキューからは差分だけ取り除かせる
+                await NotificationService.broadcast_realtime_update(
+                    MODERATION_CHANNEL,
+                    "posts_moderated",
+                    {"post_ids": updated_ids, "status": new_status.value, "moderated_by": admin_id}
                 )
             
-            return result.data[0]
+            return {
+                "status": new_status.value,
+                "updated_ids": updated_ids,
+                "skipped_ids": skipped_ids
+            }
             
         except Exception as e:
             if hasattr(e, 'status_code'):
                 raise e
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"モデレートエラー: {str(e)}"
-            )
\ No newline at end of file
+                detail=f"一括モデレートエラー: {str(e)}"
+            )
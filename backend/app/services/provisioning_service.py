@@ -0,0 +1,176 @@
+from app.core.supabase import supabase, execute_async
+from app.core.config import settings
+from app.core.rows import parse_timestamp
+from app.core.jobs import job_queue
+from app.services.notification_service import NotificationService
+from datetime import datetime, timedelta, timezone
+from starlette.concurrency import run_in_threadpool
+from typing import Dict, Any, List, Optional
+import asyncio
+
+
+# ジョブと、アカウント作成・通知メールに必要な申請情報
+JOB_SELECT = (
+    "id, kind, status, attempts, auth_id, locked_until, "
+    "applications!inner(id, email, name, status, rejected_reason)"
+)
+
+# ジョブの種類（申請の承認・却下時に enqueue_review_job トリガーが登録する）
+JOB_KIND_APPROVAL = "approval"
+JOB_KIND_REJECTION = "rejection"
+
+# in_ フィルタ1回あたりのID数（URL長の上限対策）
+IN_CHUNK_SIZE = 200
+
+
+class ProvisioningService:
+    @staticmethod
+    async def enqueue_jobs(application_ids: List[str]) -> List[str]:
+        """
+        審査した申請の未実行のジョブをワーカーに渡す
+        ジョブは申請の更新と同じトランザクションでトリガーが登録済みのため、
+        ここで失敗しても定期ジョブ（sweep）が拾う
+        """
+        job_ids: List[str] = []
+        try:
+            for i in range(0, len(application_ids), IN_CHUNK_SIZE):
+                result = await execute_async(supabase.table("provisioning_jobs").select("id").in_(
+                    "application_id", application_ids[i:i + IN_CHUNK_SIZE]
+                ).eq("status", "pending"))
+                job_ids.extend(row["id"] for row in result.data or [])
+        except Exception as e:
+            print(f"審査結果のジョブの取得エラー（定期ジョブで実行します）: {str(e)}")
+            return []
+        for job_id in job_ids:
+            job_queue.enqueue("provision_account", {"job_id": job_id})
+        return job_ids
+
+    @staticmethod
+    async def _claim(job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        ジョブを実行中にする（試行回数を条件にした更新で、同時に1ワーカーだけが取得できる）
+        """
+        result = await execute_async(supabase.table("provisioning_jobs").select(JOB_SELECT).eq("id", job_id))
+        if not result.data:
+            return None
+        job = result.data[0]
+        now = datetime.now(timezone.utc)
+        if job["status"] == "done" or job["attempts"] >= settings.PROVISIONING_MAX_ATTEMPTS:
+            return None
+        if job["status"] == "running" and job.get("locked_until") and parse_timestamp(job["locked_until"]) > now:
+            return None
+
+        claimed = await execute_async(supabase.table("provisioning_jobs").update({
+            "status": "running",
+            "attempts": job["attempts"] + 1,
+            "locked_until": (now + timedelta(seconds=settings.PROVISIONING_LEASE_SECONDS)).isoformat()
+        }).eq("id", job_id).eq("attempts", job["attempts"]).neq("status", "done"))
+        if not claimed.data:
+            return None
+        return {**claimed.data[0], "applications": job["applications"]}
+
+    @staticmethod
+    async def _ensure_auth_user(job: Dict[str, Any]) -> str:
+        """
+        Supabase Authのユーザーを用意し、IDをジョブに記録する（再試行時は記録済みのIDを使う）
+        """
+        if job.get("auth_id"):
+            return job["auth_id"]
+
+        application = job["applications"]
+        existing = await execute_async(supabase.table("users").select("auth_id").eq("email", application["email"]))
+        created = False
+        if existing.data:
+            auth_id = existing.data[0]["auth_id"]
+        else:
+            auth_response = await run_in_threadpool(supabase.auth.admin.create_user, {
+                "email": application["email"],
+                "email_confirm": True
+            })
+            auth_id = auth_response.user.id
+            created = True
+
+        try:
+            await execute_async(supabase.table("provisioning_jobs").update({"auth_id": auth_id}).eq("id", job["id"]))
+        except Exception:
+            # 記録できなければAuthユーザーを削除（ロールバック）して次の試行で作り直す
+            if created:
+                await run_in_threadpool(supabase.auth.admin.delete_user, auth_id)
+            raise
+        return auth_id
+
+    @staticmethod
+    async def process(job_id: str) -> str:
+        """
+        審査結果のジョブを1件実行し、結果（done / skipped）を返す
+        承認は users と dogs を provision_account 関数で1トランザクションで作成してから承認メール、
+        却下は却下メールを送り、送信できたらジョブを完了にする
+        失敗した場合はジョブを failed にして例外を送出する（メールも含めて再試行される）
+        """
+        job = await ProvisioningService._claim(job_id)
+        if job is None:
+            return "skipped"
+
+        try:
+            application = job["applications"]
+            if job.get("kind") == JOB_KIND_REJECTION:
+                if application["status"] != "rejected":
+                    raise ValueError(f"申請が却下されていません: {application['status']}")
+                await NotificationService.send_rejection_email(application, application.get("rejected_reason") or "")
+            else:
+                if application["status"] != "approved":
+                    raise ValueError(f"申請が承認されていません: {application['status']}")
+                auth_id = await ProvisioningService._ensure_auth_user(job)
+                await execute_async(supabase.rpc("provision_account", {"p_job_id": job_id, "p_auth_id": auth_id}))
+                await NotificationService.send_approval_email(application)
+
+            await execute_async(supabase.table("provisioning_jobs").update({
+                "status": "done",
+                "last_error": None,
+                "locked_until": None,
+                "completed_at": datetime.now(timezone.utc).isoformat()
+            }).eq("id", job_id))
+        except Exception as e:
+            await execute_async(supabase.table("provisioning_jobs").update({
+                "status": "failed",
+                "last_error": str(e)[:1000],
+                "locked_until": None
+            }).eq("id", job_id))
+            raise
+
+        return "done"
+
+    @staticmethod
+    async def sweep() -> Dict[str, int]:
+        """
+        未完了のジョブ（未実行・失敗・リース切れ）をまとめて並列に実行（定期ジョブ用）
+        DB・Authの往復はスレッドプールで行うため、PROVISIONING_CONCURRENCY 件まで同時に進む
+        """
+        result = await execute_async(supabase.table("provisioning_jobs").select("id").in_(
+            "status", ["pending", "running", "failed"]
+        ).lt("attempts", settings.PROVISIONING_MAX_ATTEMPTS).order("created_at").limit(
+            settings.PROVISIONING_SWEEP_LIMIT
+        ))
+        job_ids = [row["id"] for row in result.data or []]
+
+        semaphore = asyncio.Semaphore(settings.PROVISIONING_CONCURRENCY)
+
+        async def run(job_id: str) -> str:
+            async with semaphore:
+                try:
+                    return await ProvisioningService.process(job_id)
+                except Exception:
+                    return "failed"
+
+        outcomes = await asyncio.gather(*[run(job_id) for job_id in job_ids])
+        return {
+            "found": len(job_ids),
+            "done": outcomes.count("done"),
+            "skipped": outcomes.count("skipped"),
+            "failed": outcomes.count("failed"),
+        }
+
+
+@job_queue.register("provision_account")
+async def provision_account_job(payload: Dict[str, Any]) -> None:
+    await ProvisioningService.process(payload["job_id"])
@@ -1,4 +1,3 @@
-import qrcode
 import io
 import base64
 from datetime import datetime, timedelta
@@ -27,7 +26,9 @@ class QRService:
             # JWTトークンを生成
             token = jwt.encode(payload, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
             
-            # QRコードの生成
+            # QRコードの生成（qrcode/Pillowは重いため初回使用時に読み込む）
+            import qrcode
+            
             qr = qrcode.QRCode(
                 version=1,
                 error_correction=qrcode.constants.ERROR_CORRECT_L,
@@ -0,0 +1,524 @@
+from app.core.supabase import supabase, execute_async
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.core.rows import parse_timestamp
+from app.schemas.post import PostCategory, PostStatus
+from app.services.user_card_service import UserCardService
+from collections import OrderedDict
+from starlette.concurrency import run_in_threadpool
+from typing import Dict, Any, List, Optional, Set, Tuple
+import json
+import threading
+import time
+
+
+# タイムラインに載せる投稿カード（描画に必要な列だけを取得、投稿者名・アバターは利用者カードから付ける）
+TIMELINE_CARD_SELECT = (
+    "id, user_id, content, category, status, like_count, comment_count, created_at, updated_at, "
+    "post_images(id, image_url, display_order, created_at), "
+    "post_hashtags(hashtags(id, name))"
+)
+
+# カテゴリ指定なしのタイムライン
+TIMELINE_ALL = "all"
+
+TIMELINE_KEYS = [TIMELINE_ALL] + [category.value for category in PostCategory]
+
+
+def _score(card: Dict[str, Any]) -> float:
+    """タイムラインの並び順（作成日時の新しい順）"""
+    return parse_timestamp(card["created_at"]).timestamp()
+
+
+class MemoryTimelineStore:
+    """
+    プロセス内メモリのタイムライン
+    サーバーレスではインスタンスごとに保持されるため、TTLで他インスタンスの更新を取り込む
+    """
+
+    def __init__(self, size: int, ttl: int, max_viewers: int = 10000):
+        self.size = size
+        self.ttl = ttl
+        self.max_viewers = max_viewers
+        self._lock = threading.Lock()
+        self._timelines: Dict[str, Dict[str, Any]] = {}
+        self._cards: Dict[str, Dict[str, Any]] = {}
+        self._liked: "OrderedDict[str, Tuple[Set[str], Set[str], float]]" = OrderedDict()
+
+    def _live(self, key: str) -> Optional[Dict[str, Any]]:
+        timeline = self._timelines.get(key)
+        if timeline is None or timeline["expires"] < time.monotonic():
+            return None
+        return timeline
+
+    def _prune_cards(self) -> None:
+        referenced = {post_id for t in self._timelines.values() for post_id, _ in t["entries"]}
+        for post_id in list(self._cards):
+            if post_id not in referenced:
+                del self._cards[post_id]
+
+    def load(self, key: str, cards: List[Dict[str, Any]], total: int) -> None:
+        with self._lock:
+            entries = sorted(((c["id"], _score(c)) for c in cards), key=lambda e: e[1], reverse=True)
+            self._timelines[key] = {
+                "entries": entries[:self.size],
+                "total": total,
+                "expires": time.monotonic() + self.ttl,
+            }
+            for card in cards:
+                self._cards[card["id"]] = card
+            self._prune_cards()
+
+    def add(self, keys: List[str], card: Dict[str, Any]) -> None:
+        with self._lock:
+            score = _score(card)
+            for key in keys:
+                timeline = self._live(key)
+                if timeline is None:
+                    continue
+                entries = [e for e in timeline["entries"] if e[0] != card["id"]]
+                if len(entries) == len(timeline["entries"]):
+                    timeline["total"] += 1
+                entries.append((card["id"], score))
+                entries.sort(key=lambda e: e[1], reverse=True)
+                timeline["entries"] = entries[:self.size]
+            self._cards[card["id"]] = card
+            self._prune_cards()
+
+    def any_warm(self) -> bool:
+        with self._lock:
+            return any(self._live(key) is not None for key in list(self._timelines))
+
+    def remove(self, post_ids: List[str]) -> None:
+        with self._lock:
+            targets = set(post_ids)
+            for timeline in self._timelines.values():
+                entries = [e for e in timeline["entries"] if e[0] not in targets]
+                timeline["total"] -= len(timeline["entries"]) - len(entries)
+                timeline["entries"] = entries
+            self._prune_cards()
+
+    def page(self, key: str, offset: int, limit: int) -> Optional[Tuple[List[Dict[str, Any]], int]]:
+        with self._lock:
+            timeline = self._live(key)
+            if timeline is None:
+                return None
+            ids = [post_id for post_id, _ in timeline["entries"][offset:offset + limit]]
+            cards = [self._cards.get(post_id) for post_id in ids]
+            if any(card is None for card in cards):
+                return None
+            return [dict(card) for card in cards], timeline["total"]
+
+    def set_like_count(self, post_id: str, like_count: int) -> None:
+        with self._lock:
+            if post_id in self._cards:
+                self._cards[post_id]["like_count"] = like_count
+
+    def incr_comment_count(self, post_id: str) -> None:
+        with self._lock:
+            if post_id in self._cards:
+                self._cards[post_id]["comment_count"] = (self._cards[post_id].get("comment_count") or 0) + 1
+
+    def liked_lookup(self, user_id: str, post_ids: List[str]) -> Tuple[Set[str], Set[str]]:
+        """
+        (確認済みの投稿ID, いいね済みの投稿ID) を返す
+        """
+        with self._lock:
+            entry = self._liked.get(user_id)
+            if entry is None or entry[2] < time.monotonic():
+                return set(), set()
+            checked, liked, _ = entry
+            wanted = set(post_ids)
+            return checked & wanted, liked & wanted
+
+    def liked_store(self, user_id: str, checked: List[str], liked: List[str]) -> None:
+        with self._lock:
+            entry = self._liked.pop(user_id, None)
+            if entry is None or entry[2] < time.monotonic():
+                entry = (set(), set(), 0.0)
+            entry[0].update(checked)
+            entry[1].update(liked)
+            self._liked[user_id] = (entry[0], entry[1], time.monotonic() + self.ttl)
+            while len(self._liked) > self.max_viewers:
+                self._liked.popitem(last=False)
+
+    def liked_toggle(self, user_id: str, post_id: str, liked: bool) -> None:
+        with self._lock:
+            entry = self._liked.get(user_id)
+            if entry is None:
+                return
+            entry[0].add(post_id)
+            if liked:
+                entry[1].add(post_id)
+            else:
+                entry[1].discard(post_id)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._timelines.clear()
+            self._cards.clear()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._timelines.clear()
+            self._cards.clear()
+            self._liked.clear()
+
+
+class RedisTimelineStore:
+    """
+    Redisのタイムライン（全インスタンスで共有）
+    timeline:{key} はソート済みセット（スコア＝作成日時）、カード本体とカウンタはハッシュに保持する
+    """
+
+    PREFIX = "timeline"
+
+    def __init__(self, client, size: int, ttl: int):
+        self.client = client
+        self.size = size
+        self.ttl = ttl
+
+    def _key(self, *parts: str) -> str:
+        return ":".join((self.PREFIX,) + parts)
+
+    def load(self, key: str, cards: List[Dict[str, Any]], total: int) -> None:
+        kept = sorted(cards, key=_score, reverse=True)[:self.size]
+        pipe = self.client.pipeline()
+        pipe.zrange(self._key(key), 0, -1)
+        pipe.delete(self._key(key))
+        if kept:
+            pipe.zadd(self._key(key), {c["id"]: _score(c) for c in kept})
+            self._write_cards(pipe, kept)
+        pipe.hset(self._key(key, "meta"), "total", total)
+        for name in (self._key(key), self._key(key, "meta")):
+            pipe.expire(name, self.ttl)
+        previous = pipe.execute()[0]
+        kept_ids = {c["id"] for c in kept}
+        self._prune_cards([post_id for post_id in previous if post_id not in kept_ids])
+
+    def _write_cards(self, pipe, cards: List[Dict[str, Any]]) -> None:
+        pipe.hset(self._key("cards"), mapping={c["id"]: json.dumps(c, default=str) for c in cards})
+        pipe.hset(self._key("likes"), mapping={c["id"]: c.get("like_count") or 0 for c in cards})
+        pipe.hset(self._key("comments"), mapping={c["id"]: c.get("comment_count") or 0 for c in cards})
+        for name in ("cards", "likes", "comments"):
+            # タイムラインより長く保持し、期限切れ直前の読み取りでカードが欠けないようにする
+            pipe.expire(self._key(name), self.ttl * 2)
+
+    def _prune_cards(self, post_ids: List[str]) -> None:
+        """
+        どのタイムラインにも残っていない投稿のカードとカウンタを削除する
+        （削除と同時に別のタイムラインへ載った投稿はカード欠けとなり、次の読み込みで作り直される）
+        """
+        post_ids = list(dict.fromkeys(post_ids))
+        if not post_ids:
+            return
+        pipe = self.client.pipeline()
+        for key in TIMELINE_KEYS:
+            pipe.zmscore(self._key(key), post_ids)
+        scores = pipe.execute()
+        orphans = [
+            post_id for i, post_id in enumerate(post_ids)
+            if all(timeline[i] is None for timeline in scores)
+        ]
+        if not orphans:
+            return
+        pipe = self.client.pipeline()
+        for name in ("cards", "likes", "comments"):
+            pipe.hdel(self._key(name), *orphans)
+        pipe.execute()
+
+    def add(self, keys: List[str], card: Dict[str, Any]) -> None:
+        live = self.client.pipeline()
+        for key in keys:
+            live.exists(self._key(key, "meta"))
+        warm = [key for key, exists in zip(keys, live.execute()) if exists]
+        if not warm:
+            return
+        pipe = self.client.pipeline()
+        self._write_cards(pipe, [card])
+        written = len(pipe)
+        for key in warm:
+            pipe.zadd(self._key(key), {card["id"]: _score(card)})
+            pipe.zrevrange(self._key(key), self.size, -1)
+            pipe.zremrangebyrank(self._key(key), 0, -(self.size + 1))
+        results = pipe.execute()[written:]
+        added, evicted = results[0::3], results[1::3]
+        # ZADD が新規追加（1）を返したタイムラインだけ総数を増やす
+        pipe = self.client.pipeline()
+        for key, is_new in zip(warm, added):
+            if is_new:
+                pipe.hincrby(self._key(key, "meta"), "total", 1)
+        pipe.execute()
+        # 保持件数を超えて押し出された投稿（古い投稿なら追加した投稿自身）
+        self._prune_cards([post_id for ids in evicted for post_id in ids])
+
+    def any_warm(self) -> bool:
+        return bool(self.client.exists(*[self._key(key, "meta") for key in TIMELINE_KEYS]))
+
+    def remove(self, post_ids: List[str]) -> None:
+        pipe = self.client.pipeline()
+        for key in TIMELINE_KEYS:
+            pipe.zrem(self._key(key), *post_ids)
+        removed = pipe.execute()
+        pipe = self.client.pipeline()
+        for key, count in zip(TIMELINE_KEYS, removed):
+            if count:
+                pipe.hincrby(self._key(key, "meta"), "total", -count)
+        pipe.execute()
+        self._prune_cards(post_ids)
+
+    def page(self, key: str, offset: int, limit: int) -> Optional[Tuple[List[Dict[str, Any]], int]]:
+        pipe = self.client.pipeline()
+        pipe.zrevrange(self._key(key), offset, offset + limit - 1)
+        pipe.hget(self._key(key, "meta"), "total")
+        ids, total = pipe.execute()
+        if total is None:
+            return None
+        if not ids:
+            return [], int(total)
+        pipe = self.client.pipeline()
+        pipe.hmget(self._key("cards"), ids)
+        pipe.hmget(self._key("likes"), ids)
+        pipe.hmget(self._key("comments"), ids)
+        raw_cards, like_counts, comment_counts = pipe.execute()
+        if any(raw is None for raw in raw_cards):
+            return None
+        cards = []
+        for raw, like_count, comment_count in zip(raw_cards, like_counts, comment_counts):
+            card = json.loads(raw)
+            card["like_count"] = int(like_count or 0)
+            card["comment_count"] = int(comment_count or 0)
+            cards.append(card)
+        return cards, int(total)
+
+    def set_like_count(self, post_id: str, like_count: int) -> None:
+        self.client.hset(self._key("likes"), post_id, like_count)
+
+    def incr_comment_count(self, post_id: str) -> None:
+        # カード未登録の投稿はカード書き込み時に上書きされる
+        self.client.hincrby(self._key("comments"), post_id, 1)
+
+    def liked_lookup(self, user_id: str, post_ids: List[str]) -> Tuple[Set[str], Set[str]]:
+        pipe = self.client.pipeline()
+        pipe.smismember(self._key("checked", user_id), post_ids)
+        pipe.smismember(self._key("liked", user_id), post_ids)
+        checked_flags, liked_flags = pipe.execute()
+        checked = {post_id for post_id, flag in zip(post_ids, checked_flags) if flag}
+        liked = {post_id for post_id, flag in zip(post_ids, liked_flags) if flag}
+        return checked, liked
+
+    def liked_store(self, user_id: str, checked: List[str], liked: List[str]) -> None:
+        pipe = self.client.pipeline()
+        if checked:
+            pipe.sadd(self._key("checked", user_id), *checked)
+        if liked:
+            pipe.sadd(self._key("liked", user_id), *liked)
+        pipe.expire(self._key("checked", user_id), self.ttl)
+        pipe.expire(self._key("liked", user_id), self.ttl)
+        pipe.execute()
+
+    def liked_toggle(self, user_id: str, post_id: str, liked: bool) -> None:
+        if not self.client.exists(self._key("checked", user_id)):
+            return
+        pipe = self.client.pipeline()
+        pipe.sadd(self._key("checked", user_id), post_id)
+        if liked:
+            pipe.sadd(self._key("liked", user_id), post_id)
+        else:
+            pipe.srem(self._key("liked", user_id), post_id)
+        pipe.execute()
+
+    def invalidate(self) -> None:
+        self.client.delete(*[self._key(key) for key in TIMELINE_KEYS],
+                           *[self._key(key, "meta") for key in TIMELINE_KEYS],
+                           *[self._key(name) for name in ("cards", "likes", "comments")])
+
+    def clear(self) -> None:
+        keys = list(self.client.scan_iter(f"{self.PREFIX}:*"))
+        if keys:
+            self.client.delete(*keys)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+class TimelineService:
+    @staticmethod
+    def store():
+        """
+        タイムラインの保存先を取得（REDIS_URL があればRedis、なければメモリ）
+        """
+        global _store
+        if _store is None:
+            with _store_lock:
+                if _store is None:
+                    client = get_redis()
+                    if client is not None:
+                        _store = RedisTimelineStore(client, settings.TIMELINE_SIZE, settings.TIMELINE_TTL_SECONDS)
+                    else:
+                        _store = MemoryTimelineStore(settings.TIMELINE_SIZE, settings.TIMELINE_TTL_SECONDS)
+        return _store
+    
+    @staticmethod
+    def set_store(store) -> None:
+        """タイムラインの保存先を差し替える（テスト用）"""
+        global _store
+        _store = store
+    
+    @staticmethod
+    def _to_card(post: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        投稿をタイムライン用のカードに整形（閲覧者ごとの is_liked と投稿者名・アバターは含めない）
+        """
+        post["images"] = post.pop("post_images", None) or []
+        post["hashtags"] = [h["hashtags"] for h in post.pop("post_hashtags", None) or []]
+        return post
+    
+    @staticmethod
+    def _keys_for(card: Dict[str, Any]) -> List[str]:
+        keys = [TIMELINE_ALL]
+        if card.get("category") in TIMELINE_KEYS:
+            keys.append(card["category"])
+        return keys
+    
+    @staticmethod
+    def is_cacheable(category: Optional[str], hashtag: Optional[str], offset: int, limit: int) -> bool:
+        """
+        タイムラインから返せるリクエストか（ハッシュタグ絞り込みと保持件数より先は対象外）
+        """
+        return (
+            settings.TIMELINE_CACHE_ENABLED
+            and not hashtag
+            and (category is None or category in TIMELINE_KEYS)
+            and offset + limit <= settings.TIMELINE_SIZE
+        )
+    
+    @staticmethod
+    async def _rebuild(key: str) -> None:
+        """
+        承認済み投稿の上位をDBから読み込んでタイムラインを作り直す
+        """
+        query = supabase.table("posts").select(
+            TIMELINE_CARD_SELECT,
+            count="exact"
+        ).eq("status", PostStatus.APPROVED.value)
+        if key != TIMELINE_ALL:
+            query = query.eq("category", key)
+        result = await execute_async(query.order("created_at", desc=True).range(0, settings.TIMELINE_SIZE - 1))
+        cards = [TimelineService._to_card(post) for post in result.data or []]
+        total = result.count if getattr(result, "count", None) is not None else len(cards)
+        await run_in_threadpool(TimelineService.store().load, key, cards, total)
+    
+    @staticmethod
+    async def _overlay_liked(cards: List[Dict[str, Any]], user_id: Optional[str]) -> None:
+        """
+        閲覧者のいいね状態を重ねる（未確認の投稿だけを likes から1クエリで取得）
+        """
+        if not user_id:
+            for card in cards:
+                card["is_liked"] = False
+            return
+        store = TimelineService.store()
+        post_ids = [card["id"] for card in cards]
+        checked, liked = await run_in_threadpool(store.liked_lookup, user_id, post_ids)
+        unknown = [post_id for post_id in post_ids if post_id not in checked]
+        if unknown:
+            result = await execute_async(
+                supabase.table("likes").select("post_id").eq("user_id", user_id).in_("post_id", unknown)
+            )
+            found = [row["post_id"] for row in result.data or []]
+            await run_in_threadpool(store.liked_store, user_id, unknown, found)
+            liked |= set(found)
+        for card in cards:
+            card["is_liked"] = card["id"] in liked
+    
+    @staticmethod
+    async def get_page(
+        category: Optional[str],
+        offset: int,
+        limit: int,
+        current_user_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        タイムラインからフィードのページを返す（未構築・期限切れなら構築してから返す）
+        """
+        key = category or TIMELINE_ALL
+        store = TimelineService.store()
+        page = await run_in_threadpool(store.page, key, offset, limit)
+        if page is None:
+            await TimelineService._rebuild(key)
+            page = await run_in_threadpool(store.page, key, offset, limit) or ([], 0)
+        cards, total = page
+        await TimelineService._overlay_liked(cards, current_user_id)
+        await UserCardService.hydrate(cards)
+        return {
+            "total": total,
+            "items": cards,
+            "page": offset // limit + 1,
+            "per_page": limit
+        }
+    
+    @staticmethod
+    async def on_approved(post_ids: List[str]) -> None:
+        """
+        承認された投稿のカードをタイムラインへ書き込む
+        """
+        if not settings.TIMELINE_CACHE_ENABLED or not post_ids:
+            return
+        try:
+            store = TimelineService.store()
+            # 構築済みのタイムラインが無ければ次回の読み込みで作られる
+            if not await run_in_threadpool(store.any_warm):
+                return
+            result = await execute_async(supabase.table("posts").select(TIMELINE_CARD_SELECT).in_("id", post_ids))
+            for post in result.data or []:
+                card = TimelineService._to_card(post)
+                await run_in_threadpool(store.add, TimelineService._keys_for(card), card)
+        except Exception as e:
+            # 書き込みに失敗したタイムラインは破棄し、次回の読み込みで作り直す
+            print(f"タイムライン更新エラー: {str(e)}")
+            await TimelineService.invalidate()
+    
+    @staticmethod
+    async def on_removed(post_ids: List[str]) -> None:
+        """
+        承認済みでなくなった投稿をタイムラインから取り除く
+        """
+        if not settings.TIMELINE_CACHE_ENABLED or not post_ids:
+            return
+        try:
+            await run_in_threadpool(TimelineService.store().remove, post_ids)
+        except Exception as e:
+            print(f"タイムライン更新エラー: {str(e)}")
+            await TimelineService.invalidate()
+    
+    @staticmethod
+    async def on_like_toggled(post_id: str, user_id: str, liked: bool, like_count: int) -> None:
+        if not settings.TIMELINE_CACHE_ENABLED:
+            return
+        try:
+            store = TimelineService.store()
+            await run_in_threadpool(store.set_like_count, post_id, like_count)
+            await run_in_threadpool(store.liked_toggle, user_id, post_id, liked)
+        except Exception as e:
+            print(f"タイムライン更新エラー: {str(e)}")
+    
+    @staticmethod
+    async def on_comment_added(post_id: str) -> None:
+        if not settings.TIMELINE_CACHE_ENABLED:
+            return
+        try:
+            await run_in_threadpool(TimelineService.store().incr_comment_count, post_id)
+        except Exception as e:
+            print(f"タイムライン更新エラー: {str(e)}")
+    
+    @staticmethod
+    async def invalidate() -> None:
+        """
+        全タイムラインを破棄（承認取り消しなど、差分で反映できない変更用）
+        """
+        try:
+            await run_in_threadpool(TimelineService.store().invalidate)
+        except Exception as e:
+            print(f"タイムライン破棄エラー: {str(e)}")
@@ -0,0 +1,113 @@
+from app.core.config import settings
+from app.services.loaders import Loaders
+from collections import OrderedDict
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+import threading
+import time
+
+
+class UserCardCache:
+    """
+    利用者の表示用カード（id・名前・アバター）を保持するプロセス内のLRUキャッシュ
+    プロフィール・アバターの変更時に破棄し、他インスタンスでの変更はTTLで取り込む
+    """
+
+    def __init__(self, size: int, ttl: int):
+        self.size = size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._cards: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+
+    def get_many(self, user_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        キャッシュにあるカードだけを返す（期限切れは破棄する）
+        """
+        now = time.monotonic()
+        found: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            for user_id in user_ids:
+                entry = self._cards.get(user_id)
+                if entry is None:
+                    continue
+                card, expires = entry
+                if expires < now:
+                    del self._cards[user_id]
+                    continue
+                self._cards.move_to_end(user_id)
+                found[user_id] = card
+        return found
+
+    def set_many(self, cards: Iterable[Dict[str, Any]]) -> None:
+        with self._lock:
+            expires = time.monotonic() + self.ttl
+            for card in cards:
+                self._cards[card["id"]] = (card, expires)
+                self._cards.move_to_end(card["id"])
+            while len(self._cards) > self.size:
+                self._cards.popitem(last=False)
+
+    def invalidate(self, user_ids: Iterable[str]) -> None:
+        with self._lock:
+            for user_id in user_ids:
+                self._cards.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cards.clear()
+
+    def __len__(self) -> int:
+        return len(self._cards)
+
+
+class UserCardService:
+    _cache: Optional[UserCardCache] = None
+
+    @staticmethod
+    def cache() -> UserCardCache:
+        if UserCardService._cache is None:
+            UserCardService._cache = UserCardCache(settings.USER_CARD_CACHE_SIZE, settings.USER_CARD_TTL_SECONDS)
+        return UserCardService._cache
+
+    @staticmethod
+    def set_cache(cache: Optional[UserCardCache]) -> None:
+        """キャッシュを差し替える（テスト用、None で次回生成）"""
+        UserCardService._cache = cache
+
+    @staticmethod
+    async def get_many(user_ids: Iterable[Optional[str]]) -> Dict[str, Dict[str, Any]]:
+        """
+        利用者のカードを返す（キャッシュにない利用者だけをリクエスト内のローダーでまとめて取得）
+        """
+        ids = list(dict.fromkeys(user_id for user_id in user_ids if user_id))
+        cache = UserCardService.cache()
+        cards = cache.get_many(ids)
+        missing = [user_id for user_id in ids if user_id not in cards]
+        if missing:
+            fetched = [row for row in await Loaders.users().load_many(missing) if row]
+            cache.set_many(fetched)
+            cards.update({row["id"]: row for row in fetched})
+        return cards
+
+    @staticmethod
+    async def hydrate(
+        rows: List[Dict[str, Any]],
+        user_key: str = "user_id",
+        avatar: bool = True
+    ) -> List[Dict[str, Any]]:
+        """
+        一覧の各行に利用者名（user_name）とアバター（user_avatar、avatar=False なら付けない）を付ける
+        """
+        cards = await UserCardService.get_many(row.get(user_key) for row in rows)
+        for row in rows:
+            card = cards.get(row.get(user_key)) or {}
+            row["user_name"] = card.get("name")
+            if avatar:
+                row["user_avatar"] = card.get("avatar_url")
+        return rows
+
+    @staticmethod
+    def invalidate(user_id: str) -> None:
+        """
+        名前・アバターを変更した利用者のカードを破棄
+        """
+        UserCardService.cache().invalidate([user_id])
@@ -1,9 +1,21 @@
 from app.core.supabase import supabase
 from app.schemas.user import UserProfileUpdate, UserStatusUpdate
+from app.services.dog_service import DOG_COLUMNS, DOG_WITH_VACCINATIONS_SELECT
+from app.services.user_card_service import UserCardService
 from fastapi import HTTPException, status
 from typing import Dict, Any, List, Optional
 
 
+# ユーザー情報のレスポンスに必要な列
+USER_COLUMNS = (
+    "id, auth_id, email, name, phone, address, is_imabari_resident, residence_years, "
+    "status, avatar_url, created_at, updated_at"
+)
+
+# ユーザーと飼っている犬（有効な犬だけを dogs.is_active で絞り込む）
+USER_WITH_DOGS_SELECT = f"{USER_COLUMNS}, dogs({DOG_COLUMNS})"
+
+
 class UserService:
     @staticmethod
     async def get_profile(user_id: str) -> Dict[str, Any]:
@@ -11,10 +23,10 @@ class UserService:
         ユーザープロフィールを取得
         """
         try:
-            # ユーザー情報と犬情報を結合して取得
+            # ユーザー情報とアクティブな犬の情報を結合して取得
             result = supabase.table("users").select(
-                "*, dogs(*)"
-            ).eq("id", user_id).execute()
+                USER_WITH_DOGS_SELECT
+            ).eq("id", user_id).eq("dogs.is_active", True).execute()
             
             if not result.data:
                 raise HTTPException(
@@ -22,12 +34,7 @@ class UserService:
                     detail="ユーザーが見つかりません"
                 )
             
-            # アクティブな犬のみフィルタリング
-            user_data = result.data[0]
-            if user_data.get("dogs"):
-                user_data["dogs"] = [dog for dog in user_data["dogs"] if dog.get("is_active", True)]
-            
-            return user_data
+            return result.data[0]
             
         except Exception as e:
             if hasattr(e, 'status_code'):
@@ -60,6 +67,9 @@ class UserService:
                     detail="プロフィールの更新に失敗しました"
                 )
             
+            # 一覧に表示する名前・アバターを次回の表示で取り直す
+            UserCardService.invalidate(user_id)
+            
             return result.data[0]
             
         except Exception as e:
@@ -81,7 +91,9 @@ class UserService:
         """
         try:
             # クエリの構築
-            query = supabase.table("users").select("*, dogs(*)", count="exact")
+            query = supabase.table("users").select(
+                USER_WITH_DOGS_SELECT, count="exact"
+            ).eq("dogs.is_active", True)
             
             if status:
                 query = query.eq("status", status)
@@ -89,12 +101,6 @@ class UserService:
             # ページネーション
             result = query.order("created_at", desc=True).range(offset, offset + limit - 1).execute()
             
-            # 各ユーザーのアクティブな犬のみフィルタリング
-            if result.data:
-                for user in result.data:
-                    if user.get("dogs"):
-                        user["dogs"] = [dog for dog in user["dogs"] if dog.get("is_active", True)]
-            
             return {
                 "total": result.count if hasattr(result, 'count') else len(result.data),
                 "items": result.data or [],
@@ -115,7 +121,7 @@ class UserService:
         """
         try:
             result = supabase.table("users").select(
-                "*, dogs(*, vaccination_records(*))"
+                f"{USER_COLUMNS}, dogs({DOG_WITH_VACCINATIONS_SELECT})"
             ).eq("id", user_id).execute()
             
             if not result.data:
@@ -175,7 +181,7 @@ class UserService:
         """
         try:
             # 名前、メールアドレス、電話番号で検索
-            result = supabase.table("users").select("*").or_(
+            result = supabase.table("users").select(USER_COLUMNS).or_(
                 f"name.ilike.%{query}%,email.ilike.%{query}%,phone.ilike.%{query}%"
             ).limit(limit).execute()
             
@@ -0,0 +1,198 @@
+from app.core.supabase import supabase
+from app.core.config import settings
+from datetime import date, datetime, timedelta
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+import threading
+import time
+
+
+# 入場可否の判定に必要な列だけを犬ごとに埋め込んで取得
+DOG_VACCINATION_SELECT = "id, vaccination_records(vaccine_type, vaccination_date, next_vaccination_date)"
+
+# PostgRESTの1レスポンスあたりの上限行数に合わせたページサイズ
+PAGE_SIZE = 1000
+
+# in_ フィルタ1回あたりのID数（URL長の上限対策）
+IN_CHUNK_SIZE = 200
+
+
+def _to_date(value: Any) -> date:
+    return value if isinstance(value, date) else date.fromisoformat(str(value)[:10])
+
+
+def valid_until(records: List[Dict[str, Any]]) -> Optional[date]:
+    """
+    ワクチン記録から入場可能な最終日を求める
+    必須ワクチンごとに最新の有効期限を取り、その中で最も早い日（未接種の種類があれば None）
+    """
+    latest: Dict[str, date] = {}
+    for record in records:
+        if record.get("next_vaccination_date"):
+            expires = _to_date(record["next_vaccination_date"])
+        else:
+            expires = _to_date(record["vaccination_date"]) + timedelta(days=settings.VACCINATION_VALIDITY_DAYS)
+        vaccine_type = record["vaccine_type"]
+        if vaccine_type not in latest or latest[vaccine_type] < expires:
+            latest[vaccine_type] = expires
+
+    required = settings.REQUIRED_VACCINE_TYPES
+    if any(vaccine_type not in latest for vaccine_type in required):
+        return None
+    return min(latest[vaccine_type] for vaccine_type in required) if required else date.max
+
+
+class EligibilityCache:
+    """
+    犬ごとの入場可能な最終日を保持するプロセス内キャッシュ
+    入場できる判定は期限日まで、入場できない判定は短いTTLの間だけ保持する
+    （サーバーレスではインスタンスごとに保持されるため、他インスタンスでの記録追加はTTLで取り込む）
+    """
+
+    def __init__(self, negative_ttl: int):
+        self.negative_ttl = negative_ttl
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[Optional[date], float]] = {}
+
+    def get(self, dog_id: str, today: date) -> Tuple[bool, Optional[date]]:
+        """
+        (キャッシュ有無, 最終日) を返す
+        """
+        with self._lock:
+            entry = self._entries.get(dog_id)
+            if entry is None:
+                return False, None
+            until, expires = entry
+            if until is not None and until >= today:
+                return True, until
+            # 入場できない判定（期限の境界を越えたものを含む）はTTLが過ぎたら取り直す
+            if expires < time.monotonic():
+                del self._entries[dog_id]
+                return False, None
+            return True, until
+
+    def set_many(self, values: Dict[str, Optional[date]]) -> None:
+        with self._lock:
+            expires = time.monotonic() + self.negative_ttl
+            for dog_id, until in values.items():
+                self._entries[dog_id] = (until, expires)
+
+    def invalidate(self, dog_ids: Iterable[str]) -> None:
+        with self._lock:
+            for dog_id in dog_ids:
+                self._entries.pop(dog_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class VaccinationEligibilityService:
+    _cache: Optional[EligibilityCache] = None
+
+    @staticmethod
+    def cache() -> EligibilityCache:
+        if VaccinationEligibilityService._cache is None:
+            VaccinationEligibilityService._cache = EligibilityCache(settings.ELIGIBILITY_NEGATIVE_TTL_SECONDS)
+        return VaccinationEligibilityService._cache
+
+    @staticmethod
+    def set_cache(cache: Optional[EligibilityCache]) -> None:
+        """キャッシュを差し替える（テスト用、None で次回生成）"""
+        VaccinationEligibilityService._cache = cache
+
+    @staticmethod
+    def park_today() -> date:
+        """
+        園の所在地（PARK_TIMEZONE）での今日の日付（有効期限は園の日付で判定する）
+        """
+        return datetime.now(ZoneInfo(settings.PARK_TIMEZONE)).date()
+
+    @staticmethod
+    def _fetch(dog_ids: Optional[List[str]] = None) -> Dict[str, Optional[date]]:
+        """
+        犬ごとのワクチン記録を埋め込みで取得し、最終日を求める
+        dog_ids を省略すると有効な全頭をページ単位で取得する
+        """
+        values: Dict[str, Optional[date]] = {}
+        if dog_ids is not None:
+            for i in range(0, len(dog_ids), IN_CHUNK_SIZE):
+                result = supabase.table("dogs").select(DOG_VACCINATION_SELECT).in_(
+                    "id", dog_ids[i:i + IN_CHUNK_SIZE]
+                ).execute()
+                for dog in result.data or []:
+                    values[dog["id"]] = valid_until(dog.get("vaccination_records") or [])
+            return values
+
+        offset = 0
+        while True:
+            result = supabase.table("dogs").select(DOG_VACCINATION_SELECT).eq(
+                "is_active", True
+            ).order("id").range(offset, offset + PAGE_SIZE - 1).execute()
+            page = result.data or []
+            for dog in page:
+                values[dog["id"]] = valid_until(dog.get("vaccination_records") or [])
+            if len(page) < PAGE_SIZE:
+                return values
+            offset += PAGE_SIZE
+
+    @staticmethod
+    def check(dog_ids: List[str], today: Optional[date] = None) -> Dict[str, Optional[date]]:
+        """
+        犬ごとの入場可能な最終日を返す（キャッシュにない犬だけまとめてDBから取得）
+        """
+        today = today or VaccinationEligibilityService.park_today()
+        cache = VaccinationEligibilityService.cache()
+        values: Dict[str, Optional[date]] = {}
+        missing: List[str] = []
+        for dog_id in dog_ids:
+            hit, until = cache.get(dog_id, today)
+            if hit:
+                values[dog_id] = until
+            else:
+                missing.append(dog_id)
+
+        if missing:
+            fetched = VaccinationEligibilityService._fetch(missing)
+            for dog_id in missing:
+                values[dog_id] = fetched.get(dog_id)
+            cache.set_many({dog_id: values[dog_id] for dog_id in missing})
+        return values
+
+    @staticmethod
+    def ineligible(dog_ids: List[str], today: Optional[date] = None) -> List[str]:
+        """
+        ワクチン接種が確認できない（未登録・期限切れ）犬のIDを返す
+        """
+        today = today or VaccinationEligibilityService.park_today()
+        values = VaccinationEligibilityService.check(dog_ids, today)
+        return [dog_id for dog_id in dog_ids if values[dog_id] is None or values[dog_id] < today]
+
+    @staticmethod
+    def refresh(dog_ids: List[str]) -> None:
+        """
+        ワクチン記録の追加後に該当する犬の判定を取り直す（失敗時は破棄して次回の入場時に取得）
+        """
+        cache = VaccinationEligibilityService.cache()
+        try:
+            cache.set_many(VaccinationEligibilityService._fetch(dog_ids))
+        except Exception:
+            cache.invalidate(dog_ids)
+
+    @staticmethod
+    async def preload(today: Optional[date] = None) -> Dict[str, Any]:
+        """
+        有効な全頭の判定をまとめてキャッシュに読み込む（開園時のスキャナー端末向け）
+        """
+        today = today or VaccinationEligibilityService.park_today()
+        values = VaccinationEligibilityService._fetch()
+        VaccinationEligibilityService.cache().set_many(values)
+        eligible = sum(1 for until in values.values() if until is not None and until >= today)
+        return {
+            "dogs": len(values),
+            "eligible": eligible,
+            "ineligible": len(values) - eligible,
+        }
@@ -0,0 +1,171 @@
+from app.core.supabase import supabase
+from app.core.config import settings
+from app.services.notification_service import NotificationService
+from datetime import date, timedelta
+from typing import Dict, Any, List, Optional, Set, Tuple
+import asyncio
+
+
+# PostgRESTの1レスポンスあたりの上限行数に合わせたページサイズ
+PAGE_SIZE = 1000
+
+# in_ フィルタ1回あたりのID数（URL長の上限対策）
+IN_CHUNK_SIZE = 200
+
+
+def _chunks(items: List[Any], size: int) -> List[List[Any]]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+class VaccinationReminderService:
+    @staticmethod
+    async def run(today: Optional[date] = None) -> Dict[str, int]:
+        """
+        接種期限が近いワクチン記録を走査し、飼い主ごとに1通のまとめメールを送る
+        送信済みの記録は vaccination_reminders に残し、再実行しても重複送信しない
+        """
+        today = today or date.today()
+        windows = sorted(set(settings.VACCINATION_REMINDER_DAYS))
+        horizon = today + timedelta(days=windows[-1])
+
+        records = VaccinationReminderService._fetch_due_records(today, horizon)
+        sent_keys = VaccinationReminderService._fetch_sent_keys(today, horizon)
+
+        # 記録ごとに該当する通知タイミング（期限までの日数以上で最も近いもの）を決める
+        pending: Dict[str, List[Dict[str, Any]]] = {}
+        skipped = 0
+        for record in records:
+            due = date.fromisoformat(str(record["next_vaccination_date"])[:10])
+            days_before = next(w for w in windows if (due - today).days <= w)
+            if (record["id"], due.isoformat(), days_before) in sent_keys:
+                skipped += 1
+                continue
+            record["days_before"] = days_before
+            pending.setdefault(record["dogs"]["user_id"], []).append(record)
+
+        owners = VaccinationReminderService._fetch_owners(list(pending))
+
+        semaphore = asyncio.Semaphore(settings.REMINDER_SEND_CONCURRENCY)
+
+        async def send(user_id: str) -> Tuple[str, bool]:
+            async with semaphore:
+                sent = await VaccinationReminderService._send_digest(owners[user_id], pending[user_id])
+                return user_id, sent
+
+        sent_users, failed = 0, 0
+        for batch in _chunks([user_id for user_id in pending if user_id in owners], IN_CHUNK_SIZE):
+            results = await asyncio.gather(*[send(user_id) for user_id in batch])
+            # 送信できた分をバッチごとに記録（途中で止まっても送信済みは再送しない）
+            rows = [
+                {
+                    "vaccination_record_id": record["id"],
+                    "user_id": user_id,
+                    "due_date": str(record["next_vaccination_date"])[:10],
+                    "days_before": record["days_before"],
+                }
+                for user_id, sent in results if sent
+                for record in pending[user_id]
+            ]
+            if rows:
+                supabase.table("vaccination_reminders").upsert(
+                    rows,
+                    on_conflict="vaccination_record_id,due_date,days_before",
+                    ignore_duplicates=True
+                ).execute()
+            sent_users += sum(1 for _, sent in results if sent)
+            failed += sum(1 for _, sent in results if not sent)
+
+        return {
+            "scanned": len(records),
+            "already_sent": skipped,
+            "due": sum(len(items) for items in pending.values()),
+            "users": len(pending),
+            "sent": sent_users,
+            "failed": failed,
+        }
+
+    @staticmethod
+    def _fetch_due_records(today: date, horizon: date) -> List[Dict[str, Any]]:
+        """
+        期限が [today, horizon] の記録を next_vaccination_date のインデックスでページ単位に取得
+        """
+        records: List[Dict[str, Any]] = []
+        offset = 0
+        while True:
+            result = supabase.table("vaccination_records").select(
+                "id, vaccine_type, next_vaccination_date, dogs!inner(name, user_id, is_active)"
+            ).gte("next_vaccination_date", today.isoformat()).lte(
+                "next_vaccination_date", horizon.isoformat()
+            ).eq("dogs.is_active", True).order("next_vaccination_date").order("id").range(
+                offset, offset + PAGE_SIZE - 1
+            ).execute()
+
+            page = result.data or []
+            records.extend(page)
+            if len(page) < PAGE_SIZE:
+                return records
+            offset += PAGE_SIZE
+
+    @staticmethod
+    def _fetch_sent_keys(today: date, horizon: date) -> Set[Tuple[str, str, int]]:
+        """
+        同じ期間に送信済みの (記録ID, 期限, 通知タイミング) を取得
+        """
+        keys: Set[Tuple[str, str, int]] = set()
+        offset = 0
+        while True:
+            result = supabase.table("vaccination_reminders").select(
+                "vaccination_record_id, due_date, days_before"
+            ).gte("due_date", today.isoformat()).lte("due_date", horizon.isoformat()).order("id").range(
+                offset, offset + PAGE_SIZE - 1
+            ).execute()
+
+            page = result.data or []
+            keys.update(
+                (row["vaccination_record_id"], str(row["due_date"])[:10], row["days_before"])
+                for row in page
+            )
+            if len(page) < PAGE_SIZE:
+                return keys
+            offset += PAGE_SIZE
+
+    @staticmethod
+    def _fetch_owners(user_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        飼い主をまとめて取得（in_ フィルタ、URL長の上限に合わせて分割）
+        """
+        owners: Dict[str, Dict[str, Any]] = {}
+        for chunk in _chunks(user_ids, IN_CHUNK_SIZE):
+            result = supabase.table("users").select("id, email, name").in_("id", chunk).eq(
+                "status", "active"
+            ).execute()
+            for user in result.data or []:
+                owners[user["id"]] = user
+        return owners
+
+    @staticmethod
+    async def _send_digest(owner: Dict[str, Any], records: List[Dict[str, Any]]) -> bool:
+        """
+        飼い主1人分のまとめメールを送信
+        """
+        lines = "\n".join(
+            f"            ・{record['dogs']['name']}（{record['vaccine_type']}）: {str(record['next_vaccination_date'])[:10]} まで"
+            for record in sorted(records, key=lambda r: str(r["next_vaccination_date"]))
+        )
+        subject = "ワクチン接種期限のお知らせ"
+        message = f"""
+            {owner['name']} 様
+
+            以下のワクチン接種期限が近づいています。
+
+{lines}
+
+            ドッグランを安全にご利用いただくため、
+            お早めにワクチン接種を受けていただきますようお願いいたします。
+
+            接種後は、アプリからワクチン記録を更新してください。
+
+            里山ドッグラン管理チーム
+            """
+
+        return await NotificationService._send_email(owner["email"], subject, message)
@@ -1,7 +1,6 @@
 import uuid
 from datetime import datetime, timedelta, timezone
 from typing import Dict, Any, List, Optional
-import hashlib
 import secrets
 
 
@@ -16,19 +15,15 @@ def generate_secure_token(length: int = 32) -> str:
 
 
 def hash_password(password: str) -> str:
-    """パスワードをハッシュ化"""
-    # 実際のアプリケーションではより強固なハッシュ化（bcrypt等）を使用
-    salt = secrets.token_hex(16)
-    return hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), 100000).hex() + ':' + salt
+    """パスワードをハッシュ化（同期、非同期の処理からは PasswordService.hash を使う）"""
+    from app.services.password_service import PasswordService
+    return PasswordService.hash_sync(password)
 
 
 def verify_password(password: str, hashed: str) -> bool:
-    """パスワードを検証"""
-    try:
-        password_hash, salt = hashed.split(':')
-        return hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), 100000).hex() == password_hash
-    except:
-        return False
+    """パスワードを検証（同期、非同期の処理からは PasswordService.verify を使う）"""
+    from app.services.password_service import PasswordService
+    return PasswordService.verify_sync(password, hashed)
 
 
 def get_jst_now() -> datetime:
@@ -0,0 +1,1133 @@
+"""
+負荷試験用のインプロセスSupabaseスタンドイン
+
+database_schema.sql のテーブル定義（カラム、デフォルト値、外部キー、UNIQUE制約）を読み込み、
+supabase-py / postgrest-py のクエリビルダーと同じ呼び出し形式を受け付けるメモリ上のDBを提供する。
+各 execute() ではネットワーク往復を模した遅延を挿入し、ルート単位のクエリ回数を記録する。
+"""
+import contextvars
+import copy
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    from postgrest.exceptions import APIError
+except ImportError:  # pragma: no cover - postgrest未インストール環境用
+    class APIError(Exception):
+        def __init__(self, error: Dict[str, Any]):
+            self.message = error.get("message")
+            self.code = error.get("code")
+            super().__init__(self.message)
+
+
+SCHEMA_PATH = Path(__file__).resolve().parent.parent / "database_schema.sql"
+
+# 現在処理中のルート（クエリ回数の集計に使用）
+current_route: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "current_route", default=None
+)
+
+
+# ========================================
+# スキーマ定義の読み込み
+# ========================================
+
+@dataclass
+class Column:
+    name: str
+    type: str
+    default: Optional[str] = None
+    references: Optional[Tuple[str, str]] = None
+    primary_key: bool = False
+    unique: bool = False
+
+
+@dataclass
+class Table:
+    name: str
+    columns: Dict[str, Column] = field(default_factory=dict)
+    unique_sets: List[Tuple[str, ...]] = field(default_factory=list)
+
+    @property
+    def primary_key(self) -> str:
+        for column in self.columns.values():
+            if column.primary_key:
+                return column.name
+        return "id"
+
+
+_TABLE_PATTERN = re.compile(
+    r"CREATE TABLE (?:IF NOT EXISTS )?(\w+)\s*\((.*?)\n\)(?:\s*PARTITION BY [^;]*)?;", re.DOTALL | re.IGNORECASE
+)
+_ALTER_ADD_PATTERN = re.compile(
+    r"ALTER TABLE (\w+)\s+ADD COLUMN (?:IF NOT EXISTS )?(.*?);", re.DOTALL | re.IGNORECASE
+)
+
+
+def _parse_column(line: str) -> Optional[Column]:
+    parts = line.split()
+    if len(parts) < 2:
+        return None
+    upper = line.upper()
+    column = Column(name=parts[0], type=parts[1].upper())
+    default = re.search(r"DEFAULT\s+('(?:[^']*)'|[\w.()]+)", line, re.IGNORECASE)
+    if default:
+        column.default = default.group(1)
+    ref = re.search(r"REFERENCES\s+(\w+)\((\w+)\)", line, re.IGNORECASE)
+    if ref:
+        column.references = (ref.group(1), ref.group(2))
+    column.primary_key = "PRIMARY KEY" in upper
+    column.unique = bool(re.search(r"\bUNIQUE\b", upper))
+    return column
+
+
+def load_schema(path: Path = SCHEMA_PATH) -> Dict[str, Table]:
+    """CREATE TABLE文からテーブル定義を読み込む"""
+    sql = path.read_text(encoding="utf-8")
+    tables: Dict[str, Table] = {}
+    for name, body in _TABLE_PATTERN.findall(sql):
+        table = Table(name=name)
+        for raw in body.split("\n"):
+            line = raw.split("--")[0].strip().rstrip(",")
+            if not line:
+                continue
+            upper = line.upper()
+            if upper.startswith("UNIQUE"):
+                cols = re.search(r"\((.*?)\)", line).group(1)
+                table.unique_sets.append(tuple(c.strip() for c in cols.split(",")))
+                continue
+            if re.match(r"(PRIMARY KEY|CONSTRAINT|CHECK|FOREIGN KEY)\b", upper):
+                continue
+            column = _parse_column(line)
+            if column:
+                table.columns[column.name] = column
+                if column.unique and not column.primary_key:
+                    table.unique_sets.append((column.name,))
+        tables[name] = table
+    for name, body in _ALTER_ADD_PATTERN.findall(sql):
+        if name in tables:
+            column = _parse_column(body.strip())
+            if column:
+                tables[name].columns[column.name] = column
+    return tables
+
+
+# ========================================
+# 値の正規化
+# ========================================
+
+def _utc_now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _normalize_timestamp(value: Any) -> Any:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        dt = value
+    elif isinstance(value, date):
+        dt = datetime(value.year, value.month, value.day)
+    else:
+        text = str(value)
+        try:
+            dt = datetime.fromisoformat(text.replace("Z", "+00:00"))
+        except ValueError:
+            return text
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc).isoformat()
+
+
+def _coerce(column: Optional[Column], value: Any) -> Any:
+    """カラム型に合わせて値を変換（PostgRESTのJSON表現に揃える）"""
+    if column is None or value is None:
+        return value
+    col_type = column.type
+    if col_type.startswith("TIMESTAMP"):
+        return _normalize_timestamp(value)
+    if col_type == "DATE":
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()[:10]
+        return str(value)[:10]
+    if col_type == "BOOLEAN":
+        if isinstance(value, str):
+            return value.lower() == "true"
+        return bool(value)
+    if col_type in ("INTEGER", "BIGINT", "SMALLINT"):
+        return int(value)
+    if col_type.startswith(("DECIMAL", "NUMERIC", "DOUBLE", "REAL", "FLOAT")):
+        return float(value)
+    if col_type == "UUID":
+        return str(value)
+    return value
+
+
+def _default_value(column: Column) -> Any:
+    default = column.default
+    if default is None:
+        return None
+    lowered = default.lower()
+    if lowered.startswith(("gen_random_uuid", "uuid_generate_v4")):
+        return str(uuid.uuid4())
+    if lowered in ("current_timestamp", "now()"):
+        return _utc_now()
+    if lowered == "current_date":
+        return date.today().isoformat()
+    if lowered in ("true", "false"):
+        return lowered == "true"
+    if default.startswith("'"):
+        return default.strip("'")
+    try:
+        return _coerce(column, default)
+    except ValueError:
+        return default
+
+
+# ========================================
+# レスポンス・遅延モデル
+# ========================================
+
+@dataclass
+class FakeResponse:
+    data: Any
+    count: Optional[int] = None
+
+
+@dataclass
+class LatencyModel:
+    """
+    1往復あたりの遅延モデル
+    基本遅延 + 指数分布のゆらぎ + 返却行数に比例する転送コスト
+    """
+    base_ms: float = 8.0
+    jitter_ms: float = 4.0
+    per_row_us: float = 15.0
+    seed: Optional[int] = None
+
+    def __post_init__(self):
+        self._random = random.Random(self.seed)
+
+    def delay(self, rows: int) -> float:
+        jitter = self._random.expovariate(1 / self.jitter_ms) if self.jitter_ms > 0 else 0.0
+        return (self.base_ms + jitter) / 1000 + rows * self.per_row_us / 1_000_000
+
+
+class QueryStats:
+    """ルートごとの往復回数を集計する"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.total = 0
+        self.by_route: Dict[str, int] = defaultdict(int)
+        self.by_table: Dict[str, int] = defaultdict(int)
+
+    def record(self, table: str) -> None:
+        route = current_route.get() or "-"
+        with self._lock:
+            self.total += 1
+            self.by_route[route] += 1
+            self.by_table[table] += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self.total = 0
+            self.by_route.clear()
+            self.by_table.clear()
+
+
+# ========================================
+# select文字列のパース
+# ========================================
+
+@dataclass
+class SelectNode:
+    """select句（埋め込みリソースを含む）のツリー"""
+    columns: List[Tuple[str, str]] = field(default_factory=list)  # (alias, column)
+    star: bool = False
+    embeds: List["EmbedNode"] = field(default_factory=list)
+
+
+@dataclass
+class EmbedNode:
+    alias: str
+    relation: str
+    hint: Optional[str]
+    inner: bool
+    select: SelectNode
+    filters: List["Filter"] = field(default_factory=list)
+    orders: List[Tuple[str, bool, Optional[bool]]] = field(default_factory=list)
+
+
+def _split_top_level(text: str) -> List[str]:
+    items, depth, current = [], 0, []
+    for ch in text:
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        if ch == "," and depth == 0:
+            items.append("".join(current).strip())
+            current = []
+        else:
+            current.append(ch)
+    if "".join(current).strip():
+        items.append("".join(current).strip())
+    return items
+
+
+def parse_select(text: str) -> SelectNode:
+    node = SelectNode()
+    for item in _split_top_level(text or "*"):
+        if "(" in item:
+            head, inner = item.split("(", 1)
+            inner = inner[: inner.rfind(")")]
+            alias = None
+            if ":" in head:
+                alias, head = head.split(":", 1)
+            name, _, hint = head.partition("!")
+            hints = [h for h in hint.split("!") if h] if hint else []
+            is_inner = "inner" in hints
+            fk_hint = next((h for h in hints if h not in ("inner", "left")), None)
+            node.embeds.append(EmbedNode(
+                alias=(alias or name).strip(),
+                relation=name.strip(),
+                hint=fk_hint,
+                inner=is_inner,
+                select=parse_select(inner),
+            ))
+        elif item == "*":
+            node.star = True
+        else:
+            column = item.split("::")[0]
+            if ":" in column:
+                alias, column = column.split(":", 1)
+            else:
+                alias = column
+            node.columns.append((alias.strip(), column.strip()))
+    return node
+
+
+# ========================================
+# フィルタ
+# ========================================
+
+@dataclass
+class Filter:
+    column: str
+    op: str
+    value: Any
+
+    def matches(self, row: Dict[str, Any], table: Optional[Table]) -> bool:
+        column = table.columns.get(self.column) if table else None
+        actual = row.get(self.column)
+        op, value = self.op, self.value
+        if op == "is":
+            if value is None or str(value).lower() == "null":
+                return actual is None
+            return actual is _coerce(Column("", "BOOLEAN"), value)
+        if op == "or":
+            return any(f.matches(row, table) for f in value)
+        if op == "not":
+            return not value.matches(row, table)
+        if actual is None:
+            return False
+        if op == "in":
+            return actual in {_coerce(column, v) for v in value}
+        if op in ("like", "ilike"):
+            pattern = re.escape(str(value)).replace("%", ".*").replace("_", ".")
+            pattern = pattern.replace("\\*", ".*")
+            flags = re.IGNORECASE if op == "ilike" else 0
+            return re.fullmatch(pattern, str(actual), flags | re.DOTALL) is not None
+        if op == "cs":
+            return all(v in (actual or []) for v in value)
+        expected = _coerce(column, value)
+        if op == "eq":
+            return actual == expected
+        if op == "neq":
+            return actual != expected
+        try:
+            if op == "gt":
+                return actual > expected
+            if op == "gte":
+                return actual >= expected
+            if op == "lt":
+                return actual < expected
+            if op == "lte":
+                return actual <= expected
+        except TypeError:
+            return False
+        raise ValueError(f"unsupported operator: {op}")
+
+
+def _parse_or(expression: str) -> List[Filter]:
+    filters = []
+    for item in _split_top_level(expression):
+        column, op, value = item.split(".", 2)
+        if op == "in":
+            value = [v.strip().strip('"') for v in value.strip("()").split(",")]
+        elif op == "is":
+            value = None if value == "null" else value
+        filters.append(Filter(column, op, value))
+    return filters
+
+
+# ========================================
+# クエリビルダー
+# ========================================
+
+class FakeQuery:
+    def __init__(self, db: "FakeDatabase", table: str):
+        self._db = db
+        self._table = table
+        self._action = "select"
+        self._select = parse_select("*")
+        self._payload: Any = None
+        self._count: Optional[str] = None
+        self._filters: List[Filter] = []
+        self._embed_filters: List[Tuple[str, Filter]] = []
+        self._orders: List[Tuple[str, bool, Optional[bool]]] = []
+        self._embed_orders: List[Tuple[str, Tuple[str, bool, Optional[bool]]]] = []
+        self._offset = 0
+        self._limit: Optional[int] = None
+        self._on_conflict: Optional[str] = None
+        self._ignore_duplicates = False
+        self._single = False
+        self._maybe_single = False
+        self._negate_next = False
+
+    # --- アクション ---
+    def select(self, *columns: str, count: Optional[str] = None, head: bool = False) -> "FakeQuery":
+        self._select = parse_select(",".join(columns) if columns else "*")
+        self._count = count
+        return self
+
+    def insert(self, payload: Any, count: Optional[str] = None, returning: str = "representation",
+               upsert: bool = False, default_to_null: bool = True) -> "FakeQuery":
+        self._action = "upsert" if upsert else "insert"
+        self._payload = payload
+        return self
+
+    def upsert(self, payload: Any, count: Optional[str] = None, returning: str = "representation",
+               ignore_duplicates: bool = False, on_conflict: str = "",
+               default_to_null: bool = True) -> "FakeQuery":
+        self._action = "upsert"
+        self._payload = payload
+        self._on_conflict = on_conflict or None
+        self._ignore_duplicates = ignore_duplicates
+        return self
+
+    def update(self, payload: Dict[str, Any], count: Optional[str] = None,
+               returning: str = "representation") -> "FakeQuery":
+        self._action = "update"
+        self._payload = payload
+        return self
+
+    def delete(self, count: Optional[str] = None, returning: str = "representation") -> "FakeQuery":
+        self._action = "delete"
+        return self
+
+    # --- フィルタ ---
+    def _add(self, column: str, op: str, value: Any) -> "FakeQuery":
+        path, _, leaf = column.rpartition(".")
+        target = Filter(leaf, op, value)
+        if self._negate_next:
+            target = Filter("", "not", target)
+            self._negate_next = False
+        if path:
+            self._embed_filters.append((path, target))
+        else:
+            self._filters.append(target)
+        return self
+
+    @property
+    def not_(self) -> "FakeQuery":
+        """次のフィルタを否定する（.not_.is_("col", "null") など）"""
+        self._negate_next = True
+        return self
+
+    def eq(self, column: str, value: Any) -> "FakeQuery":
+        return self._add(column, "eq", value)
+
+    def neq(self, column: str, value: Any) -> "FakeQuery":
+        return self._add(column, "neq", value)
+
+    def gt(self, column: str, value: Any) -> "FakeQuery":
+        return self._add(column, "gt", value)
+
+    def gte(self, column: str, value: Any) -> "FakeQuery":
+        return self._add(column, "gte", value)
+
+    def lt(self, column: str, value: Any) -> "FakeQuery":
+        return self._add(column, "lt", value)
+
+    def lte(self, column: str, value: Any) -> "FakeQuery":
+        return self._add(column, "lte", value)
+
+    def like(self, column: str, pattern: str) -> "FakeQuery":
+        return self._add(column, "like", pattern)
+
+    def ilike(self, column: str, pattern: str) -> "FakeQuery":
+        return self._add(column, "ilike", pattern)
+
+    def is_(self, column: str, value: Any) -> "FakeQuery":
+        return self._add(column, "is", value)
+
+    def in_(self, column: str, values: List[Any]) -> "FakeQuery":
+        return self._add(column, "in", list(values))
+
+    def contains(self, column: str, value: List[Any]) -> "FakeQuery":
+        return self._add(column, "cs", value)
+
+    def or_(self, filters: str, reference_table: Optional[str] = None) -> "FakeQuery":
+        target = Filter("", "or", _parse_or(filters))
+        if reference_table:
+            self._embed_filters.append((reference_table, target))
+        else:
+            self._filters.append(target)
+        return self
+
+    def filter(self, column: str, operator: str, criteria: Any) -> "FakeQuery":
+        return self._add(column, operator, criteria)
+
+    def match(self, query: Dict[str, Any]) -> "FakeQuery":
+        for column, value in query.items():
+            self.eq(column, value)
+        return self
+
+    # --- 並び順・ページネーション ---
+    def order(self, column: str, desc: bool = False, nullsfirst: bool = False,
+              foreign_table: Optional[str] = None) -> "FakeQuery":
+        # postgrest-py は nullsfirst=True のときだけ .nullsfirst を付け、False では何も付けない
+        # （NULLS LAST にはならず、Postgresの既定どおり降順ではNULLが先頭になる）
+        nullsfirst = True if nullsfirst else None
+        if foreign_table:
+            self._embed_orders.append((foreign_table, (column, desc, nullsfirst)))
+        else:
+            self._orders.append((column, desc, nullsfirst))
+        return self
+
+    def limit(self, size: int, foreign_table: Optional[str] = None) -> "FakeQuery":
+        if not foreign_table:
+            self._limit = size
+        return self
+
+    def range(self, start: int, end: int, foreign_table: Optional[str] = None) -> "FakeQuery":
+        if not foreign_table:
+            self._offset = start
+            self._limit = end - start + 1
+        return self
+
+    def single(self) -> "FakeQuery":
+        self._single = True
+        return self
+
+    def maybe_single(self) -> "FakeQuery":
+        self._maybe_single = True
+        return self
+
+    # --- 実行 ---
+    def execute(self) -> FakeResponse:
+        response = self._db.run(self)
+        return response
+
+
+class FakeRPC:
+    def __init__(self, db: "FakeDatabase", name: str, params: Dict[str, Any]):
+        self._db = db
+        self._name = name
+        self._params = params or {}
+
+    def execute(self) -> FakeResponse:
+        return self._db.call_rpc(self._name, self._params)
+
+
+# ========================================
+# データベース本体
+# ========================================
+
+class FakeDatabase:
+    def __init__(self, schema: Optional[Dict[str, Table]] = None,
+                 latency: Optional[LatencyModel] = None):
+        self.schema = schema if schema is not None else load_schema()
+        self.rows: Dict[str, List[Dict[str, Any]]] = {name: [] for name in self.schema}
+        self.latency = latency or LatencyModel(base_ms=0, jitter_ms=0, per_row_us=0)
+        self.stats = QueryStats()
+        self.rpcs: Dict[str, Callable[["FakeDatabase", Dict[str, Any]], Any]] = dict(MIGRATION_RPCS)
+        self.triggers: Dict[str, List[Callable[..., None]]] = {
+            table: list(fns) for table, fns in MIGRATION_TRIGGERS.items()
+        }
+        self._lock = threading.RLock()
+
+    # --- 直接操作（シード用、遅延なし） ---
+    def seed(self, table: str, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [self._insert_row(table, row, check_unique=False) for row in rows]
+
+    def register_rpc(self, name: str, fn: Callable[["FakeDatabase", Dict[str, Any]], Any]) -> None:
+        self.rpcs[name] = fn
+
+    def call_rpc(self, name: str, params: Dict[str, Any]) -> FakeResponse:
+        self.stats.record(f"rpc:{name}")
+        if name not in self.rpcs:
+            raise APIError({"message": f"function {name} does not exist", "code": "42883"})
+        with self._lock:
+            data = self.rpcs[name](self, params)
+        time.sleep(self.latency.delay(len(data) if isinstance(data, list) else 1))
+        return FakeResponse(data=data)
+
+    # --- 内部ヘルパー ---
+    def _table(self, name: str) -> Table:
+        if name not in self.schema:
+            raise APIError({"message": f'relation "{name}" does not exist', "code": "42P01"})
+        return self.schema[name]
+
+    def _insert_row(self, table_name: str, values: Dict[str, Any], check_unique: bool = True) -> Dict[str, Any]:
+        table = self._table(table_name)
+        row = {}
+        for column in table.columns.values():
+            if column.name in values:
+                row[column.name] = _coerce(column, values[column.name])
+            else:
+                row[column.name] = _default_value(column)
+        for key, value in values.items():
+            if key not in row:
+                raise APIError({
+                    "message": f"Could not find the '{key}' column of '{table_name}'",
+                    "code": "PGRST204",
+                })
+        if check_unique:
+            conflict = self._find_conflict(table, row)
+            if conflict is not None:
+                raise APIError({
+                    "message": f'duplicate key value violates unique constraint on "{table_name}"',
+                    "code": "23505",
+                })
+        self.rows[table_name].append(row)
+        self._fire_triggers(table_name, "INSERT", row)
+        return row
+
+    def _delete_rows(self, table_name: str, rows: List[Dict[str, Any]]) -> None:
+        ids = {id(r) for r in rows}
+        self.rows[table_name] = [r for r in self.rows[table_name] if id(r) not in ids]
+        for row in rows:
+            self._fire_triggers(table_name, "DELETE", row)
+
+    def _fire_triggers(self, table_name: str, op: str, row: Dict[str, Any],
+                       old: Optional[Dict[str, Any]] = None) -> None:
+        """INSERT / UPDATE / DELETE トリガー相当の処理を呼び出す（UPDATE では old に更新前の行を渡す）"""
+        for fn in self.triggers.get(table_name, []):
+            fn(self, op, row, old)
+
+    def find(self, table_name: str, **values: Any) -> Optional[Dict[str, Any]]:
+        """条件に一致する最初の行（トリガー・RPC実装用）"""
+        for row in self.rows[table_name]:
+            if all(row.get(k) == v for k, v in values.items()):
+                return row
+        return None
+
+    def _find_conflict(self, table: Table, row: Dict[str, Any],
+                       columns: Optional[Tuple[str, ...]] = None) -> Optional[Dict[str, Any]]:
+        candidates = [columns] if columns else [(table.primary_key,)] + table.unique_sets
+        for unique_cols in candidates:
+            key = tuple(row.get(c) for c in unique_cols)
+            if any(v is None for v in key):
+                continue
+            for existing in self.rows[table.name]:
+                if tuple(existing.get(c) for c in unique_cols) == key:
+                    return existing
+        return None
+
+    def _resolve_relation(self, parent: Table, embed: EmbedNode) -> Tuple[str, str, str, bool]:
+        """
+        埋め込みリソースの結合条件を解決する
+        戻り値: (子テーブル, 親側カラム, 子側カラム, 多対一かどうか)
+        """
+        target = self._table(embed.relation)
+        # 多対一: 親が子を参照している
+        for column in parent.columns.values():
+            if column.references and column.references[0] == target.name:
+                if embed.hint and embed.hint != column.name:
+                    continue
+                return target.name, column.name, column.references[1], True
+        # 一対多: 子が親を参照している
+        for column in target.columns.values():
+            if column.references and column.references[0] == parent.name:
+                if embed.hint and embed.hint != column.name:
+                    continue
+                return target.name, column.references[1], column.name, False
+        raise APIError({
+            "message": f"Could not find a relationship between '{parent.name}' and '{target.name}'",
+            "code": "PGRST200",
+        })
+
+    def _project(self, table: Table, row: Dict[str, Any], node: SelectNode) -> Optional[Dict[str, Any]]:
+        result: Dict[str, Any] = {}
+        if node.star:
+            result.update(copy.deepcopy(row))
+        for alias, column in node.columns:
+            if column == "count":
+                continue
+            result[alias] = copy.deepcopy(row.get(column))
+        for embed in node.embeds:
+            child_name, parent_col, child_col, many_to_one = self._resolve_relation(table, embed)
+            child_table = self._table(child_name)
+            key = row.get(parent_col)
+            children = self._sort([
+                r for r in self.rows[child_name]
+                if key is not None and r.get(child_col) == key
+                and all(f.matches(r, child_table) for f in embed.filters)
+            ], embed.orders)
+            if embed.select.columns == [("count", "count")] and not embed.select.star:
+                result[embed.alias] = [{"count": len(children)}]
+                continue
+            projected = [p for p in (self._project(child_table, c, embed.select) for c in children) if p is not None]
+            if embed.inner and not projected:
+                return None
+            if many_to_one:
+                result[embed.alias] = projected[0] if projected else None
+            else:
+                result[embed.alias] = projected
+        return result
+
+    def _find_embed(self, node: SelectNode, path: str) -> Optional[EmbedNode]:
+        head, _, rest = path.partition(".")
+        for embed in node.embeds:
+            if embed.alias == head or embed.relation == head:
+                return self._find_embed(embed.select, rest) if rest else embed
+        return None
+
+    def _attach_embed_filters(self, node: SelectNode, path: str, flt: Filter) -> None:
+        embed = self._find_embed(node, path)
+        if embed is not None:
+            embed.filters.append(flt)
+
+    def _matching(self, query: FakeQuery) -> List[Dict[str, Any]]:
+        table = self._table(query._table)
+        return [r for r in self.rows[query._table] if all(f.matches(r, table) for f in query._filters)]
+
+    @staticmethod
+    def _sort(rows: List[Dict[str, Any]], orders: List[Tuple[str, bool, Optional[bool]]]) -> List[Dict[str, Any]]:
+        for column, desc, nullsfirst in reversed(orders):
+            nulls_first = desc if nullsfirst is None else nullsfirst
+            present = [r for r in rows if r.get(column) is not None]
+            missing = [r for r in rows if r.get(column) is None]
+            present.sort(key=lambda r: r[column], reverse=desc)
+            rows = missing + present if nulls_first else present + missing
+        return rows
+
+    def run(self, query: FakeQuery) -> FakeResponse:
+        self.stats.record(query._table)
+        with self._lock:
+            data, count = self._run_locked(query)
+        time.sleep(self.latency.delay(len(data) if isinstance(data, list) else 1))
+        if query._single or query._maybe_single:
+            if not data:
+                if query._single:
+                    raise APIError({"message": "JSON object requested, multiple (or no) rows returned",
+                                    "code": "PGRST116"})
+                return FakeResponse(data=None, count=count)
+            return FakeResponse(data=data[0], count=count)
+        return FakeResponse(data=data, count=count)
+
+    def _run_locked(self, query: FakeQuery) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        table = self._table(query._table)
+        action = query._action
+
+        if action in ("insert", "upsert"):
+            payload = query._payload if isinstance(query._payload, list) else [query._payload]
+            written = []
+            conflict_cols = tuple(c.strip() for c in query._on_conflict.split(",")) if query._on_conflict else None
+            for values in payload:
+                if action == "upsert":
+                    probe = {c.name: _coerce(c, values[c.name]) for c in table.columns.values() if c.name in values}
+                    existing = self._find_conflict(table, probe, conflict_cols)
+                    if existing is not None:
+                        if not query._ignore_duplicates:
+                            for key, value in values.items():
+                                existing[key] = _coerce(table.columns.get(key), value)
+                            if "updated_at" in table.columns:
+                                existing["updated_at"] = _utc_now()
+                            written.append(existing)
+                        continue
+                written.append(self._insert_row(query._table, values))
+            return [copy.deepcopy(r) for r in written], None
+
+        matched = self._matching(query)
+
+        if action == "update":
+            for row in matched:
+                old = dict(row)
+                for key, value in query._payload.items():
+                    if key not in table.columns:
+                        raise APIError({
+                            "message": f"Could not find the '{key}' column of '{query._table}'",
+                            "code": "PGRST204",
+                        })
+                    row[key] = _coerce(table.columns[key], value)
+                if "updated_at" in table.columns and "updated_at" not in query._payload:
+                    row["updated_at"] = _utc_now()
+                self._fire_triggers(query._table, "UPDATE", row, old)
+            return [copy.deepcopy(r) for r in matched], None
+
+        if action == "delete":
+            self._delete_rows(query._table, matched)
+            return [copy.deepcopy(r) for r in matched], None
+
+        # select
+        select = copy.deepcopy(query._select)
+        for path, flt in query._embed_filters:
+            self._attach_embed_filters(select, path, flt)
+        for path, order in query._embed_orders:
+            embed = self._find_embed(select, path)
+            if embed is not None:
+                embed.orders.append(order)
+        projected = []
+        for row in self._sort(matched, query._orders):
+            item = self._project(table, row, select)
+            if item is not None:
+                projected.append(item)
+        count = len(projected) if query._count else None
+        end = None if query._limit is None else query._offset + query._limit
+        return projected[query._offset:end], count
+
+
+# ========================================
+# マイグレーションで定義しているSQL関数・トリガー
+# ========================================
+
+# bump_hashtag_trend の減衰係数（半減期24時間）
+_TREND_DECAY = math.log(2) / (24 * 3600)
+
+
+def _set_column(db: FakeDatabase, table_name: str, row: Dict[str, Any], column: str, value: Any) -> None:
+    """SQL関数の UPDATE 相当（database_schema.sql にないカラムへの書き込みは実DBと同じくエラー）"""
+    table = db._table(table_name)
+    if column not in table.columns:
+        raise APIError({
+            "message": f'column "{column}" of relation "{table_name}" does not exist',
+            "code": "42703",
+        })
+    row[column] = _coerce(table.columns[column], value)
+
+
+def _rpc_bump_hashtag_trend(db: FakeDatabase, params: Dict[str, Any]) -> None:
+    post_ids = {str(post_id) for post_id in params["p_post_ids"]}
+    counts: Dict[str, int] = defaultdict(int)
+    for link in db.rows["post_hashtags"]:
+        if link["post_id"] in post_ids:
+            counts[link["hashtag_id"]] += 1
+    approved_at = time.time()
+    now = _TREND_DECAY * approved_at
+    # 取り消し時に同じ寄与を差し引けるよう承認時刻を残す
+    for post in db.rows["posts"]:
+        if post["id"] in post_ids:
+            _set_column(db, "posts", post, "approved_at", datetime.fromtimestamp(approved_at, timezone.utc).isoformat())
+    for tag in db.rows["hashtags"]:
+        cnt = counts.get(tag["id"])
+        if not cnt:
+            continue
+        added = now + math.log(cnt)
+        current = tag.get("trend_score")
+        if current is None:
+            tag["trend_score"] = added
+        else:
+            tag["trend_score"] = max(current, added) + math.log1p(math.exp(-abs(current - added)))
+        tag["post_count"] = (tag.get("post_count") or 0) + cnt
+    return None
+
+
+def _withdraw_hashtag_trend(db: FakeDatabase, op: str, row: Dict[str, Any],
+                            old: Optional[Dict[str, Any]] = None) -> None:
+    """withdraw_hashtag_trend トリガー相当（承認済みの投稿が却下・削除されたら寄与を差し引く）"""
+    before = old if op == "UPDATE" else row
+    if op == "INSERT" or before.get("status") != "approved" or (op == "UPDATE" and row.get("status") == "approved"):
+        return
+    approved_at = before["approved_at"] or before.get("created_at")
+    added = _TREND_DECAY * datetime.fromisoformat(str(approved_at)).timestamp()
+    for link in db.rows["post_hashtags"]:
+        if link["post_id"] != before["id"]:
+            continue
+        tag = db.find("hashtags", id=link["hashtag_id"])
+        if tag is None:
+            continue
+        count = tag.get("post_count") or 0
+        score = tag.get("trend_score")
+        tag["post_count"] = max(count - 1, 0)
+        if count <= 1 or score is None or score <= added:
+            tag["trend_score"] = None
+        else:
+            tag["trend_score"] = score + math.log1p(-math.exp(max(added - score, -700)))
+
+
+def _rpc_toggle_like(db: FakeDatabase, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    post_id, user_id = str(params["p_post_id"]), str(params["p_user_id"])
+    existing = db.find("likes", post_id=post_id, user_id=user_id)
+    if existing is not None:
+        db._delete_rows("likes", [existing])
+        liked = False
+    else:
+        if db.find("posts", id=post_id) is None:
+            raise APIError({"message": 'insert or update on table "likes" violates foreign key constraint',
+                            "code": "23503"})
+        db._insert_row("likes", {"post_id": post_id, "user_id": user_id})
+        liked = True
+    post = db.find("posts", id=post_id)
+    return [{"liked": liked, "like_count": post["like_count"] if post else None}]
+
+
+def _rpc_provision_account(db: FakeDatabase, params: Dict[str, Any]) -> str:
+    job_id, auth_id = str(params["p_job_id"]), str(params["p_auth_id"])
+    job = db.find("provisioning_jobs", id=job_id)
+    application = db.find("applications", id=job["application_id"]) if job else None
+    if application is None:
+        raise APIError({"message": f"provisioning job {job_id} not found", "code": "P0002"})
+    user = db.find("users", email=application["email"])
+    if user is None:
+        user = db._insert_row("users", {
+            "auth_id": auth_id,
+            "email": application["email"],
+            "name": application["name"],
+            "phone": application.get("phone"),
+            "address": application.get("address"),
+            "is_imabari_resident": bool(application.get("is_imabari_resident")),
+            "residence_years": application.get("residence_years"),
+            "status": "active",
+        })
+    for dog in [d for d in db.rows["application_dogs"] if d["application_id"] == application["id"]]:
+        if db.find("dogs", application_dog_id=dog["id"]) is None:
+            db._insert_row("dogs", {
+                "user_id": user["id"],
+                "name": dog["name"],
+                "breed": dog.get("breed"),
+                "weight": dog.get("weight"),
+                "gender": dog.get("gender"),
+                "birth_date": dog.get("birth_date"),
+                "personality": dog.get("personality"),
+                "application_dog_id": dog["id"],
+            })
+    # 完了は承認メールの送信後にバックエンドが記録する
+    job.update({"auth_id": auth_id, "user_id": user["id"]})
+    return user["id"]
+
+
+def _enqueue_review_job(db: FakeDatabase, op: str, row: Dict[str, Any],
+                        old: Optional[Dict[str, Any]] = None) -> None:
+    """enqueue_review_job トリガー相当（承認待ちの申請が承認・却下されたら同じ更新の中でジョブを登録する）"""
+    if op != "UPDATE" or old.get("status") != "pending" or row.get("status") not in ("approved", "rejected"):
+        return
+    if db.find("provisioning_jobs", application_id=row["id"]) is None:
+        db._insert_row("provisioning_jobs", {
+            "application_id": row["id"],
+            "kind": "approval" if row["status"] == "approved" else "rejection",
+        })
+
+
+def _counter_trigger(column: str) -> Callable[[FakeDatabase, str, Dict[str, Any]], None]:
+    """update_post_like_count / update_post_comment_count 相当"""
+    def trigger(db: FakeDatabase, op: str, row: Dict[str, Any], old: Optional[Dict[str, Any]] = None) -> None:
+        if op == "UPDATE":
+            return
+        post = db.find("posts", id=row.get("post_id"))
+        if post is None:
+            return
+        delta = 1 if op == "INSERT" else -1
+        post[column] = max((post.get(column) or 0) + delta, 0)
+    return trigger
+
+
+def _month_range(month: Any) -> Tuple[str, str]:
+    start = date.fromisoformat(str(month)[:10]).replace(day=1)
+    end = (start + timedelta(days=32)).replace(day=1)
+    return (_normalize_timestamp(datetime.combine(start, datetime.min.time(), timezone.utc)),
+            _normalize_timestamp(datetime.combine(end, datetime.min.time(), timezone.utc)))
+
+
+def _rpc_ensure_entry_log_partition(db: FakeDatabase, params: Dict[str, Any]) -> str:
+    # パーティションは entry_logs の1テーブルで表すため、名前だけ返す
+    return "entry_logs_" + str(params["p_month"])[:7].replace("-", "_")
+
+
+def _rpc_archive_entry_log_partition(db: FakeDatabase, params: Dict[str, Any]) -> bool:
+    start, end = _month_range(params["p_month"])
+    rows = [r for r in db.rows["entry_logs"] if start <= _normalize_timestamp(r["entry_time"]) < end]
+    if len(rows) != int(params["p_row_count"]):
+        return False
+    month = start[:10]
+    archive = db.find("entry_log_archives", month=month)
+    if archive is None:
+        db._insert_row("entry_log_archives", {
+            "month": month, "storage_path": params["p_storage_path"], "row_count": len(rows)
+        })
+    else:
+        archive.update({"storage_path": params["p_storage_path"], "row_count": len(rows), "archived_at": _utc_now()})
+    # パーティションの切り離し・削除
+    db._delete_rows("entry_logs", rows)
+    return True
+
+
+MIGRATION_RPCS: Dict[str, Callable[[FakeDatabase, Dict[str, Any]], Any]] = {
+    "bump_hashtag_trend": _rpc_bump_hashtag_trend,
+    "toggle_like": _rpc_toggle_like,
+    "provision_account": _rpc_provision_account,
+    "ensure_entry_log_partition": _rpc_ensure_entry_log_partition,
+    "archive_entry_log_partition": _rpc_archive_entry_log_partition,
+}
+
+MIGRATION_TRIGGERS: Dict[str, List[Callable[..., None]]] = {
+    "likes": [_counter_trigger("like_count")],
+    "comments": [_counter_trigger("comment_count")],
+    "posts": [_withdraw_hashtag_trend],
+    "applications": [_enqueue_review_job],
+}
+
+
+# ========================================
+# Auth / Storage
+# ========================================
+
+class _Obj:
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class FakeAuthAdmin:
+    def __init__(self, auth: "FakeAuth"):
+        self._auth = auth
+
+    def create_user(self, attributes: Dict[str, Any]):
+        return self._auth.sign_up(attributes)
+
+    def delete_user(self, user_id: str) -> None:
+        self._auth.users.pop(user_id, None)
+
+
+class FakeAuth:
+    """
+    トークン "bench:<auth_id>" を受け付ける簡易Auth
+    """
+    TOKEN_PREFIX = "bench:"
+
+    def __init__(self, db: FakeDatabase):
+        self._db = db
+        self.users: Dict[str, Dict[str, Any]] = {}
+        self.admin = FakeAuthAdmin(self)
+
+    def register(self, auth_id: str, email: str, password: str = "password") -> str:
+        self.users[auth_id] = {"id": auth_id, "email": email, "password": password}
+        return self.token_for(auth_id)
+
+    @classmethod
+    def token_for(cls, auth_id: str) -> str:
+        return f"{cls.TOKEN_PREFIX}{auth_id}"
+
+    def _session(self, auth_id: str):
+        user = _Obj(id=auth_id, email=self.users[auth_id]["email"])
+        session = _Obj(access_token=self.token_for(auth_id), refresh_token=f"refresh:{auth_id}")
+        return _Obj(user=user, session=session)
+
+    def get_user(self, token: str):
+        self._db.stats.record("auth")
+        time.sleep(self._db.latency.delay(1))
+        auth_id = token[len(self.TOKEN_PREFIX):] if token.startswith(self.TOKEN_PREFIX) else None
+        if auth_id not in self.users:
+            raise APIError({"message": "invalid JWT", "code": "401"})
+        return _Obj(user=_Obj(id=auth_id, email=self.users[auth_id]["email"]))
+
+    def sign_up(self, credentials: Dict[str, Any]):
+        self._db.stats.record("auth")
+        time.sleep(self._db.latency.delay(1))
+        for auth_id, user in self.users.items():
+            if user["email"] == credentials["email"]:
+                raise APIError({"message": "User already registered", "code": "422"})
+        auth_id = str(uuid.uuid4())
+        self.register(auth_id, credentials["email"], credentials.get("password", ""))
+        return self._session(auth_id)
+
+    def sign_in_with_password(self, credentials: Dict[str, Any]):
+        self._db.stats.record("auth")
+        time.sleep(self._db.latency.delay(1))
+        for auth_id, user in self.users.items():
+            if user["email"] == credentials["email"] and user["password"] == credentials["password"]:
+                return self._session(auth_id)
+        raise APIError({"message": "Invalid login credentials", "code": "400"})
+
+    def refresh_session(self, refresh_token: str):
+        auth_id = refresh_token.split(":", 1)[-1]
+        if auth_id not in self.users:
+            raise APIError({"message": "invalid refresh token", "code": "401"})
+        return self._session(auth_id)
+
+    def sign_out(self) -> None:
+        return None
+
+
+class FakeBucket:
+    def __init__(self, storage: "FakeStorage", name: str):
+        self._storage = storage
+        self._name = name
+
+    def upload(self, path: str, file: bytes, file_options: Optional[Dict[str, Any]] = None):
+        self._storage.objects[(self._name, path)] = file
+        return _Obj(path=path)
+
+    def download(self, path: str) -> bytes:
+        return self._storage.objects[(self._name, path)]
+
+    def get_public_url(self, path: str) -> str:
+        return f"https://storage.local/{self._name}/{path}"
+
+    def remove(self, paths: List[str]):
+        for path in paths:
+            self._storage.objects.pop((self._name, path), None)
+        return []
+
+    def list(self, path: Optional[str] = None, options: Optional[Dict[str, Any]] = None):
+        prefix = f"{path}/" if path else ""
+        return [{"name": p[len(prefix):]} for (b, p) in self._storage.objects if b == self._name and p.startswith(prefix)]
+
+
+class FakeStorage:
+    def __init__(self):
+        self.objects: Dict[Tuple[str, str], bytes] = {}
+
+    def from_(self, bucket: str) -> FakeBucket:
+        return FakeBucket(self, bucket)
+
+
+class FakeSupabaseClient:
+    """supabase.Client 互換のインプロセススタンドイン"""
+
+    def __init__(self, db: Optional[FakeDatabase] = None):
+        self.db = db or FakeDatabase()
+        self.auth = FakeAuth(self.db)
+        self.storage = FakeStorage()
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self.db, name)
+
+    from_ = table
+
+    def rpc(self, fn: str, params: Optional[Dict[str, Any]] = None) -> FakeRPC:
+        return FakeRPC(self.db, fn, params or {})
+
+
+def install(client: FakeSupabaseClient, app=None) -> None:
+    """
+    app.* モジュールが参照するSupabaseクライアントを差し替える
+    """
+    import app.core.supabase as core
+
+    # app.core.supabase.supabase は遅延プロキシのため、実体を差し替えれば
+    # 読み込み済み・未読み込みの全モジュールに反映される
+    core.set_supabase_client(client)
+    if app is not None:
+        app.dependency_overrides[core.get_supabase_client] = lambda: client
@@ -0,0 +1,101 @@
+"""
+ログイン集中時のパスワード検証によるイベントループの停止の計測
+
+使い方:
+    python -m benchmarks.password_hashing --logins 50 --concurrency 10
+
+同時に concurrency 件ずつ、合計 logins 件のパスワード検証を流しながら、
+1ms ごとに起きるだけのタスク（他のリクエストの代わり）の遅れを計測する。
+検証をイベントループ上で直接行う経路（helpers.verify_password を async 関数から呼ぶ）と、
+PasswordService.verify でスレッドプールに逃がす経路を比べる。
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.run import percentile
+
+HEARTBEAT_SECONDS = 0.001
+
+
+def _prepare_env() -> None:
+    dummy_key = "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.bench"
+    os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+    os.environ.setdefault("SUPABASE_ANON_KEY", dummy_key)
+    os.environ.setdefault("SUPABASE_SERVICE_KEY", dummy_key)
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+
+
+async def _heartbeat(stop: asyncio.Event, lags: List[float]) -> None:
+    """HEARTBEAT_SECONDS ごとに起き、予定より遅れた時間を記録する"""
+    while not stop.is_set():
+        expected = time.perf_counter() + HEARTBEAT_SECONDS
+        await asyncio.sleep(HEARTBEAT_SECONDS)
+        lags.append(max(0.0, time.perf_counter() - expected))
+
+
+async def measure(verify: Callable[[], Awaitable[Any]], logins: int, concurrency: int) -> Dict[str, float]:
+    """
+    ログインの集中中に他のタスクが待たされた時間（p50・p99・最大）と全件の所要時間
+    """
+    lags: List[float] = []
+    stop = asyncio.Event()
+    heartbeat = asyncio.create_task(_heartbeat(stop, lags))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def login() -> None:
+        async with semaphore:
+            await verify()
+
+    started = time.perf_counter()
+    await asyncio.gather(*[login() for _ in range(logins)])
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await heartbeat
+
+    ordered = sorted(lags) or [0.0]
+    return {
+        "elapsed": elapsed,
+        "p50": percentile(ordered, 50),
+        "p99": percentile(ordered, 99),
+        "max": ordered[-1],
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="パスワード検証がイベントループを止める時間を比べる")
+    parser.add_argument("--logins", type=int, default=50, help="検証するパスワードの件数")
+    parser.add_argument("--concurrency", type=int, default=10, help="同時に行うログインの件数")
+    args = parser.parse_args(argv)
+
+    _prepare_env()
+    from app.services.password_service import PasswordService
+    from app.utils.helpers import verify_password
+
+    hashed = PasswordService.hash_sync("correct horse battery staple")
+    print(f"scheme: {PasswordService.scheme()}")
+
+    async def inline() -> bool:
+        return verify_password("correct horse battery staple", hashed)
+
+    async def pooled() -> bool:
+        return await PasswordService.verify("correct horse battery staple", hashed)
+
+    for name, verify in (("inline (event loop)", inline), ("PasswordService.verify", pooled)):
+        result = asyncio.run(measure(verify, args.logins, args.concurrency))
+        print(
+            f"{name:24s} total {result['elapsed'] * 1000:8.1f} ms  "
+            f"loop lag p50 {result['p50'] * 1000:6.1f} ms  p99 {result['p99'] * 1000:7.1f} ms  "
+            f"max {result['max'] * 1000:7.1f} ms"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,521 @@
+"""
+サービスが発行する問い合わせの実行計画チェック
+
+使い方:
+    python -m benchmarks.query_plans --scale 1
+    QUERY_PLAN_DATABASE_URL=postgresql://postgres@localhost/postgres python -m benchmarks.query_plans
+
+サービスのメソッドをインプロセスのSupabaseスタンドイン（benchmarks.fake_supabase）に対して実行し、
+PostgRESTに送られる問い合わせ（select・フィルタ・埋め込み・並び順）を記録してSQLに変換する。
+使い捨てのPostgreSQLに database_schema.sql を適用して合成データを投入し、
+各SQLの EXPLAIN (FORMAT JSON) で大きなテーブルの順次走査とコストの上限を確認する。
+
+PostgreSQLは QUERY_PLAN_DATABASE_URL の接続先に一時データベースを作って使う。
+未指定の場合は pgserver（pip install pgserver）で一時ディレクトリに起動する。
+"""
+import argparse
+import asyncio
+import copy
+import json
+import os
+import sys
+import tempfile
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.fake_supabase import (
+    SCHEMA_PATH, EmbedNode, FakeDatabase, FakeQuery, FakeResponse, FakeSupabaseClient, Filter,
+    SelectNode, install,
+)
+
+# これ未満の行数のテーブルは順次走査でよい（小さなテーブル・空のパーティション）
+SEQ_SCAN_MIN_ROWS = 1000
+# 順次走査で読んだ行のうち条件に合う行（推定）がこの割合以下なら、インデックスで引くべき問い合わせとみなす
+# （ハッシュ結合の内側や大半の行を数える問い合わせのように、ほぼ全行を使う順次走査は対象外）
+SEQ_SCAN_MAX_SELECTIVITY = 0.1
+
+
+# ========================================
+# 問い合わせの記録とSQLへの変換
+# ========================================
+
+class RecordingDatabase(FakeDatabase):
+    """実行した select をすべて記録するスタンドインDB"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.recorded: List[FakeQuery] = []
+
+    def run(self, query: FakeQuery) -> FakeResponse:
+        if query._action == "select":
+            snapshot = copy.copy(query)
+            snapshot._select = copy.deepcopy(query._select)
+            snapshot._filters = list(query._filters)
+            snapshot._embed_filters = list(query._embed_filters)
+            snapshot._orders = list(query._orders)
+            self.recorded.append(snapshot)
+        return super().run(query)
+
+
+def _literal(value: Any) -> str:
+    if value is None:
+        return "NULL"
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, (int, float)):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        value = value.isoformat()
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _condition(alias: str, flt: Filter) -> str:
+    column = f'{alias}."{flt.column}"'
+    op, value = flt.op, flt.value
+    if op == "or":
+        return "(" + " OR ".join(_condition(alias, f) for f in value) + ")"
+    if op == "not":
+        return f"NOT {_condition(alias, value)}"
+    if op == "is":
+        if value is None or str(value).lower() == "null":
+            return f"{column} IS NULL"
+        return f"{column} IS {str(value).upper()}"
+    if op == "in":
+        if not value:
+            return "FALSE"
+        return f"{column} IN ({', '.join(_literal(v) for v in value)})"
+    if op in ("like", "ilike"):
+        return f"{column} {op.upper()} {_literal(str(value).replace('*', '%'))}"
+    if op == "cs":
+        return f"{column} @> ARRAY[{', '.join(_literal(v) for v in value)}]"
+    operators = {"eq": "=", "neq": "<>", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+    return f"{column} {operators[op]} {_literal(value)}"
+
+
+class SqlBuilder:
+    """
+    記録した問い合わせをPostgRESTと同じ形のSQLにする
+    多対一の埋め込みは LATERAL 結合の1行、一対多は json_agg、!inner は結合先がない行を除く
+    """
+
+    def __init__(self, db: FakeDatabase):
+        self.db = db
+        self._aliases = 0
+
+    def _alias(self, table: str) -> str:
+        self._aliases += 1
+        return f"{table}_{self._aliases}"
+
+    def _relation(self, table_name: str, node: SelectNode, alias: str, filters: List[Filter],
+                  where: List[str]) -> Tuple[str, str, List[str]]:
+        """(選択列, 結合, 条件) を返す"""
+        table = self.db._table(table_name)
+        items = [f"{alias}.*"] if node.star else []
+        items += [f'{alias}."{column}" AS "{name}"' for name, column in node.columns if column != "count"]
+        joins = []
+        for embed in node.embeds:
+            item, join = self._embed(table, alias, embed)
+            items.append(item)
+            joins.append(join)
+        conditions = where + [_condition(alias, flt) for flt in filters]
+        return ", ".join(items) or "1", " ".join(joins), conditions
+
+    def _embed(self, parent, parent_alias: str, embed: EmbedNode) -> Tuple[str, str]:
+        child, parent_col, child_col, many_to_one = self.db._resolve_relation(parent, embed)
+        alias = self._alias(child)
+        link = [f'{alias}."{child_col}" = {parent_alias}."{parent_col}"']
+        join = "JOIN LATERAL" if embed.inner else "LEFT JOIN LATERAL"
+        if embed.select.columns == [("count", "count")] and not embed.select.star:
+            subquery = f'SELECT count(*) AS "count" FROM public.{child} {alias} WHERE {" AND ".join(link)}'
+            outer = self._alias("agg")
+            return f'json_build_array(json_build_object(\'count\', {outer}."count")) AS "{embed.alias}"', \
+                f"{join} ({subquery}) {outer} ON TRUE"
+        select, joins, conditions = self._relation(child, embed.select, alias, embed.filters, link)
+        subquery = f"SELECT {select} FROM public.{child} {alias} {joins} WHERE {' AND '.join(conditions)}"
+        outer = self._alias("embed")
+        if many_to_one:
+            return f'row_to_json({outer}.*) AS "{embed.alias}"', f"{join} ({subquery}) {outer} ON TRUE"
+        rows = self._alias("rows")
+        # 一対多の !inner は該当行がなければ集約の行を返さない（HAVING count(*) > 0）
+        having = " HAVING count(*) > 0" if embed.inner else ""
+        aggregate = f'SELECT json_agg({rows}) AS "rows" FROM ({subquery}) {rows}{having}'
+        return f'COALESCE({outer}."rows", \'[]\') AS "{embed.alias}"', f"{join} ({aggregate}) {outer} ON TRUE"
+
+    def _exists(self, parent, parent_alias: str, node: SelectNode) -> List[str]:
+        """
+        件数のSQLでは !inner の埋め込みを EXISTS にする（PostgRESTの件数の問い合わせと同じ）
+        """
+        conditions = []
+        for embed in node.embeds:
+            if not embed.inner:
+                continue
+            child, parent_col, child_col, _ = self.db._resolve_relation(parent, embed)
+            alias = self._alias(child)
+            where = [f'{alias}."{child_col}" = {parent_alias}."{parent_col}"']
+            where += [_condition(alias, flt) for flt in embed.filters]
+            where += self._exists(self.db._table(child), alias, embed.select)
+            conditions.append(f"EXISTS (SELECT 1 FROM public.{child} {alias} WHERE {' AND '.join(where)})")
+        return conditions
+
+    def build(self, query: FakeQuery) -> List[str]:
+        """
+        問い合わせのSQL（count="exact" のときは件数のSQLも）を返す
+        """
+        select_node = copy.deepcopy(query._select)
+        for path, flt in query._embed_filters:
+            self.db._attach_embed_filters(select_node, path, flt)
+        alias = self._alias(query._table)
+        select, joins, conditions = self._relation(query._table, select_node, alias, query._filters, [])
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        sql = f"SELECT {select} FROM public.{query._table} {alias} {joins}{where}"
+        if query._orders:
+            sql += " ORDER BY " + ", ".join(
+                f'{alias}."{column}" {"DESC" if desc else "ASC"}'
+                + ("" if nullsfirst is None else (" NULLS FIRST" if nullsfirst else " NULLS LAST"))
+                for column, desc, nullsfirst in query._orders
+            )
+        if query._limit is not None:
+            sql += f" LIMIT {query._limit} OFFSET {query._offset}"
+        statements = [sql]
+
+        if query._count:
+            alias = self._alias(query._table)
+            conditions = [_condition(alias, flt) for flt in query._filters]
+            conditions += self._exists(self.db._table(query._table), alias, select_node)
+            where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+            statements.append(f"SELECT count(*) FROM public.{query._table} {alias}{where}")
+        return statements
+
+
+# ========================================
+# 実行計画の確認
+# ========================================
+
+@dataclass
+class PlanCase:
+    """
+    確認する問い合わせ（サービスのメソッド呼び出し）とコストの上限
+    allowed_seq_scans には理由があって全件を読むテーブルを挙げる
+    """
+    name: str
+    call: Callable[["FixtureIds"], Awaitable[Any]]
+    max_cost: float
+    allowed_seq_scans: Tuple[str, ...] = ()
+
+
+@dataclass
+class PlanResult:
+    case: str
+    sql: str
+    cost: float
+    max_cost: float
+    seq_scans: List[Tuple[str, int]] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.seq_scans and self.cost <= self.max_cost
+
+
+def _nodes(plan: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _nodes(child)
+
+
+def seq_scans(plan: Dict[str, Any], table_rows: Dict[str, int], min_rows: int = SEQ_SCAN_MIN_ROWS,
+              max_selectivity: float = SEQ_SCAN_MAX_SELECTIVITY) -> List[Tuple[str, int]]:
+    """
+    実行計画の中で min_rows 行以上のテーブルを順次走査して一部の行だけを絞り込んでいるもの (テーブル, 行数)
+    """
+    found = []
+    for node in _nodes(plan):
+        if node.get("Node Type") not in ("Seq Scan", "Parallel Seq Scan"):
+            continue
+        relation = node.get("Relation Name")
+        rows = table_rows.get(relation, 0)
+        # Parallel Seq Scan の推定行数はワーカー1つあたり
+        matched = node.get("Plan Rows", 0) * (node.get("Workers Planned") or 1)
+        if rows >= min_rows and "Filter" in node and matched <= rows * max_selectivity:
+            found.append((relation, rows))
+    return found
+
+
+# ========================================
+# 使い捨てのPostgreSQL
+# ========================================
+
+def seed_sql(scale: float = 1.0) -> str:
+    """
+    合成データの投入SQL（scale=1 で利用者2,000・投稿50,000・いいね200,000・入退場300,000件）
+    """
+    users = max(int(2000 * scale), 10)
+    dogs = max(int(3000 * scale), 10)
+    posts = max(int(50000 * scale), 10)
+    entries = max(int(300000 * scale), 10)
+    events = max(int(200 * scale), 5)
+    return f"""
+SET session_replication_role = replica;  -- カウンタのトリガーを止めて投入を速くする
+INSERT INTO users (auth_id, email, name, phone, status)
+SELECT gen_random_uuid(), 'user' || g || '@example.com', '利用者' || g, '090' || lpad(g::text, 8, '0'), 'active'
+FROM generate_series(1, {users}) g;
+CREATE TEMP TABLE seed_users AS SELECT id, row_number() OVER (ORDER BY id) AS n FROM users;
+INSERT INTO dogs (user_id, name, breed)
+SELECT u.id, '犬' || g, '柴犬' FROM generate_series(1, {dogs}) g JOIN seed_users u ON u.n = 1 + g % {users};
+CREATE TEMP TABLE seed_dogs AS SELECT id, user_id, row_number() OVER (ORDER BY id) AS n FROM dogs;
+INSERT INTO vaccination_records (dog_id, vaccine_type, vaccination_date, next_vaccination_date)
+SELECT d.id, t, CURRENT_DATE - 30, CURRENT_DATE + 335 FROM seed_dogs d, unnest(ARRAY['狂犬病', '混合']) t;
+INSERT INTO posts (user_id, content, category, status, created_at)
+SELECT u.id, '投稿 ' || g, (ARRAY['general', 'question', 'event', 'review'])[1 + g % 4],
+       CASE WHEN g % 20 = 0 THEN 'pending' WHEN g % 20 = 1 THEN 'rejected' ELSE 'approved' END,
+       NOW() - g * INTERVAL '1 minute'
+FROM generate_series(1, {posts}) g JOIN seed_users u ON u.n = 1 + g % {users};
+CREATE TEMP TABLE seed_posts AS SELECT id, row_number() OVER (ORDER BY id) AS n FROM posts;
+INSERT INTO likes (post_id, user_id)
+SELECT p.id, u.id FROM seed_posts p CROSS JOIN generate_series(0, 3) k
+JOIN seed_users u ON u.n = 1 + (p.n * 7 + k * 131) % {users} ON CONFLICT DO NOTHING;
+INSERT INTO comments (post_id, user_id, content)
+SELECT p.id, u.id, 'コメント' FROM seed_posts p CROSS JOIN generate_series(0, 1) k
+JOIN seed_users u ON u.n = 1 + (p.n + k) % {users};
+INSERT INTO hashtags (name, post_count) SELECT 'tag' || g, 0 FROM generate_series(1, 100) g;
+INSERT INTO post_hashtags (post_id, hashtag_id)
+SELECT p.id, h.id FROM seed_posts p JOIN (SELECT id, row_number() OVER (ORDER BY id) AS n FROM hashtags) h
+ON h.n = 1 + p.n % 100;
+INSERT INTO events (title, event_date)
+SELECT 'イベント ' || g, NOW() + g * INTERVAL '1 day' FROM generate_series(1, {events}) g;
+INSERT INTO event_registrations (event_id, user_id, status)
+SELECT e.id, u.id, CASE WHEN u.n % 5 = 0 THEN 'cancelled' ELSE 'registered' END
+FROM (SELECT id, row_number() OVER (ORDER BY id) AS n FROM events) e JOIN seed_users u ON (u.n + e.n) % 33 = 0;
+SELECT count(ensure_entry_log_partition(month::date))
+FROM generate_series(date_trunc('month', NOW() - {entries} * INTERVAL '3 minutes'), date_trunc('month', NOW()),
+                     INTERVAL '1 month') AS month;
+INSERT INTO entry_logs (user_id, dog_id, entry_time, exit_time, exit_reason)
+SELECT d.user_id, d.id, t, CASE WHEN g <= {entries} - 50 THEN t + INTERVAL '70 minutes' END,
+       CASE WHEN g <= {entries} - 50 THEN 'scanned' END
+FROM generate_series(1, {entries}) g
+JOIN seed_dogs d ON d.n = 1 + g % {dogs}
+CROSS JOIN LATERAL (SELECT NOW() - ({entries} - g) * INTERVAL '3 minutes' AS t) x;
+SET session_replication_role = origin;
+"""
+
+
+class PlanDatabase:
+    """
+    スキーマを適用して合成データを投入した使い捨てのPostgreSQL
+    """
+
+    def __init__(self, scale: float = 1.0, database_url: Optional[str] = None,
+                 schema_path: Path = SCHEMA_PATH):
+        self.scale = scale
+        self.database_url = database_url or os.environ.get("QUERY_PLAN_DATABASE_URL")
+        self.schema_path = schema_path
+        self._server = None
+        self._tempdir = None
+        self._admin = None
+        self._database = None
+        self.connection = None
+        self.table_rows: Dict[str, int] = {}
+
+    def __enter__(self) -> "PlanDatabase":
+        import psycopg2
+
+        if self.database_url:
+            # 接続先のサーバーに一時データベースを作る
+            self._admin = psycopg2.connect(self.database_url)
+            self._admin.autocommit = True
+            self._database = f"query_plans_{uuid.uuid4().hex[:12]}"
+            with self._admin.cursor() as cursor:
+                cursor.execute(f'CREATE DATABASE "{self._database}"')
+            dsn = self._admin.get_dsn_parameters()
+            self.connection = psycopg2.connect(
+                dbname=self._database, user=dsn.get("user"), host=dsn.get("host"), port=dsn.get("port"),
+                password=self._admin.info.password or None
+            )
+        else:
+            import pgserver
+
+            self._tempdir = tempfile.TemporaryDirectory(prefix="query_plans_")
+            self._server = pgserver.get_server(self._tempdir.name, cleanup_mode="stop")
+            self.connection = psycopg2.connect(self._server.get_uri())
+
+        self.connection.autocommit = True
+        with self.connection.cursor() as cursor:
+            cursor.execute(self.schema_path.read_text(encoding="utf-8"))
+            cursor.execute(seed_sql(self.scale))
+            cursor.execute("VACUUM ANALYZE")
+            cursor.execute(
+                "SELECT relname, reltuples::bigint FROM pg_class "
+                "WHERE relnamespace = 'public'::regnamespace AND relkind IN ('r', 'p')"
+            )
+            self.table_rows = {name: max(rows, 0) for name, rows in cursor.fetchall()}
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self.connection is not None:
+            self.connection.close()
+        if self._admin is not None:
+            with self._admin.cursor() as cursor:
+                cursor.execute(f'DROP DATABASE IF EXISTS "{self._database}"')
+            self._admin.close()
+        if self._server is not None:
+            self._server.cleanup()
+        if self._tempdir is not None:
+            self._tempdir.cleanup()
+
+    def explain(self, sql: str) -> Dict[str, Any]:
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}")
+            plan = cursor.fetchone()[0]
+        return (json.loads(plan) if isinstance(plan, str) else plan)[0]["Plan"]
+
+
+# ========================================
+# 確認するサービスのメソッド
+# ========================================
+
+def _run(coro: Awaitable[Any]) -> Any:
+    # 呼び出し元（pytest等）の現在のイベントループには触れない
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+@dataclass
+class FixtureIds:
+    """スタンドインに投入した、サービス呼び出しに使うID"""
+    admin_id: str
+    user_id: str
+    dog_id: str
+    qr_token: str
+
+
+def _seed_fixture(client: FakeSupabaseClient) -> FixtureIds:
+    """サービスの処理が最後まで進む最小限のデータ"""
+    db = client.db
+    today = date.today()
+    admin = db.seed("admin_users", [{"auth_id": str(uuid.uuid4()), "email": "admin@example.com", "name": "管理者"}])[0]
+    user = db.seed("users", [{"auth_id": str(uuid.uuid4()), "email": "yamada@example.com", "name": "山田",
+                              "status": "active"}])[0]
+    dog = db.seed("dogs", [{"user_id": user["id"], "name": "ポチ", "breed": "柴犬"}])[0]
+    db.seed("vaccination_records", [{
+        "dog_id": dog["id"], "vaccine_type": vaccine, "vaccination_date": (today - timedelta(days=30)).isoformat(),
+        "next_vaccination_date": (today + timedelta(days=335)).isoformat()
+    } for vaccine in ("狂犬病", "混合")])
+    post = db.seed("posts", [{"user_id": user["id"], "content": "散歩 #柴犬", "status": "approved"}])[0]
+    tag = db.seed("hashtags", [{"name": "柴犬"}])[0]
+    db.seed("post_hashtags", [{"post_id": post["id"], "hashtag_id": tag["id"]}])
+    event = db.seed("events", [{"title": "しつけ教室", "event_date": (datetime.now(timezone.utc) + timedelta(days=7)).isoformat()}])[0]
+    db.seed("event_registrations", [{"event_id": event["id"], "user_id": user["id"]}])
+
+    from app.services.qr_service import QRService
+    token = _run(QRService.generate_entry_qr(user["id"], [dog["id"]]))["token"]
+    return FixtureIds(admin_id=admin["id"], user_id=user["id"], dog_id=dog["id"], qr_token=token)
+
+
+def plan_cases() -> List[PlanCase]:
+    """
+    確認するサービスのメソッド（ホットパス）とコストの上限
+    上限は scale=1 の実測の2〜5倍（実行計画が悪い方に変わったときに検知するための目安）
+    """
+    from app.services.entry_service import EntryService
+    from app.services.event_service import EventService
+    from app.services.post_service import PostService
+    from app.services.user_service import UserService
+
+    return [
+        PlanCase("get_feed", lambda ids: PostService.get_feed(current_user_id=ids.user_id), 5000),
+        PlanCase("get_feed(hashtag)", lambda ids: PostService.get_feed(hashtag="柴犬", current_user_id=ids.user_id), 1500),
+        PlanCase("check_in", lambda ids: EntryService.check_in(ids.qr_token, ids.admin_id), 200),
+        PlanCase("get_visitor_statistics", lambda ids: EntryService.get_visitor_statistics(), 500),
+        # 部分一致（前後の %）の検索はB-treeのインデックスを使えないため users を順次走査する
+        # コストの上限（利用者1万人強で超える）を超えたら pg_trgm のGINインデックスを検討する
+        PlanCase("search_users", lambda ids: UserService.search_users("山田"), 500, allowed_seq_scans=("users",)),
+        PlanCase("get_events", lambda ids: EventService.get_events(current_user_id=ids.user_id), 500),
+    ]
+
+
+def record_queries(cases: List[PlanCase]) -> Dict[str, List[str]]:
+    """
+    各メソッドをスタンドインに対して実行し、発行したselectのSQLを返す
+    """
+    from app.core.supabase import set_supabase_client
+    from app.services.timeline_service import TimelineService
+    from app.services.user_card_service import UserCardService
+    from app.services.vaccination_eligibility_service import VaccinationEligibilityService
+
+    recorded: Dict[str, List[str]] = {}
+    try:
+        for case in cases:
+            client = FakeSupabaseClient(RecordingDatabase())
+            install(client)
+            TimelineService.set_store(None)
+            VaccinationEligibilityService.set_cache(None)
+            UserCardService.set_cache(None)
+            ids = _seed_fixture(client)
+            client.db.recorded.clear()
+            _run(case.call(ids))
+            builder = SqlBuilder(client.db)
+            recorded[case.name] = [sql for query in client.db.recorded for sql in builder.build(query)]
+    finally:
+        set_supabase_client(None)
+    return recorded
+
+
+def check_plans(database: PlanDatabase, cases: Optional[List[PlanCase]] = None) -> List[PlanResult]:
+    """
+    各メソッドが発行するSQLの実行計画を確認する
+    """
+    cases = cases if cases is not None else plan_cases()
+    results = []
+    for case in cases:
+        for sql in record_queries([case])[case.name]:
+            plan = database.explain(sql)
+            results.append(PlanResult(
+                case=case.name,
+                sql=sql,
+                cost=plan["Total Cost"],
+                max_cost=case.max_cost,
+                seq_scans=[
+                    (table, rows) for table, rows in seq_scans(plan, database.table_rows)
+                    if table not in case.allowed_seq_scans
+                ],
+            ))
+    return results
+
+
+def _prepare_env() -> None:
+    dummy_key = "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.bench"
+    os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+    os.environ.setdefault("SUPABASE_ANON_KEY", dummy_key)
+    os.environ.setdefault("SUPABASE_SERVICE_KEY", dummy_key)
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="サービスの問い合わせの実行計画を確認する")
+    parser.add_argument("--scale", type=float, default=1.0, help="合成データの規模（1 で投稿50,000件）")
+    parser.add_argument("--database-url", help="一時データベースを作るPostgreSQL（既定: pgserver）")
+    parser.add_argument("--sql", action="store_true", help="確認したSQLを表示する")
+    args = parser.parse_args(argv)
+
+    _prepare_env()
+    with PlanDatabase(args.scale, args.database_url) as database:
+        results = check_plans(database)
+
+    for result in results:
+        mark = "OK " if result.ok else "NG "
+        scans = ", ".join(f"Seq Scan on {table} ({rows}行)" for table, rows in result.seq_scans)
+        print(f"{mark}{result.case:24s} cost {result.cost:10.1f} / {result.max_cost:8.0f}  {scans}")
+        if args.sql or not result.ok:
+            print(f"    {result.sql}")
+    return 0 if all(result.ok for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""
+入退場記録のデコードとJSON化の計測
+
+使い方:
+    python -m benchmarks.row_decoding --rows 10000 --repeat 5
+
+Supabaseが返す形の入退場記録（時刻はISO 8601文字列）を合成し、
+従来の経路（辞書のまま response_model=List[EntryLogResponse] で検証してJSON化）と、
+EntryRow にデコードして RowsResponse で直接JSON化する経路の所要時間を比べる。
+両者の出力が同じJSON（バイト列）になることも確認する。
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def _prepare_env() -> None:
+    dummy_key = "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.bench"
+    os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+    os.environ.setdefault("SUPABASE_ANON_KEY", dummy_key)
+    os.environ.setdefault("SUPABASE_SERVICE_KEY", dummy_key)
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+
+
+def make_rows(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    利用者名・犬の情報を付ける前の入退場記録（PostgRESTの応答と同じ形）
+    """
+    rng = random.Random(seed)
+    start = datetime(2025, 6, 1, tzinfo=timezone.utc)
+    rows = []
+    for i in range(count):
+        entry_time = start + timedelta(minutes=7 * i, microseconds=rng.randrange(1_000_000))
+        exit_time = entry_time + timedelta(minutes=rng.randrange(10, 180)) if rng.random() < 0.8 else None
+        rows.append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "user_id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "dog_id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "entry_time": entry_time.isoformat(),
+            "exit_time": exit_time.isoformat() if exit_time else None,
+            "checked_by": None,
+            "created_at": entry_time.isoformat(),
+            "user_name": f"利用者{i % 500}",
+            "dogs": {"name": f"犬{i % 700}", "breed": "柴犬"},
+        })
+    return rows
+
+
+def dict_path() -> Callable[[List[Dict[str, Any]]], bytes]:
+    """
+    従来の経路: 辞書のまま FastAPI が response_model で検証し、ORJSONResponse でJSON化する
+    """
+    from fastapi.responses import ORJSONResponse
+    from pydantic import TypeAdapter
+    from app.schemas.entry import EntryLogResponse
+    from app.services.entry_service import EntryService
+
+    adapter = TypeAdapter(List[EntryLogResponse])
+    response = ORJSONResponse.__new__(ORJSONResponse)
+
+    def run(rows: List[Dict[str, Any]]) -> bytes:
+        entries = [EntryService._flatten(dict(row)) for row in rows]
+        return response.render(adapter.dump_python(adapter.validate_python(entries), mode="json"))
+
+    return run
+
+
+def row_path() -> Callable[[List[Dict[str, Any]]], bytes]:
+    """
+    EntryRow にデコードし、RowsResponse で直接JSON化する
+    """
+    from app.core.rows import EntryRow, RowsResponse
+    from app.services.entry_service import EntryService
+
+    response = RowsResponse.__new__(RowsResponse)
+
+    def run(rows: List[Dict[str, Any]]) -> bytes:
+        entries = [EntryRow.decode(EntryService._flatten(dict(row))) for row in rows]
+        return response.render(entries)
+
+    return run
+
+
+def measure(run: Callable[[List[Dict[str, Any]]], bytes], rows: List[Dict[str, Any]], repeat: int) -> float:
+    """repeat 回のうち最速の所要時間（秒）"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run(rows)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="入退場記録のデコードとJSON化の所要時間を比べる")
+    parser.add_argument("--rows", type=int, default=10000, help="記録の件数")
+    parser.add_argument("--repeat", type=int, default=5, help="計測の回数（最速の回を表示）")
+    args = parser.parse_args(argv)
+
+    _prepare_env()
+    rows = make_rows(args.rows)
+    paths = {"dict + response_model": dict_path(), "EntryRow + RowsResponse": row_path()}
+
+    if len({run(rows) for run in paths.values()}) != 1:
+        print("NG 出力が一致しません")
+        return 1
+
+    baseline = None
+    for name, run in paths.items():
+        seconds = measure(run, rows, args.repeat)
+        baseline = baseline or seconds
+        print(f"{name:26s} {seconds * 1000:8.1f} ms  ({baseline / seconds:4.1f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
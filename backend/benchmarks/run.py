@@ -0,0 +1,246 @@
+"""
+APIの負荷試験ランナー
+
+使い方:
+    python -m benchmarks.run --scenario feed_browsing --clients 20 --duration 30
+    python -m benchmarks.run --scenario mixed --json after.json --compare before.json
+
+デフォルトではインプロセスのSupabaseスタンドイン（benchmarks.fake_supabase）に対して
+app.main:app を起動する。--base-url を指定すると起動済みのサーバー
+（benchmarks.serve で別プロセス起動したuvicorn等）に対してリクエストを送る。
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.scenarios import SCENARIOS, Scenario
+from benchmarks.seed import SeedConfig, SeedResult, seed_database
+
+
+def _prepare_env() -> None:
+    # Settingsの必須項目（スタンドイン使用時は実際の接続先は不要）
+    dummy_key = "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.bench"
+    os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+    os.environ.setdefault("SUPABASE_ANON_KEY", dummy_key)
+    os.environ.setdefault("SUPABASE_SERVICE_KEY", dummy_key)
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+    # 少数のクライアントから大量に送るため、レート制限は既定で外す
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """最近傍順位法によるパーセンタイル"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.statuses: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+
+    def record(self, label: str, seconds: float, status: Optional[int], ok: bool) -> None:
+        self.latencies[label].append(seconds)
+        if status is not None:
+            self.statuses[label][status] += 1
+        if not ok:
+            self.errors[label] += 1
+
+
+class BenchmarkContext:
+    def __init__(self, client: httpx.AsyncClient, seed: SeedResult, recorder: Recorder,
+                 rng: random.Random, state: Dict[str, Any], track_queries: bool):
+        self.client = client
+        self.seed = seed
+        self.recorder = recorder
+        self.rng = rng
+        self.state = state
+        self.track_queries = track_queries
+
+    async def call(self, label: str, method: str, url: str, expected: Tuple[int, ...] = (200,),
+                   **kwargs) -> Optional[httpx.Response]:
+        token = None
+        if self.track_queries:
+            from benchmarks.fake_supabase import current_route
+            token = current_route.set(label)
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except Exception:
+            self.recorder.record(label, time.perf_counter() - started, None, False)
+            return None
+        finally:
+            if token is not None:
+                from benchmarks.fake_supabase import current_route
+                current_route.reset(token)
+        self.recorder.record(label, time.perf_counter() - started, response.status_code,
+                             response.status_code in expected)
+        return response
+
+
+async def _client_loop(ctx: BenchmarkContext, scenario: Scenario, deadline: float, think_ms: float) -> None:
+    while time.perf_counter() < deadline:
+        operation = scenario.pick(ctx.rng)
+        await operation(ctx)
+        if think_ms:
+            await asyncio.sleep(ctx.rng.expovariate(1 / think_ms) / 1000)
+        else:
+            # インプロセス実行では同期処理だけのリクエストが制御を返さないため、他のタスクに譲る
+            await asyncio.sleep(0)
+
+
+def build_report(recorder: Recorder, elapsed: float, queries: Optional[Dict[str, int]]) -> Dict[str, Any]:
+    routes = {}
+    for label, values in sorted(recorder.latencies.items()):
+        ordered = sorted(values)
+        count = len(ordered)
+        routes[label] = {
+            "count": count,
+            "errors": recorder.errors.get(label, 0),
+            "rps": count / elapsed if elapsed else 0.0,
+            "p50_ms": percentile(ordered, 50) * 1000,
+            "p95_ms": percentile(ordered, 95) * 1000,
+            "p99_ms": percentile(ordered, 99) * 1000,
+            "mean_ms": sum(ordered) / count * 1000,
+            "statuses": dict(recorder.statuses.get(label, {})),
+        }
+        if queries is not None:
+            routes[label]["queries_per_request"] = queries.get(label, 0) / count
+    total = sum(r["count"] for r in routes.values())
+    return {
+        "elapsed_s": elapsed,
+        "total_requests": total,
+        "throughput_rps": total / elapsed if elapsed else 0.0,
+        "routes": routes,
+    }
+
+
+def print_report(report: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> None:
+    header = f"{'route':<42} {'n':>6} {'err':>4} {'rps':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'q/req':>6}"
+    if baseline:
+        header += f" {'Δp95':>8}"
+    print(header)
+    print("-" * len(header))
+    for label, stats in report["routes"].items():
+        line = (
+            f"{label:<42} {stats['count']:>6} {stats['errors']:>4} {stats['rps']:>7.1f} "
+            f"{stats['p50_ms']:>7.1f}ms {stats['p95_ms']:>6.1f}ms {stats['p99_ms']:>6.1f}ms "
+            f"{stats.get('queries_per_request', float('nan')):>6.1f}"
+        )
+        if baseline:
+            before = baseline.get("routes", {}).get(label)
+            if before and before["p95_ms"]:
+                delta = (stats["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100
+                line += f" {delta:>+7.1f}%"
+            else:
+                line += f" {'-':>8}"
+        print(line)
+    print("-" * len(header))
+    print(f"total {report['total_requests']} requests in {report['elapsed_s']:.1f}s "
+          f"({report['throughput_rps']:.1f} req/s)")
+
+
+async def run_benchmark(
+    scenario: Scenario,
+    clients: int,
+    duration: float,
+    seed_config: SeedConfig,
+    latency_ms: float,
+    jitter_ms: float,
+    think_ms: float,
+    base_url: Optional[str] = None,
+    seed_result: Optional[SeedResult] = None,
+) -> Dict[str, Any]:
+    queries = None
+    if base_url:
+        if seed_result is None:
+            raise ValueError("--base-url を使う場合は --seed-file でシード情報を指定してください")
+        transport = None
+        fake = None
+    else:
+        _prepare_env()
+        from benchmarks.fake_supabase import FakeDatabase, FakeSupabaseClient, LatencyModel, install
+        from app.main import app
+
+        fake = FakeSupabaseClient(FakeDatabase(latency=LatencyModel(base_ms=0, jitter_ms=0, per_row_us=0)))
+        install(fake, app)
+        seed_result = seed_database(fake, seed_config)
+        fake.db.latency = LatencyModel(base_ms=latency_ms, jitter_ms=jitter_ms, seed=seed_config.seed)
+        fake.db.stats.reset()
+        transport = httpx.ASGITransport(app=app)
+        base_url = "http://bench"
+
+    recorder = Recorder()
+    state: Dict[str, Any] = {}
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=60) as client:
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(*[
+            _client_loop(
+                BenchmarkContext(client, seed_result, recorder, random.Random(seed_config.seed + i),
+                                 state, track_queries=fake is not None),
+                scenario, deadline, think_ms,
+            )
+            for i in range(clients)
+        ])
+        elapsed = time.perf_counter() - started
+
+    if fake is not None:
+        queries = dict(fake.db.stats.by_route)
+    return build_report(recorder, elapsed, queries)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="里山ドッグランAPI 負荷試験")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="mixed")
+    parser.add_argument("--clients", type=int, default=20, help="同時クライアント数")
+    parser.add_argument("--duration", type=float, default=20.0, help="計測時間（秒）")
+    parser.add_argument("--users", type=int, default=500, help="シードするユーザー数")
+    parser.add_argument("--latency-ms", type=float, default=8.0, help="Supabase往復の基本遅延")
+    parser.add_argument("--jitter-ms", type=float, default=4.0, help="遅延のゆらぎ（指数分布の平均）")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="クライアントの思考時間")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--base-url", help="起動済みサーバーのURL（省略時はインプロセス）")
+    parser.add_argument("--seed-file", type=Path, help="benchmarks.serve が出力したシード情報")
+    parser.add_argument("--json", type=Path, help="結果をJSONで保存")
+    parser.add_argument("--compare", type=Path, help="比較対象の結果JSON")
+    args = parser.parse_args(argv)
+
+    scenario = SCENARIOS[args.scenario]
+    print(f"scenario: {scenario.name} - {scenario.description}")
+    report = asyncio.run(run_benchmark(
+        scenario=scenario,
+        clients=args.clients,
+        duration=args.duration,
+        seed_config=SeedConfig(users=args.users, seed=args.seed),
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        think_ms=args.think_ms,
+        base_url=args.base_url,
+        seed_result=SeedResult(**json.loads(args.seed_file.read_text())) if args.seed_file else None,
+    ))
+    report["scenario"] = scenario.name
+    report["config"] = {k: (str(v) if isinstance(v, Path) else v) for k, v in vars(args).items()}
+
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+    print_report(report, baseline)
+    if args.json:
+        args.json.write_text(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+負荷試験のトラフィックシナリオ
+
+各オペレーションは BenchmarkContext.call() を通じてHTTPリクエストを発行し、
+ルート単位でレイテンシとステータスが記録される。
+"""
+import random
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+Operation = Callable[["BenchmarkContext"], Awaitable[None]]
+
+
+@dataclass
+class Scenario:
+    name: str
+    description: str
+    operations: List[Tuple[Operation, int]]
+
+    def pick(self, rng: random.Random) -> Operation:
+        ops, weights = zip(*self.operations)
+        return rng.choices(ops, weights=weights, k=1)[0]
+
+
+def _auth(token: str) -> Dict[str, str]:
+    return {"Authorization": f"Bearer {token}"}
+
+
+# ========================================
+# 入場ゲート（開園直後のラッシュ）
+# ========================================
+
+async def gate_entry(ctx: "BenchmarkContext") -> None:
+    """利用者がQRを発行し、スタッフがスキャンして入場"""
+    user_id = ctx.rng.choice(ctx.seed.user_ids)
+    dogs = ctx.seed.dogs_by_user.get(user_id, [])
+    if not dogs:
+        return
+    response = await ctx.call(
+        "POST /api/v1/entries/qr", "POST", "/api/v1/entries/qr",
+        json={"dog_ids": dogs}, headers=_auth(ctx.seed.token_by_user[user_id]),
+    )
+    if response is None or response.status_code != 200:
+        return
+    token = response.json()["token"]
+    response = await ctx.call(
+        "POST /api/v1/entries/check-in", "POST", "/api/v1/entries/check-in",
+        json={"qr_token": token}, headers=_auth(ctx.rng.choice(ctx.seed.admin_tokens)),
+        expected=(201, 400),
+    )
+    if response is not None and response.status_code == 201:
+        ctx.state.setdefault("open_entries", []).extend(
+            log["id"] for log in response.json().get("entry_logs", [])
+        )
+
+
+async def gate_exit(ctx: "BenchmarkContext") -> None:
+    """退場スキャン"""
+    open_entries = ctx.state.get("open_entries") or []
+    if not open_entries:
+        return await current_visitors(ctx)
+    log_id = open_entries.pop(ctx.rng.randrange(len(open_entries)))
+    await ctx.call(
+        "POST /api/v1/entries/check-out", "POST", "/api/v1/entries/check-out",
+        json={"entry_log_ids": [log_id]}, headers=_auth(ctx.rng.choice(ctx.seed.admin_tokens)),
+        expected=(200, 404),
+    )
+
+
+async def current_visitors(ctx: "BenchmarkContext") -> None:
+    await ctx.call("GET /api/v1/entries/current-visitors", "GET", "/api/v1/entries/current-visitors")
+
+
+async def visitor_statistics(ctx: "BenchmarkContext") -> None:
+    await ctx.call("GET /api/v1/entries/statistics", "GET", "/api/v1/entries/statistics")
+
+
+# ========================================
+# フィード閲覧
+# ========================================
+
+def _user_headers(ctx: "BenchmarkContext") -> Dict[str, str]:
+    return _auth(ctx.rng.choice(ctx.seed.user_tokens))
+
+
+async def feed_first_page(ctx: "BenchmarkContext") -> None:
+    await ctx.call("GET /api/v1/posts/feed", "GET", "/api/v1/posts/feed", headers=_user_headers(ctx))
+
+
+async def feed_scroll(ctx: "BenchmarkContext") -> None:
+    offset = 20 * ctx.rng.randint(1, 3)
+    await ctx.call(
+        "GET /api/v1/posts/feed?offset", "GET", f"/api/v1/posts/feed?offset={offset}",
+        headers=_user_headers(ctx),
+    )
+
+
+async def feed_hashtag(ctx: "BenchmarkContext") -> None:
+    tag = ctx.rng.choice(ctx.seed.hashtags)
+    await ctx.call(
+        "GET /api/v1/posts/feed?hashtag", "GET", "/api/v1/posts/feed",
+        params={"hashtag": tag}, headers=_user_headers(ctx),
+    )
+
+
+async def hashtag_trending(ctx: "BenchmarkContext") -> None:
+    await ctx.call("GET /api/v1/posts/hashtags/trending", "GET", "/api/v1/posts/hashtags/trending")
+
+
+async def post_detail(ctx: "BenchmarkContext") -> None:
+    post_id = ctx.rng.choice(ctx.seed.approved_post_ids)
+    await ctx.call("GET /api/v1/posts/{post_id}", "GET", f"/api/v1/posts/{post_id}", headers=_user_headers(ctx))
+
+
+async def post_like(ctx: "BenchmarkContext") -> None:
+    post_id = ctx.rng.choice(ctx.seed.approved_post_ids)
+    await ctx.call(
+        "POST /api/v1/posts/{post_id}/like", "POST", f"/api/v1/posts/{post_id}/like",
+        headers=_user_headers(ctx),
+    )
+
+
+async def post_comments(ctx: "BenchmarkContext") -> None:
+    post_id = ctx.rng.choice(ctx.seed.approved_post_ids)
+    await ctx.call("GET /api/v1/posts/{post_id}/comments", "GET", f"/api/v1/posts/{post_id}/comments")
+
+
+async def event_list(ctx: "BenchmarkContext") -> None:
+    await ctx.call("GET /api/v1/events/", "GET", "/api/v1/events/", headers=_user_headers(ctx))
+
+
+# ========================================
+# 管理ダッシュボード
+# ========================================
+
+def _admin_headers(ctx: "BenchmarkContext") -> Dict[str, str]:
+    return _auth(ctx.rng.choice(ctx.seed.admin_tokens))
+
+
+async def admin_user_list(ctx: "BenchmarkContext") -> None:
+    await ctx.call("GET /api/v1/users/admin/list", "GET", "/api/v1/users/admin/list", headers=_admin_headers(ctx))
+
+
+async def admin_pending_posts(ctx: "BenchmarkContext") -> None:
+    await ctx.call("GET /api/v1/posts/admin/pending", "GET", "/api/v1/posts/admin/pending", headers=_admin_headers(ctx))
+
+
+async def admin_bulk_moderate(ctx: "BenchmarkContext") -> None:
+    """承認待ち投稿を20件ずつまとめて承認"""
+    if "pending_queue" not in ctx.state:
+        ctx.state["pending_queue"] = list(ctx.seed.pending_post_ids)
+    queue = ctx.state["pending_queue"]
+    if not queue:
+        return await admin_pending_posts(ctx)
+    batch, queue[:] = queue[:20], queue[20:]
+    await ctx.call(
+        "POST /api/v1/posts/admin/bulk-moderate", "POST", "/api/v1/posts/admin/bulk-moderate",
+        json={"post_ids": batch, "status": "approved"}, headers=_admin_headers(ctx),
+    )
+
+
+async def admin_entry_history(ctx: "BenchmarkContext") -> None:
+    await ctx.call(
+        "GET /api/v1/entries/history", "GET", "/api/v1/entries/history",
+        params={"limit": 200}, headers=_admin_headers(ctx),
+    )
+
+
+async def admin_search_users(ctx: "BenchmarkContext") -> None:
+    await ctx.call(
+        "GET /api/v1/users/admin/search", "GET", "/api/v1/users/admin/search",
+        params={"q": f"利用者{ctx.rng.randint(0, 99)}"}, headers=_admin_headers(ctx),
+        expected=(200, 422),
+    )
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "gate_rush": Scenario(
+        "gate_rush",
+        "開園直後の入場ラッシュ（QR発行・入場スキャン・退場・利用者数表示）",
+        [(gate_entry, 6), (gate_exit, 2), (current_visitors, 3), (visitor_statistics, 1)],
+    ),
+    "feed_browsing": Scenario(
+        "feed_browsing",
+        "イベント後のフィード閲覧（1ページ目・スクロール・詳細・いいね・コメント）",
+        [(feed_first_page, 6), (feed_scroll, 2), (feed_hashtag, 1), (hashtag_trending, 1), (post_detail, 3),
+         (post_like, 2), (post_comments, 2), (event_list, 1)],
+    ),
+    "admin_dashboard": Scenario(
+        "admin_dashboard",
+        "管理画面（統計・利用者一覧・承認待ち投稿と一括承認・入退場履歴）",
+        [(visitor_statistics, 3), (current_visitors, 3), (admin_user_list, 2),
+         (admin_pending_posts, 2), (admin_bulk_moderate, 1), (admin_entry_history, 2),
+         (admin_search_users, 1)],
+    ),
+}
+
+SCENARIOS["mixed"] = Scenario(
+    "mixed",
+    "全シナリオの混合",
+    [op for scenario in list(SCENARIOS.values()) for op in scenario.operations],
+)
@@ -0,0 +1,230 @@
+"""
+負荷試験用の合成データ投入
+"""
+import random
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List
+
+from benchmarks.fake_supabase import FakeSupabaseClient
+
+
+BREEDS = ["柴犬", "トイプードル", "チワワ", "ミニチュアダックスフンド", "ゴールデンレトリバー", "コーギー", "雑種"]
+HASHTAGS = ["里山ドッグラン", "柴犬", "散歩", "今治", "イベント", "トイプードル", "初参加", "雨の日", "夕焼け", "友達"]
+CATEGORIES = ["general", "question", "event", "review"]
+
+
+@dataclass
+class SeedConfig:
+    users: int = 500
+    admins: int = 3
+    dogs_per_user: int = 2
+    posts_per_user: float = 2.0
+    pending_ratio: float = 0.15
+    likes_per_post: int = 8
+    comments_per_post: int = 2
+    entry_days: int = 60
+    entries_per_day: int = 80
+    events: int = 20
+    seed: int = 42
+
+
+@dataclass
+class SeedResult:
+    """シナリオから参照するID群とトークン"""
+    user_tokens: List[str] = field(default_factory=list)
+    admin_tokens: List[str] = field(default_factory=list)
+    user_ids: List[str] = field(default_factory=list)
+    dogs_by_user: Dict[str, List[str]] = field(default_factory=dict)
+    token_by_user: Dict[str, str] = field(default_factory=dict)
+    approved_post_ids: List[str] = field(default_factory=list)
+    pending_post_ids: List[str] = field(default_factory=list)
+    event_ids: List[str] = field(default_factory=list)
+    hashtags: List[str] = field(default_factory=list)
+
+
+def _ts(dt: datetime) -> str:
+    return dt.astimezone(timezone.utc).isoformat()
+
+
+def seed_database(client: FakeSupabaseClient, config: SeedConfig = SeedConfig()) -> SeedResult:
+    """
+    ユーザー、犬、投稿、入退場記録などをメモリ上のDBへ投入する
+    """
+    rng = random.Random(config.seed)
+    db = client.db
+    now = datetime.now(timezone.utc)
+    result = SeedResult()
+
+    # 管理者
+    admin_ids = []
+    for i in range(config.admins):
+        auth_id = str(uuid.uuid4())
+        admin = db.seed("admin_users", [{
+            "auth_id": auth_id,
+            "email": f"admin{i}@example.com",
+            "name": f"管理者{i}",
+            "role": "super_admin" if i == 0 else "admin",
+            "is_active": True,
+        }])[0]
+        # get_current_user は users テーブルも参照するため管理者分も作成
+        db.seed("users", [{
+            "auth_id": auth_id,
+            "email": f"admin{i}@example.com",
+            "name": f"管理者{i}",
+            "status": "active",
+            "is_imabari_resident": True,
+        }])
+        result.admin_tokens.append(client.auth.register(auth_id, f"admin{i}@example.com"))
+        admin_ids.append(admin["id"])
+
+    # ユーザーと犬
+    user_rows = []
+    for i in range(config.users):
+        auth_id = str(uuid.uuid4())
+        created = now - timedelta(days=rng.randint(1, 365))
+        user_rows.append({
+            "auth_id": auth_id,
+            "email": f"user{i}@example.com",
+            "name": f"利用者{i}",
+            "phone": f"090-{rng.randint(1000, 9999)}-{rng.randint(1000, 9999)}",
+            "address": f"愛媛県今治市{rng.randint(1, 9)}丁目{rng.randint(1, 30)}番地",
+            "is_imabari_resident": rng.random() < 0.8,
+            "residence_years": rng.randint(1, 40),
+            "status": "active" if rng.random() < 0.95 else "pending",
+            "avatar_url": f"https://storage.local/images/avatars/{i}.png",
+            "created_at": _ts(created),
+            "updated_at": _ts(created),
+        })
+        token = client.auth.register(auth_id, f"user{i}@example.com")
+        result.user_tokens.append(token)
+    users = db.seed("users", user_rows)
+    for user, token in zip(users, result.user_tokens):
+        result.user_ids.append(user["id"])
+        result.token_by_user[user["id"]] = token
+
+    dog_rows, vaccination_rows = [], []
+    for user_id in result.user_ids:
+        for j in range(rng.randint(1, config.dogs_per_user)):
+            dog_id = str(uuid.uuid4())
+            dog_rows.append({
+                "id": dog_id,
+                "user_id": user_id,
+                "name": f"ワン{j}",
+                "breed": rng.choice(BREEDS),
+                "weight": round(rng.uniform(2, 30), 1),
+                "gender": rng.choice(["オス", "メス"]),
+                "birth_date": (date.today() - timedelta(days=rng.randint(200, 4000))).isoformat(),
+                "personality": "人懐っこい",
+                "is_active": True,
+            })
+            vaccinated = date.today() - timedelta(days=rng.randint(0, 400))
+            vaccination_rows.append({
+                "dog_id": dog_id,
+                "vaccine_type": "狂犬病",
+                "vaccination_date": vaccinated.isoformat(),
+                "next_vaccination_date": (vaccinated + timedelta(days=365)).isoformat(),
+            })
+            result.dogs_by_user.setdefault(user_id, []).append(dog_id)
+    db.seed("dogs", dog_rows)
+    db.seed("vaccination_records", vaccination_rows)
+
+    # ハッシュタグ
+    tags = db.seed("hashtags", [{"name": name} for name in HASHTAGS])
+    result.hashtags = [t["name"] for t in tags]
+
+    # 投稿・画像・いいね・コメント
+    post_rows, image_rows, link_rows, like_rows, comment_rows = [], [], [], [], []
+    total_posts = int(config.users * config.posts_per_user)
+    for i in range(total_posts):
+        post_id = str(uuid.uuid4())
+        author = rng.choice(result.user_ids)
+        created = now - timedelta(minutes=rng.randint(1, 60 * 24 * 90))
+        pending = rng.random() < config.pending_ratio
+        post_rows.append({
+            "id": post_id,
+            "user_id": author,
+            "content": f"今日もドッグランで遊びました #{rng.choice(HASHTAGS)} " * rng.randint(1, 4),
+            "category": rng.choice(CATEGORIES),
+            "status": "pending" if pending else "approved",
+            "created_at": _ts(created),
+            "updated_at": _ts(created),
+        })
+        (result.pending_post_ids if pending else result.approved_post_ids).append(post_id)
+        for order in range(rng.randint(0, 3)):
+            image_rows.append({
+                "post_id": post_id,
+                "image_url": f"https://storage.local/images/posts/{post_id}/{order}.jpg",
+                "display_order": order,
+            })
+        for tag in rng.sample(tags, rng.randint(0, 3)):
+            link_rows.append({"post_id": post_id, "hashtag_id": tag["id"]})
+        if not pending:
+            for liker in rng.sample(result.user_ids, min(len(result.user_ids), rng.randint(0, config.likes_per_post * 2))):
+                like_rows.append({"post_id": post_id, "user_id": liker})
+            for _ in range(rng.randint(0, config.comments_per_post * 2)):
+                comment_rows.append({
+                    "post_id": post_id,
+                    "user_id": rng.choice(result.user_ids),
+                    "content": "かわいいですね！",
+                })
+    db.seed("posts", post_rows)
+    db.seed("post_images", image_rows)
+    db.seed("post_hashtags", link_rows)
+    db.seed("likes", like_rows)
+    db.seed("comments", comment_rows)
+    # 承認済み投稿のハッシュタグをトレンドに反映
+    db.call_rpc("bump_hashtag_trend", {"p_post_ids": result.approved_post_ids})
+
+    # 入退場記録（過去分は退場済み、当日分の一部は滞在中）
+    entry_rows = []
+    today = date.today()
+    all_dogs = [(u, d) for u, dogs in result.dogs_by_user.items() for d in dogs]
+    for day_offset in range(config.entry_days):
+        day = today - timedelta(days=day_offset)
+        for _ in range(rng.randint(config.entries_per_day // 2, config.entries_per_day)):
+            user_id, dog_id = rng.choice(all_dogs)
+            entry = datetime(day.year, day.month, day.day, rng.randint(0, 8), rng.randint(0, 59), tzinfo=timezone.utc)
+            still_inside = day_offset == 0 and rng.random() < 0.1
+            entry_rows.append({
+                "user_id": user_id,
+                "dog_id": dog_id,
+                "entry_time": _ts(entry),
+                "exit_time": None if still_inside else _ts(entry + timedelta(minutes=rng.randint(15, 180))),
+                "checked_by": rng.choice(admin_ids),
+            })
+    db.seed("entry_logs", entry_rows)
+
+    # イベントと参加登録
+    event_rows, registration_rows = [], []
+    for i in range(config.events):
+        event_id = str(uuid.uuid4())
+        event_date = now + timedelta(days=rng.randint(-30, 60))
+        event_rows.append({
+            "id": event_id,
+            "title": f"わんわん交流会 第{i + 1}回",
+            "description": "みんなで遊びましょう",
+            "event_date": _ts(event_date),
+            "location": "里山ドッグラン",
+            "max_participants": rng.choice([None, 20, 50]),
+            "registration_deadline": _ts(event_date - timedelta(days=1)),
+            "created_by": rng.choice(admin_ids),
+        })
+        result.event_ids.append(event_id)
+        for user_id in rng.sample(result.user_ids, min(len(result.user_ids), rng.randint(0, 30))):
+            registration_rows.append({"event_id": event_id, "user_id": user_id, "status": "registered"})
+    db.seed("events", event_rows)
+    db.seed("event_registrations", registration_rows)
+
+    # 営業時間・お知らせ
+    db.seed("business_hours", [
+        {"day_of_week": d, "open_time": "09:00", "close_time": "17:00", "is_closed": d == 3}
+        for d in range(7)
+    ])
+    db.seed("announcements", [
+        {"title": f"お知らせ{i}", "content": "本日は通常営業です", "priority": "normal", "created_by": admin_ids[0]}
+        for i in range(10)
+    ])
+
+    return result
@@ -0,0 +1,48 @@
+"""
+スタンドインDBを使ったAPIサーバーを別プロセスで起動する
+
+使い方:
+    python -m benchmarks.serve --port 8100 --seed-out /tmp/seed.json
+    python -m benchmarks.run --base-url http://127.0.0.1:8100 --seed-file /tmp/seed.json
+
+uvicornのワーカー構成やミドルウェアを含めた計測をしたい場合に使う。
+"""
+import argparse
+import dataclasses
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.run import _prepare_env
+from benchmarks.seed import SeedConfig, seed_database
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="負荷試験用APIサーバー")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=8.0)
+    parser.add_argument("--jitter-ms", type=float, default=4.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--seed-out", type=Path, required=True, help="トークン等のシード情報の出力先")
+    args = parser.parse_args()
+
+    _prepare_env()
+    import uvicorn
+    from app.main import app
+    from benchmarks.fake_supabase import FakeDatabase, FakeSupabaseClient, LatencyModel, install
+
+    fake = FakeSupabaseClient(FakeDatabase())
+    install(fake, app)
+    result = seed_database(fake, SeedConfig(users=args.users, seed=args.seed))
+    fake.db.latency = LatencyModel(base_ms=args.latency_ms, jitter_ms=args.jitter_ms, seed=args.seed)
+    args.seed_out.write_text(json.dumps(dataclasses.asdict(result), ensure_ascii=False))
+
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
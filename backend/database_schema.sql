@@ -47,6 +47,35 @@ CREATE TABLE IF NOT EXISTS applications (
     reviewed_by UUID REFERENCES admin_users(id)
 );
 
+-- 申請時の犬情報（承認時に dogs へ移す）
+CREATE TABLE IF NOT EXISTS application_dogs (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    application_id UUID REFERENCES applications(id) ON DELETE CASCADE,
+    name VARCHAR(100) NOT NULL,
+    breed VARCHAR(100),
+    weight DECIMAL(5,2),
+    gender VARCHAR(10),
+    birth_date DATE,
+    personality TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- 審査結果のジョブ（申請IDを冪等キーとして1申請1件、承認・却下の UPDATE と同じトランザクションでトリガーが登録）
+CREATE TABLE IF NOT EXISTS provisioning_jobs (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    application_id UUID UNIQUE NOT NULL REFERENCES applications(id) ON DELETE CASCADE,
+    kind VARCHAR(20) NOT NULL DEFAULT 'approval', -- approval（アカウント作成と承認メール）, rejection（却下メール）
+    status VARCHAR(20) NOT NULL DEFAULT 'pending', -- pending, running, done, failed
+    attempts INTEGER NOT NULL DEFAULT 0,
+    auth_id UUID,  -- 作成済みのSupabase Auth ID（再試行時に再利用）
+    user_id UUID REFERENCES users(id) ON DELETE SET NULL,
+    last_error TEXT,
+    locked_until TIMESTAMP WITH TIME ZONE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    completed_at TIMESTAMP WITH TIME ZONE
+);
+
 -- 犬情報テーブル
 CREATE TABLE IF NOT EXISTS dogs (
     id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
@@ -59,6 +88,7 @@ CREATE TABLE IF NOT EXISTS dogs (
     personality TEXT,
     photo_url TEXT,
     is_active BOOLEAN DEFAULT true,
+    application_dog_id UUID UNIQUE REFERENCES application_dogs(id) ON DELETE SET NULL, -- 申請から作成した場合の元データ
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
@@ -75,6 +105,17 @@ CREATE TABLE IF NOT EXISTS vaccination_records (
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
 
+-- ワクチン接種リマインダーの送信記録（同じ記録・期限・通知タイミングには1回だけ送る）
+CREATE TABLE IF NOT EXISTS vaccination_reminders (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    vaccination_record_id UUID REFERENCES vaccination_records(id) ON DELETE CASCADE,
+    user_id UUID REFERENCES users(id) ON DELETE CASCADE,
+    due_date DATE NOT NULL,
+    days_before INTEGER NOT NULL,
+    sent_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(vaccination_record_id, due_date, days_before)
+);
+
 -- 投稿テーブル
 CREATE TABLE IF NOT EXISTS posts (
     id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
@@ -82,6 +123,9 @@ CREATE TABLE IF NOT EXISTS posts (
     content TEXT NOT NULL,
     category VARCHAR(50),
     status VARCHAR(20) DEFAULT 'pending', -- pending, approved, rejected
+    like_count INTEGER NOT NULL DEFAULT 0, -- likes のトリガーで更新
+    comment_count INTEGER NOT NULL DEFAULT 0, -- comments のトリガーで更新
+    approved_at TIMESTAMP WITH TIME ZONE, -- 承認時刻（bump_hashtag_trend で記録、トレンドの取り消しに使う）
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
@@ -99,6 +143,8 @@ CREATE TABLE IF NOT EXISTS post_images (
 CREATE TABLE IF NOT EXISTS hashtags (
     id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
     name VARCHAR(100) UNIQUE NOT NULL,
+    post_count INTEGER DEFAULT 0, -- 承認済みになった投稿数
+    trend_score DOUBLE PRECISION, -- 時間減衰スコア（対数・絶対時刻基準、bump_hashtag_trendで更新）
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
 
@@ -154,15 +200,29 @@ CREATE TABLE IF NOT EXISTS event_registrations (
     UNIQUE(event_id, user_id)
 );
 
--- 入退場記録テーブル
+-- 入退場記録テーブル（entry_time の月単位でパーティション分割、古い月はParquetにアーカイブ）
 CREATE TABLE IF NOT EXISTS entry_logs (
-    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    id UUID NOT NULL DEFAULT gen_random_uuid(),
     user_id UUID REFERENCES users(id) ON DELETE CASCADE,
     dog_id UUID REFERENCES dogs(id) ON DELETE CASCADE,
     entry_time TIMESTAMP WITH TIME ZONE NOT NULL,
     exit_time TIMESTAMP WITH TIME ZONE,
+    exit_reason VARCHAR(20), -- scanned: QRで退場, auto_closed: 閉園時に自動で退場
     checked_by UUID REFERENCES admin_users(id),
-    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, entry_time)
+) PARTITION BY RANGE (entry_time);
+
+-- 対応する月のパーティションがない記録の受け皿（通常は空のまま）
+CREATE TABLE IF NOT EXISTS entry_logs_default PARTITION OF entry_logs DEFAULT;
+
+-- アーカイブ済みの月（Parquetファイルの保存先）
+CREATE TABLE IF NOT EXISTS entry_log_archives (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    month DATE UNIQUE NOT NULL,
+    storage_path TEXT NOT NULL,
+    row_count INTEGER NOT NULL,
+    archived_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
 
 -- お知らせテーブル
@@ -203,14 +263,28 @@ CREATE INDEX idx_users_email ON users(email);
 CREATE INDEX idx_applications_status ON applications(status);
 CREATE INDEX idx_applications_email ON applications(email);
 CREATE INDEX idx_dogs_user_id ON dogs(user_id);
+CREATE INDEX idx_application_dogs_application_id ON application_dogs(application_id);
+CREATE INDEX idx_provisioning_jobs_status ON provisioning_jobs(status, locked_until);
+CREATE INDEX idx_vaccination_records_next_date ON vaccination_records(next_vaccination_date);
+CREATE INDEX idx_vaccination_records_dog_id ON vaccination_records(dog_id, vaccination_date DESC);
+CREATE INDEX idx_vaccination_reminders_due_date ON vaccination_reminders(due_date);
 CREATE INDEX idx_posts_user_id ON posts(user_id);
 CREATE INDEX idx_posts_status ON posts(status);
 CREATE INDEX idx_posts_created_at ON posts(created_at DESC);
-CREATE INDEX idx_likes_post_id ON likes(post_id);
-CREATE INDEX idx_comments_post_id ON comments(post_id);
+CREATE INDEX idx_posts_pending_queue ON posts(created_at) WHERE status = 'pending';
+CREATE INDEX idx_posts_approved_created_at ON posts(created_at DESC) WHERE status = 'approved';
+CREATE INDEX idx_post_hashtags_hashtag_id ON post_hashtags(hashtag_id, post_id);
+CREATE INDEX idx_hashtags_trend_score ON hashtags(trend_score DESC NULLS LAST);
+CREATE INDEX idx_likes_user_id ON likes(user_id, post_id);
+CREATE INDEX idx_comments_post_created_at ON comments(post_id, created_at DESC);
 CREATE INDEX idx_events_event_date ON events(event_date);
-CREATE INDEX idx_entry_logs_user_id ON entry_logs(user_id);
+CREATE INDEX idx_event_registrations_event_status ON event_registrations(event_id, status);
+CREATE INDEX idx_event_registrations_user_status ON event_registrations(user_id, status);
+CREATE INDEX idx_entry_logs_user_entry_time ON entry_logs(user_id, entry_time DESC);
+CREATE INDEX idx_entry_logs_entry_time ON entry_logs(entry_time);
 CREATE INDEX idx_entry_logs_exit_time ON entry_logs(exit_time);
+CREATE INDEX idx_entry_logs_open ON entry_logs(entry_time) WHERE exit_time IS NULL;
+CREATE INDEX idx_entry_logs_open_dog ON entry_logs(dog_id) WHERE exit_time IS NULL;
 
 -- 更新日時を自動更新するトリガー関数
 CREATE OR REPLACE FUNCTION update_updated_at_column()
@@ -231,6 +305,9 @@ CREATE TRIGGER update_admin_users_updated_at BEFORE UPDATE ON admin_users
 CREATE TRIGGER update_dogs_updated_at BEFORE UPDATE ON dogs
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
+CREATE TRIGGER update_provisioning_jobs_updated_at BEFORE UPDATE ON provisioning_jobs
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
 CREATE TRIGGER update_vaccination_records_updated_at BEFORE UPDATE ON vaccination_records
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
@@ -247,4 +324,232 @@ CREATE TRIGGER update_announcements_updated_at BEFORE UPDATE ON announcements
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
 CREATE TRIGGER update_business_hours_updated_at BEFORE UPDATE ON business_hours
-    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
\ No newline at end of file
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+-- ハッシュタグのトレンドスコアを加算する（投稿が承認されたときに呼び出す）
+-- スコアは半減期24時間の指数減衰の合計を ln(Σ exp(λ・t)) として保持する。
+-- 全タグに共通の減衰係数を掛けても順位は変わらないため、定期的な再計算なしで
+-- trend_score の降順がそのまま現在のトレンド順になる。
+CREATE OR REPLACE FUNCTION bump_hashtag_trend(p_post_ids UUID[])
+RETURNS VOID AS $$
+DECLARE
+    v_now DOUBLE PRECISION := ln(2) / (24 * 3600) * EXTRACT(EPOCH FROM NOW());
+BEGIN
+    -- 取り消し時に同じ寄与を差し引けるよう承認時刻を残す
+    UPDATE posts SET approved_at = NOW() WHERE id = ANY(p_post_ids);
+
+    UPDATE hashtags h
+    SET post_count = h.post_count + t.cnt,
+        trend_score = CASE
+            WHEN h.trend_score IS NULL THEN v_now + ln(t.cnt)
+            ELSE GREATEST(h.trend_score, v_now + ln(t.cnt))
+                 + ln(1 + exp(GREATEST(-abs(h.trend_score - (v_now + ln(t.cnt))), -700)))
+        END
+    FROM (
+        SELECT hashtag_id, COUNT(*) AS cnt
+        FROM post_hashtags
+        WHERE post_id = ANY(p_post_ids)
+        GROUP BY hashtag_id
+    ) t
+    WHERE h.id = t.hashtag_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- 承認済みの投稿が却下・削除されたら、その投稿の寄与をトレンドスコアから差し引く
+-- ln(exp(s) - exp(λ・t)) = s + ln(1 - exp(λ・t - s))（承認時刻が未記録の投稿は作成日時を使う）
+-- 最後の1件だった場合や丸め誤差で寄与が残りを上回る場合はスコアなし（NULL）にする
+CREATE OR REPLACE FUNCTION withdraw_hashtag_trend()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_added DOUBLE PRECISION := ln(2) / (24 * 3600) * EXTRACT(EPOCH FROM COALESCE(OLD.approved_at, OLD.created_at));
+BEGIN
+    UPDATE hashtags h
+    SET post_count = GREATEST(h.post_count - 1, 0),
+        trend_score = CASE
+            WHEN h.post_count <= 1 OR h.trend_score IS NULL OR h.trend_score <= v_added THEN NULL
+            ELSE h.trend_score + ln(1 - exp(GREATEST(v_added - h.trend_score, -700)))
+        END
+    FROM post_hashtags ph
+    WHERE ph.post_id = OLD.id AND h.id = ph.hashtag_id;
+    IF TG_OP = 'DELETE' THEN
+        RETURN OLD;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- 承認済み → 却下・承認待ち
+CREATE TRIGGER withdraw_hashtag_trend_on_unapprove
+    AFTER UPDATE OF status ON posts
+    FOR EACH ROW WHEN (OLD.status = 'approved' AND NEW.status <> 'approved')
+    EXECUTE FUNCTION withdraw_hashtag_trend();
+
+-- 承認済みの投稿の削除（post_hashtags が ON DELETE CASCADE で消える前に差し引く）
+CREATE TRIGGER withdraw_hashtag_trend_on_delete
+    BEFORE DELETE ON posts
+    FOR EACH ROW WHEN (OLD.status = 'approved')
+    EXECUTE FUNCTION withdraw_hashtag_trend();
+
+-- いいね数・コメント数を posts に反映するトリガー関数
+CREATE OR REPLACE FUNCTION update_post_like_count()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE posts SET like_count = like_count + 1 WHERE id = NEW.post_id;
+    ELSE
+        UPDATE posts SET like_count = GREATEST(like_count - 1, 0) WHERE id = OLD.post_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION update_post_comment_count()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE posts SET comment_count = comment_count + 1 WHERE id = NEW.post_id;
+    ELSE
+        UPDATE posts SET comment_count = GREATEST(comment_count - 1, 0) WHERE id = OLD.post_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER update_posts_like_count AFTER INSERT OR DELETE ON likes
+    FOR EACH ROW EXECUTE FUNCTION update_post_like_count();
+
+CREATE TRIGGER update_posts_comment_count AFTER INSERT OR DELETE ON comments
+    FOR EACH ROW EXECUTE FUNCTION update_post_comment_count();
+
+-- いいねを切り替え、切り替え後の状態といいね数を返す（1往復で完結）
+CREATE OR REPLACE FUNCTION toggle_like(p_post_id UUID, p_user_id UUID)
+RETURNS TABLE(liked BOOLEAN, like_count INTEGER) AS $$
+BEGIN
+    DELETE FROM likes l WHERE l.post_id = p_post_id AND l.user_id = p_user_id;
+    IF FOUND THEN
+        liked := FALSE;
+    ELSE
+        INSERT INTO likes (post_id, user_id) VALUES (p_post_id, p_user_id)
+        ON CONFLICT DO NOTHING;
+        liked := TRUE;
+    END IF;
+    SELECT p.like_count INTO like_count FROM posts p WHERE p.id = p_post_id;
+    RETURN NEXT;
+END;
+$$ LANGUAGE plpgsql;
+
+-- 申請の承認・却下と同じトランザクションで審査結果のジョブを登録する
+CREATE OR REPLACE FUNCTION enqueue_review_job()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO provisioning_jobs (application_id, kind)
+    VALUES (NEW.id, CASE WHEN NEW.status = 'approved' THEN 'approval' ELSE 'rejection' END)
+    ON CONFLICT (application_id) DO NOTHING;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER enqueue_review_job_on_review
+    AFTER UPDATE OF status ON applications
+    FOR EACH ROW WHEN (OLD.status = 'pending' AND NEW.status IN ('approved', 'rejected'))
+    EXECUTE FUNCTION enqueue_review_job();
+
+-- 承認済み申請から users と dogs をまとめて作成（1トランザクションで途中状態を残さない）
+-- 再実行しても既存の行は作り直さない（email と application_dog_id で冪等）
+-- ジョブの完了は承認メールの送信後にバックエンドが記録する
+CREATE OR REPLACE FUNCTION provision_account(p_job_id UUID, p_auth_id UUID)
+RETURNS UUID AS $$
+DECLARE
+    v_application applications%ROWTYPE;
+    v_user_id UUID;
+BEGIN
+    SELECT a.* INTO v_application
+    FROM provisioning_jobs j JOIN applications a ON a.id = j.application_id
+    WHERE j.id = p_job_id
+    FOR UPDATE OF j;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'provisioning job % not found', p_job_id USING ERRCODE = 'P0002';
+    END IF;
+
+    INSERT INTO users (auth_id, email, name, phone, address, is_imabari_resident, residence_years, status)
+    VALUES (p_auth_id, v_application.email, v_application.name, v_application.phone, v_application.address,
+            COALESCE(v_application.is_imabari_resident, false), v_application.residence_years, 'active')
+    ON CONFLICT (email) DO NOTHING;
+    SELECT u.id INTO v_user_id FROM users u WHERE u.email = v_application.email;
+
+    INSERT INTO dogs (user_id, name, breed, weight, gender, birth_date, personality, application_dog_id)
+    SELECT v_user_id, d.name, d.breed, d.weight, d.gender, d.birth_date, d.personality, d.id
+    FROM application_dogs d
+    WHERE d.application_id = v_application.id
+    ON CONFLICT (application_dog_id) DO NOTHING;
+
+    UPDATE provisioning_jobs
+    SET auth_id = p_auth_id, user_id = v_user_id
+    WHERE id = p_job_id;
+
+    RETURN v_user_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- 月（UTC）のパーティションを用意する（既にあれば何もしない）
+-- 既定パーティションに入っていたその月の記録は新しいパーティションへ移す
+CREATE OR REPLACE FUNCTION ensure_entry_log_partition(p_month DATE)
+RETURNS TEXT AS $$
+DECLARE
+    v_from TIMESTAMPTZ := (date_trunc('month', p_month)::date::text || ' 00:00:00+00')::timestamptz;
+    v_to TIMESTAMPTZ := ((date_trunc('month', p_month) + INTERVAL '1 month')::date::text || ' 00:00:00+00')::timestamptz;
+    v_name TEXT := 'entry_logs_' || to_char(p_month, 'YYYY_MM');
+BEGIN
+    IF to_regclass(v_name) IS NOT NULL THEN
+        RETURN v_name;
+    END IF;
+
+    IF to_regclass('pg_temp.entry_logs_moving') IS NULL THEN
+        CREATE TEMP TABLE entry_logs_moving (LIKE entry_logs) ON COMMIT DROP;
+    ELSE
+        TRUNCATE entry_logs_moving;
+    END IF;
+    WITH moved AS (
+        DELETE FROM entry_logs_default
+        WHERE entry_time >= v_from AND entry_time < v_to
+        RETURNING *
+    )
+    INSERT INTO entry_logs_moving SELECT * FROM moved;
+
+    EXECUTE format(
+        'CREATE TABLE %I PARTITION OF entry_logs FOR VALUES FROM (%L) TO (%L)',
+        v_name, v_from, v_to
+    );
+    EXECUTE format('ALTER TABLE %I ENABLE ROW LEVEL SECURITY', v_name);
+    INSERT INTO entry_logs SELECT * FROM entry_logs_moving;
+    RETURN v_name;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public, pg_temp;
+
+-- Parquetに書き出した月のパーティションを切り離して削除する
+-- 書き出した件数とパーティションの件数が一致しない場合（書き出し後に追加・変更があった場合）は何もしない
+CREATE OR REPLACE FUNCTION archive_entry_log_partition(p_month DATE, p_storage_path TEXT, p_row_count INTEGER)
+RETURNS BOOLEAN AS $$
+DECLARE
+    v_name TEXT := ensure_entry_log_partition(p_month);
+    v_count INTEGER;
+BEGIN
+    EXECUTE format('LOCK TABLE %I IN ACCESS EXCLUSIVE MODE', v_name);
+    EXECUTE format('SELECT COUNT(*) FROM %I', v_name) INTO v_count;
+    IF v_count <> p_row_count THEN
+        RETURN false;
+    END IF;
+
+    INSERT INTO entry_log_archives (month, storage_path, row_count)
+    VALUES (date_trunc('month', p_month)::date, p_storage_path, p_row_count)
+    ON CONFLICT (month) DO UPDATE
+    SET storage_path = EXCLUDED.storage_path, row_count = EXCLUDED.row_count, archived_at = NOW();
+
+    EXECUTE format('ALTER TABLE entry_logs DETACH PARTITION %I', v_name);
+    EXECUTE format('DROP TABLE %I', v_name);
+    RETURN true;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public, pg_temp;
+
+-- 当月から3か月先までのパーティション
+SELECT ensure_entry_log_partition((date_trunc('month', NOW()) + make_interval(months => n))::date)
+FROM generate_series(0, 3) AS n;
@@ -104,4 +104,24 @@ def sample_event() -> Dict[str, Any]:
         "location": "里山ドッグラン",
         "max_participants": 20,
         "created_by": "test-admin-id"
-    }
\ No newline at end of file
+    }
+
+@pytest.fixture
+def fake_supabase():
+    """スキーマ定義を読み込んだスタンドインDBをアプリのSupabaseクライアントとして差し込む"""
+    from benchmarks.fake_supabase import FakeSupabaseClient, install
+    from app.core.supabase import set_supabase_client
+    from app.services.timeline_service import TimelineService
+    from app.services.user_card_service import UserCardService
+    from app.services.vaccination_eligibility_service import VaccinationEligibilityService
+
+    client = FakeSupabaseClient()
+    install(client)
+    TimelineService.set_store(None)
+    VaccinationEligibilityService.set_cache(None)
+    UserCardService.set_cache(None)
+    yield client
+    set_supabase_client(None)
+    TimelineService.set_store(None)
+    VaccinationEligibilityService.set_cache(None)
+    UserCardService.set_cache(None)
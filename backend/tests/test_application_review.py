@@ -0,0 +1,94 @@
+import uuid
+import pytest
+from app.core.jobs import job_queue
+from app.schemas.application import ApplicationStatus
+from app.services.application_service import IN_CHUNK_SIZE, ApplicationService
+
+
+@pytest.fixture
+def applications(fake_supabase):
+    admin = fake_supabase.db.seed("admin_users", [
+        {"auth_id": str(uuid.uuid4()), "email": "admin@example.com", "name": "管理者", "role": "admin"}
+    ])[0]
+    rows = fake_supabase.db.seed("applications", [
+        {"email": f"{i}@example.com", "name": f"申請者{i}", "phone": "090-0000-0000", "address": "今治市",
+         "is_imabari_resident": True, "status": "approved" if i == 3 else "pending"}
+        for i in range(4)
+    ])
+    return {"admin_id": admin["id"], "ids": [row["id"] for row in rows]}
+
+
+@pytest.mark.asyncio
+async def test_bulk_approve_reports_per_item_and_provisions_in_background(fake_supabase, applications):
+    """1回の条件付き更新で承認し、アカウント作成はジョブで行うこと"""
+    missing = str(uuid.uuid4())
+    ids = applications["ids"] + [missing]
+    fake_supabase.db.stats.reset()
+
+    report = await ApplicationService.bulk_review_applications(ids, ApplicationStatus.APPROVED, applications["admin_id"])
+
+    # 更新1回 + 更新されなかった申請の確認1回
+    assert fake_supabase.db.stats.by_table["applications"] == 2
+    assert report["updated"] == 3
+    assert [r["result"] for r in report["results"]] == ["approved"] * 3 + ["already_processed", "not_found"]
+
+    await job_queue.drain()
+    users = fake_supabase.db.rows["users"]
+    assert sorted(u["email"] for u in users) == ["0@example.com", "1@example.com", "2@example.com"]
+    assert all(u["status"] == "active" for u in users)
+    assert len(fake_supabase.auth.users) == 3
+
+    # 再実行しても承認済みとして扱われ、アカウントは増えない
+    again = await ApplicationService.bulk_review_applications(ids[:3], ApplicationStatus.APPROVED, applications["admin_id"])
+    await job_queue.drain()
+    assert again["updated"] == 0
+    assert len(fake_supabase.db.rows["users"]) == 3
+
+
+@pytest.mark.asyncio
+async def test_bulk_reject_requires_reason(fake_supabase, applications):
+    """却下理由なしの一括却下は400になること"""
+    with pytest.raises(Exception) as exc:
+        await ApplicationService.bulk_review_applications(
+            applications["ids"], ApplicationStatus.REJECTED, applications["admin_id"]
+        )
+    assert exc.value.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_bulk_review_chunks_in_filters(fake_supabase, applications):
+    """IDが多いときは IN_CHUNK_SIZE 件ずつに分けて更新すること"""
+    ids = applications["ids"] + [str(uuid.uuid4()) for _ in range(IN_CHUNK_SIZE)]
+    fake_supabase.db.stats.reset()
+
+    report = await ApplicationService.bulk_review_applications(
+        ids, ApplicationStatus.REJECTED, applications["admin_id"], rejected_reason="書類不備"
+    )
+    await job_queue.drain()
+
+    # 更新2回 + 更新されなかった申請の確認2回
+    assert fake_supabase.db.stats.by_table["applications"] == 4
+    assert report["updated"] == 3
+    assert [r["result"] for r in report["results"]].count("not_found") == IN_CHUNK_SIZE
+
+
+@pytest.mark.asyncio
+async def test_rejection_email_job_is_retried(fake_supabase, applications, monkeypatch):
+    """却下メールの送信に失敗したジョブは再試行され、送信後に完了になること"""
+    sent = []
+
+    async def flaky_send(to_email, subject, body):
+        sent.append(to_email)
+        return len(sent) > 1
+
+    monkeypatch.setattr("app.services.notification_service.NotificationService._send_email", flaky_send)
+    monkeypatch.setattr(job_queue, "retry_delay", 0)
+
+    await ApplicationService.bulk_review_applications(
+        applications["ids"][:1], ApplicationStatus.REJECTED, applications["admin_id"], rejected_reason="書類不備"
+    )
+    await job_queue.drain()
+
+    assert sent == ["0@example.com", "0@example.com"]
+    job = fake_supabase.db.find("provisioning_jobs", application_id=applications["ids"][0])
+    assert (job["kind"], job["status"], job["attempts"]) == ("rejection", "done", 2)
@@ -0,0 +1,52 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from app.services.auto_checkout_service import AutoCheckoutService
+
+JST = timezone(timedelta(hours=9))
+
+
+@pytest.fixture
+def entries(fake_supabase):
+    """17:00閉園（4/30は特別休業日）、前日の退場漏れ・当日の入場・閉園後の入場・退場済み"""
+    fake_supabase.db.seed("business_hours", [
+        {"day_of_week": day, "open_time": "09:00", "close_time": "17:00"} for day in range(7)
+    ])
+    fake_supabase.db.seed("special_holidays", [{"holiday_date": "2024-04-30", "reason": "点検"}])
+    user = fake_supabase.db.seed("users", [{"auth_id": "auth-1", "email": "a@example.com", "name": "飼い主"}])[0]
+    dog = fake_supabase.db.seed("dogs", [{"user_id": user["id"], "name": "ポチ"}])[0]
+
+    def log(entry_time, exit_time=None):
+        return {"user_id": user["id"], "dog_id": dog["id"], "entry_time": entry_time.isoformat(),
+                "exit_time": exit_time.isoformat() if exit_time else None}
+
+    return fake_supabase.db.seed("entry_logs", [
+        log(datetime(2024, 4, 30, 10, tzinfo=JST)),
+        log(datetime(2024, 5, 1, 10, tzinfo=JST)),
+        log(datetime(2024, 5, 1, 17, 10, tzinfo=JST)),
+        log(datetime(2024, 5, 1, 11, tzinfo=JST), datetime(2024, 5, 1, 12, tzinfo=JST)),
+    ])
+
+
+def _exit_times(fake_supabase):
+    return [
+        (row["exit_time"] and datetime.fromisoformat(row["exit_time"]), row.get("exit_reason"))
+        for row in sorted(fake_supabase.db.rows["entry_logs"], key=lambda r: r["entry_time"])
+    ]
+
+
+@pytest.mark.asyncio
+async def test_open_entries_are_closed_after_closing_time(fake_supabase, entries):
+    """閉園＋猶予を過ぎた日の入場記録だけを閉園時刻でまとめて退場させ、再実行しても変わらないこと"""
+    before_closing = await AutoCheckoutService.run(datetime(2024, 5, 1, 17, 20, tzinfo=JST))
+    assert before_closing == {"open": 3, "closed": 1, "waiting_days": 1}
+
+    now = datetime(2024, 5, 1, 18, tzinfo=JST)
+    assert await AutoCheckoutService.run(now) == {"open": 2, "closed": 2, "waiting_days": 0}
+    assert await AutoCheckoutService.run(now) == {"open": 0, "closed": 0, "waiting_days": 0}
+
+    assert _exit_times(fake_supabase) == [
+        (datetime(2024, 5, 1, 0, tzinfo=JST), "auto_closed"),  # 休業日は日の終わり
+        (datetime(2024, 5, 1, 17, tzinfo=JST), "auto_closed"),
+        (datetime(2024, 5, 1, 12, tzinfo=JST), None),
+        (now, "auto_closed"),  # 閉園後の入場は実行時刻
+    ]
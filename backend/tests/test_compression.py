@@ -0,0 +1,62 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.core.compression import CompressionMiddleware
+from app.core.etag import ETagMiddleware
+
+items = [{"id": i, "name": f"投稿{i}"} for i in range(200)]
+
+app = FastAPI()
+app.add_middleware(ETagMiddleware, paths=["/items"])
+app.add_middleware(CompressionMiddleware, minimum_size=500)
+
+
+@app.get("/items")
+async def list_items():
+    return {"items": items}
+
+
+@app.get("/small")
+async def small():
+    return {"status": "ok"}
+
+
+client = TestClient(app)
+
+
+def test_large_json_is_gzipped_and_small_is_not():
+    """しきい値以上のJSONだけを圧縮すること"""
+    response = client.get("/items", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.json()["items"] == items
+
+    raw = client.get("/items", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in raw.headers
+    assert int(response.headers["content-length"]) < len(raw.content) // 3
+
+    small = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+
+
+def test_unchanged_list_returns_304():
+    """同じ内容なら If-None-Match で304を返し、内容が変われば新しいETagを返すこと"""
+    first = client.get("/items", headers={"Accept-Encoding": "gzip"})
+    etag = first.headers["etag"]
+    assert etag.endswith('-gzip"')
+    assert first.headers["cache-control"] == "private, no-cache"
+
+    cached = client.get("/items", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b"" and cached.headers["etag"] == etag
+
+    # 圧縮なしの表現のETagでも一致する
+    plain = client.get("/items", headers={"Accept-Encoding": "identity", "If-None-Match": etag})
+    assert plain.status_code == 304
+
+    items.append({"id": 999, "name": "新しい投稿"})
+    try:
+        changed = client.get("/items", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+        assert changed.status_code == 200 and changed.headers["etag"] != etag
+    finally:
+        items.pop()
+
@@ -0,0 +1,100 @@
+import pytest
+from fastapi import HTTPException
+from app.schemas.dog import DogUpdate
+from app.services.announcement_service import AnnouncementService
+from app.services.dog_service import DogService
+from app.services.entry_service import EntryService
+
+
+@pytest.fixture
+def owners(fake_supabase):
+    """2人の飼い主とそれぞれの犬"""
+    users = fake_supabase.db.seed("users", [
+        {"auth_id": f"auth-{i}", "email": f"{i}@example.com", "name": f"飼い主{i}"} for i in range(2)
+    ])
+    dogs = fake_supabase.db.seed("dogs", [
+        {"user_id": user["id"], "name": name, "is_active": True}
+        for user, name in ((users[0], "ポチ"), (users[0], "タロ"), (users[1], "ハナ"))
+    ])
+    return {"user_ids": [u["id"] for u in users], "dog_ids": [d["id"] for d in dogs]}
+
+
+@pytest.mark.asyncio
+async def test_update_dog_is_one_round_trip_scoped_to_owner(fake_supabase, owners):
+    """所有者の犬は1往復で更新され、他人の犬は403で変更されないこと"""
+    fake_supabase.db.stats.reset()
+    updated = await DogService.update_dog(owners["dog_ids"][0], DogUpdate(name="ポチ丸"), owners["user_ids"][0])
+    assert updated["name"] == "ポチ丸"
+    assert fake_supabase.db.stats.total == 1
+
+    with pytest.raises(HTTPException) as exc:
+        await DogService.delete_dog(owners["dog_ids"][2], owners["user_ids"][0])
+    assert exc.value.status_code == 403
+    assert fake_supabase.db.find("dogs", id=owners["dog_ids"][2])["is_active"] is True
+
+
+@pytest.mark.asyncio
+async def test_missing_dog_is_404_not_403(fake_supabase, owners):
+    """存在しない犬の更新・削除・QRコード生成は、一致しなかったときの1回の確認で404になること"""
+    missing = "00000000-0000-0000-0000-000000000000"
+    fake_supabase.db.stats.reset()
+    with pytest.raises(HTTPException) as exc:
+        await DogService.update_dog(missing, DogUpdate(name="ポチ丸"), owners["user_ids"][0])
+    assert (exc.value.status_code, exc.value.detail) == (404, "犬情報が見つかりません")
+    assert fake_supabase.db.stats.total == 2
+
+    with pytest.raises(HTTPException) as exc:
+        await DogService.delete_dog(missing, owners["user_ids"][0])
+    assert exc.value.status_code == 404
+
+    with pytest.raises(HTTPException) as exc:
+        await EntryService.generate_qr_code(owners["user_ids"][0], [owners["dog_ids"][0], missing])
+    assert exc.value.status_code == 404 and missing in exc.value.detail
+
+
+@pytest.mark.asyncio
+async def test_qr_code_checks_all_dogs_in_one_query(fake_supabase, owners):
+    """QRコード生成時の所有権確認は犬の数によらず1クエリで、他人の犬があれば403になること"""
+    fake_supabase.db.stats.reset()
+    await EntryService.generate_qr_code(owners["user_ids"][0], owners["dog_ids"][:2])
+    assert fake_supabase.db.stats.by_table["dogs"] == 1
+
+    with pytest.raises(HTTPException) as exc:
+        await EntryService.generate_qr_code(owners["user_ids"][0], owners["dog_ids"])
+    assert exc.value.status_code == 403
+    assert owners["dog_ids"][2] in exc.value.detail and owners["dog_ids"][0] not in exc.value.detail
+
+
+@pytest.mark.asyncio
+async def test_missing_rows_map_to_404(fake_supabase):
+    """存在しないお知らせ・特別休業日の更新・削除は404になること"""
+    with pytest.raises(HTTPException) as exc:
+        await AnnouncementService.delete_announcement("00000000-0000-0000-0000-000000000000")
+    assert exc.value.status_code == 404
+
+    with pytest.raises(HTTPException) as exc:
+        await AnnouncementService.delete_special_holiday("00000000-0000-0000-0000-000000000000")
+    assert exc.value.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_check_out_only_closes_open_entries(fake_supabase, owners):
+    """退場は1回の条件付きUPDATEで行い、自動退場済みの記録は上書きしないこと"""
+    logs = fake_supabase.db.seed("entry_logs", [
+        {"user_id": owners["user_ids"][0], "dog_id": owners["dog_ids"][0], "entry_time": "2024-05-01T01:00:00+00:00"},
+        {"user_id": owners["user_ids"][0], "dog_id": owners["dog_ids"][1], "entry_time": "2024-05-01T01:00:00+00:00",
+         "exit_time": "2024-05-01T09:30:00+00:00", "exit_reason": "auto_closed"},
+    ])
+    ids = [log["id"] for log in logs]
+    fake_supabase.db.stats.reset()
+
+    result = await EntryService.check_out(ids, "admin-1")
+
+    assert fake_supabase.db.stats.total == 1
+    assert result["entry_log_ids"] == [ids[0]]
+    assert fake_supabase.db.find("entry_logs", id=ids[0])["exit_reason"] == "scanned"
+    assert fake_supabase.db.find("entry_logs", id=ids[1])["exit_time"] == "2024-05-01T09:30:00+00:00"
+
+    with pytest.raises(HTTPException) as exc:
+        await EntryService.check_out(ids, "admin-1")
+    assert exc.value.status_code == 404
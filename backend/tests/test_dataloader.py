@@ -0,0 +1,84 @@
+import asyncio
+import pytest
+from datetime import date, datetime, timedelta, timezone
+from app.core.dataloader import DataLoader
+from app.services.entry_service import EntryService
+from app.services.event_service import EventService
+
+
+@pytest.mark.asyncio
+async def test_loads_in_one_tick_are_batched_and_memoized():
+    """同じ周回の load は1回にまとめ、取得済みのキーは問い合わせ直さないこと"""
+    calls = []
+
+    async def batch(keys):
+        calls.append(sorted(keys))
+        return {key: key * 10 for key in keys if key != 3}
+
+    loader = DataLoader(batch, max_batch_size=2)
+    assert await asyncio.gather(loader.load(1), loader.load(2), loader.load(1)) == [10, 20, 10]
+    assert await loader.load_many([2, 3, 4]) == [20, None, 40]
+    assert calls == [[1, 2], [3, 4]]
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_is_not_cached():
+    """問い合わせに失敗したキーは次の load で問い合わせ直すこと"""
+    attempts = []
+
+    async def batch(keys):
+        attempts.append(keys)
+        if len(attempts) == 1:
+            raise RuntimeError("timeout")
+        return {key: "ok" for key in keys}
+
+    loader = DataLoader(batch)
+    with pytest.raises(RuntimeError):
+        await loader.load("a")
+    assert await loader.load("a") == "ok"
+
+
+@pytest.mark.asyncio
+async def test_event_list_makes_one_query(fake_supabase):
+    """イベント一覧は件数によらず1クエリで参加者数と自分の登録状態を返すこと"""
+    users = fake_supabase.db.seed("users", [
+        {"auth_id": f"auth-{i}", "email": f"{i}@example.com", "name": f"参加者{i}"} for i in range(3)
+    ])
+    event_date = (datetime.now(timezone.utc) + timedelta(days=7)).isoformat()
+    events = fake_supabase.db.seed("events", [
+        {"title": f"イベント{i}", "event_date": event_date, "max_participants": 2} for i in range(5)
+    ])
+    fake_supabase.db.seed("event_registrations", [
+        {"event_id": events[0]["id"], "user_id": users[0]["id"]},
+        {"event_id": events[0]["id"], "user_id": users[1]["id"]},
+        {"event_id": events[1]["id"], "user_id": users[0]["id"], "status": "cancelled"},
+    ])
+    fake_supabase.db.stats.reset()
+
+    result = await EventService.get_events(current_user_id=users[0]["id"])
+
+    assert fake_supabase.db.stats.total == 1
+    by_id = {event["id"]: event for event in result["items"]}
+    assert by_id[events[0]["id"]]["registration_count"] == 2
+    assert by_id[events[0]["id"]]["is_registered"] and not by_id[events[0]["id"]]["can_register"]
+    assert by_id[events[1]["id"]]["registration_count"] == 0 and not by_id[events[1]["id"]]["is_registered"]
+    assert "registered" not in by_id[events[0]["id"]] and "mine" not in by_id[events[0]["id"]]
+
+
+@pytest.mark.asyncio
+async def test_export_looks_up_each_user_and_dog_once(fake_supabase):
+    """CSVエクスポートは記録ごとに結合せず、利用者・犬をIDごとに1回だけ引くこと"""
+    user = fake_supabase.db.seed("users", [{"auth_id": "auth-1", "email": "a@example.com", "name": "飼い主"}])[0]
+    dog = fake_supabase.db.seed("dogs", [{"user_id": user["id"], "name": "ポチ", "breed": "柴犬"}])[0]
+    today = date.today()
+    fake_supabase.db.seed("entry_logs", [
+        {"user_id": user["id"], "dog_id": dog["id"],
+         "entry_time": datetime.combine(today, datetime.min.time(), timezone.utc).replace(hour=h).isoformat()}
+        for h in range(5)
+    ])
+    fake_supabase.db.stats.reset()
+
+    csv_text = await EntryService.export_entry_history(today, today)
+
+    assert csv_text.count("ポチ") == 5 and csv_text.count("柴犬") == 5
+    assert fake_supabase.db.stats.by_table["users"] == 1 and fake_supabase.db.stats.by_table["dogs"] == 1
@@ -0,0 +1,61 @@
+import pytest
+from collections import OrderedDict
+from datetime import date
+from app.services import entry_archive_service
+from app.services.entry_archive_service import EntryArchiveService
+from app.services.entry_service import EntryService
+
+pytest.importorskip("pyarrow")
+
+
+@pytest.fixture
+def entries(fake_supabase, monkeypatch):
+    """2024年1月・2月（アーカイブ対象）と2025年6月（保持期間内）の入場記録"""
+    monkeypatch.setattr(entry_archive_service, "_archive_cache", OrderedDict())
+    user = fake_supabase.db.seed("users", [{"auth_id": "auth-1", "email": "a@example.com", "name": "飼い主"}])[0]
+    dog = fake_supabase.db.seed("dogs", [{"user_id": user["id"], "name": "ポチ", "breed": "柴犬"}])[0]
+
+    def log(entry_time, exit_time=None):
+        return {"user_id": user["id"], "dog_id": dog["id"], "entry_time": entry_time, "exit_time": exit_time}
+
+    return fake_supabase.db.seed("entry_logs", [
+        log("2024-01-10T01:00:00+00:00", "2024-01-10T02:30:00+00:00"),
+        log("2024-02-03T01:00:00+00:00", "2024-02-03T01:45:00+00:00"),
+        log("2025-06-01T01:00:00+00:00"),
+    ])
+
+
+@pytest.mark.asyncio
+async def test_old_months_are_archived_to_parquet(fake_supabase, entries):
+    result = await EntryArchiveService.archive(date(2025, 6, 15))
+
+    assert result["archived_months"] == 2
+    assert result["archived_rows"] == 2
+    assert ("archives", "entry_logs/2024/01.parquet") in fake_supabase.storage.objects
+    assert [row["entry_time"][:7] for row in fake_supabase.db.rows["entry_logs"]] == ["2025-06"]
+    assert [row["month"] for row in fake_supabase.db.rows["entry_log_archives"]] == ["2024-01-01", "2024-02-01"]
+
+    # 再実行しても何もしない
+    assert (await EntryArchiveService.archive(date(2025, 6, 15)))["archived_months"] == 0
+
+
+@pytest.mark.asyncio
+async def test_history_and_export_read_archived_months(fake_supabase, entries):
+    await EntryArchiveService.archive(date(2025, 6, 15))
+
+    # 期間の指定がなければアーカイブは読まない
+    fake_supabase.db.stats.reset()
+    recent = await EntryService.get_entry_history(limit=10)
+    assert [entry.entry_time.date().isoformat() for entry in recent] == ["2025-06-01"]
+    assert "entry_log_archives" not in fake_supabase.db.stats.by_table
+
+    history = await EntryService.get_entry_history(start_date=date(2024, 1, 1), limit=10)
+    assert [entry.entry_time.date().isoformat() for entry in history] == ["2025-06-01", "2024-02-03", "2024-01-10"]
+    assert history[1].dog_name == "ポチ"
+    assert history[1].stay_minutes == 45
+
+    january = await EntryService.get_entry_history(start_date=date(2024, 1, 1), end_date=date(2024, 1, 31))
+    assert [entry.stay_minutes for entry in january] == [90]
+
+    exported = await EntryService.export_entry_history(date(2024, 1, 1), date(2025, 12, 31))
+    assert len(exported.strip().splitlines()) == 4
@@ -0,0 +1,49 @@
+import pytest
+from benchmarks.fake_supabase import FakeSupabaseClient
+
+
+@pytest.fixture
+def fake():
+    """スキーマ定義を読み込んだスタンドインDB"""
+    client = FakeSupabaseClient()
+    user = client.db.seed("users", [{"auth_id": "auth-1", "email": "a@example.com", "name": "テスト"}])[0]
+    post = client.db.seed("posts", [{"user_id": user["id"], "content": "こんにちは", "status": "approved"}])[0]
+    client.db.seed("post_images", [{"post_id": post["id"], "image_url": "https://example.com/1.jpg"}])
+    return client
+
+
+def test_select_with_embedded_resources(fake):
+    """埋め込みリソース（多対一・一対多）を解決できること"""
+    result = fake.table("posts").select(
+        "*, users!inner(name, avatar_url), post_images(*)", count="exact"
+    ).eq("status", "approved").execute()
+
+    assert result.count == 1
+    post = result.data[0]
+    assert post["users"] == {"name": "テスト", "avatar_url": None}
+    assert len(post["post_images"]) == 1
+
+
+def test_unique_constraint_and_upsert(fake):
+    """UNIQUE制約違反とon_conflict指定のupsert"""
+    fake.table("hashtags").insert({"name": "柴犬"}).execute()
+
+    with pytest.raises(Exception):
+        fake.table("hashtags").insert({"name": "柴犬"}).execute()
+
+    result = fake.table("hashtags").upsert({"name": "柴犬"}, on_conflict="name").execute()
+    assert len(result.data) == 1
+    assert len(fake.db.rows["hashtags"]) == 1
+
+
+def test_filters_and_update(fake):
+    """is_ / or_ フィルタと更新"""
+    fake.db.seed("entry_logs", [{"entry_time": "2024-01-01T10:00:00+00:00"}])
+    open_logs = fake.table("entry_logs").select("id").is_("exit_time", None).execute()
+    assert len(open_logs.data) == 1
+
+    fake.table("entry_logs").update({"exit_time": "2024-01-01T12:00:00"}).is_("exit_time", None).execute()
+    assert fake.table("entry_logs").select("id").is_("exit_time", None).execute().data == []
+
+    found = fake.table("users").select("id").or_("name.ilike.%テス%,email.ilike.%zzz%").execute()
+    assert len(found.data) == 1
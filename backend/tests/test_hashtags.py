@@ -0,0 +1,81 @@
+import pytest
+from app.schemas.post import PostCreate, PostModerate, PostStatus
+from app.services.post_service import PostService
+
+
+@pytest.fixture
+def author(fake_supabase):
+    return fake_supabase.db.seed("users", [{"auth_id": "auth-1", "email": "a@example.com", "name": "テスト"}])[0]
+
+
+@pytest.mark.asyncio
+async def test_create_post_batches_hashtags(fake_supabase, author):
+    """ハッシュタグは1回のupsertと1回の複数行insertで登録すること"""
+    fake_supabase.db.seed("hashtags", [{"name": "柴犬"}])
+    fake_supabase.db.stats.reset()
+
+    post = await PostService.create_post(
+        PostCreate(content="散歩", hashtags=["#柴犬", "散歩", "散歩", " 夕焼け "]), author["id"]
+    )
+
+    assert fake_supabase.db.stats.by_table["hashtags"] == 1
+    assert fake_supabase.db.stats.by_table["post_hashtags"] == 1
+    assert sorted(tag["name"] for tag in post["hashtags"]) == ["夕焼け", "散歩", "柴犬"]
+    assert len(fake_supabase.db.rows["hashtags"]) == 3
+
+
+@pytest.mark.asyncio
+async def test_feed_filters_by_hashtag_and_trending(fake_supabase, author):
+    """ハッシュタグで絞り込めること、承認時にトレンドへ反映されること"""
+    tagged = await PostService.create_post(PostCreate(content="a", hashtags=["柴犬"]), author["id"])
+    await PostService.create_post(PostCreate(content="b", hashtags=["散歩"]), author["id"])
+    for post in fake_supabase.db.rows["posts"]:
+        await PostService.moderate_post(post["id"], PostModerate(status=PostStatus.APPROVED), "admin-1")
+
+    feed = await PostService.get_feed(hashtag="#柴犬")
+    assert [post["id"] for post in feed["items"]] == [tagged["id"]]
+    assert feed["total"] == 1
+    assert "tag_filter" not in feed["items"][0]
+
+    # 同じステータスへの再モデレートは二重計上しない
+    await PostService.moderate_post(tagged["id"], PostModerate(status=PostStatus.APPROVED), "admin-1")
+    trending = await PostService.get_trending_hashtags()
+    assert {tag["name"]: tag["post_count"] for tag in trending} == {"柴犬": 1, "散歩": 1}
+    assert all(0.99 < tag["score"] <= 1.0 for tag in trending)
+
+
+@pytest.mark.asyncio
+async def test_trend_score_counts_recent_posts_and_is_withdrawn(fake_supabase, author):
+    """スコアは直近の承認投稿数に近く順位もそれに従い、承認後の却下・削除で差し引かれること"""
+    busy = [
+        await PostService.create_post(PostCreate(content=f"p{i}", hashtags=["柴犬"]), author["id"])
+        for i in range(3)
+    ]
+    await PostService.create_post(PostCreate(content="q", hashtags=["散歩"]), author["id"])
+    post_ids = [post["id"] for post in fake_supabase.db.rows["posts"]]
+    await PostService.bulk_moderate_posts(post_ids, PostStatus.APPROVED, "admin-1")
+
+    trending = await PostService.get_trending_hashtags()
+    assert [tag["name"] for tag in trending] == ["柴犬", "散歩"]
+    assert 2.99 < trending[0]["score"] <= 3.0 and 0.99 < trending[1]["score"] <= 1.0
+
+    await PostService.moderate_post(busy[0]["id"], PostModerate(status=PostStatus.REJECTED), "admin-1")
+    fake_supabase.table("posts").delete().eq("id", busy[1]["id"]).execute()
+
+    by_name = {tag["name"]: tag for tag in await PostService.get_trending_hashtags()}
+    assert by_name["柴犬"]["post_count"] == 1
+    assert 0.99 < by_name["柴犬"]["score"] <= 1.0
+
+
+@pytest.mark.asyncio
+async def test_trending_skips_tags_without_score(fake_supabase, author):
+    """スコアのないタグ（承認前・取り消し済み）が上位件数を埋めないこと"""
+    for i in range(3):
+        await PostService.create_post(PostCreate(content=f"p{i}", hashtags=[f"未承認{i}"]), author["id"])
+    approved = await PostService.create_post(PostCreate(content="q", hashtags=["柴犬"]), author["id"])
+    await PostService.moderate_post(approved["id"], PostModerate(status=PostStatus.APPROVED), "admin-1")
+
+    trending = await PostService.get_trending_hashtags(limit=2)
+
+    assert [tag["name"] for tag in trending] == ["柴犬"]
+    assert fake_supabase.db.find("posts", id=approved["id"])["approved_at"] is not None
@@ -0,0 +1,96 @@
+import asyncio
+import uuid
+import pytest
+from pydantic import ValidationError
+from app.core.realtime import RealtimeHub, realtime_hub
+from app.schemas.post import PostBulkModerate, PostStatus
+from app.services.post_service import IN_CHUNK_SIZE, PostService, MODERATION_CHANNEL
+
+
+@pytest.fixture
+def pending_posts(fake_supabase):
+    """承認待ち3件と承認済み1件"""
+    user = fake_supabase.db.seed("users", [{"auth_id": "auth-1", "email": "a@example.com", "name": "テスト"}])[0]
+    posts = fake_supabase.db.seed("posts", [
+        {"user_id": user["id"], "content": f"投稿{i}", "status": "pending",
+         "created_at": f"2024-01-0{i + 1}T10:00:00+00:00"}
+        for i in range(3)
+    ] + [{"user_id": user["id"], "content": "承認済み", "status": "approved"}])
+    return [post["id"] for post in posts]
+
+
+@pytest.mark.asyncio
+async def test_moderation_queue_is_single_query(fake_supabase, pending_posts):
+    """承認待ち投稿のみを古い順に1クエリで取得すること（投稿者名は利用者カードから付ける）"""
+    fake_supabase.db.stats.reset()
+    queue = await PostService.get_moderation_queue(limit=20, offset=0)
+
+    assert fake_supabase.db.stats.by_table["posts"] == 1
+    assert fake_supabase.db.stats.by_table["users"] == 1
+    assert queue["total"] == 3
+    assert [post["id"] for post in queue["items"]] == pending_posts[:3]
+    assert queue["items"][0]["user_name"] == "テスト"
+
+    # 利用者カードが温まっていれば投稿の1クエリだけ
+    fake_supabase.db.stats.reset()
+    await PostService.get_moderation_queue(limit=20, offset=0)
+    assert fake_supabase.db.stats.total == 1
+
+
+@pytest.mark.asyncio
+async def test_bulk_moderate_updates_once_and_pushes_diff(fake_supabase, pending_posts):
+    """一括モデレートは1回のUPDATEで反映し、差分をキュー購読者へ配信すること"""
+    async with realtime_hub.subscribe(MODERATION_CHANNEL) as queue:
+        fake_supabase.db.stats.reset()
+        result = await PostService.bulk_moderate_posts(
+            pending_posts[:2] + [pending_posts[3]], PostStatus.APPROVED, "admin-1"
+        )
+
+        assert fake_supabase.db.stats.by_table["posts"] == 1
+        assert result["updated_ids"] == pending_posts[:2]
+        assert result["skipped_ids"] == [pending_posts[3]]
+
+        message = queue.get_nowait()
+        assert message["event"] == "posts_moderated"
+        assert message["data"]["post_ids"] == pending_posts[:2]
+
+    remaining = await PostService.get_moderation_queue()
+    assert [post["id"] for post in remaining["items"]] == [pending_posts[2]]
+
+
+@pytest.mark.asyncio
+async def test_bulk_moderate_chunks_in_filters(fake_supabase, pending_posts):
+    """IDが多いときは IN_CHUNK_SIZE 件ずつに分けて更新すること"""
+    post_ids = pending_posts + [str(uuid.uuid4()) for _ in range(IN_CHUNK_SIZE)]
+    fake_supabase.db.stats.reset()
+
+    result = await PostService.bulk_moderate_posts(post_ids, PostStatus.REJECTED, "admin-1")
+
+    assert fake_supabase.db.stats.by_table["posts"] == 2
+    assert result["updated_ids"] == pending_posts[:3]
+    assert len(result["skipped_ids"]) == IN_CHUNK_SIZE + 1
+
+
+def test_bulk_moderate_accepts_only_approve_or_reject():
+    """一括モデレートで承認待ちには戻せないこと"""
+    with pytest.raises(ValidationError):
+        PostBulkModerate(post_ids=["p1"], status="pending")
+    assert PostBulkModerate(post_ids=["p1"], status="rejected").status == PostStatus.REJECTED
+
+
+@pytest.mark.asyncio
+async def test_realtime_hub_fans_out_across_instances_through_redis():
+    """Redisを共有するハブ同士では、別インスタンスの broadcast も購読者に届くこと"""
+    fakeredis = pytest.importorskip("fakeredis")
+    server = fakeredis.FakeServer()
+    instance_a = RealtimeHub(redis=fakeredis.FakeRedis(server=server, decode_responses=True), poll_timeout=0.05)
+    instance_b = RealtimeHub(redis=fakeredis.FakeRedis(server=server, decode_responses=True), poll_timeout=0.05)
+
+    async with instance_a.subscribe(MODERATION_CHANNEL) as queue:
+        await instance_b.broadcast(MODERATION_CHANNEL, "posts_moderated", {"post_ids": ["p1"], "status": "approved"})
+        message = await asyncio.wait_for(queue.get(), timeout=2)
+
+    assert message == {"event": "posts_moderated", "data": {"post_ids": ["p1"], "status": "approved"}}
+    # 購読者がいなくなると受信タスクも終わる
+    await asyncio.sleep(0.2)
+    assert not instance_a._listeners
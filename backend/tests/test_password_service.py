@@ -0,0 +1,49 @@
+import hashlib
+import pytest
+from app.core.config import settings
+from app.services import password_service
+from app.services.password_service import PasswordService
+
+
+@pytest.fixture
+def pbkdf2(monkeypatch):
+    """PBKDF2（テストでは反復回数を少なくする）"""
+    monkeypatch.setattr(settings, "PASSWORD_HASH_SCHEME", "pbkdf2_sha256")
+    monkeypatch.setattr(settings, "PASSWORD_PBKDF2_ITERATIONS", 1000)
+
+
+@pytest.mark.asyncio
+async def test_legacy_hash_is_verified_and_rehashed_on_login(pbkdf2):
+    """以前の helpers.hash_password の形式も検証でき、一致したときだけ現在の形式で再ハッシュすること"""
+    salt = "0123456789abcdef"
+    legacy = hashlib.pbkdf2_hmac("sha256", b"secret-pass", salt.encode(), 100000).hex() + ":" + salt
+
+    assert await PasswordService.verify_and_update("wrong-pass", legacy) == (False, None)
+    ok, rehashed = await PasswordService.verify_and_update("secret-pass", legacy)
+    assert ok and rehashed.startswith("pbkdf2_sha256$1000$")
+    assert await PasswordService.verify_and_update("secret-pass", rehashed) == (True, None)
+
+
+@pytest.mark.asyncio
+async def test_changed_cost_triggers_rehash(pbkdf2, monkeypatch):
+    """反復回数を変えると、次の検証で新しいパラメータのハッシュを返すこと"""
+    hashed = await PasswordService.hash("secret-pass")
+    monkeypatch.setattr(settings, "PASSWORD_PBKDF2_ITERATIONS", 2000)
+
+    ok, rehashed = await PasswordService.verify_and_update("secret-pass", hashed)
+    assert ok and rehashed.startswith("pbkdf2_sha256$2000$")
+
+
+@pytest.mark.asyncio
+async def test_argon2id_is_used_when_available(monkeypatch):
+    """argon2-cffi があれば argon2id でハッシュし、PBKDF2のハッシュは再ハッシュの対象になること"""
+    if password_service.PasswordHasher is None:
+        pytest.skip("argon2-cffi がインストールされていません")
+    monkeypatch.setattr(settings, "PASSWORD_ARGON2_MEMORY_KIB", 1024)
+    monkeypatch.setattr(settings, "PASSWORD_ARGON2_TIME_COST", 1)
+
+    hashed = await PasswordService.hash("secret-pass")
+    assert hashed.startswith("$argon2id$") and await PasswordService.verify("secret-pass", hashed)
+    assert not PasswordService.needs_rehash(hashed)
+    monkeypatch.setattr(settings, "PASSWORD_ARGON2_TIME_COST", 2)
+    assert PasswordService.needs_rehash(hashed)
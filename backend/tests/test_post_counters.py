@@ -0,0 +1,44 @@
+import pytest
+from app.schemas.post import CommentCreate
+from app.services.post_service import PostService
+
+
+@pytest.fixture
+def post(fake_supabase):
+    users = fake_supabase.db.seed("users", [
+        {"auth_id": f"auth-{i}", "email": f"{i}@example.com", "name": f"利用者{i}"} for i in range(3)
+    ])
+    post = fake_supabase.db.seed("posts", [{"user_id": users[0]["id"], "content": "こんにちは", "status": "approved"}])[0]
+    return {"id": post["id"], "user_ids": [u["id"] for u in users]}
+
+
+@pytest.mark.asyncio
+async def test_toggle_like_is_one_round_trip(fake_supabase, post):
+    """いいねの切り替えは1往復で、切り替え後のいいね数を返すこと"""
+    first, second = post["user_ids"][1], post["user_ids"][2]
+    fake_supabase.db.stats.reset()
+
+    assert await PostService.toggle_like(post["id"], first) == {"liked": True, "like_count": 1}
+    assert fake_supabase.db.stats.total == 1
+    assert await PostService.toggle_like(post["id"], second) == {"liked": True, "like_count": 2}
+    assert await PostService.toggle_like(post["id"], first) == {"liked": False, "like_count": 1}
+
+
+@pytest.mark.asyncio
+async def test_feed_and_detail_read_stored_counters(fake_supabase, post):
+    """フィード・詳細はカウンタカラムを読み、件数クエリを発行しないこと"""
+    viewer = post["user_ids"][1]
+    await PostService.toggle_like(post["id"], viewer)
+    await PostService.add_comment(post["id"], CommentCreate(content="かわいい"), viewer)
+
+    fake_supabase.db.stats.reset()
+    feed = await PostService.get_feed(current_user_id=viewer)
+    detail = await PostService.get_post(post["id"], post["user_ids"][2])
+
+    # フィードはタイムライン構築・いいね状態・投稿者カードの3クエリ、詳細は1クエリ（カードは取得済み）
+    assert fake_supabase.db.stats.total == 4
+    assert fake_supabase.db.stats.by_table["users"] == 1
+    assert fake_supabase.db.stats.by_table["comments"] == 0
+    item = feed["items"][0]
+    assert (item["like_count"], item["comment_count"], item["is_liked"]) == (1, 1, True)
+    assert (detail["like_count"], detail["comment_count"], detail["is_liked"]) == (1, 1, False)
@@ -0,0 +1,173 @@
+import json
+import uuid
+import pytest
+from httpx import AsyncClient
+from app.core.jobs import job_queue
+from app.main import app
+from app.schemas.application import ApplicationStatus
+from app.services.application_service import ApplicationService
+from app.services.provisioning_service import ProvisioningService
+
+
+@pytest.fixture
+def application(fake_supabase):
+    row = fake_supabase.db.seed("applications", [
+        {"email": "new@example.com", "name": "申請者", "phone": "090-0000-0000", "address": "今治市",
+         "is_imabari_resident": True, "status": "pending"}
+    ])[0]
+    fake_supabase.db.seed("application_dogs", [
+        {"application_id": row["id"], "name": name, "breed": "柴犬"} for name in ("ポチ", "タロ")
+    ])
+    return row
+
+
+@pytest.mark.asyncio
+async def test_approval_provisions_user_and_dogs_once(fake_supabase, application):
+    """承認はすぐ返り、ジョブでユーザーと犬が1回だけ作成されること"""
+    approved = await ApplicationService.approve_application(application["id"], None)
+    assert approved["status"] == "approved"
+    await job_queue.drain()
+
+    job = fake_supabase.db.rows["provisioning_jobs"][0]
+    assert (job["status"], job["attempts"]) == ("done", 1)
+    user = fake_supabase.db.find("users", email="new@example.com")
+    assert user["status"] == "active" and user["auth_id"] == job["auth_id"]
+    assert sorted(d["name"] for d in fake_supabase.db.rows["dogs"]) == ["タロ", "ポチ"]
+
+    # 同じ申請のジョブ登録・再実行では何も作らない
+    assert await ProvisioningService.enqueue_jobs([application["id"]]) == []
+    assert await ProvisioningService.process(job["id"]) == "skipped"
+    assert len(fake_supabase.db.rows["users"]) == 1
+    assert len(fake_supabase.db.rows["dogs"]) == 2
+    assert len(fake_supabase.auth.users) == 1
+
+
+@pytest.mark.asyncio
+async def test_approval_job_is_registered_with_the_update(fake_supabase, application, monkeypatch):
+    """ワーカーに渡せなくても承認と同時にジョブが登録され、定期ジョブでアカウント作成と承認メールが行われること"""
+    sent = []
+
+    async def send(to_email, subject, body):
+        sent.append(to_email)
+        return True
+
+    monkeypatch.setattr("app.services.notification_service.NotificationService._send_email", send)
+    monkeypatch.setattr(job_queue, "enqueue", lambda name, payload: None)
+
+    await ApplicationService.approve_application(application["id"], None)
+    job = fake_supabase.db.rows["provisioning_jobs"][0]
+    assert (job["application_id"], job["kind"], job["status"]) == (application["id"], "approval", "pending")
+
+    assert (await ProvisioningService.sweep())["done"] == 1
+    assert job["status"] == "done" and job["completed_at"] is not None
+    assert fake_supabase.db.find("users", email="new@example.com") is not None
+    assert sent == ["new@example.com"]
+
+
+@pytest.mark.asyncio
+async def test_reject_is_conditional_and_sends_email_from_job(fake_supabase, application, monkeypatch):
+    """却下は承認待ちの申請だけを更新し、却下メールはジョブで送られること"""
+    sent = []
+
+    async def send(to_email, subject, body):
+        sent.append((to_email, "書類不備" in body))
+        return True
+
+    monkeypatch.setattr("app.services.notification_service.NotificationService._send_email", send)
+
+    rejected = await ApplicationService.reject_application(application["id"], None, "書類不備")
+    assert rejected["status"] == "rejected"
+    await job_queue.drain()
+
+    job = fake_supabase.db.rows["provisioning_jobs"][0]
+    assert (job["kind"], job["status"]) == ("rejection", "done")
+    assert sent == [("new@example.com", True)]
+    assert fake_supabase.db.rows["users"] == []
+
+    with pytest.raises(Exception) as exc:
+        await ApplicationService.reject_application(application["id"], None, "書類不備")
+    assert exc.value.status_code == 400
+    with pytest.raises(Exception) as exc:
+        await ApplicationService.reject_application(str(uuid.uuid4()), None, "書類不備")
+    assert exc.value.status_code == 404
+    assert len(fake_supabase.db.rows["provisioning_jobs"]) == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_job_is_resumed_by_sweep_without_duplicate_auth_user(fake_supabase, application, monkeypatch):
+    """Auth作成後に失敗したジョブは、定期ジョブで同じAuthユーザーを使って完了すること"""
+    fake_supabase.db.seed("provisioning_jobs", [{"application_id": application["id"]}])
+    fake_supabase.db.rows["applications"][0]["status"] = "approved"
+    fail = {"rpc": True}
+    original = fake_supabase.db.rpcs["provision_account"]
+
+    def flaky(db, params):
+        if fail["rpc"]:
+            raise RuntimeError("connection reset")
+        return original(db, params)
+
+    monkeypatch.setitem(fake_supabase.db.rpcs, "provision_account", flaky)
+
+    assert await ProvisioningService.sweep() == {"found": 1, "done": 0, "skipped": 0, "failed": 1}
+    job = fake_supabase.db.rows["provisioning_jobs"][0]
+    assert job["status"] == "failed" and "connection reset" in job["last_error"]
+    assert fake_supabase.db.rows["users"] == []
+
+    fail["rpc"] = False
+    assert await ProvisioningService.sweep() == {"found": 1, "done": 1, "skipped": 0, "failed": 0}
+    assert job["attempts"] == 2
+    assert len(fake_supabase.auth.users) == 1
+    assert fake_supabase.db.find("users", email="new@example.com")["auth_id"] == job["auth_id"]
+
+
+@pytest.mark.asyncio
+async def test_sweep_runs_jobs_concurrently(fake_supabase):
+    """定期ジョブはDB・Authの往復を待つ間も他のジョブを進め、件数分の直列時間より早く終わること"""
+    import time
+    from benchmarks.fake_supabase import LatencyModel
+
+    applications = fake_supabase.db.seed("applications", [
+        {"email": f"user{i}@example.com", "name": f"申請者{i}", "phone": "090-0000-0000", "address": "今治市",
+         "is_imabari_resident": True, "status": "approved"}
+        for i in range(4)
+    ])
+    fake_supabase.db.seed("provisioning_jobs", [{"application_id": row["id"]} for row in applications])
+    fake_supabase.db.latency = LatencyModel(base_ms=20, jitter_ms=0, per_row_us=0)
+
+    started = time.perf_counter()
+    assert (await ProvisioningService.sweep())["done"] == 4
+    # 1件あたり7往復 × 20ms を4件直列に行うと約560ms
+    assert time.perf_counter() - started < 0.3
+
+
+@pytest.mark.asyncio
+async def test_submitted_dogs_are_provisioned_after_approval(fake_supabase):
+    """申請フォームから送った犬が application_dogs に保存され、承認後に dogs として作成されること"""
+    dogs = [
+        {"name": "ポチ", "breed": "柴犬", "gender": "male", "age": 3, "weight": 9.5, "neutered": True},
+        {"name": "ハナ", "breed": "トイプードル", "gender": "female", "age": 1, "weight": 3.2, "neutered": False},
+    ]
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.post("/api/v1/applications/", data={
+            "name": "申請者", "email": "form@example.com", "phone": "090-0000-0000",
+            "address": "今治市", "dogs": json.dumps(dogs, ensure_ascii=False),
+        })
+        invalid = await client.post("/api/v1/applications/", data={
+            "name": "申請者", "email": "bad@example.com", "phone": "090-0000-0000",
+            "address": "今治市", "dogs": json.dumps([{"breed": "柴犬"}]),
+        })
+
+    assert response.status_code == 201
+    application_id = response.json()["id"]
+    saved = fake_supabase.db.rows["application_dogs"]
+    assert [(d["application_id"], d["name"], d["gender"]) for d in saved] == [
+        (application_id, "ポチ", "male"), (application_id, "ハナ", "female")
+    ]
+    assert invalid.status_code == 400
+    assert fake_supabase.db.find("applications", email="bad@example.com") is None
+
+    await ApplicationService.approve_application(application_id, None)
+    await job_queue.drain()
+
+    user = fake_supabase.db.find("users", email="form@example.com")
+    assert sorted(d["name"] for d in fake_supabase.db.rows["dogs"] if d["user_id"] == user["id"]) == ["ハナ", "ポチ"]
@@ -0,0 +1,50 @@
+import importlib.util
+import os
+import pytest
+from benchmarks.fake_supabase import FakeQuery
+from benchmarks.query_plans import PlanDatabase, RecordingDatabase, SqlBuilder, check_plans, seq_scans
+
+
+def test_builds_postgrest_shaped_sql_with_count():
+    db = RecordingDatabase()
+    query = FakeQuery(db, "posts").select(
+        "id, users!inner(name), tag_filter:post_hashtags!inner(hashtags!inner(name))", count="exact"
+    ).eq("status", "approved").eq("tag_filter.hashtags.name", "柴犬").order("created_at", desc=True).range(0, 19)
+    query.execute()
+
+    select_sql, count_sql = SqlBuilder(db).build(db.recorded[0])
+    assert "JOIN LATERAL" in select_sql and "HAVING count(*) > 0" in select_sql
+    assert select_sql.endswith('ORDER BY posts_1."created_at" DESC LIMIT 20 OFFSET 0')
+    # 件数は !inner の埋め込みを EXISTS にして数える
+    assert count_sql.startswith("SELECT count(*) FROM public.posts")
+    assert count_sql.count("EXISTS") == 3 and "= '柴犬'" in count_sql
+
+
+def test_seq_scans_only_flags_selective_scans_of_large_tables():
+    plan = {"Node Type": "Hash Join", "Plans": [
+        {"Node Type": "Seq Scan", "Relation Name": "posts", "Filter": "(user_id = '...')", "Plan Rows": 10},
+        # ほぼ全行を読む走査（承認済み投稿の件数など）は対象外
+        {"Node Type": "Seq Scan", "Relation Name": "comments", "Filter": "(post_id IS NOT NULL)", "Plan Rows": 99000},
+        {"Node Type": "Seq Scan", "Relation Name": "users", "Plan Rows": 2000},
+        {"Node Type": "Seq Scan", "Relation Name": "business_hours", "Filter": "(day_of_week = 1)", "Plan Rows": 1},
+        {"Node Type": "Index Scan", "Relation Name": "likes"},
+    ]}
+    table_rows = {"posts": 50000, "comments": 100000, "users": 2000, "business_hours": 7, "likes": 200000}
+    assert seq_scans(plan, table_rows) == [("posts", 50000)]
+
+
+@pytest.mark.skipif(
+    not os.environ.get("QUERY_PLAN_DATABASE_URL") and importlib.util.find_spec("pgserver") is None,
+    reason="QUERY_PLAN_DATABASE_URL か pgserver が必要"
+)
+def test_hot_path_queries_use_indexes():
+    """フィード・入場・利用統計・利用者検索・イベント一覧の問い合わせが大きなテーブルを順次走査しないこと"""
+    with PlanDatabase(scale=float(os.environ.get("QUERY_PLAN_SCALE", "1"))) as database:
+        results = check_plans(database)
+
+    failures = [
+        f"{result.case}: cost {result.cost:.0f} / {result.max_cost:.0f} {result.seq_scans}\n{result.sql}"
+        for result in results if not result.ok
+    ]
+    assert {result.case for result in results} >= {"get_feed", "check_in", "search_users"}
+    assert failures == []
@@ -0,0 +1,107 @@
+import asyncio
+import httpx
+import pytest
+from fastapi import FastAPI
+from app.core.config import settings
+from app.core.rate_limit import ENDPOINT_RULES, MemoryRateLimiter, RateLimitMiddleware, RateLimitRule, RedisRateLimiter
+from app.core.singleflight import CoalesceMiddleware
+
+
+@pytest.fixture(params=["memory", "redis"])
+def limiter(request):
+    """メモリ版とRedis版の両方で確認する"""
+    if request.param == "memory":
+        return MemoryRateLimiter()
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")  # fakeredis でLuaスクリプトを実行するため
+    return RedisRateLimiter(fakeredis.FakeRedis(decode_responses=True))
+
+
+def test_token_bucket_allows_burst_then_rejects(limiter):
+    """バースト分までは通し、超えたら待ち時間を返すこと"""
+    rule = RateLimitRule("test", per_minute=60, capacity=3)
+    assert [limiter.allow("k", rule)[0] for _ in range(3)] == [True, True, True]
+    allowed, retry_after = limiter.allow("k", rule)
+    assert not allowed and 0 < retry_after <= 1.0
+    assert limiter.allow("other", rule)[0]
+
+
+def _client(app) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+@pytest.mark.asyncio
+async def test_middleware_limits_per_endpoint_and_ip(monkeypatch):
+    """ログインはIPごとに個別の上限を超えると429とRetry-Afterを返すこと"""
+    monkeypatch.setattr(settings, "RATE_LIMIT_TRUST_FORWARDED", True)
+    app = FastAPI()
+
+    @app.post("/api/v1/auth/login")
+    async def login():
+        return {"ok": True}
+
+    app.add_middleware(RateLimitMiddleware, limiter=MemoryRateLimiter())
+
+    async with _client(app) as client:
+        statuses = [
+            (await client.post("/api/v1/auth/login", headers={"X-Forwarded-For": "203.0.113.1"})).status_code
+            for _ in range(11)
+        ]
+        assert statuses == [200] * 10 + [429]
+        limited = await client.post("/api/v1/auth/login", headers={"X-Forwarded-For": "203.0.113.1"})
+        assert int(limited.headers["retry-after"]) >= 1
+        other = await client.post("/api/v1/auth/login", headers={"X-Forwarded-For": "203.0.113.2"})
+        assert other.status_code == 200
+
+
+
+def test_endpoint_rules_match_only_their_route():
+    """申請作成の制限は同じ前方一致の管理用エンドポイントには掛からないこと"""
+    create = next(rule for rule in ENDPOINT_RULES if rule.name == "application_create")
+    assert create.matches("POST", "/api/v1/applications/") and create.matches("POST", "/api/v1/applications")
+    assert not create.matches("POST", "/api/v1/applications/admin/bulk-review")
+
+
+@pytest.mark.asyncio
+async def test_forwarded_for_is_ignored_by_default():
+    """既定では X-Forwarded-For を変えても同じIPのバケットで数えること"""
+    app = FastAPI()
+
+    @app.post("/api/v1/auth/login")
+    async def login():
+        return {"ok": True}
+
+    app.add_middleware(RateLimitMiddleware, limiter=MemoryRateLimiter())
+
+    async with _client(app) as client:
+        statuses = [
+            (await client.post("/api/v1/auth/login", headers={"X-Forwarded-For": f"203.0.113.{i}"})).status_code
+            for i in range(11)
+        ]
+        assert statuses == [200] * 10 + [429]
+
+@pytest.mark.asyncio
+async def test_identical_anonymous_gets_share_one_execution():
+    """認証なしの同一GETは同時に来ても1回だけ処理され、認証付きはまとめないこと"""
+    app = FastAPI()
+    calls = {"count": 0}
+
+    @app.get("/api/v1/posts/feed")
+    async def feed(limit: int = 20, offset: int = 0):
+        calls["count"] += 1
+        await asyncio.sleep(0.05)
+        return {"limit": limit, "offset": offset, "call": calls["count"]}
+
+    app.add_middleware(CoalesceMiddleware, paths=["/api/v1/posts/feed"])
+
+    async with _client(app) as client:
+        responses = await asyncio.gather(*[
+            client.get("/api/v1/posts/feed", params={"offset": 0, "limit": 20}) for _ in range(5)
+        ])
+        assert calls["count"] == 1
+        assert {r.json()["call"] for r in responses} == {1}
+
+        await asyncio.gather(*[
+            client.get("/api/v1/posts/feed", headers={"Authorization": f"Bearer user-{i}"}) for i in range(3)
+        ])
+        assert calls["count"] == 4
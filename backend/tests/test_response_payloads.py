@@ -0,0 +1,88 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from app.schemas.event import EventRegistrationResponse
+from app.schemas.post import CommentCreate, CommentResponse, PostCreate, PostResponse
+from app.schemas.user import UserProfileResponse
+from app.services.event_service import EventService
+from app.services.post_service import PostService
+from app.services.timeline_service import TimelineService
+from app.services.user_service import UserService
+
+
+@pytest.mark.asyncio
+async def test_user_list_contains_only_response_fields(fake_supabase):
+    """ユーザー一覧はレスポンスの項目だけを返し、無効な犬は含めないこと"""
+    user = fake_supabase.db.seed("users", [{"auth_id": "auth-1", "email": "a@example.com", "name": "飼い主"}])[0]
+    fake_supabase.db.seed("dogs", [
+        {"user_id": user["id"], "name": "ポチ"},
+        {"user_id": user["id"], "name": "タロ", "is_active": False},
+    ])
+
+    result = await UserService.list_users()
+
+    item = result["items"][0]
+    assert set(item) == set(UserProfileResponse.model_fields)
+    assert [dog["name"] for dog in item["dogs"]] == ["ポチ"]
+    assert "application_dog_id" not in item["dogs"][0]
+
+
+@pytest.mark.asyncio
+async def test_post_does_not_duplicate_embedded_rows(fake_supabase, monkeypatch):
+    """投稿は平坦化した項目だけを返し、埋め込みの元データを二重に含めないこと"""
+    monkeypatch.setattr(TimelineService, "is_cacheable", staticmethod(lambda *args: False))
+    user = fake_supabase.db.seed("users", [{"auth_id": "auth-1", "email": "a@example.com", "name": "投稿者"}])[0]
+    post = fake_supabase.db.seed("posts", [{"user_id": user["id"], "content": "散歩", "status": "approved"}])[0]
+    fake_supabase.db.seed("post_images", [{"post_id": post["id"], "image_url": "https://example.com/1.jpg"}])
+
+    feed = await PostService.get_feed()
+
+    item = feed["items"][0]
+    assert set(item) == set(PostResponse.model_fields)
+    assert item["user_name"] == "投稿者" and len(item["images"]) == 1
+
+
+@pytest.mark.asyncio
+async def test_writes_return_composed_rows_without_rereading(fake_supabase):
+    """投稿・コメントのレスポンスは保存した行と投稿者から組み立て、読み直さないこと"""
+    user = fake_supabase.db.seed("users", [
+        {"auth_id": "auth-1", "email": "a@example.com", "name": "投稿者", "avatar_url": "https://example.com/a.png"}
+    ])[0]
+    fake_supabase.db.stats.reset()
+
+    post = await PostService.create_post(PostCreate(content="散歩", hashtags=["柴犬"]), user["id"], user)
+
+    assert set(post) == set(PostResponse.model_fields)
+    assert post["user_avatar"] == "https://example.com/a.png" and post["hashtags"][0]["name"] == "柴犬"
+    assert fake_supabase.db.stats.by_table["posts"] == 1 and fake_supabase.db.stats.by_table["users"] == 0
+
+    fake_supabase.db.find("posts", id=post["id"])["status"] = "approved"
+    fake_supabase.db.stats.reset()
+    comment = await PostService.add_comment(post["id"], CommentCreate(content="かわいい"), user["id"], user)
+
+    assert set(comment) == set(CommentResponse.model_fields)
+    assert comment["user_name"] == "投稿者"
+    assert fake_supabase.db.stats.by_table["comments"] == 1 and fake_supabase.db.stats.by_table["users"] == 0
+
+
+@pytest.mark.asyncio
+async def test_register_event_reads_state_in_one_query(fake_supabase):
+    """参加登録はイベントと登録状況を1クエリで確認し、キャンセル後は登録し直せること"""
+    user = fake_supabase.db.seed("users", [{"auth_id": "auth-1", "email": "a@example.com", "name": "参加者"}])[0]
+    event = fake_supabase.db.seed("events", [{
+        "title": "お散歩会",
+        "event_date": (datetime.now(timezone.utc) + timedelta(days=7)).isoformat(),
+        "max_participants": 10
+    }])[0]
+    fake_supabase.db.stats.reset()
+
+    registration = await EventService.register_event(event["id"], user["id"], user)
+
+    assert set(registration) >= set(EventRegistrationResponse.model_fields)
+    assert registration["user_name"] == "参加者"
+    assert fake_supabase.db.stats.by_table["events"] == 1
+    assert fake_supabase.db.stats.by_table["event_registrations"] == 1
+
+    await EventService.cancel_registration(event["id"], user["id"])
+    again = await EventService.register_event(event["id"], user["id"], user)
+    assert again["id"] == registration["id"] and again["cancelled_at"] is None
+    assert (await EventService.get_event(event["id"], user["id"]))["registration_count"] == 1
@@ -0,0 +1,18 @@
+from datetime import datetime, timezone
+from app.core.rows import parse_timestamp
+from benchmarks.row_decoding import dict_path, make_rows, row_path
+
+
+def test_parse_timestamp_reads_supabase_formats_as_utc():
+    """Z・オフセット付き・タイムゾーンなしの時刻をすべてタイムゾーン付きで読むこと"""
+    expected = datetime(2025, 6, 1, 1, 2, 3, 450000, tzinfo=timezone.utc)
+    assert parse_timestamp("2025-06-01T01:02:03.45Z") == expected
+    assert parse_timestamp("2025-06-01T10:02:03.45+09:00") == expected
+    assert parse_timestamp("2025-06-01T01:02:03.45") == expected
+    assert parse_timestamp(expected) is expected and parse_timestamp(None) is None
+
+
+def test_entry_rows_serialize_like_response_model():
+    """EntryRow を直接JSON化した結果が response_model を通した結果と同じになること"""
+    rows = make_rows(50)
+    assert row_path()(rows) == dict_path()(rows)
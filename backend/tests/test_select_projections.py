@@ -0,0 +1,69 @@
+import ast
+import re
+from pathlib import Path
+from typing import Dict, List, Optional
+
+APP_DIR = Path(__file__).resolve().parent.parent / "app"
+
+# 取得列の「*」（先頭・カンマの後・埋め込みの括弧内）
+STAR = re.compile(r"(^|[,(])\s*\*\s*($|[,)])")
+
+
+def _module_strings(tree: ast.Module) -> Dict[str, str]:
+    """モジュール直下で文字列を代入している定数（取得列の定数）"""
+    constants: Dict[str, str] = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            value = _resolve(node.value, constants)
+            if value is not None:
+                constants[node.targets[0].id] = value
+    return constants
+
+
+def _resolve(node: ast.AST, constants: Dict[str, str]) -> Optional[str]:
+    """select() の引数を文字列に展開する（定数・f文字列の中の定数も展開）"""
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    if isinstance(node, ast.Name):
+        return constants.get(node.id)
+    if isinstance(node, ast.JoinedStr):
+        parts = [_resolve(value.value if isinstance(value, ast.FormattedValue) else value, constants)
+                 for value in node.values]
+        return "".join(part or "" for part in parts)
+    return None
+
+
+def find_star_selects(root: Path = APP_DIR) -> List[str]:
+    """
+    select("*") や埋め込みの (*) で全列を取得している箇所を「ファイル:行」で返す
+    """
+    found = []
+    for path in sorted(root.rglob("*.py")):
+        tree = ast.parse(path.read_text(encoding="utf-8"))
+        constants = _module_strings(tree)
+        for node in ast.walk(tree):
+            if not (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+                    and node.func.attr == "select" and node.args):
+                continue
+            columns = _resolve(node.args[0], constants)
+            if columns is not None and STAR.search(columns):
+                found.append(f"{path.relative_to(root.parent)}:{node.lineno}")
+    return found
+
+
+def test_no_star_selects():
+    """サービス・APIは使う列だけを取得すること（全列取得はPostgRESTの転送量と解析時間が増える）"""
+    assert find_star_selects() == []
+
+
+def test_detects_star_in_constants_and_embeds(tmp_path):
+    (tmp_path / "sample.py").write_text(
+        'COLUMNS = "id, name"\n'
+        'EMBED = f"{COLUMNS}, dogs(*)"\n'
+        'db.table("a").select("*").execute()\n'
+        'db.table("a").select(EMBED).execute()\n'
+        'db.table("a").select(COLUMNS, count="exact").execute()\n'
+        'db.table("a").select("id", count="exact").execute()\n',
+        encoding="utf-8"
+    )
+    assert find_star_selects(tmp_path) == [f"{tmp_path.name}/sample.py:3", f"{tmp_path.name}/sample.py:4"]
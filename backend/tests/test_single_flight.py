@@ -0,0 +1,46 @@
+import asyncio
+import pytest
+from datetime import date
+from app.core.singleflight import single_flight, single_flight_metrics
+from app.services.announcement_service import AnnouncementService
+from app.services.entry_service import EntryService
+
+
+@pytest.mark.asyncio
+async def test_identical_concurrent_calls_share_one_execution():
+    """同じ引数（省略・キーワード指定を含む）の同時呼び出しは1回だけ実行されること"""
+    calls = []
+
+    @single_flight
+    async def load(day: date, limit: int = 20):
+        calls.append((day, limit))
+        await asyncio.sleep(0.01)
+        return {"day": day, "limit": limit}
+
+    day = date(2024, 5, 1)
+    results = await asyncio.gather(
+        load(day), load(day, 20), load(day=day, limit=20), load(day, limit=10)
+    )
+
+    assert len(calls) == 2
+    assert results[0] is results[1] is results[2]
+    assert results[3]["limit"] == 10
+    metrics = single_flight_metrics()[load.__qualname__]
+    assert (metrics["calls"], metrics["shared"], metrics["coalesce_ratio"]) == (4, 2, 0.5)
+
+    # 実行が終われば次の呼び出しは新しく実行する（結果を保持しない）
+    await load(day)
+    assert len(calls) == 3
+
+
+@pytest.mark.asyncio
+async def test_opening_time_burst_hits_supabase_once(fake_supabase):
+    """開園時に集中する営業時間・利用統計の取得は、同時呼び出し分が1往復にまとまること"""
+    fake_supabase.db.stats.reset()
+
+    hours = await asyncio.gather(*[AnnouncementService.get_business_hours() for _ in range(10)])
+    stats = await asyncio.gather(*[EntryService.get_visitor_statistics() for _ in range(10)])
+
+    assert fake_supabase.db.stats.by_table["business_hours"] == 1
+    assert fake_supabase.db.stats.by_table["entry_logs"] == 3
+    assert len(hours) == 10 and stats[0]["current_visitors"] == 0
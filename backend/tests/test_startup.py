@@ -0,0 +1,55 @@
+"""
+起動時間（コールドスタート）のテスト
+"""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# コールドスタートで読み込まれてはならない重いモジュール
+HEAVY_MODULES = ("supabase", "qrcode", "PIL", "smtplib")
+
+# コールドスタート時の app.main の累積import時間の上限（μs、遅いCI環境では環境変数で調整する）
+COLD_START_BUDGET_US = int(os.environ.get("COLD_START_BUDGET_US", "1500000"))
+
+
+def _import_times(lazy_routers: bool) -> dict:
+    """python -X importtime の出力をモジュール名 → 累積時間(μs)に変換"""
+    env = dict(os.environ, LAZY_ROUTERS="true" if lazy_routers else "false")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_cold_start_skips_heavy_imports():
+    """ルーター遅延読み込み時は重いモジュールをimportしない"""
+    times = _import_times(lazy_routers=True)
+    assert "app.main" in times
+    loaded = [name for name in HEAVY_MODULES if name in times]
+    assert loaded == []
+
+
+def test_cold_start_import_time_within_budget():
+    """ルーター遅延読み込み時の app.main のimport時間が上限に収まること（3回のうち最速の回で判定）"""
+    best = min(_import_times(lazy_routers=True)["app.main"] for _ in range(3))
+    assert best < COLD_START_BUDGET_US, f"app.main のimportに {best}μs（上限 {COLD_START_BUDGET_US}μs）"
+
+
+def test_eager_start_skips_client_sdks():
+    """全ルーターを読み込んでもSupabase SDKとQR生成ライブラリは初回使用まで読み込まない"""
+    times = _import_times(lazy_routers=False)
+    # importlib.import_module 経由のルーター本体は計上されないため、配下のサービスで確認
+    assert "app.services.qr_service" in times
+    loaded = [name for name in HEAVY_MODULES if name in times]
+    assert loaded == []
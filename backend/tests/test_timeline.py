@@ -0,0 +1,92 @@
+import pytest
+from app.schemas.post import PostModerate, PostStatus
+from app.services.post_service import PostService
+from app.services.timeline_service import MemoryTimelineStore, RedisTimelineStore, TimelineService
+
+
+@pytest.fixture(params=["memory", "redis"])
+def timeline_store(request, fake_supabase):
+    """メモリ版とRedis版の両方で確認する"""
+    if request.param == "memory":
+        store = MemoryTimelineStore(size=3, ttl=60)
+    else:
+        fakeredis = pytest.importorskip("fakeredis")
+        store = RedisTimelineStore(fakeredis.FakeRedis(decode_responses=True), size=3, ttl=60)
+    TimelineService.set_store(store)
+    return store
+
+
+@pytest.fixture
+def posts(fake_supabase):
+    users = fake_supabase.db.seed("users", [
+        {"auth_id": f"auth-{i}", "email": f"{i}@example.com", "name": f"利用者{i}"} for i in range(2)
+    ])
+    posts = fake_supabase.db.seed("posts", [
+        {"user_id": users[0]["id"], "content": f"投稿{i}", "category": "general",
+         "status": "approved" if i < 4 else "pending", "created_at": f"2024-01-0{i + 1}T10:00:00+00:00"}
+        for i in range(5)
+    ])
+    return {"post_ids": [p["id"] for p in posts], "viewer": users[1]["id"]}
+
+
+@pytest.mark.asyncio
+async def test_first_page_is_served_from_timeline(fake_supabase, timeline_store, posts):
+    """2回目以降のフィード1ページ目はDBへ問い合わせないこと"""
+    viewer = posts["viewer"]
+    await PostService.toggle_like(posts["post_ids"][3], viewer)
+
+    first = await PostService.get_feed(limit=2, current_user_id=viewer)
+    fake_supabase.db.stats.reset()
+    second = await PostService.get_feed(limit=2, current_user_id=viewer)
+
+    assert fake_supabase.db.stats.total == 0
+    assert second == first
+    assert second["total"] == 4
+    assert [item["id"] for item in second["items"]] == [posts["post_ids"][3], posts["post_ids"][2]]
+    assert [item["is_liked"] for item in second["items"]] == [True, False]
+    assert second["items"][0]["like_count"] == 1
+
+
+@pytest.mark.asyncio
+async def test_moderation_and_likes_update_timeline(fake_supabase, timeline_store, posts):
+    """承認・承認取り消し・いいねが差分でタイムラインへ反映されること"""
+    viewer, post_ids = posts["viewer"], posts["post_ids"]
+    await PostService.get_feed(limit=3, current_user_id=viewer)
+
+    await PostService.moderate_post(post_ids[4], PostModerate(status=PostStatus.APPROVED), "admin-1")
+    await PostService.toggle_like(post_ids[4], viewer)
+    await PostService.moderate_post(post_ids[3], PostModerate(status=PostStatus.REJECTED), "admin-1")
+
+    fake_supabase.db.stats.reset()
+    feed = await PostService.get_feed(limit=2, current_user_id=viewer)
+
+    assert fake_supabase.db.stats.total == 0
+    assert feed["total"] == 4
+    assert [item["id"] for item in feed["items"]] == [post_ids[4], post_ids[2]]
+    assert feed["items"][0]["is_liked"] is True
+    assert feed["items"][0]["like_count"] == 1
+    assert feed["items"][0]["user_name"] == "利用者0"
+
+    # カテゴリ別タイムラインにも反映される
+    general = await PostService.get_feed(category="general", limit=1, current_user_id=viewer)
+    assert [item["id"] for item in general["items"]] == [post_ids[4]]
+
+
+@pytest.mark.asyncio
+async def test_redis_cards_are_pruned_with_timeline(fake_supabase, posts):
+    """Redisのカード・カウンタから、どのタイムラインにも残っていない投稿の分が削除されること"""
+    fakeredis = pytest.importorskip("fakeredis")
+    client = fakeredis.FakeRedis(decode_responses=True)
+    TimelineService.set_store(RedisTimelineStore(client, size=3, ttl=60))
+    post_ids = posts["post_ids"]
+    await PostService.get_feed(limit=3)
+
+    # 新しい投稿の承認で保持件数から押し出された投稿・承認取り消しされた投稿
+    await PostService.moderate_post(post_ids[4], PostModerate(status=PostStatus.APPROVED), "admin-1")
+    await PostService.moderate_post(post_ids[3], PostModerate(status=PostStatus.REJECTED), "admin-1")
+
+    expected = {post_ids[4], post_ids[2]}
+    for name in ("cards", "likes", "comments"):
+        assert set(client.hkeys(f"timeline:{name}")) == expected
+    feed = await PostService.get_feed(limit=2)
+    assert [item["id"] for item in feed["items"]] == [post_ids[4], post_ids[2]]
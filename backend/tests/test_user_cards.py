@@ -0,0 +1,33 @@
+import pytest
+from app.schemas.user import UserProfileUpdate
+from app.services.user_card_service import UserCardCache, UserCardService
+from app.services.user_service import UserService
+
+
+def test_cache_evicts_least_recently_used_and_expired_cards():
+    """上限を超えると最も古く使われたカードを、TTLを過ぎたカードは取得時に破棄すること"""
+    cache = UserCardCache(size=2, ttl=300)
+    cache.set_many([{"id": "a"}, {"id": "b"}])
+    cache.get_many(["a"])
+    cache.set_many([{"id": "c"}])
+    assert set(cache.get_many(["a", "b", "c"])) == {"a", "c"}
+
+    expired = UserCardCache(size=2, ttl=-1)
+    expired.set_many([{"id": "a"}])
+    assert expired.get_many(["a"]) == {} and len(expired) == 0
+
+
+@pytest.mark.asyncio
+async def test_cards_are_cached_until_profile_update(fake_supabase):
+    """カードは2回目以降DBを引かず、プロフィール更新後は新しい名前を返すこと"""
+    user = fake_supabase.db.seed("users", [{"auth_id": "auth-1", "email": "a@example.com", "name": "旧名"}])[0]
+    rows = [{"user_id": user["id"]}, {"user_id": user["id"]}]
+    fake_supabase.db.stats.reset()
+
+    await UserCardService.hydrate(rows)
+    await UserCardService.hydrate(rows)
+    assert fake_supabase.db.stats.by_table["users"] == 1
+    assert rows[0]["user_name"] == "旧名"
+
+    await UserService.update_profile(user["id"], UserProfileUpdate(name="新名"))
+    assert (await UserCardService.hydrate([{"user_id": user["id"]}]))[0]["user_name"] == "新名"
@@ -0,0 +1,81 @@
+import pytest
+from datetime import date, datetime, timedelta, timezone
+from fastapi import HTTPException
+from app.schemas.dog import VaccinationRecordCreate
+from app.services.dog_service import DogService
+from app.services.entry_service import EntryService
+from app.services.qr_service import QRService
+from app.services.vaccination_eligibility_service import VaccinationEligibilityService
+
+
+@pytest.fixture
+def gate(fake_supabase):
+    """接種済みの犬・期限切れの犬・記録のない犬"""
+    owner = fake_supabase.db.seed("users", [{"auth_id": "auth-0", "email": "0@example.com", "name": "飼い主"}])[0]
+    dogs = fake_supabase.db.seed("dogs", [
+        {"user_id": owner["id"], "name": name, "is_active": True} for name in ("ポチ", "タロ", "ハナ")
+    ])
+    today = VaccinationEligibilityService.park_today()
+    fake_supabase.db.seed("vaccination_records", [
+        {"dog_id": dogs[0]["id"], "vaccine_type": "狂犬病", "vaccination_date": (today - timedelta(days=30)).isoformat(),
+         "next_vaccination_date": (today + timedelta(days=335)).isoformat()},
+        {"dog_id": dogs[1]["id"], "vaccine_type": "狂犬病", "vaccination_date": (today - timedelta(days=400)).isoformat()},
+    ])
+    return {"owner_id": owner["id"], "dog_ids": [d["id"] for d in dogs]}
+
+
+async def _check_in(gate, dog_ids):
+    token = (await QRService.generate_entry_qr(gate["owner_id"], dog_ids))["token"]
+    return await EntryService.check_in(token, "admin-id")
+
+
+@pytest.mark.asyncio
+async def test_preload_then_check_in_uses_cache(fake_supabase, gate):
+    """事前読み込み後の入場判定はDBに問い合わせず、接種が確認できない犬は入場できないこと"""
+    assert await VaccinationEligibilityService.preload() == {"dogs": 3, "eligible": 1, "ineligible": 2}
+
+    fake_supabase.db.stats.reset()
+    result = await _check_in(gate, gate["dog_ids"][:1])
+    assert len(result["entry_logs"]) == 1
+    assert fake_supabase.db.stats.by_table["dogs"] == 0
+
+    with pytest.raises(HTTPException) as exc:
+        await _check_in(gate, gate["dog_ids"][1:])
+    assert exc.value.status_code == 400
+    assert gate["dog_ids"][1] in exc.value.detail and gate["dog_ids"][2] in exc.value.detail
+    assert fake_supabase.db.stats.by_table["dogs"] == 0
+
+
+@pytest.mark.asyncio
+async def test_adding_record_refreshes_cached_decision(fake_supabase, gate):
+    """ワクチン記録の追加で、期限切れとキャッシュされた判定が更新されること"""
+    expired = gate["dog_ids"][1]
+    assert VaccinationEligibilityService.ineligible([expired]) == [expired]
+
+    await DogService.add_vaccination_record(
+        expired, VaccinationRecordCreate(vaccine_type="狂犬病", vaccination_date=VaccinationEligibilityService.park_today()), gate["owner_id"]
+    )
+
+    fake_supabase.db.stats.reset()
+    assert VaccinationEligibilityService.ineligible([expired]) == []
+    assert fake_supabase.db.stats.total == 0
+
+
+@pytest.mark.asyncio
+async def test_expiry_is_judged_by_park_date(fake_supabase, gate, monkeypatch):
+    """有効期限はサーバー（UTC）ではなく園の所在地の日付で判定すること"""
+    class ParkNight(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            # UTC 5/1 16:00 = 日本時間 5/2 01:00
+            return datetime(2024, 5, 1, 16, 0, tzinfo=timezone.utc).astimezone(tz)
+
+    monkeypatch.setattr("app.services.vaccination_eligibility_service.datetime", ParkNight)
+    dog_id = gate["dog_ids"][2]
+    fake_supabase.db.seed("vaccination_records", [
+        {"dog_id": dog_id, "vaccine_type": "狂犬病", "vaccination_date": "2023-05-01",
+         "next_vaccination_date": "2024-05-01"},
+    ])
+
+    assert VaccinationEligibilityService.park_today() == date(2024, 5, 2)
+    assert VaccinationEligibilityService.ineligible([dog_id]) == [dog_id]
@@ -0,0 +1,51 @@
+import pytest
+from datetime import date, timedelta
+from app.services.vaccination_reminder_service import VaccinationReminderService
+
+TODAY = date(2024, 6, 1)
+
+
+@pytest.fixture
+def records(fake_supabase):
+    """飼い主2人（1人は2頭）と、期限が近い・遠い・過ぎた記録"""
+    owners = fake_supabase.db.seed("users", [
+        {"auth_id": f"auth-{i}", "email": f"{i}@example.com", "name": f"飼い主{i}", "status": "active"}
+        for i in range(2)
+    ])
+    dogs = fake_supabase.db.seed("dogs", [
+        {"user_id": owners[0]["id"], "name": "ポチ"},
+        {"user_id": owners[0]["id"], "name": "タロ"},
+        {"user_id": owners[1]["id"], "name": "ハナ"},
+    ])
+    due = [5, 20, 3, 60, -1]
+    return fake_supabase.db.seed("vaccination_records", [
+        {"dog_id": dogs[i % 3]["id"], "vaccine_type": "狂犬病", "vaccination_date": "2023-06-01",
+         "next_vaccination_date": (TODAY + timedelta(days=days)).isoformat()}
+        for i, days in enumerate(due)
+    ])
+
+
+@pytest.mark.asyncio
+async def test_sends_one_digest_per_owner_and_is_idempotent(fake_supabase, records, monkeypatch):
+    """飼い主ごとに1通だけ送り、再実行では送らないこと"""
+    sent = []
+
+    async def fake_send(to_email, subject, body):
+        sent.append((to_email, body))
+        return True
+
+    monkeypatch.setattr("app.services.notification_service.NotificationService._send_email", fake_send)
+
+    result = await VaccinationReminderService.run(today=TODAY)
+
+    assert result == {"scanned": 3, "already_sent": 0, "due": 3, "users": 2, "sent": 2, "failed": 0}
+    assert sorted(email for email, _ in sent) == ["0@example.com", "1@example.com"]
+    digest = dict(sent)["0@example.com"]
+    assert "ポチ" in digest and "タロ" in digest
+    reminders = fake_supabase.db.rows["vaccination_reminders"]
+    assert sorted(r["days_before"] for r in reminders) == [7, 7, 30]
+
+    sent.clear()
+    rerun = await VaccinationReminderService.run(today=TODAY)
+    assert rerun["already_sent"] == 3 and rerun["sent"] == 0
+    assert sent == []
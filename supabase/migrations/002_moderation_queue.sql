@@ -0,0 +1,6 @@
+-- モデレーションキュー（backend/database_schema.sql の posts テーブル向け）
+-- 承認待ち投稿だけを古い順に読む部分インデックス
+-- 承認済みが大半を占めても、キューの取得は承認待ちの件数分しか走査しない
+CREATE INDEX IF NOT EXISTS idx_posts_pending_queue
+  ON public.posts(created_at)
+  WHERE status = 'pending';
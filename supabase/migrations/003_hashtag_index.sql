@@ -0,0 +1,61 @@
+-- ハッシュタグ絞り込みとトレンド（backend/database_schema.sql の posts / hashtags 向け）
+
+-- タグ → 投稿の逆引き（UNIQUE(post_id, hashtag_id) は投稿 → タグ方向しか使えない）
+CREATE INDEX IF NOT EXISTS idx_post_hashtags_hashtag_id
+  ON public.post_hashtags(hashtag_id, post_id);
+
+-- トレンド集計用カラム
+ALTER TABLE public.hashtags ADD COLUMN IF NOT EXISTS post_count INTEGER DEFAULT 0;
+ALTER TABLE public.hashtags ADD COLUMN IF NOT EXISTS trend_score DOUBLE PRECISION;
+
+CREATE INDEX IF NOT EXISTS idx_hashtags_trend_score
+  ON public.hashtags(trend_score DESC NULLS LAST);
+
+-- ハッシュタグのトレンドスコアを加算する（投稿が承認されたときに呼び出す）
+-- スコアは半減期24時間の指数減衰の合計を ln(Σ exp(λ・t)) として保持する。
+-- 全タグに共通の減衰係数を掛けても順位は変わらないため、定期的な再計算なしで
+-- trend_score の降順がそのまま現在のトレンド順になる。
+CREATE OR REPLACE FUNCTION bump_hashtag_trend(p_post_ids UUID[])
+RETURNS VOID AS $$
+DECLARE
+    v_now DOUBLE PRECISION := ln(2) / (24 * 3600) * EXTRACT(EPOCH FROM NOW());
+BEGIN
+    UPDATE hashtags h
+    SET post_count = h.post_count + t.cnt,
+        trend_score = CASE
+            WHEN h.trend_score IS NULL THEN v_now + ln(t.cnt)
+            ELSE GREATEST(h.trend_score, v_now + ln(t.cnt))
+                 + ln(1 + exp(GREATEST(-abs(h.trend_score - (v_now + ln(t.cnt))), -700)))
+        END
+    FROM (
+        SELECT hashtag_id, COUNT(*) AS cnt
+        FROM post_hashtags
+        WHERE post_id = ANY(p_post_ids)
+        GROUP BY hashtag_id
+    ) t
+    WHERE h.id = t.hashtag_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- 既存の承認済み投稿からスコアを初期化（作成日時を基準に減衰させる）
+-- 指数のアンダーフローを避けるため、タグごとの最大値 m を括り出して m + ln(Σ exp(x - m)) で計算する
+-- （exp の引数は -700 で打ち切る。それより古い寄与は無視できる）
+UPDATE public.hashtags h
+SET post_count = t.cnt,
+    trend_score = t.score
+FROM (
+  SELECT hashtag_id,
+         COUNT(*) AS cnt,
+         MAX(m) + ln(SUM(exp(GREATEST(x - m, -700)))) AS score
+  FROM (
+    SELECT ph.hashtag_id,
+           ln(2) / (24 * 3600) * EXTRACT(EPOCH FROM p.created_at) AS x,
+           MAX(ln(2) / (24 * 3600) * EXTRACT(EPOCH FROM p.created_at))
+             OVER (PARTITION BY ph.hashtag_id) AS m
+    FROM public.post_hashtags ph
+    JOIN public.posts p ON p.id = ph.post_id
+    WHERE p.status = 'approved'
+  ) s
+  GROUP BY hashtag_id
+) t
+WHERE h.id = t.hashtag_id;
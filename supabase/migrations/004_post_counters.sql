@@ -0,0 +1,62 @@
+-- いいね数・コメント数の非正規化（backend/database_schema.sql の posts 向け）
+-- 一覧・詳細では count クエリの代わりにこのカラムを読む
+
+ALTER TABLE public.posts ADD COLUMN IF NOT EXISTS like_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE public.posts ADD COLUMN IF NOT EXISTS comment_count INTEGER NOT NULL DEFAULT 0;
+
+-- いいね数・コメント数を posts に反映するトリガー関数
+CREATE OR REPLACE FUNCTION update_post_like_count()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE posts SET like_count = like_count + 1 WHERE id = NEW.post_id;
+    ELSE
+        UPDATE posts SET like_count = GREATEST(like_count - 1, 0) WHERE id = OLD.post_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION update_post_comment_count()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE posts SET comment_count = comment_count + 1 WHERE id = NEW.post_id;
+    ELSE
+        UPDATE posts SET comment_count = GREATEST(comment_count - 1, 0) WHERE id = OLD.post_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER update_posts_like_count AFTER INSERT OR DELETE ON likes
+    FOR EACH ROW EXECUTE FUNCTION update_post_like_count();
+
+CREATE TRIGGER update_posts_comment_count AFTER INSERT OR DELETE ON comments
+    FOR EACH ROW EXECUTE FUNCTION update_post_comment_count();
+
+-- いいねを切り替え、切り替え後の状態といいね数を返す（1往復で完結）
+CREATE OR REPLACE FUNCTION toggle_like(p_post_id UUID, p_user_id UUID)
+RETURNS TABLE(liked BOOLEAN, like_count INTEGER) AS $$
+BEGIN
+    DELETE FROM likes l WHERE l.post_id = p_post_id AND l.user_id = p_user_id;
+    IF FOUND THEN
+        liked := FALSE;
+    ELSE
+        INSERT INTO likes (post_id, user_id) VALUES (p_post_id, p_user_id)
+        ON CONFLICT DO NOTHING;
+        liked := TRUE;
+    END IF;
+    SELECT p.like_count INTO like_count FROM posts p WHERE p.id = p_post_id;
+    RETURN NEXT;
+END;
+$$ LANGUAGE plpgsql;
+
+-- 既存データからカウンタを初期化
+UPDATE public.posts p
+SET like_count = (SELECT COUNT(*) FROM public.likes l WHERE l.post_id = p.id),
+    comment_count = (SELECT COUNT(*) FROM public.comments c WHERE c.post_id = p.id);
+
+-- サービスキー（service_role）経由のバックエンドからのみ呼び出す
+REVOKE EXECUTE ON FUNCTION toggle_like(UUID, UUID) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION bump_hashtag_trend(UUID[]) FROM PUBLIC, anon, authenticated;
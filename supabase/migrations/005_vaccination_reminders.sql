@@ -0,0 +1,19 @@
+-- ワクチン接種リマインダー（backend/database_schema.sql の vaccination_records 向け）
+
+-- 期限が近い記録を日付範囲で引くためのインデックス
+CREATE INDEX IF NOT EXISTS idx_vaccination_records_next_date
+  ON public.vaccination_records(next_vaccination_date);
+
+-- 送信記録（同じ記録・期限・通知タイミングには1回だけ送る。ジョブの再実行で重複しない）
+CREATE TABLE IF NOT EXISTS public.vaccination_reminders (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  vaccination_record_id UUID REFERENCES public.vaccination_records(id) ON DELETE CASCADE,
+  user_id UUID REFERENCES public.users(id) ON DELETE CASCADE,
+  due_date DATE NOT NULL,
+  days_before INTEGER NOT NULL,
+  sent_at TIMESTAMPTZ DEFAULT NOW(),
+  UNIQUE(vaccination_record_id, due_date, days_before)
+);
+
+CREATE INDEX IF NOT EXISTS idx_vaccination_reminders_due_date
+  ON public.vaccination_reminders(due_date);
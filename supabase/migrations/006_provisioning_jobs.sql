@@ -0,0 +1,85 @@
+-- 承認済み申請のアカウント作成パイプライン（backend/database_schema.sql 向け）
+
+-- 申請時の犬情報（承認時に dogs へ移す）
+CREATE TABLE IF NOT EXISTS public.application_dogs (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  application_id UUID REFERENCES public.applications(id) ON DELETE CASCADE,
+  name VARCHAR(100) NOT NULL,
+  breed VARCHAR(100),
+  weight DECIMAL(5,2),
+  gender VARCHAR(10),
+  birth_date DATE,
+  personality TEXT,
+  created_at TIMESTAMPTZ DEFAULT NOW()
+);
+ALTER TABLE public.application_dogs ADD COLUMN IF NOT EXISTS birth_date DATE;
+ALTER TABLE public.application_dogs ADD COLUMN IF NOT EXISTS personality TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_application_dogs_application_id
+  ON public.application_dogs(application_id);
+
+-- 申請から作成した犬の元データ（再実行時に同じ犬を二重に作らない）
+ALTER TABLE public.dogs ADD COLUMN IF NOT EXISTS application_dog_id UUID
+  UNIQUE REFERENCES public.application_dogs(id) ON DELETE SET NULL;
+
+-- アカウント作成ジョブ（申請IDを冪等キーとして1申請1件）
+CREATE TABLE IF NOT EXISTS public.provisioning_jobs (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  application_id UUID UNIQUE NOT NULL REFERENCES public.applications(id) ON DELETE CASCADE,
+  status VARCHAR(20) NOT NULL DEFAULT 'pending',
+  attempts INTEGER NOT NULL DEFAULT 0,
+  auth_id UUID,
+  user_id UUID REFERENCES public.users(id) ON DELETE SET NULL,
+  last_error TEXT,
+  locked_until TIMESTAMPTZ,
+  created_at TIMESTAMPTZ DEFAULT NOW(),
+  updated_at TIMESTAMPTZ DEFAULT NOW(),
+  completed_at TIMESTAMPTZ
+);
+
+CREATE INDEX IF NOT EXISTS idx_provisioning_jobs_status
+  ON public.provisioning_jobs(status, locked_until);
+
+DROP TRIGGER IF EXISTS update_provisioning_jobs_updated_at ON public.provisioning_jobs;
+CREATE TRIGGER update_provisioning_jobs_updated_at BEFORE UPDATE ON public.provisioning_jobs
+  FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+-- 承認済み申請から users と dogs をまとめて作成（1トランザクションで途中状態を残さない）
+-- 再実行しても既存の行は作り直さない（email と application_dog_id で冪等）
+CREATE OR REPLACE FUNCTION public.provision_account(p_job_id UUID, p_auth_id UUID)
+RETURNS UUID AS $$
+DECLARE
+    v_application public.applications%ROWTYPE;
+    v_user_id UUID;
+BEGIN
+    SELECT a.* INTO v_application
+    FROM public.provisioning_jobs j JOIN public.applications a ON a.id = j.application_id
+    WHERE j.id = p_job_id
+    FOR UPDATE OF j;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'provisioning job % not found', p_job_id USING ERRCODE = 'P0002';
+    END IF;
+
+    INSERT INTO public.users (auth_id, email, name, phone, address, is_imabari_resident, residence_years, status)
+    VALUES (p_auth_id, v_application.email, v_application.name, v_application.phone, v_application.address,
+            COALESCE(v_application.is_imabari_resident, false), v_application.residence_years, 'active')
+    ON CONFLICT (email) DO NOTHING;
+    SELECT u.id INTO v_user_id FROM public.users u WHERE u.email = v_application.email;
+
+    INSERT INTO public.dogs (user_id, name, breed, weight, gender, birth_date, personality, application_dog_id)
+    SELECT v_user_id, d.name, d.breed, d.weight, d.gender, d.birth_date, d.personality, d.id
+    FROM public.application_dogs d
+    WHERE d.application_id = v_application.id
+    ON CONFLICT (application_dog_id) DO NOTHING;
+
+    UPDATE public.provisioning_jobs
+    SET status = 'done', auth_id = p_auth_id, user_id = v_user_id, last_error = NULL,
+        locked_until = NULL, completed_at = NOW()
+    WHERE id = p_job_id;
+
+    RETURN v_user_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- サービスキー（service_role）経由のバックエンドからのみ呼び出す
+REVOKE EXECUTE ON FUNCTION public.provision_account(UUID, UUID) FROM PUBLIC, anon, authenticated;
@@ -0,0 +1,8 @@
+-- 閉園時の自動退場（backend/database_schema.sql の entry_logs 向け）
+
+-- 退場の記録理由（scanned: QRで退場、auto_closed: 閉園時に自動で退場）
+ALTER TABLE public.entry_logs ADD COLUMN IF NOT EXISTS exit_reason VARCHAR(20);
+
+-- 退場していない記録だけの部分インデックス（現在の利用者・自動退場の対象を引く）
+CREATE INDEX IF NOT EXISTS idx_entry_logs_open
+  ON public.entry_logs(entry_time) WHERE exit_time IS NULL;
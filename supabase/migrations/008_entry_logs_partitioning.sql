@@ -0,0 +1,146 @@
+-- 入退場記録の月単位パーティション化と古い月のアーカイブ（backend/database_schema.sql の entry_logs 向け）
+-- 既存の entry_logs を作り直してデータを移す（実行中は入退場の書き込みを止めること）
+
+ALTER TABLE public.entry_logs RENAME TO entry_logs_legacy;
+ALTER INDEX IF EXISTS public.idx_entry_logs_open RENAME TO idx_entry_logs_legacy_open;
+ALTER INDEX IF EXISTS public.idx_entry_logs_user_id RENAME TO idx_entry_logs_legacy_user_id;
+ALTER INDEX IF EXISTS public.idx_entry_logs_exit_time RENAME TO idx_entry_logs_legacy_exit_time;
+
+-- パーティションキー（entry_time）は主キーに含める必要がある
+CREATE TABLE public.entry_logs (
+  id UUID NOT NULL DEFAULT gen_random_uuid(),
+  user_id UUID REFERENCES public.users(id) ON DELETE CASCADE,
+  dog_id UUID REFERENCES public.dogs(id) ON DELETE CASCADE,
+  entry_time TIMESTAMPTZ NOT NULL,
+  exit_time TIMESTAMPTZ,
+  exit_reason VARCHAR(20),
+  checked_by UUID REFERENCES public.admin_users(id),
+  created_at TIMESTAMPTZ DEFAULT NOW(),
+  PRIMARY KEY (id, entry_time)
+) PARTITION BY RANGE (entry_time);
+
+-- 対応する月のパーティションがない記録の受け皿（通常は空のまま）
+CREATE TABLE public.entry_logs_default PARTITION OF public.entry_logs DEFAULT;
+-- パーティションはAPIから直接参照させない（RLSを有効にしてポリシーを付けない）
+ALTER TABLE public.entry_logs_default ENABLE ROW LEVEL SECURITY;
+
+CREATE INDEX IF NOT EXISTS idx_entry_logs_user_id ON public.entry_logs(user_id);
+CREATE INDEX IF NOT EXISTS idx_entry_logs_exit_time ON public.entry_logs(exit_time);
+CREATE INDEX IF NOT EXISTS idx_entry_logs_open ON public.entry_logs(entry_time) WHERE exit_time IS NULL;
+
+-- 月（UTC）のパーティションを用意する（既にあれば何もしない）
+-- 既定パーティションに入っていたその月の記録は新しいパーティションへ移す
+CREATE OR REPLACE FUNCTION public.ensure_entry_log_partition(p_month DATE)
+RETURNS TEXT AS $$
+DECLARE
+    v_from TIMESTAMPTZ := (date_trunc('month', p_month)::date::text || ' 00:00:00+00')::timestamptz;
+    v_to TIMESTAMPTZ := ((date_trunc('month', p_month) + INTERVAL '1 month')::date::text || ' 00:00:00+00')::timestamptz;
+    v_name TEXT := 'entry_logs_' || to_char(p_month, 'YYYY_MM');
+BEGIN
+    IF to_regclass('public.' || v_name) IS NOT NULL THEN
+        RETURN v_name;
+    END IF;
+
+    IF to_regclass('pg_temp.entry_logs_moving') IS NULL THEN
+        CREATE TEMP TABLE entry_logs_moving (LIKE public.entry_logs) ON COMMIT DROP;
+    ELSE
+        TRUNCATE entry_logs_moving;
+    END IF;
+    WITH moved AS (
+        DELETE FROM public.entry_logs_default
+        WHERE entry_time >= v_from AND entry_time < v_to
+        RETURNING *
+    )
+    INSERT INTO entry_logs_moving SELECT * FROM moved;
+
+    EXECUTE format(
+        'CREATE TABLE public.%I PARTITION OF public.entry_logs FOR VALUES FROM (%L) TO (%L)',
+        v_name, v_from, v_to
+    );
+    EXECUTE format('ALTER TABLE public.%I ENABLE ROW LEVEL SECURITY', v_name);
+    INSERT INTO public.entry_logs SELECT * FROM entry_logs_moving;
+    RETURN v_name;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public, pg_temp;
+
+-- 既存データの月から数か月先までのパーティションを作ってデータを移す
+SELECT public.ensure_entry_log_partition(month::date)
+FROM generate_series(
+    date_trunc('month', LEAST(COALESCE((SELECT MIN(entry_time) FROM public.entry_logs_legacy), NOW()), NOW())),
+    date_trunc('month', NOW() + INTERVAL '3 months'),
+    INTERVAL '1 month'
+) AS month;
+
+INSERT INTO public.entry_logs (id, user_id, dog_id, entry_time, exit_time, exit_reason, checked_by, created_at)
+SELECT id, user_id, dog_id, entry_time, exit_time, exit_reason, checked_by, created_at
+FROM public.entry_logs_legacy;
+
+-- 旧テーブルを参照するビュー（rls_policies.sql）を作り直す
+DROP VIEW IF EXISTS public.current_visitors;
+DROP TABLE public.entry_logs_legacy;
+
+DO $$
+BEGIN
+    IF to_regclass('public.users') IS NOT NULL AND to_regclass('public.dogs') IS NOT NULL THEN
+        CREATE OR REPLACE VIEW public.current_visitors AS
+        SELECT el.id, el.user_id, u.name, u.email, el.entry_time, COUNT(d.id) AS dog_count
+        FROM public.entry_logs el
+        JOIN public.users u ON el.user_id = u.id
+        LEFT JOIN public.dogs d ON d.user_id = u.id
+        WHERE el.exit_time IS NULL
+        GROUP BY el.id, el.user_id, u.name, u.email, el.entry_time
+        ORDER BY el.entry_time DESC;
+    END IF;
+END $$;
+
+-- RLS（rls_policies.sql と同じポリシー、is_admin() がある環境のみ）
+ALTER TABLE public.entry_logs ENABLE ROW LEVEL SECURITY;
+DO $$
+BEGIN
+    IF to_regprocedure('public.is_admin()') IS NOT NULL THEN
+        CREATE POLICY "Users can view own entry logs" ON public.entry_logs
+        FOR SELECT USING (user_id IN (SELECT id FROM public.users WHERE auth_id = auth.uid()));
+        CREATE POLICY "Admins can manage all entry logs" ON public.entry_logs
+        FOR ALL USING (public.is_admin());
+        CREATE POLICY "Admins can create entry logs" ON public.entry_logs
+        FOR INSERT WITH CHECK (public.is_admin());
+    END IF;
+END $$;
+
+-- アーカイブ済みの月（Parquetファイルの保存先）
+CREATE TABLE IF NOT EXISTS public.entry_log_archives (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  month DATE UNIQUE NOT NULL,
+  storage_path TEXT NOT NULL,
+  row_count INTEGER NOT NULL,
+  archived_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- Parquetに書き出した月のパーティションを切り離して削除する
+-- 書き出した件数とパーティションの件数が一致しない場合（書き出し後に追加・変更があった場合）は何もしない
+CREATE OR REPLACE FUNCTION public.archive_entry_log_partition(p_month DATE, p_storage_path TEXT, p_row_count INTEGER)
+RETURNS BOOLEAN AS $$
+DECLARE
+    v_name TEXT := public.ensure_entry_log_partition(p_month);
+    v_count INTEGER;
+BEGIN
+    EXECUTE format('LOCK TABLE public.%I IN ACCESS EXCLUSIVE MODE', v_name);
+    EXECUTE format('SELECT COUNT(*) FROM public.%I', v_name) INTO v_count;
+    IF v_count <> p_row_count THEN
+        RETURN false;
+    END IF;
+
+    INSERT INTO public.entry_log_archives (month, storage_path, row_count)
+    VALUES (date_trunc('month', p_month)::date, p_storage_path, p_row_count)
+    ON CONFLICT (month) DO UPDATE
+    SET storage_path = EXCLUDED.storage_path, row_count = EXCLUDED.row_count, archived_at = NOW();
+
+    EXECUTE format('ALTER TABLE public.entry_logs DETACH PARTITION public.%I', v_name);
+    EXECUTE format('DROP TABLE public.%I', v_name);
+    RETURN true;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public, pg_temp;
+
+-- サービスキー（service_role）経由のバックエンドからのみ呼び出す
+REVOKE EXECUTE ON FUNCTION public.ensure_entry_log_partition(DATE) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION public.archive_entry_log_partition(DATE, TEXT, INTEGER) FROM PUBLIC, anon, authenticated;
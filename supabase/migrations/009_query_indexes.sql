@@ -0,0 +1,52 @@
+-- サービスの問い合わせに合わせたインデックス（backend/database_schema.sql 向け）
+-- 各コメントの時間は投入データ（利用者2,000・犬3,000・投稿50,000・いいね200,000・コメント100,000・
+-- 入退場300,000件を25か月のパーティションに分散）での EXPLAIN ANALYZE の実行時間（5回の中央値、適用前 → 適用後）
+
+-- 入場処理の「入場中か」の確認（dog_id かつ exit_time IS NULL）0.32ms → 0.43ms
+-- 投入データでは退場していない記録が50件しかなく差は出ない（どちらも全パーティションを1回ずつ引くのが大半）
+-- 退場していない記録が多く残っても、その犬の記録だけを読む
+CREATE INDEX IF NOT EXISTS idx_entry_logs_open_dog
+  ON public.entry_logs(dog_id) WHERE exit_time IS NULL;
+
+-- 利用者ごとの入退場履歴（新しい順）0.65ms → 0.57ms
+-- user_id だけのインデックスは先頭列が同じこのインデックスで代わりになる
+CREATE INDEX IF NOT EXISTS idx_entry_logs_user_entry_time
+  ON public.entry_logs(user_id, entry_time DESC);
+DROP INDEX IF EXISTS public.idx_entry_logs_user_id;
+
+-- 利用統計（その日の入場記録、月パーティションの中の範囲検索）8.92ms → 0.29ms
+CREATE INDEX IF NOT EXISTS idx_entry_logs_entry_time
+  ON public.entry_logs(entry_time);
+
+-- フィード（承認済み投稿の新しい順、カテゴリ別も同じインデックスを使う）0.034ms → 0.044ms
+-- 承認待ち・却下の投稿を読み飛ばさずに済む（投入データでは承認済みが9割のため差は出ない）
+CREATE INDEX IF NOT EXISTS idx_posts_approved_created_at
+  ON public.posts(created_at DESC) WHERE status = 'approved';
+
+-- フィードの「いいね済み」（user_id と表示中の投稿20件の post_id）0.16ms → 0.07ms
+-- toggle_like の (post_id, user_id) は UNIQUE(post_id, user_id) のインデックスで引ける
+CREATE INDEX IF NOT EXISTS idx_likes_user_id
+  ON public.likes(user_id, post_id);
+-- post_id だけのインデックスは UNIQUE(post_id, user_id) で代わりになる
+DROP INDEX IF EXISTS public.idx_likes_post_id;
+
+-- コメント一覧（投稿ごとの新しい順）0.048ms → 0.057ms（1投稿2件のため差は出ない、件数が多い投稿で並べ替えが不要になる）
+CREATE INDEX IF NOT EXISTS idx_comments_post_created_at
+  ON public.comments(post_id, created_at DESC);
+DROP INDEX IF EXISTS public.idx_comments_post_id;
+
+-- イベントの参加者数（event_id かつ status）0.19ms → 0.24ms
+-- 投入データでは1イベント60件のため UNIQUE(event_id, user_id) で足りており差は出ない
+CREATE INDEX IF NOT EXISTS idx_event_registrations_event_status
+  ON public.event_registrations(event_id, status);
+
+-- 自分の参加イベント（user_id かつ status）0.80ms → 0.021ms
+CREATE INDEX IF NOT EXISTS idx_event_registrations_user_status
+  ON public.event_registrations(user_id, status);
+
+-- 犬ごとのワクチン接種記録（接種日の新しい順）0.82ms → 0.067ms
+CREATE INDEX IF NOT EXISTS idx_vaccination_records_dog_id
+  ON public.vaccination_records(dog_id, vaccination_date DESC);
+
+ANALYZE public.entry_logs, public.posts, public.likes, public.comments,
+  public.event_registrations, public.vaccination_records;
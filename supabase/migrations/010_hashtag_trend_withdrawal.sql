@@ -0,0 +1,66 @@
+-- 承認済みの投稿が却下・削除されたときのハッシュタグのトレンドの取り消し（backend/database_schema.sql 向け）
+-- bump_hashtag_trend は承認時刻 t の投稿ごとに exp(λ・t) を trend_score = ln(Σ exp(λ・t)) に加えるため、
+-- 取り消しでは同じ寄与を ln(exp(s) - exp(λ・t)) = s + ln(1 - exp(λ・t - s)) で差し引く。
+
+-- 承認時刻（加算と同じ NOW() を残し、差し引く寄与を加えた寄与と一致させる）
+ALTER TABLE public.posts ADD COLUMN IF NOT EXISTS approved_at TIMESTAMPTZ;
+
+CREATE OR REPLACE FUNCTION bump_hashtag_trend(p_post_ids UUID[])
+RETURNS VOID AS $$
+DECLARE
+    v_now DOUBLE PRECISION := ln(2) / (24 * 3600) * EXTRACT(EPOCH FROM NOW());
+BEGIN
+    UPDATE posts SET approved_at = NOW() WHERE id = ANY(p_post_ids);
+
+    UPDATE hashtags h
+    SET post_count = h.post_count + t.cnt,
+        trend_score = CASE
+            WHEN h.trend_score IS NULL THEN v_now + ln(t.cnt)
+            ELSE GREATEST(h.trend_score, v_now + ln(t.cnt))
+                 + ln(1 + exp(GREATEST(-abs(h.trend_score - (v_now + ln(t.cnt))), -700)))
+        END
+    FROM (
+        SELECT hashtag_id, COUNT(*) AS cnt
+        FROM post_hashtags
+        WHERE post_id = ANY(p_post_ids)
+        GROUP BY hashtag_id
+    ) t
+    WHERE h.id = t.hashtag_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- 投稿1件分の寄与を差し引く（承認時刻が未記録の投稿は、003 の初期化と同じく作成日時を使う）
+-- 最後の1件だった場合や丸め誤差で寄与が残りを上回る場合はスコアなし（NULL）にする
+CREATE OR REPLACE FUNCTION withdraw_hashtag_trend()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_added DOUBLE PRECISION := ln(2) / (24 * 3600) * EXTRACT(EPOCH FROM COALESCE(OLD.approved_at, OLD.created_at));
+BEGIN
+    UPDATE hashtags h
+    SET post_count = GREATEST(h.post_count - 1, 0),
+        trend_score = CASE
+            WHEN h.post_count <= 1 OR h.trend_score IS NULL OR h.trend_score <= v_added THEN NULL
+            ELSE h.trend_score + ln(1 - exp(GREATEST(v_added - h.trend_score, -700)))
+        END
+    FROM post_hashtags ph
+    WHERE ph.post_id = OLD.id AND h.id = ph.hashtag_id;
+    IF TG_OP = 'DELETE' THEN
+        RETURN OLD;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- 承認済み → 却下・承認待ち
+DROP TRIGGER IF EXISTS withdraw_hashtag_trend_on_unapprove ON public.posts;
+CREATE TRIGGER withdraw_hashtag_trend_on_unapprove
+    AFTER UPDATE OF status ON public.posts
+    FOR EACH ROW WHEN (OLD.status = 'approved' AND NEW.status <> 'approved')
+    EXECUTE FUNCTION withdraw_hashtag_trend();
+
+-- 承認済みの投稿の削除（post_hashtags が ON DELETE CASCADE で消える前に差し引く）
+DROP TRIGGER IF EXISTS withdraw_hashtag_trend_on_delete ON public.posts;
+CREATE TRIGGER withdraw_hashtag_trend_on_delete
+    BEFORE DELETE ON public.posts
+    FOR EACH ROW WHEN (OLD.status = 'approved')
+    EXECUTE FUNCTION withdraw_hashtag_trend();
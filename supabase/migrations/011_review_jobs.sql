@@ -0,0 +1,67 @@
+-- 審査結果のジョブを申請の更新と同じトランザクションで登録する（backend/database_schema.sql 向け）
+-- 承認・却下の UPDATE だけが確定してジョブがない状態（アカウントも通知メールもない申請）を残さない。
+-- 承認はアカウント作成と承認メール、却下は却下メールをジョブとして再試行する。
+
+-- ジョブの種類（approval: アカウント作成と承認メール、rejection: 却下メール）
+ALTER TABLE public.provisioning_jobs ADD COLUMN IF NOT EXISTS kind VARCHAR(20) NOT NULL DEFAULT 'approval';
+
+CREATE OR REPLACE FUNCTION public.enqueue_review_job()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO public.provisioning_jobs (application_id, kind)
+    VALUES (NEW.id, CASE WHEN NEW.status = 'approved' THEN 'approval' ELSE 'rejection' END)
+    ON CONFLICT (application_id) DO NOTHING;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS enqueue_review_job_on_review ON public.applications;
+CREATE TRIGGER enqueue_review_job_on_review
+    AFTER UPDATE OF status ON public.applications
+    FOR EACH ROW WHEN (OLD.status = 'pending' AND NEW.status IN ('approved', 'rejected'))
+    EXECUTE FUNCTION public.enqueue_review_job();
+
+-- users と dogs の作成だけを行う（ジョブの完了は承認メールの送信後にバックエンドが記録する）
+CREATE OR REPLACE FUNCTION public.provision_account(p_job_id UUID, p_auth_id UUID)
+RETURNS UUID AS $$
+DECLARE
+    v_application public.applications%ROWTYPE;
+    v_user_id UUID;
+BEGIN
+    SELECT a.* INTO v_application
+    FROM public.provisioning_jobs j JOIN public.applications a ON a.id = j.application_id
+    WHERE j.id = p_job_id
+    FOR UPDATE OF j;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'provisioning job % not found', p_job_id USING ERRCODE = 'P0002';
+    END IF;
+
+    INSERT INTO public.users (auth_id, email, name, phone, address, is_imabari_resident, residence_years, status)
+    VALUES (p_auth_id, v_application.email, v_application.name, v_application.phone, v_application.address,
+            COALESCE(v_application.is_imabari_resident, false), v_application.residence_years, 'active')
+    ON CONFLICT (email) DO NOTHING;
+    SELECT u.id INTO v_user_id FROM public.users u WHERE u.email = v_application.email;
+
+    INSERT INTO public.dogs (user_id, name, breed, weight, gender, birth_date, personality, application_dog_id)
+    SELECT v_user_id, d.name, d.breed, d.weight, d.gender, d.birth_date, d.personality, d.id
+    FROM public.application_dogs d
+    WHERE d.application_id = v_application.id
+    ON CONFLICT (application_dog_id) DO NOTHING;
+
+    UPDATE public.provisioning_jobs
+    SET auth_id = p_auth_id, user_id = v_user_id
+    WHERE id = p_job_id;
+
+    RETURN v_user_id;
+END;
+$$ LANGUAGE plpgsql;
+
+REVOKE EXECUTE ON FUNCTION public.provision_account(UUID, UUID) FROM PUBLIC, anon, authenticated;
+
+-- 承認の UPDATE 後にジョブの登録が失敗していた申請（アカウント未作成）を定期ジョブの対象にする
+INSERT INTO public.provisioning_jobs (application_id, kind)
+SELECT a.id, 'approval'
+FROM public.applications a
+WHERE a.status = 'approved'
+  AND NOT EXISTS (SELECT 1 FROM public.users u WHERE u.email = a.email)
+ON CONFLICT (application_id) DO NOTHING;